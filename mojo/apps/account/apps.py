@@ -10,6 +10,12 @@ class AppConfig(BaseAppConfig):
         from mojo.apps.account.services import system_settings  # noqa: F401
         from mojo.apps.account.services import admin_settings
         admin_settings.register_core_descriptors()
+        # Serializer cache_ttl graphs drop their entries when the rows change.
+        from mojo.serializers.core.cache import signals as serializer_cache_signals
+        serializer_cache_signals.connect()
+        # Cached authenticated principals drop when their rows change.
+        from mojo.apps.account.services import principal_cache
+        principal_cache.connect()
         from mojo.helpers.settings import settings
         if settings.is_app_installed("django.contrib.admin"):
             self.unregister_apps()
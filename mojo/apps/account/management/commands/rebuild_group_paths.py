@@ -0,0 +1,31 @@
+"""
+Django management command to rebuild Group.path, the materialized ancestry.
+
+Group.save() keeps paths current; run this after writes that bypass it
+(QuerySet.update(parent=...), bulk_create) or to verify the index.
+
+Usage:
+    python manage.py rebuild_group_paths
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mojo.apps.account.services import group_hierarchy
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized path of every account Group'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows written per UPDATE batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            changed = group_hierarchy.rebuild_paths(batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {changed} group paths"))
@@ -0,0 +1,48 @@
+"""Add Group.path, the materialized ancestry index, and backfill it.
+
+Groups unreachable from a root (a parent cycle) or deeper than 32 levels are
+left without a path; ancestor lookups keep walking, and failing closed, for
+them exactly as before.
+"""
+from django.db import migrations, models
+
+
+MAX_DEPTH = 32
+
+
+def backfill(apps, schema_editor):
+    Group = apps.get_model("account", "Group")
+    children_of = {}
+    for gid, pid in Group.objects.values_list("id", "parent_id"):
+        children_of.setdefault(pid, []).append(gid)
+
+    batch = []
+    stack = [(gid, "/", 1) for gid in children_of.get(None, [])]
+    while stack:
+        gid, parent_path, depth = stack.pop()
+        if depth > MAX_DEPTH:
+            continue
+        path = f"{parent_path}{gid}/"
+        batch.append(Group(id=gid, path=path))
+        stack.extend((child, path, depth + 1) for child in children_of.get(gid, []))
+        if len(batch) >= 500:
+            Group.objects.bulk_update(batch, ["path"])
+            batch = []
+    if batch:
+        Group.objects.bulk_update(batch, ["path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0052_oauthclient_oauthgrant_oauthcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='path',
+            field=models.CharField(db_index=True, default=None, editable=False, max_length=512, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -688,35 +688,9 @@ class ApiKey(MojoSecrets, MojoModel):
 
         Returns (ApiKeyUser, None) on success or (None, error_string) on failure.
         """
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        try:
-            api_key = cls.objects.select_related("group", "user").get(token_hash=token_hash)
-        except cls.DoesNotExist:
-            return None, "Invalid API key"
-
-        if not api_key.is_active:
-            return None, "API key is inactive"
-
-        if api_key.expires_at and dates.utcnow() > api_key.expires_at:
-            return None, "API key has expired"
-
-        # A linked member who has been deactivated takes their keys with them.
-        # Reuses the EXISTING inactive string rather than a new one — a
-        # distinct message would turn this into an account-state oracle for
-        # anyone holding the token (same reasoning as User.validate_jwt).
-        if api_key.user_id and not api_key.user.is_active:
-            return None, "API key is inactive"
-
-        # Re-assert the superuser bar at AUTH time, not only at link time.
-        # validate_acting_user blocks a superuser target when the link is made,
-        # but a member can be promoted afterwards — and User.has_permission
-        # returns True for everything once is_superuser is set, so a key linked
-        # before the promotion would silently become a superuser key.
-        if api_key.user_id and api_key.user.is_superuser:
-            logit.error(
-                f"api key {api_key.pk} is linked to superuser "
-                f"{api_key.user_id}; refusing to authenticate")
-            return None, "API key is inactive"
+        api_key, group_active, error = cls.resolve_token(token)
+        if error is not None:
+            return None, error
 
         # Group context is granted only for an EFFECTIVELY ACTIVE group — the
         # group AND every ancestor (DM-048). Deactivating a tenant (or any of
@@ -727,9 +701,9 @@ class ApiKey(MojoSecrets, MojoModel):
         # active-only contract. NOT a hard reject: the federation path
         # (requires_global_perms, allow_api_keys) ignores request.group, so
         # rejecting the token would over-suspend legitimate fleet-peer keys.
-        # (The group FK is non-nullable and select_related-loaded above — there
-        # is no null-group key variant to guard for.)
-        request.group = api_key.group if api_key.group.is_effectively_active() else None
+        # (The group FK is non-nullable and select_related-loaded — there is
+        # no null-group key variant to guard for.)
+        request.group = api_key.group if group_active else None
         request.api_key = api_key
 
         # Set in BOTH modes. This is the attribution identity — what lands in
@@ -739,11 +713,6 @@ class ApiKey(MojoSecrets, MojoModel):
         # on (mojo/helpers/request.py is_key_backed_session).
         request.acting_user = api_key.user
 
-        try:
-            cls.objects.filter(pk=api_key.pk).update(last_used=dates.utcnow())
-        except Exception:
-            pass
-
         # NOTE for anyone fixing WebSocket api-key auth: it is dead today —
         # realtime/handler.py calls async_validate_bearer_token with
         # request=None, so the request.group write above raises and is
@@ -762,6 +731,90 @@ class ApiKey(MojoSecrets, MojoModel):
 
         return api_key, None
 
+    @classmethod
+    def resolve_token(cls, token):
+        """
+        Resolve a raw token to (api_key, group_active, error).
+
+        The key comes back with its group and linked user attached. Served
+        from the principal cache when AUTH_PRINCIPAL_CACHE_TTL is set, so a
+        hit costs no queries; last_used is then only written on a cache fill.
+        """
+        from mojo.apps.account.services import principal_cache
+
+        entry = principal_cache.get(token)
+        if entry is not None and entry.get("kind") == "apikey":
+            return cls._restore_principal(entry), entry["group_active"], None
+
+        versions = None
+        if principal_cache.is_enabled():
+            versions = principal_cache.read_versions([
+                principal_cache.version_key(principal_cache.API_KEYS),
+                principal_cache.version_key(principal_cache.GROUPS)])
+
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        try:
+            api_key = cls.objects.select_related("group", "user").get(token_hash=token_hash)
+        except cls.DoesNotExist:
+            return None, False, "Invalid API key"
+
+        if not api_key.is_active:
+            return None, False, "API key is inactive"
+
+        if api_key.expires_at and dates.utcnow() > api_key.expires_at:
+            return None, False, "API key has expired"
+
+        # A linked member who has been deactivated takes their keys with them.
+        # Reuses the EXISTING inactive string rather than a new one — a
+        # distinct message would turn this into an account-state oracle for
+        # anyone holding the token (same reasoning as User.validate_jwt).
+        if api_key.user_id and not api_key.user.is_active:
+            return None, False, "API key is inactive"
+
+        # Re-assert the superuser bar at AUTH time, not only at link time.
+        # validate_acting_user blocks a superuser target when the link is made,
+        # but a member can be promoted afterwards — and User.has_permission
+        # returns True for everything once is_superuser is set, so a key linked
+        # before the promotion would silently become a superuser key.
+        if api_key.user_id and api_key.user.is_superuser:
+            logit.error(
+                f"api key {api_key.pk} is linked to superuser "
+                f"{api_key.user_id}; refusing to authenticate")
+            return None, False, "API key is inactive"
+
+        group_active = api_key.group.is_effectively_active()
+
+        if versions is not None and api_key.user_id:
+            user_versions = principal_cache.read_versions(
+                [principal_cache.version_key(principal_cache.USERS, api_key.user_id)])
+            versions = None if user_versions is None else dict(versions, **user_versions)
+        if versions is not None:
+            principal_cache.put(token, {
+                "kind": "apikey",
+                "api_key": principal_cache.snapshot(api_key),
+                "group": principal_cache.snapshot(api_key.group),
+                "user": principal_cache.snapshot(api_key.user) if api_key.user_id else None,
+                "group_active": group_active,
+            }, versions, expires_at=api_key.expires_at.timestamp() if api_key.expires_at else None)
+
+        try:
+            cls.objects.filter(pk=api_key.pk).update(last_used=dates.utcnow())
+        except Exception:
+            pass
+        return api_key, group_active, None
+
+    @classmethod
+    def _restore_principal(cls, entry):
+        from mojo.apps.account.models.group import Group
+        from mojo.apps.account.models.user import User
+        from mojo.apps.account.services import principal_cache
+
+        api_key = principal_cache.restore(cls, entry["api_key"])
+        api_key.group = principal_cache.restore(Group, entry["group"])
+        if entry["user"] is not None:
+            api_key.user = principal_cache.restore(User, entry["user"])
+        return api_key
+
     def get_token(self):
         """Returns the raw token from encrypted storage."""
         return self.get_secret("token")
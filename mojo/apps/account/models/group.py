@@ -34,6 +34,10 @@ class Group(MojoSecrets, MojoModel):
 
     parent = models.ForeignKey("account.Group", null=True, related_name="groups",
         default=None, on_delete=models.CASCADE)
+    # Materialized ancestry, "/<root id>/.../<own id>/" — maintained by save(),
+    # see services/group_hierarchy.py. Never client-writable.
+    path = models.CharField(max_length=512, null=True, default=None,
+        db_index=True, editable=False)
 
     # Custom domain for white-label auth pages (e.g. auth.operator.com)
     auth_domain = models.CharField(max_length=255, null=True, default=None,
@@ -51,7 +55,7 @@ class Group(MojoSecrets, MojoModel):
         VIEW_PERMS = ["view_groups", "manage_groups", "manage_group", "groups"]
         SAVE_PERMS = ["manage_groups", "manage_group", "groups"]
         PROTECTED_JSON_PERMS = ["admin_compliance", "admin_verify"]
-        NO_SAVE_FIELDS = ["id", "pk", "created"]
+        NO_SAVE_FIELDS = ["id", "pk", "created", "path"]
         POST_SAVE_ACTIONS = ['realtime_message', 'disable', 'reactivate',
                              'revoke_group_tokens']
         GRAPHS = {
@@ -221,14 +225,28 @@ class Group(MojoSecrets, MojoModel):
         return False
 
     def save(self, *args, **kwargs):
-        """Serialize and validate parent changes with the saved row."""
+        """Serialize and validate parent changes with the saved row, and
+        re-point the materialized path of the group and its subtree.
+
+        Also records in `_auth_state_changed` whether is_active or the parent
+        moved, so the principal cache skips touch() and other saves that
+        cannot change an API key's group context."""
         update_fields = kwargs.get("update_fields")
         parent_may_change = update_fields is None or bool(
             {"parent", "parent_id"}.intersection(update_fields))
-        if self.pk is not None and parent_may_change:
-            old_parent_id = type(self).objects.filter(pk=self.pk).values_list(
-                "parent_id", flat=True).first()
-            parent_may_change = old_parent_id != self.parent_id
+        active_may_change = update_fields is None or "is_active" in update_fields
+        self._auth_state_changed = parent_may_change or active_may_change
+        old_path = None
+        if self.pk is not None and self._auth_state_changed:
+            old = type(self).objects.filter(pk=self.pk).values_list(
+                "parent_id", "path", "is_active").first()
+            if old is not None:
+                old_parent_id, old_path, old_active = old
+                self._auth_state_changed = (
+                    (parent_may_change and old_parent_id != self.parent_id)
+                    or (active_may_change and old_active != self.is_active))
+                if parent_may_change:
+                    parent_may_change = old_parent_id != self.parent_id or not old_path
         if not parent_may_change:
             return super().save(*args, **kwargs)
         from mojo.apps.account.services import group_hierarchy
@@ -236,7 +254,9 @@ class Group(MojoSecrets, MojoModel):
             if self.pk is not None:
                 type(self).objects.select_for_update().filter(pk=self.pk).exists()
             group_hierarchy.validate_parent(self, self.parent, lock=True)
-            return super().save(*args, **kwargs)
+            result = super().save(*args, **kwargs)
+            group_hierarchy.reindex(self, old_path)
+            return result
 
     def is_effectively_active(self, max_depth=8):
         """A group counts as active only if it AND every ancestor is active
@@ -363,21 +383,29 @@ class Group(MojoSecrets, MojoModel):
         # covers self and every parent level: a clean chain from self to root
         # means every group the walk below visits is active. is_active=False
         # (admin/introspection) keeps raw behavior.
-        if is_active and not self.is_effectively_active(max_depth=max_depth):
-            return None
         from mojo.apps.account.services import group_hierarchy
         try:
             groups = group_hierarchy.ancestors(
                 self, include_self=True, max_depth=max_depth + 1)
         except merrors.ValueException:
             return None
+        # Same verdict as is_effectively_active(max_depth), from the chain
+        # already loaded.
+        if is_active and not all(item.is_active for item in groups):
+            return None
         if not check_parents:
             groups = groups[:1]
+        # One query for every level; the nearest group wins, and within a
+        # group the newest row (what queryset.last() returned per level).
+        queryset = self.members.model.objects.filter(
+            group_id__in=[item.pk for item in groups], user=user)
+        if is_active:
+            queryset = queryset.filter(is_active=True)
+        newest = {}
+        for member in queryset.order_by("pk"):
+            newest[member.group_id] = member
         for current in groups:
-            queryset = current.members.filter(user=user)
-            if is_active:
-                queryset = queryset.filter(is_active=True)
-            member = queryset.last()
+            member = newest.get(current.pk)
             if member is not None:
                 return member
         return None
@@ -398,9 +426,14 @@ class Group(MojoSecrets, MojoModel):
 
     def _get_all_child_ids(self, collected_ids=None):
         """
-        Recursively collects the IDs of all children.
+        Collects the IDs of all children: one indexed path-prefix query, or
+        a recursive walk for a group whose path is not built yet.
         """
         if collected_ids is None:
+            from mojo.apps.account.services import group_hierarchy
+            child_ids = group_hierarchy.descendant_ids(self)
+            if child_ids is not None:
+                return child_ids
             collected_ids = set()
 
         # Note: self.groups is the related_name from the parent ForeignKey
@@ -1786,6 +1786,27 @@ class User(MojoSecrets, MojoAuthMixin, AbstractBaseUser, MojoModel):
             from mojo.apps.account.services.oauth_server import tokens as oauth_tokens
             return oauth_tokens.validate_access(token, jwt_data, request)
 
+        # Plain access tokens go through the principal cache (a no-op unless
+        # AUTH_PRINCIPAL_CACHE_TTL is set). A hit is a token whose signature
+        # was already verified; entries never outlive its exp.
+        from mojo.apps.account.services import principal_cache
+        versions = None
+        if principal_cache.is_enabled() and jwt_data.get("token_type") == "access":
+            entry = principal_cache.get(token)
+            if entry is not None and entry.get("kind") == "user":
+                user = principal_cache.restore(User, entry["user"])
+                if isinstance(jwt_data.get("allowed_ips"), list):
+                    if request and request.ip not in jwt_data.allowed_ips:
+                        return user, "Not allowed from location"
+                last_activity = user.last_activity
+                user.touch()
+                if user.last_activity != last_activity:
+                    principal_cache.put(token, {"kind": "user", "user": principal_cache.snapshot(user)},
+                                        entry["versions"], expires_at=jwt_data.get("exp"))
+                return user, None
+            versions = principal_cache.read_versions(
+                [principal_cache.version_key(principal_cache.USERS, jwt_data.uid)])
+
         user = User.objects.filter(id=jwt_data.uid).last()
         if user is None:
             return None, "Invalid token user"
@@ -1804,4 +1825,7 @@ class User(MojoSecrets, MojoAuthMixin, AbstractBaseUser, MojoModel):
             if request and request.ip not in jwt_data.allowed_ips:
                 return user, "Not allowed from location"
         user.touch()
+        if versions is not None:
+            principal_cache.put(token, {"kind": "user", "user": principal_cache.snapshot(user)},
+                                versions, expires_at=jwt_data.get("exp"))
         return user, None
@@ -11,6 +11,7 @@ from mojo.apps.account.models.user import User
 from mojo.apps.account.services import extensions as account_extensions
 from mojo.apps.account.services import auth_config
 from mojo.apps.account.services import closure as account_closure
+from mojo.apps.account.services import principal_cache
 from mojo.apps.account.utils import tokens
 from mojo.apps.account.utils.webapp_url import build_token_url
 from mojo.apps.shortlink import maybe_shorten_url
@@ -1546,6 +1547,7 @@ def on_email_change_confirm(request):
         is_email_verified=True,
         auth_key=uuid.uuid4().hex,  # invalidate all other active sessions
     )
+    transaction.on_commit(lambda: principal_cache.invalidate_user(user.pk))
     # Update username too if it mirrored the old email
     if str(user.username).lower() == old_email.lower():
         User.objects.filter(pk=user.pk).update(username=new_email)
@@ -1617,6 +1619,7 @@ def on_email_change_confirm_get(request):
         is_email_verified=True,
         auth_key=uuid.uuid4().hex,
     )
+    transaction.on_commit(lambda: principal_cache.invalidate_user(user.pk))
     if str(user.username).lower() == old_email.lower():
         User.objects.filter(pk=user.pk).update(username=new_email)
 
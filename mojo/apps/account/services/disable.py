@@ -30,6 +30,9 @@ History is FIFO-capped at HISTORY_CAP. Long-term audit lives in incident events
 and `logit.Log`, not on the user record.
 """
 import uuid
+from functools import partial
+
+from django.db import transaction
 
 from mojo.helpers import dates, logit
 from mojo import errors as merrors
@@ -95,9 +98,17 @@ def _write_metadata(entity, new_metadata, *, atomic_with_active=None, extra_upda
     # Atomic flip + metadata write together.
     target_state = bool(atomic_with_active)
     current_state = not target_state
-    return Model.objects.filter(
+    updated = Model.objects.filter(
         pk=entity.pk, is_active=current_state,
     ).update(is_active=target_state, metadata=new_metadata, **(extra_updates or {}))
+    if updated:
+        # QuerySet.update() skips post_save; drop cached principals explicitly.
+        from mojo.apps.account.services import principal_cache
+        if Model.__name__ == "User":
+            transaction.on_commit(partial(principal_cache.invalidate_user, entity.pk))
+        else:
+            transaction.on_commit(principal_cache.invalidate_groups)
+    return updated
 
 
 def disconnect_realtime(entity, request=None):
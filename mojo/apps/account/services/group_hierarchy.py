@@ -1,14 +1,81 @@
-"""Single fail-closed owner for account.Group ancestor traversal."""
+"""Single fail-closed owner for account.Group ancestor traversal.
+
+Every group carries a materialized path, `/<root id>/.../<own id>/`, kept up
+to date by Group.save() whenever the parent changes (the whole subtree is
+rewritten in one UPDATE). Ancestry is then one `pk__in` query and the
+descendant set one indexed prefix query.
+
+The path is an index, never the authority: ancestors() verifies every
+parent_id link of the rows it loads and falls back to the row-at-a-time
+walk if the path is missing or stale. Writes that bypass Group.save()
+(QuerySet.update(parent=...), bulk_create) must be followed by
+rebuild_paths().
+"""
+
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 
 from mojo import errors as merrors
 
 
 MAX_ANCESTOR_DEPTH = 32
+PATH_SEP = "/"
+
+
+def build_path(parent_path, pk):
+    return f"{parent_path or PATH_SEP}{pk}{PATH_SEP}"
+
+
+def path_ids(path):
+    """Root-first ids of a materialized path."""
+    return [int(part) for part in path.strip(PATH_SEP).split(PATH_SEP) if part]
 
 
 def ancestors(group, include_self=False, max_depth=MAX_ANCESTOR_DEPTH,
               lock=False):
     """Return nearest-first ancestors, raising on cycles or excessive depth."""
+    if not lock:
+        chain = _ancestors_from_path(group, include_self, max_depth)
+        if chain is not None:
+            return chain
+    return _walk_ancestors(group, include_self, max_depth, lock)
+
+
+def _ancestors_from_path(group, include_self, max_depth):
+    """One query for the whole chain, or None when the path can't be trusted."""
+    from mojo.apps.account.models.group import Group
+
+    path = getattr(group, "path", None)
+    if not path or group.pk is None:
+        return None
+    try:
+        ids = path_ids(path)[::-1]
+    except ValueError:
+        return None
+    if not ids or ids[0] != group.pk or len(set(ids)) != len(ids):
+        return None
+    wanted = len(ids) if include_self else len(ids) - 1
+    if wanted > int(max_depth):
+        raise merrors.ValueException("Group hierarchy exceeds the supported depth")
+
+    rows = {row.pk: row for row in Group.objects.filter(pk__in=ids[1:])}
+    chain = [group]
+    for index, gid in enumerate(ids):
+        current = chain[-1] if index == 0 else rows.get(gid)
+        if current is None:
+            return None
+        next_id = ids[index + 1] if index + 1 < len(ids) else None
+        if current.parent_id != next_id:
+            return None
+        if index:
+            chain.append(current)
+    # Link the loaded rows so a later .parent does not query again.
+    for child, parent in zip(chain, chain[1:]):
+        Group.parent.field.set_cached_value(child, parent)
+    return chain if include_self else chain[1:]
+
+
+def _walk_ancestors(group, include_self, max_depth, lock):
     from mojo.apps.account.models.group import Group
 
     chain = []
@@ -41,3 +108,72 @@ def validate_parent(group, parent, lock=False):
     chain = ancestors(parent, include_self=True, lock=lock)
     if group.pk is not None and any(item.pk == group.pk for item in chain):
         raise merrors.ValueException("A group cannot be parented beneath its descendant")
+
+
+def descendant_ids(group):
+    """Ids of every group below `group` (not itself), or None without a path."""
+    from mojo.apps.account.models.group import Group
+
+    path = getattr(group, "path", None)
+    if not path or group.pk is None or not path.endswith(f"{PATH_SEP}{group.pk}{PATH_SEP}"):
+        return None
+    return list(Group.objects.filter(path__startswith=path)
+                .exclude(pk=group.pk).values_list("id", flat=True))
+
+
+def reindex(group, old_path):
+    """Point `group` and its whole subtree at the group's current parent.
+
+    Called by Group.save() inside its atomic block, after the row is written
+    and validate_parent() has passed."""
+    from mojo.apps.account.models.group import Group
+
+    parent_path = None
+    if group.parent_id is not None:
+        # Read through the DB: validate_parent(lock=True) holds the parent
+        # chain's rows, and the in-memory parent may predate a move.
+        parent_path = Group.objects.filter(pk=group.parent_id).values_list(
+            "path", flat=True).first() or _path_from_walk(group.parent)
+    new_path = build_path(parent_path, group.pk)
+    if new_path == old_path:
+        group.path = new_path
+        return
+    Group.objects.filter(pk=group.pk).update(path=new_path)
+    if old_path:
+        Group.objects.filter(path__startswith=old_path).exclude(pk=group.pk).update(
+            path=Concat(Value(new_path), Substr("path", len(old_path) + 1)))
+    group.path = new_path
+
+
+def _path_from_walk(group):
+    chain = _walk_ancestors(group, True, MAX_ANCESTOR_DEPTH, False)
+    return PATH_SEP + "".join(f"{item.pk}{PATH_SEP}" for item in reversed(chain))
+
+
+def rebuild_paths(model=None, batch_size=500):
+    """Recompute every group's path from parent_ids. Returns the number of
+    rows changed. Groups in a cycle (or deeper than MAX_ANCESTOR_DEPTH) get
+    no path, so ancestors() keeps walking — and failing closed — for them."""
+    if model is None:
+        from mojo.apps.account.models.group import Group as model
+
+    rows = dict(model.objects.values_list("id", "parent_id"))
+    current = dict(model.objects.values_list("id", "path"))
+    children_of = {}
+    for gid, pid in rows.items():
+        children_of.setdefault(pid, []).append(gid)
+
+    paths = {}
+    stack = [(gid, PATH_SEP, 1) for gid in children_of.get(None, [])]
+    while stack:
+        gid, parent_path, depth = stack.pop()
+        if depth > MAX_ANCESTOR_DEPTH:
+            continue
+        paths[gid] = build_path(parent_path, gid)
+        stack.extend((child, paths[gid], depth + 1) for child in children_of.get(gid, []))
+
+    changed = [gid for gid in rows if current.get(gid) != paths.get(gid)]
+    for start in range(0, len(changed), batch_size):
+        batch = [model(id=gid, path=paths.get(gid)) for gid in changed[start:start + batch_size]]
+        model.objects.bulk_update(batch, ["path"])
+    return len(changed)
@@ -0,0 +1,275 @@
+"""
+Authenticated-principal cache for bearer JWT and API key authentication.
+
+Every authenticated request used to cost 2-4 primary-DB queries before the
+view ran: the User (or ApiKey + group + linked user) row, the group ancestor
+walk for is_effectively_active(), and the activity/last_used write. A
+resolved principal is cached here, keyed by sha256 of the presented token, in
+a process-local LRU in front of a shared Redis entry.
+
+Design:
+  - `AUTH_PRINCIPAL_CACHE_TTL` default 0 => disabled, so upgrades are inert
+    until an operator opts in. Entries never outlive the token itself.
+  - Entries hold row snapshots, not pickles. Credential fields (password,
+    auth_key, mojo_secrets) are never written to Redis; they come back as
+    deferred fields and load from the DB only if a view touches them.
+  - Every hit re-reads the entry's version keys with one MGET, so a bump is
+    seen by every process on the next request — no waiting out the TTL.
+    Versions are bumped after commit by the post_save/post_delete receivers
+    (connected from the account AppConfig) and by invalidate_user() for the
+    QuerySet.update() paths that deactivate a user or rotate its auth_key.
+  - A Group save bumps the shared groups version only when is_active or the
+    parent changed (Group.save compares with the stored row). touch() saves
+    every active group every few minutes and must not flush every cached API
+    key; other group fields in an entry may lag by up to the TTL.
+  - Versions are read BEFORE the rows are loaded, so a bump racing a fill
+    leaves the new entry already stale. The one exception is an API key's
+    linked user, whose id is only known after the key row is read.
+  - Errors are never cached: a rejected token always takes the full path.
+  - Redis failures fail open to the uncached path, never to an auth decision.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_save, post_delete
+
+from mojo.helpers import logit
+from mojo.helpers.settings import settings
+
+AUTH_PRINCIPAL_CACHE_TTL = settings.get_static("AUTH_PRINCIPAL_CACHE_TTL", 0)
+AUTH_PRINCIPAL_CACHE_LOCAL_SIZE = settings.get_static("AUTH_PRINCIPAL_CACHE_LOCAL_SIZE", 10000)
+
+ENTRY_PREFIX = "auth:principal:"
+VERSION_PREFIX = "auth:pver:"
+VERSION_TTL_SECONDS = 7 * 86400
+
+# Never leave the database: a Redis reader must not be able to mint or
+# verify credentials from a cached row.
+PRIVATE_FIELDS = frozenset(("password", "auth_key", "mojo_secrets"))
+
+# Bumped by saves of the model (groups: is_active or parent changes only),
+# read before the row is loaded.
+USERS = "user"
+API_KEYS = "apikeys"
+GROUPS = "groups"
+
+
+def is_enabled():
+    return AUTH_PRINCIPAL_CACHE_TTL > 0
+
+
+def token_key(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def version_key(kind, ident=None):
+    if ident is None:
+        return f"{VERSION_PREFIX}{kind}"
+    return f"{VERSION_PREFIX}{kind}:{ident}"
+
+
+def _redis():
+    from mojo.helpers.redis import get_connection
+    return get_connection()
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def read_versions(keys):
+    """Current values of `keys` as {key: str}, or None when Redis is down."""
+    keys = list(keys)
+    if not keys:
+        return {}
+    try:
+        values = _redis().mget(keys)
+    except Exception as e:
+        logit.warn("auth", f"principal cache version read failed: {e}")
+        return None
+    return {key: _decode(value) or "0" for key, value in zip(keys, values)}
+
+
+def bump(*keys):
+    """Invalidate every entry that recorded any of `keys`."""
+    if not keys:
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+            pipe.expire(key, VERSION_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logit.error(f"principal cache version bump failed for {keys}: {e}")
+
+
+def invalidate_user(pk):
+    """Drop cached principals for user `pk`. Call after a QuerySet.update()
+    that deactivates the user or rotates its auth_key — saves are covered by
+    the post_save receiver."""
+    if is_enabled():
+        bump(version_key(USERS, pk))
+
+
+def invalidate_api_keys():
+    if is_enabled():
+        bump(version_key(API_KEYS))
+
+
+def invalidate_groups():
+    if is_enabled():
+        bump(version_key(GROUPS))
+
+
+# -- row snapshots -----------------------------------------------------------
+
+def snapshot(instance):
+    """The instance's concrete, non-credential field values as a JSON-safe dict."""
+    row = {}
+    for field in instance._meta.concrete_fields:
+        if field.name in PRIVATE_FIELDS:
+            continue
+        row[field.attname] = field.value_from_object(instance)
+    return json.loads(json.dumps(row, cls=DjangoJSONEncoder))
+
+
+def restore(model, row):
+    """A fresh, unsaved-state-free instance from snapshot() output. Fields
+    missing from the row (the private ones) are deferred."""
+    names, values = [], []
+    for field in model._meta.concrete_fields:
+        if field.attname in row:
+            names.append(field.attname)
+            values.append(field.to_python(row[field.attname]))
+    return model.from_db(DEFAULT_DB_ALIAS, names, values)
+
+
+# -- entries -----------------------------------------------------------------
+
+class LocalCache:
+    """Thread-safe LRU of decoded entries, each with its own deadline."""
+
+    def __init__(self, max_size):
+        self.max_size = max(0, int(max_size))
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, entry, expires_at):
+        if not self.max_size:
+            return
+        with self.lock:
+            self.entries[key] = (expires_at, entry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_local = LocalCache(AUTH_PRINCIPAL_CACHE_LOCAL_SIZE)
+
+
+def get(token):
+    """The cached entry for `token` if its versions are still current, else None.
+
+    An entry is a dict: `kind`, `expires_at`, `versions` and the kind's row
+    snapshots (see put)."""
+    if not is_enabled():
+        return None
+    key = token_key(token)
+    entry = _local.get(key)
+    if entry is None:
+        try:
+            raw = _redis().get(ENTRY_PREFIX + key)
+        except Exception as e:
+            logit.warn("auth", f"principal cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            return None
+        _local.set(key, entry, entry["expires_at"])
+    current = read_versions(entry["versions"])
+    if current is None or current != entry["versions"]:
+        return None
+    return entry
+
+
+def put(token, entry, versions, expires_at=None):
+    """Cache `entry` for `token`; `versions` must have been read before the
+    rows in `entry` were loaded."""
+    if not is_enabled() or versions is None:
+        return
+    deadline = time.time() + AUTH_PRINCIPAL_CACHE_TTL
+    if expires_at is not None:
+        deadline = min(deadline, float(expires_at))
+    ttl = int(deadline - time.time())
+    if ttl < 1:
+        return
+    entry = dict(entry, versions=versions, expires_at=deadline)
+    key = token_key(token)
+    try:
+        _redis().set(ENTRY_PREFIX + key, json.dumps(entry, cls=DjangoJSONEncoder), ex=ttl)
+    except Exception as e:
+        logit.warn("auth", f"principal cache write failed: {e}")
+        return
+    _local.set(key, json.loads(json.dumps(entry, cls=DjangoJSONEncoder)), deadline)
+
+
+def clear_local():
+    _local.clear()
+
+
+# -- invalidation receivers --------------------------------------------------
+
+def connect():
+    """Wire the version-bump receivers (idempotent)."""
+    post_save.connect(on_principal_changed, dispatch_uid="mojo_principal_cache_save")
+    post_delete.connect(on_principal_changed, dispatch_uid="mojo_principal_cache_delete")
+
+
+def on_principal_changed(sender, instance, using=None, **kwargs):
+    if not is_enabled() or instance.pk is None:
+        return
+    key = _version_key_for(sender, instance, kwargs.get("signal"))
+    if key is not None:
+        transaction.on_commit(partial(bump, key), using=using)
+
+
+def _version_key_for(model, instance, signal=None):
+    from mojo.apps.account.models import User, Group, ApiKey
+    if issubclass(model, User):
+        return version_key(USERS, instance.pk)
+    if issubclass(model, ApiKey):
+        return version_key(API_KEYS)
+    if issubclass(model, Group):
+        if signal is post_save and not getattr(instance, "_auth_state_changed", True):
+            return None
+        return version_key(GROUPS)
+    return None
@@ -171,7 +171,8 @@ def _tool_query_rate_limits(params, user):
 
 def _collect_rate_limits(redis_connection):
     """Collect a fair, bounded sample of active Redis rate-limit keys."""
-    # rl:* = fixed-window counters, srl:* = sliding-window zsets
+    # rl:* = fixed-window counters plus token_bucket hashes and gcra strings,
+    # srl:* = sliding-window zsets
     # (see mojo/decorators/limits.py)
     get_primaries = getattr(redis_connection, "get_primaries", None)
     primaries = list(get_primaries()) if callable(get_primaries) else []
@@ -247,16 +248,22 @@ def _collect_rate_limits(redis_connection):
             ttl = redis_connection.ttl(key)
             if ttl <= 0:
                 continue
-            if redis_connection.type(key) == "zset":
-                count = redis_connection.zcard(key)
+            key_type = redis_connection.type(key)
+            entry = {"key": key, "ttl_seconds": ttl}
+            if key_type == "zset":
+                entry["count"] = redis_connection.zcard(key)
+            elif key_type == "hash":
+                # token_bucket state: report what is left, not a hit count
+                tokens = redis_connection.hget(key, "tokens")
+                entry["count"] = None
+                entry["tokens_left"] = float(tokens) if tokens else 0.0
+            elif key.endswith(":gcra"):
+                # gcra state is a timestamp; the TTL is the time to a full budget
+                entry["count"] = None
             else:
                 val = redis_connection.get(key)
-                count = int(val) if val else 0
-            keys.append({
-                "key": key,
-                "count": count,
-                "ttl_seconds": ttl,
-            })
+                entry["count"] = int(val) if val else 0
+            keys.append(entry)
 
         if not progressed:
             break
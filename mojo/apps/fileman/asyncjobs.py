@@ -66,17 +66,11 @@ def regenerate_renditions(job):
                        file_id, f.category)
         return "completed:skipped=no-renderer"
 
-    created = []
     if roles:
-        # Delete only the requested roles, then recreate each.
+        # Delete only the requested roles, then recreate them together
+        # (image renderers download and decode the original once).
         FileRendition.objects.filter(original_file=f, role__in=roles).delete()
-        for role in roles:
-            try:
-                r = rndr.create_rendition(role)
-                if r:
-                    created.append(r)
-            except Exception as e:
-                logger.exception("regenerate_renditions: role=%s failed: %s", role, str(e))
+        created = rndr.create_renditions(roles)
     else:
         # Wipe all existing renditions and recreate defaults.
         rndr.cleanup_renditions()
@@ -11,8 +11,10 @@ from datetime import datetime
 import os
 from mojo.apps.fileman import utils
 from mojo.apps.fileman.models import FileManager
+from mojo.apps.fileman.services import urls as file_urls
 from mojo import errors as me
 from mojo.helpers import logit
+from mojo.serializers.core.plan import get_graph_plan
 
 logger = logit.get_logger("fileman", "fileman.log")
 
@@ -89,6 +91,9 @@ def _get_or_create_shortlink_url(file=None, rendition=None):
     # Happy path: cached code + active shortlink row → compose and return.
     code = getattr(owner, "shortlink_code", None)
     if code:
+        batch = getattr(owner, "_url_batch", None)
+        if batch is not None and code in batch.active_codes:
+            return batch.short_url(code)
         link = ShortLink.objects.filter(code=code, is_active=True).first()
         if link is not None:
             return _compose_short_url(code)
@@ -614,25 +619,25 @@ class File(models.Model, MojoModel):
         return None
 
     def get_rendition_by_role(self, role):
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("file_renditions")
+        if prefetched is not None:
+            # Loaded for the whole page by on_rest_prepare_rows.
+            return min((r for r in prefetched if r.role == role), key=lambda r: r.pk, default=None)
         return self.file_renditions.filter(role=role).first()
 
+    @classmethod
+    def on_rest_prepare_rows(cls, rows, graph):
+        extras = {name for name, _ in get_graph_plan(cls, graph).extras}
+        if extras & {"url", "thumbnail", "renditions"}:
+            file_urls.prime_files(rows, renditions=bool(extras & {"thumbnail", "renditions"}))
+
     def get_direct_download_url(self):
         """Return the raw backend URL (presigned for private, public for public),
         bypassing any shortlink wrapping. Used by the shortlink resolver and
-        as the fallback when shortlinks are disabled.
+        as the fallback when shortlinks are disabled. Presigned URLs come from
+        the short-lived cache in services/urls.py.
         """
-        effective_public = self.file_manager.ensure_public_access_audited(
-            file_path=self.storage_file_path,
-        )
-        if effective_public:
-            if not self.download_url:
-                self.download_url = self.file_manager.backend.get_url(self.storage_file_path)
-            return self.download_url
-        # Private — regenerate a fresh presigned URL every call.
-        return self.file_manager.backend.get_url(
-            self.storage_file_path,
-            self.file_manager.get_setting("urls_expire_in", 3600),
-        )
+        return file_urls.direct_url(self, self.storage_file_path)
 
     def generate_download_url(self):
         """Return the URL clients should use.
@@ -642,7 +647,7 @@ class File(models.Model, MojoModel):
         by a tier-1 ShortLink row tied to this file. Otherwise returns the
         raw backend URL (identical to pre-shortlink behavior).
         """
-        if not _shortlinks_enabled(self.file_manager):
+        if not file_urls.shortlinks_enabled(self):
             return self.get_direct_download_url()
         return _get_or_create_shortlink_url(self, rendition=None)
 
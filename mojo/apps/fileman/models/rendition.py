@@ -7,6 +7,8 @@ from datetime import datetime
 import os
 from mojo.apps.fileman import utils
 from mojo.apps.fileman.models import FileManager
+from mojo.apps.fileman.services import urls as file_urls
+from mojo.serializers.core.plan import get_graph_plan
 from typing import Text
 
 
@@ -134,21 +136,16 @@ class FileRendition(models.Model, MojoModel):
     def url(self):
         return self.generate_download_url()
 
+    @classmethod
+    def on_rest_prepare_rows(cls, rows, graph):
+        if any(name == "url" for name, _ in get_graph_plan(cls, graph).extras):
+            file_urls.prime_renditions(rows)
+
     def get_direct_download_url(self):
         """Return the raw backend URL, bypassing any shortlink wrapping.
         Used by the shortlink resolver and as the fallback when shortlinks are disabled.
         """
-        effective_public = self.file_manager.ensure_public_access_audited(
-            file_path=self.storage_path,
-        )
-        if effective_public:
-            if not self.download_url:
-                self.download_url = self.file_manager.backend.get_url(self.storage_path)
-            return self.download_url
-        return self.file_manager.backend.get_url(
-            self.storage_path,
-            self.file_manager.get_setting("urls_expire_in", 3600),
-        )
+        return file_urls.direct_url(self, self.storage_path)
 
     def generate_download_url(self):
         """Return the URL clients should use.
@@ -157,11 +154,8 @@ class FileRendition(models.Model, MojoModel):
         manager has `use_shortlinks` enabled. Falls back to the raw backend
         URL in all other cases.
         """
-        from mojo.apps.fileman.models.file import (
-            _shortlinks_enabled,
-            _get_or_create_shortlink_url,
-        )
-        if not _shortlinks_enabled(self.file_manager):
+        from mojo.apps.fileman.models.file import _get_or_create_shortlink_url
+        if not file_urls.shortlinks_enabled(self):
             return self.get_direct_download_url()
         return _get_or_create_shortlink_url(rendition=self)
 
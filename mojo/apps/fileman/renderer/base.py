@@ -123,6 +123,32 @@ class BaseRenderer(ABC):
         
         return None
     
+    def create_renditions(self, roles: List[str], options: Dict = None) -> List[FileRendition]:
+        """
+        Create renditions for several roles
+
+        Renderers that can share work across roles (one download, one decode)
+        override this; the default creates each role on its own.
+
+        Args:
+            roles: The roles to create
+            options: Additional options applied to every role
+
+        Returns:
+            List[FileRendition]: The created renditions
+        """
+        results = []
+        for role in roles:
+            try:
+                rendition = self.create_rendition(role, options)
+            except Exception as e:
+                logger.exception(f"create_renditions: role={role} failed: {str(e)}")
+                continue
+            if rendition:
+                self.renditions[role] = rendition
+                results.append(rendition)
+        return results
+
     def create_all_renditions(self) -> List[FileRendition]:
         """
         Create all default renditions for this file
@@ -1,11 +1,9 @@
 import os
-import io
-from typing import Dict, Optional, Tuple, Union, BinaryIO
-from PIL import Image, ImageOps
-import mimetypes
+from typing import Dict, List, Optional, Tuple, Union
 
 from mojo.apps.fileman.models import File, FileRendition
 from mojo.apps.fileman.renderer.base import BaseRenderer, RenditionRole
+from mojo.apps.fileman.renderer import pipeline
 from mojo.helpers import logit
 
 logger = logit.get_logger(__name__, "fileman.log")
@@ -95,81 +93,101 @@ class ImageRenderer(BaseRenderer):
         # Default to JPEG
         return self.default_format, '.jpg'
 
-    def _process_image(self, source_path: str, width: int, height: int,
-                      mode: str = 'contain', options: Dict = None) -> Tuple[BinaryIO, str, str]:
+    def _rendition_spec(self, source_path: str, role: str, options: Dict = None) -> pipeline.RenditionSpec:
+        """Resolve the role's defaults plus `options` into a RenditionSpec"""
+        settings = dict(self.default_renditions.get(role, {}))
+        if options:
+            settings.update(options)
+        format_name, extension = self._get_output_format(source_path, settings)
+        return pipeline.RenditionSpec(
+            role=role,
+            width=settings.get('width', 150),
+            height=settings.get('height', 150),
+            mode=settings.get('mode', 'contain'),
+            format=format_name,
+            extension=extension,
+            quality=settings.get('quality', self.default_quality),
+        )
+
+    def _rendition_paths(self, role: str, extension: str) -> Tuple[str, str]:
+        """Return (filename, storage_path) for a role's rendition"""
+        name, _ = os.path.splitext(self.file.storage_filename)
+        filename = f"{name}_renditions/{role}{extension}"
+        storage_path = os.path.join(
+            os.path.dirname(self.file.storage_file_path),
+            filename
+        )
+        return filename, storage_path
+
+    def create_renditions(self, roles: List[str], options: Dict = None) -> List[FileRendition]:
         """
-        Process image to create a rendition
+        Create renditions for several roles from one download and one decode
+
+        The original is downloaded once, every role is rendered by
+        `pipeline.render_images` (on the rendition process pool) and the
+        results are uploaded concurrently. A role that fails to render or
+        upload is logged and skipped; the others are still created.
 
         Args:
-            source_path: Path to the source image
-            width: Target width
-            height: Target height
-            mode: Resize mode ('contain', 'crop', 'stretch')
-            options: Additional processing options
+            roles: The roles to create
+            options: Additional options applied to every role
 
         Returns:
-            Tuple[BinaryIO, str, str]: (Image data, format, mime type)
+            List[FileRendition]: The created renditions, in role order
         """
-        options = options or {}
-        quality = options.get('quality', self.default_quality)
+        roles = list(dict.fromkeys(roles))
+        if not roles:
+            return []
 
-        # Formats that natively support alpha/transparency
-        ALPHA_SUPPORTING_FORMATS = {'PNG', 'WEBP', 'GIF'}
+        source_path = self._download_original()
+        if not source_path:
+            return []
 
         try:
-            # Open the image
-            with Image.open(source_path, formats=["JPEG", "PNG", "WEBP", "GIF", "BMP", "TIFF"]) as img:
-                # Determine output format early so we know whether alpha is supported
-                format_name, extension = self._get_output_format(source_path, options)
-
-                # Handle transparency based on output format
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    # Normalise palette images that may carry transparency
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-
-                    if format_name in ALPHA_SUPPORTING_FORMATS:
-                        # Keep alpha — output format supports it
-                        if img.mode == 'LA':
-                            img = img.convert('RGBA')
-                    else:
-                        # Composite onto a white background instead of letting
-                        # Pillow map alpha=0 → black during RGB conversion
-                        if img.mode == 'LA':
-                            img = img.convert('RGBA')
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        background.paste(img, mask=img.split()[3])  # alpha channel as mask
-                        img = background
-
-                elif img.mode != 'RGB':
-                    # Convert any other exotic modes (e.g. CMYK, L) to RGB
-                    img = img.convert('RGB')
-
-                # Process based on mode
-                if mode == 'crop':
-                    # Square crop (centered)
-                    img = ImageOps.fit(img, (width, height), Image.Resampling.LANCZOS)
-                elif mode == 'contain':
-                    # Resize to fit within dimensions while maintaining aspect ratio
-                    img.thumbnail((width, height), Image.Resampling.LANCZOS)
-                elif mode == 'stretch':
-                    # Stretch to fill dimensions
-                    img = img.resize((width, height), Image.Resampling.LANCZOS)
-
-                # Save to buffer
-                buffer = io.BytesIO()
-                if format_name == 'JPEG':
-                    img.save(buffer, format=format_name, quality=quality, optimize=True)
-                else:
-                    img.save(buffer, format=format_name)
-
-                buffer.seek(0)
-                mime_type = mimetypes.guess_type(f"file{extension}")[0]
-
-                return buffer, extension, mime_type
+            specs = [self._rendition_spec(source_path, role, options) for role in roles]
+            rendered = pipeline.render_images(source_path, specs)
         except Exception as e:
             logger.error(f"Image processing error: {str(e)}")
-            raise
+            return []
+        finally:
+            # Clean up temporary file
+            if os.path.exists(source_path):
+                os.unlink(source_path)
+
+        pending = []
+        for result in rendered:
+            if result.data is None:
+                logger.error(f"Failed to create image rendition '{result.role}': {result.error}")
+                continue
+            filename, storage_path = self._rendition_paths(result.role, result.extension)
+            pending.append((result, filename, storage_path))
+
+        backend = self.file.file_manager.backend
+        errors = pipeline.upload_all(backend, [
+            (storage_path, result.data, result.content_type)
+            for result, _, storage_path in pending
+        ])
+
+        created = []
+        for (result, filename, storage_path), error in zip(pending, errors):
+            if error is not None:
+                logger.error(f"Failed to create image rendition '{result.role}': {str(error)}")
+                continue
+            try:
+                rendition = self._create_rendition_object(
+                    role=result.role,
+                    filename=filename,
+                    storage_path=storage_path,
+                    content_type=result.content_type,
+                    category='image',
+                    file_size=len(result.data)
+                )
+            except Exception as e:
+                logger.error(f"Failed to create image rendition '{result.role}': {str(e)}")
+                continue
+            self.renditions[result.role] = rendition
+            created.append(rendition)
+        return created
 
     def create_rendition(self, role: str, options: Dict = None) -> Optional[FileRendition]:
         """
@@ -182,63 +200,17 @@ class ImageRenderer(BaseRenderer):
         Returns:
             FileRendition: The created rendition, or None if creation failed
         """
-        try:
-            # Get rendition settings
-            settings = self.default_renditions.get(role, {})
-            if options:
-                settings.update(options)
-
-            # Default dimensions and mode
-            width = settings.get('width', 150)
-            height = settings.get('height', 150)
-            mode = settings.get('mode', 'contain')
-
-            # Download the original file
-            source_path = self._download_original()
-            if not source_path:
-                return None
-
-            try:
-                # Process the image
-                buffer, extension, mime_type = self._process_image(
-                    source_path, width, height, mode, settings
-                )
-
-                # Generate output filename
-                name, _ = os.path.splitext(self.file.storage_filename)
-                filename = f"{name}_renditions/{role}{extension}"
+        created = self.create_renditions([role], options)
+        return created[0] if created else None
 
-                # Save to storage
-                file_manager = self.file.file_manager
-                backend = file_manager.backend
-                storage_path = os.path.join(
-                    os.path.dirname(self.file.storage_file_path),
-                    filename
-                )
-
-                # Upload to storage
-                # print(storage_path)
-                backend.save(buffer, storage_path, mime_type)
-
-                # Get file size
-                file_size = buffer.getbuffer().nbytes
-
-                # Create rendition record
-                rendition = self._create_rendition_object(
-                    role=role,
-                    filename=filename,
-                    storage_path=storage_path,
-                    content_type=mime_type,
-                    category='image',
-                    file_size=file_size
-                )
-
-                return rendition
-            finally:
-                # Clean up temporary file
-                if os.path.exists(source_path):
-                    os.unlink(source_path)
+    def create_all_renditions(self) -> List[FileRendition]:
+        """
+        Create all missing default renditions in one pass
 
-        except Exception as e:
-            logger.error(f"Failed to create image rendition '{role}': {str(e)}")
-            return None
+        Returns:
+            List[FileRendition]: Existing and newly created default renditions
+        """
+        missing = [role for role in self.default_renditions if role not in self.renditions]
+        if missing:
+            self.create_renditions(missing)
+        return [self.renditions[role] for role in self.default_renditions if role in self.renditions]
@@ -0,0 +1,242 @@
+"""
+Single-decode image rendition pipeline.
+
+ImageRenderer used to download and decode the original once per role, so an
+upload with five default roles was fetched and decoded five times. render()
+instead opens the source once and derives every role from it:
+
+  1. JPEG sources are opened with ``Image.draft()`` at the largest size any
+     role needs (times REDUCING_GAP), so libjpeg decodes at 1/2, 1/4 or 1/8
+     scale instead of full resolution. Other formats ignore draft().
+  2. The decoded image is normalized once (palette/LA to RGBA, other exotic
+     modes to RGB). Alpha is flattened onto white per output, and only for
+     formats that cannot carry it.
+  3. Roles are rendered largest first from a working copy that is
+     box-reduced (``Image.reduce``) to REDUCING_GAP times the next role's
+     size, so each resample starts from the smallest image that still
+     preserves quality rather than from the full-size original.
+
+render() touches only the source path and Pillow, so render_images() runs it
+in a process pool of FILEMAN_RENDITION_PROCESSES workers (default: one per
+core) and concurrent rendition jobs in one engine use every core. The pool
+uses the ``spawn`` start method — forking a jobs worker would copy its open DB
+sockets and held locks into the child — and each child runs django.setup()
+once, because importing this module imports the fileman app. 0 renders in the
+calling thread. A broken pool is discarded and the batch is rendered inline.
+
+upload_all() then writes the encoded renditions to the storage backend
+concurrently on FILEMAN_RENDITION_UPLOAD_THREADS threads.
+"""
+import io
+import math
+import mimetypes
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+from mojo.helpers import logit
+from mojo.helpers.settings import settings
+
+logger = logit.get_logger(__name__, "fileman.log")
+
+FILEMAN_RENDITION_PROCESSES = settings.get_static("FILEMAN_RENDITION_PROCESSES", os.cpu_count() or 1)
+FILEMAN_RENDITION_UPLOAD_THREADS = settings.get_static("FILEMAN_RENDITION_UPLOAD_THREADS", 4)
+
+SOURCE_FORMATS = ["JPEG", "PNG", "WEBP", "GIF", "BMP", "TIFF"]
+# Formats that natively support alpha/transparency
+ALPHA_FORMATS = {"PNG", "WEBP", "GIF"}
+# Same margin Image.thumbnail() keeps between a reduced image and its target.
+REDUCING_GAP = 2.0
+
+# One role to render: mode is 'contain', 'crop' or 'stretch'.
+RenditionSpec = namedtuple("RenditionSpec", ["role", "width", "height", "mode",
+                                             "format", "extension", "quality"])
+# data is the encoded bytes, or None with `error` set when the role failed.
+RenderedImage = namedtuple("RenderedImage", ["role", "data", "extension",
+                                             "content_type", "error"])
+
+
+def render(source_path, specs):
+    """Decode `source_path` once and encode every spec from it.
+
+    Returns one RenderedImage per spec, in spec order. A failure to open or
+    decode the source raises; a failure in one role is reported on that
+    role's RenderedImage and the other roles still render."""
+    with Image.open(source_path, formats=SOURCE_FORMATS) as img:
+        img.draft(None, _draft_size(specs))
+        source = _normalize(img)
+
+    results = {}
+    working = source
+    for spec in sorted(specs, key=lambda spec: _scale(source.size, spec), reverse=True):
+        try:
+            working = _reduce_for(working, source.size, spec)
+            results[spec.role] = _encode(_resize(working, source.size, spec), spec)
+        except Exception as e:
+            results[spec.role] = RenderedImage(spec.role, None, spec.extension, None, str(e))
+    return [results[spec.role] for spec in specs]
+
+
+def _draft_size(specs):
+    width = max(spec.width for spec in specs)
+    height = max(spec.height for spec in specs)
+    return (int(width * REDUCING_GAP), int(height * REDUCING_GAP))
+
+
+def _normalize(img):
+    if img.mode in ("P", "LA"):
+        return img.convert("RGBA")
+    if img.mode not in ("RGB", "RGBA"):
+        # Any other exotic mode (e.g. CMYK, L, I;16)
+        return img.convert("RGB")
+    img.load()
+    return img
+
+
+def _scale(size, spec):
+    """Scale from `size` to the spec's output: fit inside for 'contain'
+    (never upscaling, like Image.thumbnail), cover for 'crop' / 'stretch'."""
+    sx, sy = spec.width / size[0], spec.height / size[1]
+    if spec.mode == "contain":
+        return min(sx, sy, 1.0)
+    return max(sx, sy)
+
+
+def _reduce_for(working, source_size, spec):
+    """Box-reduce `working` while it stays REDUCING_GAP times above the spec."""
+    needed = source_size[0] * _scale(source_size, spec) * REDUCING_GAP
+    factor = int(working.size[0] / needed) if needed else 1
+    if factor < 2:
+        return working
+    return working.reduce(factor)
+
+
+def _contain_size(source_size, width, height):
+    """Image.thumbnail()'s output size for `source_size`, or None when the
+    source already fits. Computed from the source, not the reduced working
+    copy, whose rounded dimensions would shift the aspect by a pixel."""
+    if width >= source_size[0] and height >= source_size[1]:
+        return None
+    aspect = source_size[0] / source_size[1]
+
+    def round_aspect(number, key):
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+    if width / height >= aspect:
+        width = round_aspect(height * aspect, key=lambda n: abs(aspect - n / height))
+    else:
+        height = round_aspect(width / aspect,
+                              key=lambda n: 0 if n == 0 else abs(aspect - width / n))
+    return width, height
+
+
+def _resize(img, source_size, spec):
+    if spec.mode == "crop":
+        # Square crop (centered)
+        return ImageOps.fit(img, (spec.width, spec.height), Image.Resampling.LANCZOS)
+    if spec.mode == "stretch":
+        return img.resize((spec.width, spec.height), Image.Resampling.LANCZOS)
+    # contain: fit within the box, keeping the aspect ratio, never upscaling
+    size = _contain_size(source_size, spec.width, spec.height)
+    if size is None:
+        return img
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+
+
+def _encode(img, spec):
+    if img.mode == "RGBA" and spec.format not in ALPHA_FORMATS:
+        # Composite onto a white background instead of letting Pillow map
+        # alpha=0 to black during RGB conversion
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    buffer = io.BytesIO()
+    if spec.format == "JPEG":
+        img.save(buffer, format=spec.format, quality=spec.quality, optimize=True)
+    else:
+        img.save(buffer, format=spec.format)
+    content_type = mimetypes.guess_type(f"file{spec.extension}")[0]
+    return RenderedImage(spec.role, buffer.getvalue(), spec.extension, content_type, None)
+
+
+# -- process pool ------------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    workers = int(FILEMAN_RENDITION_PROCESSES or 0)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            import django
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    """Stop the worker processes (they are started again on next use)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def render_images(source_path, specs):
+    """render() on the process pool, or inline when the pool is off or broken."""
+    specs = list(specs)
+    if not specs:
+        return []
+    pool = _get_pool()
+    if pool is None:
+        return render(source_path, specs)
+    try:
+        return pool.submit(render, source_path, specs).result()
+    except BrokenProcessPool as e:
+        logger.warning(f"rendition process pool failed, rendering inline: {e}")
+        _discard_pool(pool)
+        return render(source_path, specs)
+
+
+# -- uploads -----------------------------------------------------------------
+
+def upload_all(backend, items):
+    """Save every `(storage_path, data, content_type)` concurrently.
+
+    Returns one exception (or None on success) per item, in item order."""
+    items = list(items)
+
+    def save(item):
+        storage_path, data, content_type = item
+        try:
+            backend.save(io.BytesIO(data), storage_path, content_type)
+            return None
+        except Exception as e:
+            return e
+
+    threads = min(len(items), max(1, int(FILEMAN_RENDITION_UPLOAD_THREADS or 1)))
+    if threads <= 1:
+        return [save(item) for item in items]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(save, items))
@@ -93,7 +93,7 @@ class VectorRenderer(ImageRenderer):
             logger.error("svg rasterization failed for file %s: %s",
                          self.file.id, str(e)[:200])
         finally:
-            # create_rendition only unlinks the path this method RETURNS, so the
+            # create_renditions only unlinks the path this method RETURNS, so the
             # intermediate .svg download is ours to clean up.
             if svg_path and os.path.exists(svg_path):
                 try:
@@ -105,9 +105,9 @@ class VectorRenderer(ImageRenderer):
         """Return a path to the rasterized PNG, or None.
 
         Overrides the parent's plain download so that everything downstream —
-        `_process_image`, `_get_output_format`, `create_rendition` — sees an
-        ordinary PNG. Returning None makes the inherited `create_rendition`
-        return None too: no rendition row, no exception out of the job, which is
+        `_get_output_format`, the render pipeline, `create_renditions` — sees an
+        ordinary PNG. Returning None makes the inherited `create_renditions`
+        create nothing: no rendition row, no exception out of the job, which is
         exactly how a file with no usable renderer behaved before this existed.
         """
         self._rasterize_once()
@@ -118,8 +118,8 @@ class VectorRenderer(ImageRenderer):
         if self._raster_state != "ok" or not self._raster_png:
             return None
 
-        # A fresh file per call: the inherited create_rendition unlinks the path
-        # it is given, and it is called once per role.
+        # A fresh file per call: the inherited create_renditions unlinks the
+        # path it is given, and a regenerate may call it more than once.
         png_path = self.get_temp_path(".png")
         try:
             with open(png_path, "wb") as fh:
@@ -0,0 +1,202 @@
+"""
+Page-scoped URL resolution for File and FileRendition rows.
+
+List graphs read `url`, `thumbnail` and `renditions` for every row. A row at
+a time that costs, per file: a FileManager instance of its own (secrets
+decrypted, parent chain walked and storage client built again), the
+public-access check, a thumbnail query, a ShortLink lookup and settings reads.
+File/FileRendition.on_rest_prepare_rows hand the page to prime_files() /
+prime_renditions(), which do that work once:
+
+  - rows that point at the same FileManager share one instance, so its
+    backend, secrets and audit state are resolved once per manager;
+  - renditions for the whole page load in one query;
+  - the effective public/private answer is memoized per manager and storage
+    prefix, and the shortlink toggle per manager;
+  - active ShortLink codes for the page load in one query.
+
+signed_url() caches presigned URLs in-process, keyed by manager, path, expiry
+and a FILEMAN_SIGNED_URL_CACHE_SECONDS time bucket. A URL is only reused
+inside its bucket, so it always has at least expires_in minus the bucket width
+left to live. Expiries shorter than two buckets are signed every call, and
+0 disables the cache.
+"""
+import threading
+import time
+
+from django.db.models import prefetch_related_objects
+
+from mojo.helpers.settings import settings
+
+FILEMAN_SIGNED_URL_CACHE_SECONDS = settings.get_static("FILEMAN_SIGNED_URL_CACHE_SECONDS", 300)
+FILEMAN_SIGNED_URL_CACHE_SIZE = settings.get_static("FILEMAN_SIGNED_URL_CACHE_SIZE", 20000)
+
+_signed_bucket = None
+_signed_urls = {}
+_signed_lock = threading.Lock()
+
+
+def signed_url(manager, path, expires_in):
+    """Presigned URL for `path`, shared by every caller in the current bucket."""
+    global _signed_bucket, _signed_urls
+    width = int(FILEMAN_SIGNED_URL_CACHE_SECONDS or 0)
+    expires_in = int(expires_in)
+    if width <= 0 or expires_in < 2 * width or manager.pk is None:
+        return manager.backend.get_url(path, expires_in)
+    bucket = int(time.time()) // width
+    # modified moves on every save, so edited credentials or buckets never
+    # serve a URL signed under the old configuration.
+    key = (manager.pk, manager.modified, path, expires_in)
+    with _signed_lock:
+        if _signed_bucket != bucket:
+            _signed_bucket, _signed_urls = bucket, {}
+        url = _signed_urls.get(key)
+    if url is None:
+        url = manager.backend.get_url(path, expires_in)
+        with _signed_lock:
+            if _signed_bucket == bucket and len(_signed_urls) < FILEMAN_SIGNED_URL_CACHE_SIZE:
+                _signed_urls[key] = url
+    return url
+
+
+def clear_signed_urls():
+    global _signed_bucket, _signed_urls
+    with _signed_lock:
+        _signed_bucket, _signed_urls = None, {}
+
+
+class UrlBatch:
+    """State shared by the rows of one serialized page."""
+
+    def __init__(self):
+        self.managers = {}
+        self.public = {}
+        self.shortlinks = {}
+        self.active_codes = set()
+        self.base_url = None
+
+    def share(self, manager):
+        """The page's single instance of `manager`."""
+        if manager is None or manager.pk is None:
+            return manager
+        return self.managers.setdefault(manager.pk, manager)
+
+    def is_public(self, manager, path):
+        key = (manager.pk, manager.root_path)
+        if key not in self.public:
+            self.public[key] = manager.ensure_public_access_audited(file_path=path)
+        return self.public[key]
+
+    def shortlinks_enabled(self, manager):
+        from mojo.apps.fileman.models.file import _shortlinks_enabled
+        key = getattr(manager, "pk", None)
+        if key not in self.shortlinks:
+            self.shortlinks[key] = _shortlinks_enabled(manager)
+        return self.shortlinks[key]
+
+    def short_url(self, code):
+        from mojo.apps.fileman.models.file import _shortlink_base_url
+        if self.base_url is None:
+            self.base_url = _shortlink_base_url()
+        return f"{self.base_url}/s/{code}"
+
+
+def direct_url(owner, path):
+    """Raw backend URL for a File or FileRendition stored at `path`: the
+    persistent URL for a public manager, a presigned one for a private one."""
+    manager = owner.file_manager
+    batch = getattr(owner, "_url_batch", None)
+    if batch is not None:
+        effective_public = batch.is_public(manager, path)
+    else:
+        effective_public = manager.ensure_public_access_audited(file_path=path)
+    if effective_public:
+        if not owner.download_url:
+            owner.download_url = manager.backend.get_url(path)
+        return owner.download_url
+    return signed_url(manager, path, manager.get_setting("urls_expire_in", 3600))
+
+
+def shortlinks_enabled(owner):
+    from mojo.apps.fileman.models.file import _shortlinks_enabled
+    batch = getattr(owner, "_url_batch", None)
+    if batch is not None:
+        return batch.shortlinks_enabled(owner.file_manager)
+    return _shortlinks_enabled(owner.file_manager)
+
+
+def prime_files(files, renditions=True):
+    """Prime a page of File rows (see module docstring). Returns the UrlBatch,
+    or None when there is nothing to prime."""
+    from mojo.apps.fileman.models import File, FileManager
+
+    files = [file for file in files if file.pk is not None and file.file_manager_id is not None]
+    if not files:
+        return None
+    batch = UrlBatch()
+    _share_managers(batch, files, File.file_manager.field, FileManager)
+    owners = list(files)
+    if renditions:
+        unloaded = [file for file in files
+                    if "file_renditions" not in getattr(file, "_prefetched_objects_cache", {})]
+        if unloaded:
+            prefetch_related_objects(unloaded, "file_renditions")
+        for file in files:
+            # The prefetch points each rendition's original_file at `file`,
+            # and with it at the shared manager.
+            owners.extend(file.file_renditions.all())
+    _attach(batch, owners)
+    return batch
+
+
+def prime_renditions(renditions):
+    """Prime a page of FileRendition rows; returns the UrlBatch or None."""
+    from mojo.apps.fileman.models import File, FileManager, FileRendition
+
+    renditions = [rendition for rendition in renditions if rendition.pk is not None]
+    if not renditions:
+        return None
+    parent_field = FileRendition.original_file.field
+    unloaded = [rendition for rendition in renditions if not parent_field.is_cached(rendition)]
+    if unloaded:
+        prefetch_related_objects(unloaded, "original_file")
+    files = {}
+    for rendition in renditions:
+        file = parent_field.get_cached_value(rendition)
+        if file is not None and file.file_manager_id is not None:
+            files[id(file)] = file
+    batch = UrlBatch()
+    _share_managers(batch, list(files.values()), File.file_manager.field, FileManager)
+    _attach(batch, renditions)
+    return batch
+
+
+def _share_managers(batch, files, manager_field, manager_model):
+    missing = set()
+    for file in files:
+        if manager_field.is_cached(file):
+            manager = manager_field.get_cached_value(file)
+            if manager is not None:
+                manager_field.set_cached_value(file, batch.share(manager))
+        else:
+            missing.add(file.file_manager_id)
+    missing.difference_update(batch.managers)
+    if missing:
+        for manager in manager_model.objects.filter(pk__in=missing):
+            batch.share(manager)
+    for file in files:
+        if not manager_field.is_cached(file) and file.file_manager_id in batch.managers:
+            manager_field.set_cached_value(file, batch.managers[file.file_manager_id])
+
+
+def _attach(batch, owners):
+    codes = set()
+    for owner in owners:
+        owner._url_batch = batch
+        code = getattr(owner, "shortlink_code", None)
+        if code and batch.shortlinks_enabled(owner.file_manager):
+            codes.add(code)
+    if codes:
+        from mojo.apps.shortlink.models import ShortLink
+        batch.active_codes = set(ShortLink.objects.filter(
+            code__in=codes, is_active=True).values_list("code", flat=True))
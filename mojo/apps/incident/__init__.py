@@ -1,6 +1,8 @@
 from .reporter import (
     record_event,
+    record_events,
     report_event,
+    report_events,
     report_event_suppressed,
     notice_key,
     budget_key,
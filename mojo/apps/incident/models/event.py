@@ -267,23 +267,54 @@ class Event(models.Model, MojoModel):
 
     def publish(self, use_catchall=True, dispatch_handlers=True,
                 allow_default_llm=True, exact_category=False):
-        from mojo.apps.incident.models import RuleSet
         # Record metrics and find the RuleSet by category
         self.record_event_metrics()
+        rule_set = self.match_rule_set(use_catchall=use_catchall, exact_category=exact_category)
+        return self.publish_matched(rule_set, dispatch_handlers=dispatch_handlers,
+                                    allow_default_llm=allow_default_llm,
+                                    exact_category=exact_category)
+
+    def match_rule_set(self, use_catchall=True, exact_category=False, lookup=None):
+        """
+        Return the RuleSet this event matches: scope, then category, then "*".
+
+        `lookup(category, event)` defaults to RuleSet.check_by_category; the
+        batch publisher passes one bound to matchers it resolved once.
+        """
+        if lookup is None:
+            from mojo.apps.incident.models import RuleSet
+            lookup = RuleSet.check_by_category
         # Trusted receivers may request an exact, server-owned policy lookup.
         # In that mode neither a broad scope rule nor the global catch-all may
         # turn attacker-controlled evidence into an action.
         if exact_category:
-            rule_set = RuleSet.check_by_category(self.category, self)
-        else:
-            rule_set = RuleSet.check_by_category(self.scope, self)
-            if rule_set is None:
-                rule_set = RuleSet.check_by_category(self.category, self)
-        if rule_set is None and use_catchall and not exact_category:
-            rule_set = RuleSet.check_by_category("*", self)
-
+            return lookup(self.category, self)
+        rule_set = lookup(self.scope, self)
+        if rule_set is None:
+            rule_set = lookup(self.category, self)
+        if rule_set is None and use_catchall:
+            rule_set = lookup("*", self)
+        return rule_set
+
+    @classmethod
+    def is_ignored_by(cls, rule_set):
+        """True when the RuleSet's handler is action=ignore ("ignore" or "ignore://")."""
+        return bool(rule_set and rule_set.handler and rule_set.handler.strip().rstrip(":/") == "ignore")
+
+    def opens_incident(self, rule_set, exact_category=False):
+        """True when publishing with `rule_set` creates or joins an incident."""
+        if self.is_ignored_by(rule_set):
+            return False
+        return bool(rule_set or (not exact_category and self.level >= INCIDENT_LEVEL_THRESHOLD))
+
+    def publish_matched(self, rule_set, dispatch_handlers=True,
+                        allow_default_llm=True, exact_category=False):
+        """
+        Publish the event against an already matched RuleSet (or None):
+        incident lookup/creation, trigger thresholds and handler dispatch.
+        """
         # Honor action=ignore from RuleSet metadata (accept both "ignore" and "ignore://")
-        if rule_set and rule_set.handler and rule_set.handler.strip().rstrip(":/") == "ignore":
+        if self.is_ignored_by(rule_set):
             return {
                 "rule_set": rule_set,
                 "incident": None,
@@ -298,12 +329,7 @@ class Event(models.Model, MojoModel):
         trigger_window = None
         retrigger_every = None
         if rule_set:
-            trigger_count = rule_set.trigger_count
-            trigger_window = rule_set.trigger_window
-            retrigger_every = rule_set.retrigger_every
-            # Fall back to bundle_minutes for the count window if trigger_window not set
-            if trigger_window is None and rule_set.bundle_minutes and rule_set.bundle_minutes > 0:
-                trigger_window = rule_set.bundle_minutes
+            trigger_count, trigger_window, retrigger_every = rule_set.get_trigger_config()
 
         if rule_set or (not exact_category and self.level >= INCIDENT_LEVEL_THRESHOLD):
             with transaction.atomic():
@@ -423,6 +449,30 @@ class Event(models.Model, MojoModel):
                     category="auth",
                     min_granularity=INCIDENT_METRICS_MIN_GRANULARITY)
 
+    @classmethod
+    def record_events_metrics(cls, events):
+        """record_event_metrics() for many events: one increment per counter."""
+        if not settings.INCIDENT_EVENT_METRICS or not events:
+            return
+        metrics.record('incident_events', count=len(events), account="incident",
+            min_granularity=INCIDENT_METRICS_MIN_GRANULARITY)
+        countries = {}
+        auth_failures = 0
+        for event in events:
+            if event.country_code:
+                countries[event.country_code] = countries.get(event.country_code, 0) + 1
+            if event.category in AUTH_FAILURE_CATEGORIES:
+                auth_failures += 1
+        for country_code, count in countries.items():
+            metrics.record(f'incident_events:country:{country_code}', count=count,
+                account="incident",
+                category="incident_events_by_country",
+                min_granularity=INCIDENT_METRICS_MIN_GRANULARITY)
+        if auth_failures:
+            metrics.record('auth:failures', count=auth_failures, account="incident",
+                category="auth",
+                min_granularity=INCIDENT_METRICS_MIN_GRANULARITY)
+
     def record_incident_metrics(self):
         if settings.INCIDENT_EVENT_METRICS:
             metrics.record('incidents', account="incident",
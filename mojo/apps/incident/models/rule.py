@@ -1,8 +1,10 @@
 import hashlib
 import re
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.core.validators import MinValueValidator
 from mojo.models import MojoModel
+from mojo.apps.incident.services import rule_matcher
 from urllib.parse import urlparse, parse_qs
 from mojo.helpers import logit
 
@@ -83,6 +85,33 @@ class BundleMinutes:
     ]
 
 
+class RuleQuerySet(models.QuerySet):
+    """
+    Bulk writes skip post_save/post_delete, so they invalidate the compiled
+    rule matchers (services/rule_matcher.py) themselves.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        rule_matcher.schedule_invalidate(self.db)
+        return rows
+
+    def delete(self):
+        result = super().delete()
+        rule_matcher.schedule_invalidate(self.db)
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        rule_matcher.schedule_invalidate(self.db)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        rule_matcher.schedule_invalidate(self.db)
+        return rows
+
+
 class RuleSet(models.Model, MojoModel):
     """
     A RuleSet represents a collection of rules that are applied to events.
@@ -137,6 +166,8 @@ class RuleSet(models.Model, MojoModel):
     metadata = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
 
+    objects = RuleQuerySet.as_manager()
+
     class RestMeta:
         SEARCH_FIELDS = ["name"]
         VIEW_PERMS = ["view_security", "security"]
@@ -880,6 +911,16 @@ class RuleSet(models.Model, MojoModel):
             rules=[],
         )
 
+    def get_trigger_config(self):
+        """
+        Return (trigger_count, trigger_window, retrigger_every). The count
+        window falls back to bundle_minutes when trigger_window is not set.
+        """
+        trigger_window = self.trigger_window
+        if trigger_window is None and self.bundle_minutes and self.bundle_minutes > 0:
+            trigger_window = self.bundle_minutes
+        return self.trigger_count, trigger_window, self.retrigger_every
+
     def check_rules(self, event):
         """
         Checks if an event satisfies the rules in this RuleSet based
@@ -933,6 +974,9 @@ class RuleSet(models.Model, MojoModel):
         Iterates over RuleSets in a category ordered by priority, checking
         if the event satisfies any of the RuleSets.
 
+        Matching runs against the category's compiled, process-cached rules
+        (see services/rule_matcher.py); only a rule change reloads them.
+
         Args:
             category (str): The category of the RuleSets to check.
             event (Event): The event to check.
@@ -940,10 +984,7 @@ class RuleSet(models.Model, MojoModel):
         Returns:
             RuleSet: The first RuleSet that matches the event, or None if no matches are found.
         """
-        for rule_set in cls.objects.filter(category=category, is_active=True).order_by("priority"):
-            if rule_set.check_rules(event):
-                return rule_set
-        return None
+        return rule_matcher.match(category, event)
 
 
 class Rule(models.Model, MojoModel):
@@ -975,6 +1016,8 @@ class Rule(models.Model, MojoModel):
     value_type = models.CharField(max_length=10, default="int")
     is_required = models.IntegerField(default=0)  # 0=no 1=yes
 
+    objects = RuleQuerySet.as_manager()
+
     class RestMeta:
         SEARCH_FIELDS = ["details"]
         VIEW_PERMS = ["view_security", "security"]
@@ -1050,14 +1093,30 @@ class Rule(models.Model, MojoModel):
         Returns:
             bool: True if the comparison is successful, False otherwise.
         """
-        comparators = {
-            "==": field_value == comp_value,
-            "eq": field_value == comp_value,
-            ">": field_value > comp_value,
-            ">=": field_value >= comp_value,
-            "<": field_value < comp_value,
-            "<=": field_value <= comp_value,
-            "contains": str(comp_value) in str(field_value),
-            "regex": re.search(str(comp_value), str(field_value), re.IGNORECASE) is not None,
-        }
-        return comparators.get(self.comparator, False)
+        comparator = self.comparator
+        if comparator in ("==", "eq"):
+            return field_value == comp_value
+        if comparator == ">":
+            return field_value > comp_value
+        if comparator == ">=":
+            return field_value >= comp_value
+        if comparator == "<":
+            return field_value < comp_value
+        if comparator == "<=":
+            return field_value <= comp_value
+        if comparator == "contains":
+            return str(comp_value) in str(field_value)
+        if comparator == "regex":
+            return re.search(str(comp_value), str(field_value), re.IGNORECASE) is not None
+        return False
+
+
+def _on_rules_changed(sender, using=None, **kwargs):
+    rule_matcher.schedule_invalidate(using)
+
+
+for _model in (RuleSet, Rule):
+    post_save.connect(_on_rules_changed, sender=_model,
+                      dispatch_uid=f"incident_rule_matcher_save_{_model.__name__}")
+    post_delete.connect(_on_rules_changed, sender=_model,
+                        dispatch_uid=f"incident_rule_matcher_delete_{_model.__name__}")
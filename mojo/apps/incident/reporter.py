@@ -17,6 +17,37 @@ def report_event(details, title=None, category="api_error", level=1, request=Non
     return event
 
 
+def record_events(entries, request=None, scope="global"):
+    """
+    Build (unsaved) Events for many report_event() calls.
+
+    Each entry is a dict of report_event() keyword arguments (``details``
+    required; ``title``, ``category``, ``level``, ``scope``, ``request`` and
+    any metadata keys optional). `request` and `scope` are defaults for
+    entries that do not carry their own.
+    """
+    from .models import Event
+    events = []
+    for entry in entries:
+        entry = dict(entry)
+        details = entry.pop("details", "")
+        entry.setdefault("request", request)
+        entry.setdefault("scope", scope)
+        events.append(Event(**_create_event_dict(details, **entry)))
+    return events
+
+
+def report_events(entries, request=None, scope="global", **publish_kwargs):
+    """
+    report_event() for a burst: one bulk insert, one rule-matching pass and
+    in-memory incident bundling (see services/ingest.py). Returns the Events.
+    """
+    from .services.ingest import publish_events
+    events = record_events(entries, request=request, scope=scope)
+    publish_events(events, **publish_kwargs)
+    return events
+
+
 # Set True the first time the Redis suppression path fails while fail_open is on,
 # so the "filing without suppression" fallback warning is logged once per process
 # instead of once per amplifiable request. Re-armed (set back to False) on the
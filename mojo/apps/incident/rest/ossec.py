@@ -71,6 +71,7 @@ def on_ossec_alert_batch(request):
     _ensure_defaults()
     ossec_alerts = ossec.parse(request.DATA) or []
 
+    entries = []
     for alert in ossec_alerts:
         # Skip None alerts (ignored or malformed)
         if not alert:
@@ -101,6 +102,9 @@ def on_ossec_alert_batch(request):
                pass
 
         # Use getattr to avoid attribute errors if 'text' is missing
-        reporter.report_event(getattr(alert, "text", ""), category="ossec", scope="ossec", **alert)
+        entries.append(dict(alert, details=getattr(alert, "text", ""), category="ossec", scope="ossec"))
 
+    # One bulk insert, one rule pass and in-memory bundling for the whole batch.
+    if entries:
+        reporter.report_events(entries)
     return JsonResponse({"status": True})
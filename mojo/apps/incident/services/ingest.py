@@ -0,0 +1,255 @@
+"""
+Batch event ingestion: publish N events without N round trips per step.
+
+publish_events() is Event.publish() for a burst (OSSEC alert batches,
+report_events() callers):
+
+1. geo lookups are shared per source IP and metadata synced in memory,
+2. the events are inserted with one bulk_create,
+3. metric counters are incremented once per slug for the whole batch,
+4. every event is matched in one pass against compiled rule matchers
+   resolved once per category (see rule_matcher.py),
+5. events that bundle together (same RuleSet and bundle criteria) are
+   grouped in memory. The first event of a group goes through
+   Event.publish_matched(), which handles incident lookup/creation,
+   escalation, thresholds and handlers. The rest of the group is attached
+   to that incident with one UPDATE and one threshold evaluation.
+
+Events that open their own incident (bundling disabled, level-threshold
+incidents without a RuleSet) are published one by one, exactly as publish()
+would. Within a group, handlers fire at most once per batch: on creation,
+on the event that crosses trigger_count, or on a retrigger boundary.
+"""
+
+import copy
+
+from django.db import transaction
+
+from mojo.helpers import logit
+from mojo.helpers.settings import settings
+
+logger = logit.get_logger(__name__, "incident.log")
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def publish_events(events, use_catchall=True, dispatch_handlers=True,
+                   allow_default_llm=True, exact_category=False):
+    """
+    Save and publish unsaved Event instances as one batch.
+
+    Returns one publish result per event, in input order, shaped like
+    Event.publish(): {"rule_set", "incident", "should_dispatch"}.
+    """
+    from mojo.apps.incident.models import Event
+
+    events = list(events)
+    if not events:
+        return []
+
+    _sync_metadata(events)
+    Event.objects.bulk_create(events, batch_size=BULK_CREATE_BATCH_SIZE)
+    Event.record_events_metrics(events)
+
+    rule_sets = _match_rule_sets(events, use_catchall, exact_category)
+    results = [{"rule_set": rule_set, "incident": None, "should_dispatch": False}
+               for rule_set in rule_sets]
+
+    groups = {}
+    singles = []
+    for index, (event, rule_set) in enumerate(zip(events, rule_sets)):
+        if not event.opens_incident(rule_set, exact_category=exact_category):
+            continue
+        key = _bundle_key(event, rule_set)
+        if key is None:
+            singles.append(index)
+        else:
+            groups.setdefault(key, []).append(index)
+
+    for index in singles:
+        _publish_one(events, rule_sets, results, index,
+                     dispatch_handlers, allow_default_llm, exact_category)
+
+    for indexes in groups.values():
+        leader = indexes[0]
+        _publish_one(events, rule_sets, results, leader,
+                     dispatch_handlers, allow_default_llm, exact_category)
+        incident = results[leader]["incident"]
+        if incident is None or len(indexes) == 1:
+            continue
+        followers = indexes[1:]
+        try:
+            should_dispatch = _attach_followers(
+                incident, rule_sets[leader], [events[i] for i in followers], dispatch_handlers)
+        except Exception:
+            logger.exception("Failed to attach %d batched events to incident %s",
+                             len(followers), incident.pk)
+            continue
+        for index in followers:
+            results[index]["incident"] = incident
+        if should_dispatch:
+            results[followers[-1]]["should_dispatch"] = True
+    return results
+
+
+def _sync_metadata(events):
+    """sync_metadata() for each event, geolocating each source IP once."""
+    geo = {}
+    for event in events:
+        ip = event.source_ip
+        if ip and not event.country_code:
+            if ip not in geo:
+                geo[ip] = event.geo_ip
+            else:
+                event._geo_ip = geo[ip]
+        event.sync_metadata()
+
+
+def _match_rule_sets(events, use_catchall, exact_category):
+    """Match every event, resolving each category's matcher once per batch."""
+    from mojo.apps.incident.services import rule_matcher
+
+    matchers = {}
+    ip_stats = {}
+
+    def lookup(category, event):
+        matcher = matchers.get(category)
+        if matcher is None:
+            matcher = matchers[category] = rule_matcher.get_matcher(category)
+        rule_set = matcher.match(event)
+        return copy.deepcopy(rule_set) if rule_set is not None else None
+
+    rule_sets = []
+    for event in events:
+        # Rate fields are one aggregate per source IP; share it across the batch.
+        if event.source_ip in ip_stats:
+            event._ip_stats = ip_stats[event.source_ip]
+        rule_sets.append(event.match_rule_set(
+            use_catchall=use_catchall, exact_category=exact_category, lookup=lookup))
+        if event._ip_stats is not None:
+            ip_stats[event.source_ip] = event._ip_stats
+    return rule_sets
+
+
+def _bundle_key(event, rule_set):
+    """Hashable bundle criteria, or None when the event gets its own incident."""
+    if rule_set is None or rule_set.bundle_by <= 0:
+        return None
+    criteria = event.determine_bundle_criteria(rule_set)
+    if "created__exact" in criteria:
+        return None  # bundle_minutes=0: bundling disabled
+    criteria.pop("created__gte", None)
+    if "rule_set" in criteria:
+        criteria["rule_set"] = criteria["rule_set"].pk
+    return (rule_set.pk, tuple(sorted(criteria.items())))
+
+
+def _publish_one(events, rule_sets, results, index, dispatch_handlers, allow_default_llm, exact_category):
+    event = events[index]
+    try:
+        results[index] = event.publish_matched(
+            rule_sets[index], dispatch_handlers=dispatch_handlers,
+            allow_default_llm=allow_default_llm, exact_category=exact_category)
+    except Exception:
+        logger.exception("Failed to publish batched event %s", event.pk)
+
+
+def _attach_followers(incident, rule_set, followers, dispatch_handlers):
+    """
+    Link the rest of a bundle group to its incident in one pass.
+
+    Mirrors what Event.publish_matched() does per event: priority escalation,
+    event_count / group reconciliation, trigger_count transitions and
+    retriggers. Returns True when a handler was due.
+    """
+    from mojo.apps import metrics
+    from mojo.apps.incident.models import Event, Incident
+    from mojo.apps.incident.models.event import INCIDENT_METRICS_MIN_GRANULARITY
+    from mojo.helpers import dates
+
+    with transaction.atomic():
+        incident = Incident.objects.select_for_update().get(pk=incident.pk)
+        Event.objects.filter(pk__in=[event.pk for event in followers]).update(incident=incident)
+        for event in followers:
+            event.incident = incident
+
+        top = max(followers, key=lambda event: event.level)
+        if top.level > incident.priority:
+            old_priority = incident.priority
+            incident.priority = top.level
+            incident.save(update_fields=["priority"])
+            incident.add_history("priority_escalated",
+                note=f"Priority escalated from {old_priority} to {top.level} by event (category: {top.category})")
+            if settings.INCIDENT_EVENT_METRICS:
+                metrics.record('incidents:escalated', account="incident",
+                    min_granularity=INCIDENT_METRICS_MIN_GRANULARITY)
+
+        _reconcile_group(incident, followers)
+
+        trigger_count, trigger_window, retrigger_every = rule_set.get_trigger_config()
+        dispatch_event = None
+        if trigger_count is not None:
+            qs = incident.events
+            if trigger_window:
+                qs = qs.filter(created__gte=dates.subtract(minutes=trigger_window))
+            total = qs.count()
+            if total < trigger_count:
+                if incident.status != "pending":
+                    incident.status = "pending"
+                    incident.save(update_fields=["status"])
+            elif incident.status == "pending":
+                incident.status = "new"
+                incident.save(update_fields=["status"])
+                incident.add_history("threshold_reached",
+                    note=f"Threshold met: {total} events (trigger_count: {trigger_count})")
+                if settings.INCIDENT_EVENT_METRICS:
+                    metrics.record('incidents:threshold_reached', account="incident",
+                        min_granularity=INCIDENT_METRICS_MIN_GRANULARITY)
+                # The event that crossed the threshold is the one handlers see.
+                crossed = trigger_count - (total - len(followers)) - 1
+                dispatch_event = followers[min(max(crossed, 0), len(followers) - 1)]
+
+        if dispatch_event is not None:
+            if retrigger_every is not None:
+                meta = dict(incident.metadata or {})
+                meta["last_trigger_count"] = incident.events.count()
+                incident.metadata = meta
+                incident.save(update_fields=["metadata"])
+        elif retrigger_every is not None and incident.status in ("new", "open", "investigating"):
+            total = incident.events.count()
+            last = (incident.metadata or {}).get("last_trigger_count")
+            if not isinstance(last, int) or last < 1:
+                last = trigger_count or 1
+            if total >= last + retrigger_every:
+                meta = dict(incident.metadata or {})
+                meta["last_trigger_count"] = total
+                incident.metadata = meta
+                incident.save(update_fields=["metadata"])
+                incident.add_history("handler_retriggered",
+                    note=f"Re-triggered: {total} events (retrigger_every: {retrigger_every})")
+                dispatch_event = followers[-1]
+
+        if dispatch_event is None or not rule_set.handler:
+            return False
+        if dispatch_handlers:
+            rule_set.run_handler(dispatch_event, incident)
+        return True
+
+
+def _reconcile_group(incident, followers):
+    """Event.link_to_incident()'s event_count and group bookkeeping, in one save."""
+    meta = dict(incident.metadata or {})
+    meta["event_count"] = int(meta.get("event_count") or 0) + len(followers)
+    update_fields = ["metadata"]
+    for event in followers:
+        event_gid = event.group_id
+        inc_gid = incident.group_id
+        if event_gid is not None and inc_gid is None and not meta.get("group_mismatch"):
+            incident.group_id = event_gid
+            update_fields.append("group")
+        elif event_gid is not None and inc_gid is not None and event_gid != inc_gid:
+            meta["group_mismatch"] = True
+            incident.group = None
+            update_fields.append("group")
+    incident.metadata = meta
+    incident.save(update_fields=list(dict.fromkeys(update_fields)))
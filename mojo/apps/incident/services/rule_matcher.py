@@ -0,0 +1,219 @@
+"""
+Compiled, process-local RuleSet matcher behind RuleSet.check_by_category().
+
+Each category compiles once into a CategoryMatcher: its active RuleSets in
+priority order, each RuleSet's rules in index order, comparison values
+converted to the rule's value_type and regexes compiled up front. Matching an
+event is then plain Python that stops at the first failing (ALL) or passing
+(ANY) rule — Event.publish reads nothing from the database to pick a RuleSet.
+
+Invalidation: post_save / post_delete on RuleSet and Rule, and the bulk
+QuerySet paths (update, delete, bulk_create, bulk_update), call
+schedule_invalidate(). Once the transaction commits that drops this process's
+matchers and INCRs a shared Redis version, which every other process compares
+on lookup (at most every INCIDENT_RULE_CACHE_CHECK_SECONDS, default 0 = every
+lookup) before recompiling. When Redis is unreachable lookups compile straight
+from the database, so a rule change is never missed — only the cache is lost.
+
+Matched RuleSets are returned as copies, so a caller that mutates one cannot
+leak the change into later events.
+"""
+
+import copy
+import operator
+import re
+import time
+
+from django.db import transaction
+
+from mojo.helpers import logit
+from mojo.helpers.settings import settings
+
+logger = logit.get_logger(__name__, "incident.log")
+
+VERSION_KEY = "incident:rules:version"
+
+_CONVERTERS = {"int": int, "float": float, "bool": bool, "str": str}
+_OPERATORS = {
+    "==": operator.eq,
+    "eq": operator.eq,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+# category -> (version, CategoryMatcher)
+_CACHE = {}
+# last version read from Redis and when it was read
+_STATE = {"version": None, "checked": 0.0}
+_UNAVAILABLE = object()
+
+
+def _never(event):
+    return False
+
+
+def compile_rule(rule):
+    """
+    Return a predicate ``check(event) -> bool`` with Rule.check_rule() semantics.
+
+    The field name is normalized and the comparison value converted once; a
+    rule that can never match (no field, private field, unconvertible value,
+    invalid regex, unknown comparator) compiles to a constant False. Errors
+    while comparing an event's value count as no match.
+    """
+    field_name = rule.field_name
+    if not field_name:
+        return _never
+    if field_name.startswith("metadata."):
+        field_name = field_name[9:]
+    if field_name.startswith("_"):
+        return _never
+
+    comparator = rule.comparator
+    comp_value = rule.value
+    convert = None
+    if comparator != "contains":
+        convert = _CONVERTERS.get(rule.value_type)
+        if convert is not None:
+            try:
+                comp_value = convert(comp_value)
+            except (TypeError, ValueError):
+                return _never
+    if comp_value is None:
+        return _never
+
+    if comparator in _OPERATORS:
+        compare = _OPERATORS[comparator]
+
+        def test(value):
+            return compare(value, comp_value)
+    elif comparator == "contains":
+        needle = str(comp_value)
+
+        def test(value):
+            return needle in str(value)
+    elif comparator == "regex":
+        try:
+            pattern = re.compile(str(comp_value), re.IGNORECASE)
+        except re.error as exc:
+            logger.warning("rule %s has an invalid regex %r: %s", rule.pk, comp_value, exc)
+            return _never
+
+        def test(value):
+            return pattern.search(str(value)) is not None
+    else:
+        return _never
+
+    def check(event):
+        value = event.metadata.get(field_name, None)
+        if value is None:
+            value = getattr(event, field_name, None)
+        if value is None:
+            return False
+        if convert is not None:
+            try:
+                value = convert(value)
+            except (TypeError, ValueError):
+                return False
+        try:
+            return bool(test(value))
+        except TypeError:
+            return False
+
+    return check
+
+
+class CategoryMatcher:
+    """The compiled RuleSets of one category, in priority order."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries):
+        # [(rule_set, match_all, [check, ...]), ...]
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def match(self, event):
+        """Return the first RuleSet the event satisfies, or None."""
+        for rule_set, match_all, checks in self.entries:
+            if not checks:
+                return rule_set  # no conditions — catch-all for the category
+            if match_all:
+                if all(check(event) for check in checks):
+                    return rule_set
+            elif any(check(event) for check in checks):
+                return rule_set
+        return None
+
+
+def compile_category(category):
+    """Load and compile the active RuleSets of `category` (two queries)."""
+    from mojo.apps.incident.models.rule import Rule, RuleSet, MatchBy
+
+    rule_sets = list(RuleSet.objects.filter(category=category, is_active=True).order_by("priority"))
+    checks = {rule_set.pk: [] for rule_set in rule_sets}
+    if rule_sets:
+        for rule in Rule.objects.filter(parent_id__in=list(checks)).order_by("index"):
+            checks[rule.parent_id].append(compile_rule(rule))
+    return CategoryMatcher([
+        (rule_set, rule_set.match_by == MatchBy.ALL, checks[rule_set.pk])
+        for rule_set in rule_sets
+    ])
+
+
+def get_matcher(category):
+    """Return the compiled matcher for `category`, recompiling if rules changed."""
+    version = _current_version()
+    if version is _UNAVAILABLE:
+        return compile_category(category)
+    cached = _CACHE.get(category)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    matcher = compile_category(category)
+    _CACHE[category] = (version, matcher)
+    return matcher
+
+
+def match(category, event):
+    """Return a copy of the first RuleSet in `category` matching `event`, or None."""
+    rule_set = get_matcher(category).match(event)
+    if rule_set is None:
+        return None
+    return copy.deepcopy(rule_set)
+
+
+def invalidate():
+    """Drop this process's matchers and tell every other process to recompile."""
+    _CACHE.clear()
+    _STATE["checked"] = 0.0
+    try:
+        from mojo.helpers.redis import get_connection
+        get_connection().incr(VERSION_KEY)
+    except Exception:
+        logger.exception("failed to publish incident rule version; other processes may match stale rules")
+
+
+def schedule_invalidate(using=None):
+    """Invalidate once the surrounding transaction (if any) commits."""
+    transaction.on_commit(invalidate, using=using)
+
+
+def _current_version():
+    interval = settings.get_static("INCIDENT_RULE_CACHE_CHECK_SECONDS", 0) or 0
+    now = time.monotonic()
+    if interval and _STATE["checked"] and now - _STATE["checked"] < interval:
+        return _STATE["version"]
+    try:
+        from mojo.helpers.redis import get_connection
+        version = get_connection().get(VERSION_KEY)
+    except Exception as exc:
+        logger.warning("failed to read incident rule version, matching without the cache: %s", exc)
+        _STATE["checked"] = 0.0
+        return _UNAVAILABLE
+    _STATE["version"] = version
+    _STATE["checked"] = now
+    return version
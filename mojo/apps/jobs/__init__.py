@@ -6,10 +6,10 @@ A reliable background job system for Django with Redis fast path and Postgres tr
 import re
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
 from django.utils import timezone
-from django.db import transaction
+from django.db import IntegrityError, transaction
 
 from mojo.helpers import logit
 from mojo.helpers.settings import settings
@@ -67,9 +67,12 @@ JOBS_DEFAULT_BACKOFF_BASE = settings.get_static('JOBS_DEFAULT_BACKOFF_BASE', 2.0
 JOBS_DEFAULT_BACKOFF_MAX = settings.get_static('JOBS_DEFAULT_BACKOFF_MAX', 3600)
 JOBS_STREAM_MAXLEN = settings.get_static('JOBS_STREAM_MAXLEN', 100000)
 JOBS_WEBHOOK_MAX_RETRIES = settings.get_static("JOBS_WEBHOOK_MAX_RETRIES", 5, kind="int")
+# Rows per INSERT (and ids per RPUSH/ZADD) for publish_many().
+PUBLISH_MANY_BATCH_SIZE = 1000
 
 __all__ = [
     'publish',
+    'publish_many',
     'publish_local',
     'publish_webhook',
     'cancel',
@@ -266,6 +269,47 @@ def get_startup_hooks():
     return list(ENGINE_STARTUP_HOOKS)
 
 
+def _check_publish_channel(channel, func_path):
+    """Validate and gate `channel` before any DB write; raises ValueError."""
+    # Fail before any DB write. A malformed channel would otherwise reach a
+    # Redis key, a metric slug, and an incident title verbatim.
+    validate_channel_name(channel)
+
+    # Gate undeclared channels. The pre-1.2.62 reroute-to-default hid typos by
+    # running the job in the wrong place; routing-as-named alone let a typo
+    # strand the job on a queue nobody consumes. With JOBS_ALLOWED_CHANNELS
+    # set, an undeclared channel is refused loudly at the call site; unset
+    # (monitor mode) it still routes as named but files an incident naming the
+    # channel and publisher, so upgrading deployments learn their channel list
+    # instead of breaking.
+    if not is_channel_allowed(channel):
+        enforced = channels_enforced()
+        _report_undeclared_channel(channel, func_path, enforced)
+        if enforced:
+            raise ValueError(
+                f"Job channel {channel!r} is not a declared publish target. "
+                f"Allowed: framework DEFAULT_CHANNELS, this box's JOBS_CHANNELS, "
+                f"the deployment's JOBS_ALLOWED_CHANNELS, and box-direct channels "
+                f"ending '{ENGINE_CHANNEL_SUFFIX}'. Add it to "
+                f"JOBS_ALLOWED_CHANNELS to declare it."
+            )
+
+
+def _check_payload(payload):
+    """Return the payload dict, raising ValueError if it is not one or is too large."""
+    payload = payload or {}
+    if not isinstance(payload, dict):
+        raise ValueError("Payload must be a dictionary")
+
+    # Check payload size
+    import json
+    payload_json = json.dumps(payload)
+    max_bytes = JOBS_PAYLOAD_MAX_BYTES
+    if len(payload_json.encode('utf-8')) > max_bytes:
+        raise ValueError(f"Payload exceeds maximum size of {max_bytes} bytes")
+    return payload
+
+
 def publish(
     func: Union[str, Callable],
     payload: Dict[str, Any] = None,
@@ -340,40 +384,8 @@ def publish(
     else:
         func_path = func
 
-    # Fail before any DB write. A malformed channel would otherwise reach a
-    # Redis key, a metric slug, and an incident title verbatim.
-    validate_channel_name(channel)
-
-    # Gate undeclared channels. The pre-1.2.62 reroute-to-default hid typos by
-    # running the job in the wrong place; routing-as-named alone let a typo
-    # strand the job on a queue nobody consumes. With JOBS_ALLOWED_CHANNELS
-    # set, an undeclared channel is refused loudly at the call site; unset
-    # (monitor mode) it still routes as named but files an incident naming the
-    # channel and publisher, so upgrading deployments learn their channel list
-    # instead of breaking.
-    if not is_channel_allowed(channel):
-        enforced = channels_enforced()
-        _report_undeclared_channel(channel, func_path, enforced)
-        if enforced:
-            raise ValueError(
-                f"Job channel {channel!r} is not a declared publish target. "
-                f"Allowed: framework DEFAULT_CHANNELS, this box's JOBS_CHANNELS, "
-                f"the deployment's JOBS_ALLOWED_CHANNELS, and box-direct channels "
-                f"ending '{ENGINE_CHANNEL_SUFFIX}'. Add it to "
-                f"JOBS_ALLOWED_CHANNELS to declare it."
-            )
-
-    # Validate payload
-    payload = payload or {}
-    if not isinstance(payload, dict):
-        raise ValueError("Payload must be a dictionary")
-
-    # Check payload size
-    import json
-    payload_json = json.dumps(payload)
-    max_bytes = JOBS_PAYLOAD_MAX_BYTES
-    if len(payload_json.encode('utf-8')) > max_bytes:
-        raise ValueError(f"Payload exceeds maximum size of {max_bytes} bytes")
+    _check_publish_channel(channel, func_path)
+    payload = _check_payload(payload)
 
     # BROADCAST FAN-OUT.
     #
@@ -628,25 +640,239 @@ def publish(
     return job_id
 
 
+def publish_many(
+    func: Union[str, Callable],
+    payloads: Sequence[Dict[str, Any]],
+    *,
+    channel: str = "default",
+    delay: Optional[int] = None,
+    run_at: Optional[datetime] = None,
+    delays: Optional[Sequence[Optional[int]]] = None,
+    idempotency_keys: Optional[Sequence[Optional[str]]] = None,
+    max_retries: Optional[int] = None,
+    backoff_base: Optional[float] = None,
+    backoff_max: Optional[int] = None,
+    expires_in: Optional[int] = None,
+    expires_at: Optional[datetime] = None,
+    max_exec_seconds: Optional[int] = None,
+) -> List[str]:
+    """
+    Publish one job per payload in a single batch.
+
+    Same contract as publish() for each item, at a fraction of the cost: the
+    Job rows and their 'created' / 'queued' / 'scheduled' events are written
+    with bulk_create, and every id reaches Redis in one pipelined RPUSH
+    (immediate jobs) plus one ZADD (delayed jobs).
+
+    Args:
+        func: Job function (registered name or callable)
+        payloads: One payload dict per job
+        channel: Channel for every job; validated and gated like publish()
+        delay / run_at: Schedule for every job (run_at wins, as in publish())
+        delays: Optional per-item delay in seconds, same length as
+            payloads; a non-None entry overrides `delay`/`run_at` for
+            that item
+        idempotency_keys: Optional per-item idempotency key, same length as
+            payloads. A key that already has a job returns that job's id
+            (exactly as publish() would); a key repeated inside the batch
+            publishes once.
+        max_retries, backoff_base, backoff_max, expires_in, expires_at,
+        max_exec_seconds: As publish(), applied to every job
+
+    Returns:
+        Job ids, one per payload, in input order.
+
+    Raises:
+        ValueError: If the channel, a payload, or the per-item lists are invalid
+        RuntimeError: If publishing fails
+    """
+    payloads = list(payloads)
+    count = len(payloads)
+    delays = list(delays) if delays is not None else [None] * count
+    keys_in = list(idempotency_keys) if idempotency_keys is not None else [None] * count
+    if len(delays) != count or len(keys_in) != count:
+        raise ValueError("delays and idempotency_keys must match payloads in length")
+    if not payloads:
+        return []
+
+    func_path = f"{func.__module__}.{func.__name__}" if callable(func) else func
+
+    def _publish_one(i):
+        return publish(
+            func_path, payloads[i], channel=channel,
+            delay=delays[i] if delays[i] is not None else delay,
+            run_at=None if delays[i] is not None else run_at,
+            max_retries=max_retries, backoff_base=backoff_base,
+            backoff_max=backoff_max, expires_in=expires_in, expires_at=expires_at,
+            max_exec_seconds=max_exec_seconds, idempotency_key=keys_in[i])
+
+    if _capture_router is not None:
+        # Test captures see each job exactly as a publish() call.
+        return [_publish_one(i) for i in range(count)]
+
+    from .models import Job, JobEvent
+
+    _check_publish_channel(channel, func_path)
+    payloads = [_check_payload(payload) for payload in payloads]
+
+    now = timezone.now()
+    if run_at and timezone.is_naive(run_at):
+        run_at = timezone.make_aware(run_at)
+    elif not run_at and delay:
+        run_at = now + timedelta(seconds=delay)
+    if expires_at:
+        if timezone.is_naive(expires_at):
+            expires_at = timezone.make_aware(expires_at)
+    else:
+        expires_at = now + timedelta(seconds=expires_in or JOBS_DEFAULT_EXPIRES_SEC)
+    if max_retries is None:
+        max_retries = JOBS_DEFAULT_MAX_RETRIES
+    if backoff_base is None:
+        backoff_base = JOBS_DEFAULT_BACKOFF_BASE
+    if backoff_max is None:
+        backoff_max = JOBS_DEFAULT_BACKOFF_MAX
+
+    # Idempotency: keys that already have a row (or repeat earlier in this
+    # batch) resolve like publish() does; only new keys are bulk-created.
+    job_ids = [None] * count
+    seen = {}
+    existing = set()
+    wanted = {key for key in keys_in if key}
+    if wanted:
+        existing = set(Job.objects.filter(idempotency_key__in=wanted).values_list('idempotency_key', flat=True))
+    fresh = []
+    for i, key in enumerate(keys_in):
+        if key and key in existing:
+            # publish() owns the resume/mirror rules for an existing key.
+            job_ids[i] = seen[key] = seen.get(key) or _publish_one(i)
+        elif key and key in seen:
+            job_ids[i] = seen[key]
+        else:
+            job_ids[i] = uuid.uuid4().hex
+            if key:
+                seen[key] = job_ids[i]
+            fresh.append(i)
+    if not fresh:
+        return job_ids
+
+    jobs = []
+    for i in fresh:
+        item_run_at = run_at
+        if delays[i] is not None:
+            item_run_at = now + timedelta(seconds=delays[i]) if delays[i] else None
+        jobs.append(Job(
+            id=job_ids[i],
+            channel=channel,
+            func=func_path,
+            payload=payloads[i],
+            status='pending',
+            run_at=item_run_at,
+            expires_at=expires_at,
+            max_retries=max_retries,
+            backoff_base=backoff_base,
+            backoff_max_sec=backoff_max,
+            broadcast=False,
+            max_exec_seconds=max_exec_seconds,
+            idempotency_key=keys_in[i],
+        ))
+
+    try:
+        with transaction.atomic():
+            Job.objects.bulk_create(jobs, batch_size=PUBLISH_MANY_BATCH_SIZE)
+            JobEvent.objects.bulk_create([
+                JobEvent(job=job, channel=channel, event='created',
+                         details={'func': func_path, 'channel': channel})
+                for job in jobs
+            ], batch_size=PUBLISH_MANY_BATCH_SIZE)
+    except IntegrityError as e:
+        if not any(job.idempotency_key for job in jobs):
+            logit.error(f"Failed to create jobs in database: {e}")
+            raise RuntimeError(f"Failed to create jobs: {e}")
+        # A concurrent publisher claimed one of the keys between the lookup
+        # and the insert: resolve the batch item by item.
+        logit.info(f"publish_many: idempotency race on {channel}, publishing {len(jobs)} jobs one by one")
+        resolved = {}
+        for i in fresh:
+            job_ids[i] = _publish_one(i)
+            if keys_in[i]:
+                resolved[keys_in[i]] = job_ids[i]
+        # Repeats of a fresh key copied its placeholder id, which the
+        # rolled-back insert never created.
+        for i, key in enumerate(keys_in):
+            if key in resolved:
+                job_ids[i] = resolved[key]
+        return job_ids
+    except Exception as e:
+        logit.error(f"Failed to create jobs in database: {e}")
+        raise RuntimeError(f"Failed to create jobs: {e}")
+
+    keys = JobKeys()
+    queue_key = keys.queue(channel)
+    queued = [job for job in jobs if not (job.run_at and job.run_at > now)]
+    scheduled = [job for job in jobs if job.run_at and job.run_at > now]
+    try:
+        with get_adapter().pipeline(transaction=False) as pipe:
+            for start in range(0, len(queued), PUBLISH_MANY_BATCH_SIZE):
+                pipe.rpush(queue_key, *[job.id for job in queued[start:start + PUBLISH_MANY_BATCH_SIZE]])
+            for start in range(0, len(scheduled), PUBLISH_MANY_BATCH_SIZE):
+                pipe.zadd(keys.sched(channel), {
+                    job.id: job.run_at.timestamp() * 1000
+                    for job in scheduled[start:start + PUBLISH_MANY_BATCH_SIZE]
+                })
+        if scheduled:
+            register_sched_channel(channel)
+    except Exception as e:
+        logit.error(f"Failed to mirror {len(jobs)} jobs to Redis: {e}")
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status='failed', last_error=f"Failed to queue: {e}", modified=timezone.now())
+        raise RuntimeError(f"Failed to queue jobs: {e}")
+
+    logit.info(f"Published {len(jobs)} {func_path} jobs on {channel} "
+               f"({len(queued)} queued, {len(scheduled)} scheduled)")
+
+    try:
+        JobEvent.objects.bulk_create(
+            [JobEvent(job=job, channel=channel, event='queued', details={'queue': queue_key})
+             for job in queued]
+            + [JobEvent(job=job, channel=channel, event='scheduled',
+                        details={'run_at': job.run_at.isoformat()})
+               for job in scheduled],
+            batch_size=PUBLISH_MANY_BATCH_SIZE)
+    except Exception as e:
+        logit.warning(f"Failed to record publish events for {len(jobs)} jobs: {e}")
+
+    try:
+        metrics.record(slug="jobs.published", when=now, count=len(jobs), category="jobs")
+        metrics.record(slug=f"jobs.published.{channel}", when=now, count=len(jobs), category="jobs")
+    except Exception as e:
+        logit.warning(f"Failed to record publish metrics for {len(jobs)} jobs: {e}")
+
+    return job_ids
+
+
 def publish_local(func: Union[str, Callable], *args,
                  run_at: Optional[datetime] = None,
                  delay: Optional[int] = None,
-                 **kwargs) -> str:
+                 local_queue: Optional[str] = None,
+                 **kwargs) -> Optional[str]:
     """
     Publish a job to the local in-process queue.
 
-    Simple approach: spawns a thread that sleeps if delay is specified,
-    then executes the function.
+    Delayed jobs wait in the queue's delay heap, so they never hold up ready
+    jobs; the queue's worker pool runs them (see local_queue.py).
 
     Args:
         func: Job function (module path or callable)
         *args: Positional arguments for the job
         run_at: When to execute the job (None for immediate)
         delay: Delay in seconds before execution (ignored if run_at is provided)
+        local_queue: Named local queue (default "default"); configure
+            workers/maxsize per name in JOBS_LOCAL_QUEUES
         **kwargs: Keyword arguments for the job
 
     Returns:
-        Job ID (for compatibility, though local jobs aren't persistent)
+        Job ID (for compatibility, though local jobs aren't persistent),
+        or None when the queue is full and rejected the job
 
     Raises:
         ImportError: If function cannot be loaded
@@ -677,9 +903,10 @@ def publish_local(func: Union[str, Callable], *args,
         from datetime import timedelta
         run_at = timezone.now() + timedelta(seconds=delay)
 
-    # Queue the job (always succeeds with new simple approach)
-    queue = get_local_queue()
-    queue.put(func_obj, args, kwargs, job_id, run_at=run_at)
+    # Queue the job; a full queue logs and rejects (see LocalQueue.stats())
+    queue = get_local_queue(local_queue or "default")
+    if not queue.put(func_obj, args, kwargs, job_id, run_at=run_at):
+        return None
 
     if run_at:
         logit.info(f"Scheduled local job {job_id} ({func_path}) for {run_at}")
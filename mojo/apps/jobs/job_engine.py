@@ -17,22 +17,23 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set, Tuple
 
-from django.db import close_old_connections
+from django.db import close_old_connections, connections, router
 from django.db.models import F
+from redis.cluster import RedisCluster
 
 from mojo.helpers.settings import settings
 from mojo.helpers import logit
 from .keys import JobKeys
 from .adapters import get_adapter
-from .models import Job, JobEvent
+from .models import Job
 import concurrent.futures
 import importlib
 from threading import Lock, Semaphore
 from typing import Callable
 
-from mojo.apps import metrics
 from mojo.helpers import dates
 from .execution_context import execution
+from .lifecycle import LifecycleWriter
 
 logger = logit.get_logger("jobs", "jobs.log", debug=True)
 
@@ -44,6 +45,36 @@ from . import (
     register_sched_channel,
 )
 
+# Pop up to ARGV[1] ids from the queues KEYS[1..ARGV[3]], in order, recording
+# each in the matching processing ZSET (KEYS[ARGV[3] + i], when passed) at
+# score ARGV[2]. Returns a flat {queue_index, job_id, ...} list.
+CLAIM_JOBS_LUA = """
+local limit = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local nqueues = tonumber(ARGV[3])
+local track = #KEYS > nqueues
+local out = {}
+local claimed = 0
+for i = 1, nqueues do
+    while claimed < limit do
+        local job_id = redis.call('RPOP', KEYS[i])
+        if not job_id then
+            break
+        end
+        if track then
+            redis.call('ZADD', KEYS[nqueues + i], now, job_id)
+        end
+        out[#out + 1] = i
+        out[#out + 1] = job_id
+        claimed = claimed + 1
+    end
+    if claimed >= limit then
+        break
+    end
+end
+return out
+"""
+
 JOBS_ENGINE_CLAIM_BATCH = settings.get_static('JOBS_ENGINE_CLAIM_BATCH', 5)
 JOBS_CHANNELS = settings.get_static('JOBS_CHANNELS', DEFAULT_CHANNELS)
 JOBS_ENGINE_MAX_WORKERS = settings.get_static('JOBS_ENGINE_MAX_WORKERS', 10)
@@ -81,6 +112,43 @@ def load_job_function(func_path: str) -> Callable:
         raise ImportError(f"Cannot load job function '{func_path}': {e}")
 
 
+def claim_pending_job(job_id: str, runner_id: str) -> Optional[Job]:
+    """
+    Atomically move a pending, unexpired job to running and return the row.
+
+    One UPDATE ... RETURNING on PostgreSQL; elsewhere the same
+    compare-and-set followed by a read.
+    Returns None when the row is missing, not pending, or expired.
+    """
+    now = dates.utcnow()
+    db = router.db_for_write(Job)
+    connection = connections[db]
+    if connection.vendor != 'postgresql':
+        claimed = Job.objects.filter(pk=job_id, status='pending').exclude(
+            expires_at__lte=now).update(
+            status='running',
+            started_at=now,
+            runner_id=runner_id,
+            attempt=F('attempt') + 1,
+        )
+        return Job.objects.get(pk=job_id) if claimed else None
+
+    qn = connection.ops.quote_name
+    fields = {f.name: qn(f.column) for f in Job._meta.concrete_fields}
+    stamp = connection.ops.adapt_datetimefield_value(now)
+    sql = (
+        f"UPDATE {qn(Job._meta.db_table)} SET "
+        f"{fields['status']} = %s, {fields['started_at']} = %s, "
+        f"{fields['runner_id']} = %s, {fields['attempt']} = {fields['attempt']} + 1 "
+        f"WHERE {fields['id']} = %s AND {fields['status']} = %s "
+        f"AND ({fields['expires_at']} IS NULL OR {fields['expires_at']} > %s) "
+        f"RETURNING {', '.join(fields.values())}"
+    )
+    rows = list(Job.objects.db_manager(db).raw(
+        sql, ['running', stamp, runner_id, job_id, 'pending', stamp]))
+    return rows[0] if rows else None
+
+
 class JobEngine:
     """
     Job execution engine that runs as a daemon process.
@@ -130,6 +198,7 @@ class JobEngine:
         # Don't claim more than we can execute - let other engines help
         self.max_claimed = self.max_workers
         self.claim_semaphore = Semaphore(self.max_claimed)
+        self._claim_script = None
 
         # Control flags
         self.running = False
@@ -143,6 +212,9 @@ class JobEngine:
         # Control channel listener
         self.control_thread = None
 
+        # Batched JobEvent / metric writes and per-channel event policy
+        self.lifecycle = LifecycleWriter()
+
         # Stats
         self.jobs_processed = 0
         self.jobs_failed = 0
@@ -180,6 +252,9 @@ class JobEngine:
         # Start heartbeat thread
         self._start_heartbeat()
 
+        # Start batched lifecycle writes (events/metrics)
+        self.lifecycle.start()
+
         # Start control listener thread
         self._start_control_listener()
 
@@ -264,6 +339,9 @@ class JobEngine:
             # Shutdown executor
             self.executor.shutdown(wait=True)
 
+        # Write buffered lifecycle events and metrics
+        self.lifecycle.stop()
+
         # Stop heartbeat
         if self.heartbeat_thread and self.heartbeat_thread.is_alive():
             self.heartbeat_thread.join(timeout=5.0)
@@ -583,51 +661,93 @@ class JobEngine:
                 with self.active_lock:
                     active_count = len(self.active_jobs)
 
-                if active_count >= self.max_claimed:
+                free = self.max_claimed - active_count
+                if free <= 0:
                     time.sleep(0.1)
                     continue
 
-                # Compose BRPOP order (priority first)
+                # Compose claim order (priority first)
                 channels_ordered = list(self.channels)
                 if 'priority' in channels_ordered:
                     channels_ordered = ['priority'] + [c for c in channels_ordered if c != 'priority']
-                queue_keys = [self.keys.queue(ch) for ch in channels_ordered]
 
-                # Claim one job at a time to avoid over-claiming
-                popped = self.redis.brpop(queue_keys, timeout=1)
-                if not popped:
-                    continue
-
-                queue_key, job_id = popped
-                # Determine channel from key
-                channel = queue_key.split(':')[-1]
+                # Fill every free slot in one atomic call when work is waiting;
+                # block on BRPOP only when the queues are empty.
+                claimed = self._claim_batch(channels_ordered, free)
+                if not claimed:
+                    queue_keys = [self.keys.queue(ch) for ch in channels_ordered]
+                    popped = self.redis.brpop(queue_keys, timeout=1)
+                    if not popped:
+                        continue
+                    queue_key, job_id = popped
+                    # Determine channel from key
+                    channel = queue_key.split(':')[-1]
+                    # Track in-flight (visibility)
+                    try:
+                        self.redis.zadd(self.keys.processing(channel), {job_id: int(time.time() * 1000)})
+                    except Exception as e:
+                        logger.warning(f"Failed to add job {job_id} to processing ZSET: {e}")
+                    claimed = [(channel, job_id)]
 
-                # Track in-flight (visibility)
-                try:
+                for channel, job_id in claimed:
                     if JOBS_DEBUG:
                         logger.info(f"Claiming job {job_id} from channel {channel}")
-                    self.redis.zadd(self.keys.processing(channel), {job_id: int(time.time() * 1000)})
-                except Exception as e:
-                    logger.warning(f"Failed to add job {job_id} to processing ZSET: {e}")
+                    self._submit_job(channel, job_id)
 
-                # Submit to thread pool
-                future = self.executor.submit(
-                    self.execute_job,
-                    channel, job_id
-                )
+            except Exception as e:
+                logger.error(f"Error in main loop: {e}")
+                time.sleep(0.5)
 
-                with self.active_lock:
-                    self.active_jobs[job_id] = {
-                        'future': future,
-                        'started': dates.utcnow(),
-                        'channel': channel
-                    }
+    def _submit_job(self, channel: str, job_id: str):
+        """Hand a claimed job to the thread pool and track it as active."""
+        future = self.executor.submit(
+            self.execute_job,
+            channel, job_id
+        )
+
+        with self.active_lock:
+            self.active_jobs[job_id] = {
+                'future': future,
+                'started': dates.utcnow(),
+                'channel': channel
+            }
 
-                future.add_done_callback(lambda f, jid=job_id: self._job_completed(jid))
+        future.add_done_callback(lambda f, jid=job_id: self._job_completed(jid))
 
+    def _claim_batch(self, channels: List[str], count: int) -> List[Tuple[str, str]]:
+        """
+        Pop up to `count` job ids across `channels` (in order) with one Lua
+        call, recording each in its channel's processing ZSET in the same
+        script. Returns [(channel, job_id), ...]; [] when the queues are empty
+        or the script fails (the caller then falls back to BRPOP).
+
+        On Redis Cluster the processing ZSETs live in other slots than the
+        {jobs}-tagged queues, so the script only pops and the ZADDs follow in
+        one pipeline.
+        """
+        queue_keys = [self.keys.queue(ch) for ch in channels]
+        processing_keys = [self.keys.processing(ch) for ch in channels]
+        now_ms = int(time.time() * 1000)
+        try:
+            client = self.redis.get_client()
+            if self._claim_script is None:
+                self._claim_script = client.register_script(CLAIM_JOBS_LUA)
+            clustered = isinstance(client, RedisCluster)
+            keys = queue_keys if clustered else queue_keys + processing_keys
+            result = self._claim_script(keys=keys, args=[count, now_ms, len(queue_keys)], client=client)
+        except Exception as e:
+            logger.warning(f"Batch claim failed, falling back to BRPOP: {e}")
+            return []
+
+        claimed = [(channels[int(result[i]) - 1], result[i + 1]) for i in range(0, len(result), 2)]
+        if claimed and clustered:
+            try:
+                with self.redis.pipeline(transaction=False) as pipe:
+                    for channel, job_id in claimed:
+                        pipe.zadd(self.keys.processing(channel), {job_id: now_ms})
             except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                time.sleep(0.5)
+                logger.warning(f"Failed to add {len(claimed)} claimed jobs to processing ZSETs: {e}")
+        return claimed
 
     def claim_jobs_by_channel(self, channel: str, count: int) -> List[Tuple[str, str, str]]:
         """Plan B: not used. Kept for compatibility."""
@@ -663,17 +783,17 @@ class JobEngine:
         """Execute job and handle all state updates (Plan B)."""
         job = None
         try:
-            # Load job from database
-            if JOBS_DEBUG:
-                logger.info(f"Loading job {job_id} from database...")
             close_old_connections()
             if JOBS_DEBUG:
-                logger.info(f"Loading job {job_id} before durable claim...")
-            # The compare-and-set below is the execution lock. Redis delivery
+                logger.info(f"Claiming job {job_id} from database...")
+            # The compare-and-set claim is the execution lock. Redis delivery
             # is intentionally treated as at-least-once.
-            job = Job.objects.get(id=job_id)
-            if JOBS_DEBUG:
-                logger.info(f"Successfully loaded job {job_id} from database")
+            job = claim_pending_job(job_id, self.runner_id)
+            if job is None:
+                # Not claimable: explain why from the row (gone, already
+                # claimed/finished, or expired) on this — the rare — path.
+                self._unclaimable_job(channel, job_id)
+                return
         except Exception as e:
             logger.exception(f"Failed to load job {job_id}: {e}")
             # Remove from processing to avoid leak
@@ -686,61 +806,8 @@ class JobEngine:
         try:
             if JOBS_DEBUG:
                 logger.info(f"Executing job {job_id} from channel {channel}")
-            # Only one Redis delivery may claim a pending row. Duplicate queue
-            # entries can occur after an ambiguous Redis write or a reaper
-            # retry; the database transition is the execution fence.
-            if job.status != 'pending':
-                self._remove_from_processing(channel, job_id)
-                return
-
-            # Check expiration
-            if job.is_expired:
-                job.status = 'expired'
-                job.finished_at = dates.utcnow()
-                job.save(update_fields=['status', 'finished_at'])
-
-                # Event: expired
-                try:
-                    JobEvent.objects.create(
-                        job=job,
-                        channel=job.channel,
-                        event='expired',
-                        runner_id=self.runner_id,
-                        attempt=job.attempt,
-                        details={'reason': 'job_expired_before_execution'}
-                    )
-                except Exception:
-                    pass
-
-                # Remove from processing after DB update
-                self._remove_from_processing(channel, job_id)
-                metrics.record("jobs.expired")
-                return
-
-            started_at = dates.utcnow()
-            claimed = Job.objects.filter(pk=job_id, status='pending').update(
-                status='running',
-                started_at=started_at,
-                runner_id=self.runner_id,
-                attempt=F('attempt') + 1,
-            )
-            if not claimed:
-                self._remove_from_processing(channel, job_id)
-                return
-            job.refresh_from_db()
-
-            # Event: running
-            try:
-                JobEvent.objects.create(
-                    job=job,
-                    channel=job.channel,
-                    event='running',
-                    runner_id=self.runner_id,
-                    attempt=job.attempt,
-                    details={'queue': self.keys.queue(channel)}
-                )
-            except Exception:
-                pass
+            self.lifecycle.event(job, 'running', self.runner_id,
+                                 {'queue': self.keys.queue(channel)})
 
             # Load and execute function
             func = load_job_function(job.func)
@@ -754,28 +821,14 @@ class JobEngine:
             job.status = 'completed'
             job.finished_at = dates.utcnow()
             job.save(update_fields=['status', 'finished_at', 'metadata'])
-            if JOBS_DEBUG:
-                logger.info(f"Job {job.id} completed")
-            # Event: completed
-            try:
-                JobEvent.objects.create(
-                    job=job,
-                    channel=job.channel,
-                    event='completed',
-                    runner_id=self.runner_id,
-                    attempt=job.attempt,
-                    details={}
-                )
-            except Exception:
-                pass
+            self.lifecycle.event(job, 'completed', self.runner_id)
 
             # Remove from processing after DB update with retries to prevent reaper issues
             self._remove_from_processing(channel, job_id)
 
             # Metrics
-            metrics.record("jobs.completed", count=1)
-            metrics.record(f"jobs.channel.{job.channel}.completed", category="jobs_channels", count=1)
-            # metrics.record("jobs.duration_ms", count=job.duration_ms)
+            self.lifecycle.metric("jobs.completed")
+            self.lifecycle.metric(f"jobs.channel.{job.channel}.completed", category="jobs_channels")
 
         except Exception as e:
             try:
@@ -785,6 +838,27 @@ class JobEngine:
                 pass
             self._handle_job_failure(job_id, channel, e)
 
+    def _unclaimable_job(self, channel: str, job_id: str):
+        """Settle a delivery whose row could not be claimed."""
+        try:
+            job = Job.objects.get(id=job_id)
+        except Job.DoesNotExist:
+            logger.error(f"Failed to load job {job_id}: job does not exist")
+            self._remove_from_processing(channel, job_id)
+            return
+
+        # Only one Redis delivery may claim a pending row. Duplicate queue
+        # entries can occur after an ambiguous Redis write or a reaper
+        # retry; the database transition is the execution fence.
+        if job.status == 'pending' and job.is_expired:
+            expired = Job.objects.filter(pk=job_id, status='pending').update(
+                status='expired', finished_at=dates.utcnow())
+            if expired:
+                self.lifecycle.event(job, 'expired', self.runner_id,
+                                     {'reason': 'job_expired_before_execution'})
+                self.lifecycle.metric("jobs.expired")
+        self._remove_from_processing(channel, job_id)
+
     def _handle_job_failure(self, job_id: str, channel: str, error: Exception):
         """Handle job failure with retries (Plan B)."""
         try:
@@ -811,17 +885,8 @@ class JobEngine:
                 ])
 
                 # Event: retry scheduled
-                try:
-                    JobEvent.objects.create(
-                        job=job,
-                        channel=job.channel,
-                        event='retry',
-                        runner_id=self.runner_id,
-                        attempt=job.attempt,
-                        details={'reason': 'failure', 'next_run_at': job.run_at.isoformat()}
-                    )
-                except Exception:
-                    pass
+                self.lifecycle.event(job, 'retry', self.runner_id,
+                                     {'reason': 'failure', 'next_run_at': job.run_at.isoformat()})
 
                 # Add to scheduled ZSET (route by broadcast)
                 score = job.run_at.timestamp() * 1000
@@ -832,7 +897,7 @@ class JobEngine:
                 # box holds the scheduler lock promotes it back onto the queue.
                 register_sched_channel(job.channel)
 
-                metrics.record("jobs.retried")
+                self.lifecycle.metric("jobs.retried")
             else:
                 # Max retries exceeded
                 job.status = 'failed'
@@ -842,20 +907,10 @@ class JobEngine:
                 ])
 
                 # Event: failed
-                try:
-                    JobEvent.objects.create(
-                        job=job,
-                        channel=job.channel,
-                        event='failed',
-                        runner_id=self.runner_id,
-                        attempt=job.attempt,
-                        details={'error': job.last_error}
-                    )
-                except Exception:
-                    pass
+                self.lifecycle.event(job, 'failed', self.runner_id, {'error': job.last_error})
 
-                metrics.record("jobs.failed")
-                metrics.record(f"jobs.channel.{job.channel}.failed")
+                self.lifecycle.metric("jobs.failed")
+                self.lifecycle.metric(f"jobs.channel.{job.channel}.failed")
 
             # Always remove from processing to prevent leaks - critical for reaper
             self._remove_from_processing(channel, job_id)
@@ -921,11 +976,7 @@ class JobEngine:
                                     job.status = 'expired'
                                     job.finished_at = dates.utcnow()
                                     job.save(update_fields=['status', 'finished_at'])
-                                    JobEvent.objects.create(
-                                        job=job, channel=ch, event='expired',
-                                        runner_id=self.runner_id, attempt=job.attempt,
-                                        details={'reason': 'reaper_expired'}
-                                    )
+                                    self.lifecycle.event(job, 'expired', self.runner_id, {'reason': 'reaper_expired'})
                                     continue
 
                                 # Check retry limits (prevent infinite requeuing)
@@ -940,11 +991,7 @@ class JobEngine:
                                     # lease ran out with no retry available.
                                     job.last_error = "in-flight lease expired and the job is not retryable"
                                     job.save(update_fields=['status', 'finished_at', 'last_error'])
-                                    JobEvent.objects.create(
-                                        job=job, channel=ch, event='failed',
-                                        runner_id=self.runner_id, attempt=job.attempt,
-                                        details={'reason': 'reaper_max_retries_exceeded'}
-                                    )
+                                    self.lifecycle.event(job, 'failed', self.runner_id, {'reason': 'reaper_max_retries_exceeded'})
                                     continue
 
                                 # Job can be retried. Return the durable row to
@@ -966,11 +1013,7 @@ class JobEngine:
                                 self._remove_from_processing(ch, jid)
                                 self.redis.rpush(self.keys.queue(ch), jid)
 
-                                JobEvent.objects.create(
-                                    job=job, channel=ch, event='retry',
-                                    runner_id=self.runner_id, attempt=job.attempt,
-                                    details={'reason': 'reaper_timeout'}
-                                )
+                                self.lifecycle.event(job, 'retry', self.runner_id, {'reason': 'reaper_timeout'})
                                 logger.info(f"Reaper requeued stale job {jid} on {ch} (attempt {job.attempt}/{job.max_retries})")
 
                             except Job.DoesNotExist:
@@ -0,0 +1,163 @@
+"""
+Runner-side lifecycle bookkeeping for JobEngine.
+
+Two knobs keep the per-job overhead of short jobs low:
+
+- Event policy, per channel. "full" records every lifecycle JobEvent
+  (running, completed, retry, failed, expired); "failures" records only the
+  ones that need a human (retry, failed, expired); "none" records nothing.
+  The Job row itself is always kept current — the policy only governs the
+  JobEvent audit trail. JOBS_EVENT_POLICY sets the default and
+  JOBS_CHANNEL_EVENT_POLICY overrides it per channel.
+
+- LifecycleWriter, which coalesces JobEvent rows and metric counters and
+  writes them from a background thread: one bulk_create per
+  JOBS_EVENT_FLUSH_SIZE events (or every JOBS_EVENT_FLUSH_INTERVAL seconds)
+  and one metrics.record per slug per flush, with the summed count. Until
+  start() is called — in-process tooling and tests calling
+  JobEngine.execute_job directly — writes go straight through.
+"""
+import threading
+from collections import Counter
+
+from django.db import close_old_connections
+
+from mojo.apps import metrics
+from mojo.helpers import logit
+from mojo.helpers.settings import settings
+
+from .models import JobEvent
+
+logger = logit.get_logger("jobs", "jobs.log", debug=True)
+
+EVENT_POLICY_FULL = "full"
+EVENT_POLICY_FAILURES = "failures"
+EVENT_POLICY_NONE = "none"
+EVENT_POLICIES = (EVENT_POLICY_FULL, EVENT_POLICY_FAILURES, EVENT_POLICY_NONE)
+FAILURE_EVENTS = frozenset(("retry", "failed", "expired"))
+
+JOBS_EVENT_POLICY = settings.get_static('JOBS_EVENT_POLICY', EVENT_POLICY_FULL)
+JOBS_CHANNEL_EVENT_POLICY = settings.get_static('JOBS_CHANNEL_EVENT_POLICY', {})
+JOBS_EVENT_FLUSH_INTERVAL = settings.get_static('JOBS_EVENT_FLUSH_INTERVAL', 1.0)
+JOBS_EVENT_FLUSH_SIZE = settings.get_static('JOBS_EVENT_FLUSH_SIZE', 500)
+
+
+def event_policy(channel: str) -> str:
+    """The JobEvent policy for `channel`; unknown values fall back to "full"."""
+    policy = (JOBS_CHANNEL_EVENT_POLICY or {}).get(channel, JOBS_EVENT_POLICY)
+    return policy if policy in EVENT_POLICIES else EVENT_POLICY_FULL
+
+
+def records_event(channel: str, event: str) -> bool:
+    """True if `channel`'s policy keeps JobEvent rows of kind `event`."""
+    policy = event_policy(channel)
+    if policy == EVENT_POLICY_FULL:
+        return True
+    if policy == EVENT_POLICY_FAILURES:
+        return event in FAILURE_EVENTS
+    return False
+
+
+class LifecycleWriter:
+    """Coalesces JobEvent rows and metric counts; see the module docstring."""
+
+    def __init__(self, flush_interval=None, batch_size=None):
+        self.flush_interval = max(0.01, float(flush_interval or JOBS_EVENT_FLUSH_INTERVAL))
+        self.batch_size = max(1, int(batch_size or JOBS_EVENT_FLUSH_SIZE))
+        self.thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._events = []
+        self._metrics = Counter()
+
+    @property
+    def started(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.started:
+            return
+        self._stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="JobLifecycleWriter", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flush everything pending and stop the thread."""
+        if self.started:
+            self._stopping.set()
+            self._wake.set()
+            self.thread.join(timeout)
+        self.flush()
+
+    def event(self, job, event: str, runner_id: str, details=None):
+        """Record a JobEvent for `job` if its channel's policy keeps `event`."""
+        if not records_event(job.channel, event):
+            return
+        row = JobEvent(
+            job_id=job.id,
+            channel=job.channel,
+            event=event,
+            runner_id=runner_id,
+            attempt=job.attempt,
+            details=details or {},
+        )
+        if not self.started:
+            try:
+                row.save(force_insert=True)
+            except Exception as e:
+                logger.warning(f"Failed to record {event} event for job {job.id}: {e}")
+            return
+        with self._lock:
+            self._events.append(row)
+            full = len(self._events) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def metric(self, slug: str, category=None, count: int = 1):
+        """Increment a metrics counter, coalesced per flush once started."""
+        if not self.started:
+            try:
+                metrics.record(slug, category=category, count=count)
+            except Exception as e:
+                logger.warning(f"Failed to record metric {slug}: {e}")
+            return
+        with self._lock:
+            self._metrics[(slug, category)] += count
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events) + len(self._metrics)
+
+    def run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"Job lifecycle flush failed: {e}")
+
+    def flush(self):
+        """Write everything buffered so far."""
+        with self._lock:
+            rows, self._events = self._events, []
+            counts, self._metrics = self._metrics, Counter()
+        if rows:
+            close_old_connections()
+            try:
+                JobEvent.objects.bulk_create(rows, batch_size=self.batch_size)
+            except Exception as e:
+                # A job deleted mid-batch breaks the FK for its row only.
+                logger.warning(f"Bulk JobEvent write failed, retrying row by row: {e}")
+                close_old_connections()
+                for row in rows:
+                    try:
+                        row.save(force_insert=True)
+                    except Exception:
+                        pass
+        for (slug, category), count in counts.items():
+            try:
+                metrics.record(slug, category=category, count=count)
+            except Exception as e:
+                logger.warning(f"Failed to record metric {slug}: {e}")
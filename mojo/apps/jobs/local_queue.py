@@ -1,14 +1,24 @@
 """
 Local in-process job queue for lightweight tasks.
 
-No persistence, no retries, no distribution - just a simple
-single worker thread with a queue for ultra-short work.
+No persistence, no retries, no distribution - just a bounded ready queue,
+a delay heap served by one timer thread, and a small worker pool for
+ultra-short work.
+
+Delayed jobs wait in the heap, not in a worker, so a publish_local(delay=60)
+never holds up the jobs behind it. Each named queue has its own worker count
+(its concurrency limit) and size bound; JOBS_LOCAL_QUEUES configures extra
+queues, e.g. {"io": {"workers": 8, "maxsize": 5000}}. The default queue uses
+JOBS_LOCAL_QUEUE_WORKERS (1 — strictly sequential, as it always was) and
+JOBS_LOCAL_QUEUE_MAXSIZE.
 """
+import heapq
+import itertools
 import queue
 import threading
 import traceback
 import time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -18,6 +28,9 @@ from django.utils import timezone
 from mojo.helpers import logit
 
 
+DEFAULT_QUEUE = "default"
+
+
 @dataclass
 class LocalJob:
     """Container for a local job."""
@@ -28,82 +41,125 @@ class LocalJob:
     delay_seconds: float = 0.0
 
 
+def _int_setting(value, default: int) -> int:
+    try:
+        if value is None:
+            return default
+        return int(value)
+    except Exception:
+        return default
+
+
 class LocalQueue:
     """
-    Simple in-process job queue with single worker thread.
+    In-process job queue with a delay heap and a worker pool.
 
     For ultra-lightweight tasks that don't need persistence,
-    retries, or distributed execution. Uses time.sleep() for delays.
+    retries, or distributed execution. `maxsize` bounds ready and delayed
+    jobs together; put() rejects (and counts) jobs past it.
     """
 
-    def __init__(self, maxsize: Optional[int] = None):
+    def __init__(self, maxsize: Optional[int] = None, workers: Optional[int] = None,
+                 name: str = DEFAULT_QUEUE):
         """
         Initialize the local queue.
 
         Args:
-            maxsize: Maximum queue size (default from settings or 1000)
+            maxsize: Maximum pending jobs, ready plus delayed (default from
+                settings or 1000)
+            workers: Worker threads, i.e. how many jobs run at once
+                (default JOBS_LOCAL_QUEUE_WORKERS or 1)
+            name: Queue name, used in thread names and logs
         """
         if maxsize is None:
             maxsize = settings.get('JOBS_LOCAL_QUEUE_MAXSIZE', 1000)
-        try:
-            if maxsize is None:
-                maxsize = 1000
-            maxsize = int(maxsize)
-        except Exception:
-            maxsize = 1000
-
-        self.queue = queue.Queue(maxsize=maxsize)
-        self.worker_thread = None
+        if workers is None:
+            workers = settings.get('JOBS_LOCAL_QUEUE_WORKERS', 1)
+
+        self.name = name
+        self.maxsize = max(1, _int_setting(maxsize, 1000))
+        self.workers = max(1, _int_setting(workers, 1))
+        self.queue = queue.Queue()
+        self.worker_threads = []
+        self.timer_thread = None
         self.stop_event = threading.Event()
         self.started = False
         self._lock = threading.RLock()
+        self._timer_cond = threading.Condition(self._lock)
+        self._delayed = []  # heap of (due monotonic time, seq, LocalJob)
+        self._seq = itertools.count()
+        self._active = 0
         self._processed_count = 0
         self._error_count = 0
+        self._rejected_count = 0
+        self._high_water = 0
+
+    @property
+    def worker_thread(self):
+        """First worker thread (kept for callers of the single-worker queue)."""
+        return self.worker_threads[0] if self.worker_threads else None
 
     def start(self):
-        """Start the worker thread."""
+        """Start the timer and worker threads."""
         with self._lock:
             if self.started:
                 return
 
             self.stop_event.clear()
-            self.worker_thread = threading.Thread(
-                target=self._worker,
-                name="LocalJobWorker",
-                daemon=True  # Dies with main process
+            self.worker_threads = [
+                threading.Thread(
+                    target=self._worker,
+                    name=f"LocalJobWorker-{self.name}-{i}",
+                    daemon=True  # Dies with main process
+                )
+                for i in range(self.workers)
+            ]
+            for thread in self.worker_threads:
+                thread.start()
+            self.timer_thread = threading.Thread(
+                target=self._timer,
+                name=f"LocalJobTimer-{self.name}",
+                daemon=True
             )
-            self.worker_thread.start()
+            self.timer_thread.start()
             self.started = True
-            logit.info("Local job queue worker started")
+            logit.info(f"Local job queue {self.name} started ({self.workers} workers)")
 
     def stop(self, timeout: float = 5.0):
         """
-        Stop the worker thread gracefully.
+        Stop the worker threads gracefully. Jobs still waiting are dropped.
 
         Args:
-            timeout: Maximum time to wait for thread to stop
+            timeout: Maximum time to wait for the threads to stop
         """
         with self._lock:
             if not self.started:
                 return
 
-            logit.info("Stopping local job queue worker...")
+            logit.info(f"Stopping local job queue {self.name}...")
             self.stop_event.set()
+            self._delayed.clear()
+            self._timer_cond.notify_all()
 
-            # Put a sentinel to unblock the worker if waiting
-            try:
-                self.queue.put_nowait(None)  # Sentinel value
-            except queue.Full:
-                pass
+        # One sentinel per worker to unblock any that are waiting
+        for _ in self.worker_threads:
+            self.queue.put_nowait(None)
 
-            if self.worker_thread and self.worker_thread.is_alive():
-                self.worker_thread.join(timeout)
-                if self.worker_thread.is_alive():
-                    logit.warn("Local job worker thread did not stop cleanly")
+        deadline = time.monotonic() + timeout
+        for thread in self.worker_threads + [self.timer_thread]:
+            if thread and thread.is_alive():
+                thread.join(max(0.0, deadline - time.monotonic()))
+                if thread.is_alive():
+                    logit.warn(f"Local job thread {thread.name} did not stop cleanly")
 
+        with self._lock:
+            # Leftover sentinels (and undelivered jobs) must not reach the
+            # workers of a later start().
+            with self.queue.mutex:
+                self.queue.queue.clear()
             self.started = False
-            logit.info(f"Local job queue stopped (processed={self._processed_count}, "
-                      f"errors={self._error_count})")
+        logit.info(f"Local job queue {self.name} stopped (processed={self._processed_count}, "
+                   f"errors={self._error_count})")
 
     def put(self, func: Callable, args: tuple, kwargs: dict,
             job_id: str, run_at: Optional[datetime] = None) -> bool:
@@ -138,47 +194,82 @@ class LocalQueue:
             delay_seconds=delay_seconds
         )
 
-        try:
-            self.queue.put_nowait(job)
-            return True
-        except queue.Full:
-            logit.warn(f"Local job queue is full, rejecting job {job_id}")
-            return False
+        with self._lock:
+            pending = self.queue.qsize() + len(self._delayed)
+            if pending >= self.maxsize:
+                self._rejected_count += 1
+                logit.warn(f"Local job queue {self.name} is full, rejecting job {job_id}")
+                return False
+            self._high_water = max(self._high_water, pending + 1)
+            if delay_seconds > 0:
+                due = time.monotonic() + delay_seconds
+                heapq.heappush(self._delayed, (due, next(self._seq), job))
+                # Wake the timer only if this job is now the earliest
+                if self._delayed[0][2] is job:
+                    self._timer_cond.notify()
+            else:
+                self.queue.put_nowait(job)
+        return True
 
     def size(self) -> int:
-        """Get current queue size."""
-        return self.queue.qsize()
+        """Get current queue size (ready plus delayed jobs)."""
+        with self._lock:
+            return self.queue.qsize() + len(self._delayed)
 
     def is_empty(self) -> bool:
         """Check if queue is empty."""
-        return self.queue.empty()
+        return self.size() == 0
 
     def stats(self) -> dict:
         """
         Get queue statistics.
 
         Returns:
-            Dict with queue stats
+            Dict with queue stats. `size` counts ready plus delayed jobs;
+            `rejected` counts put() calls refused because the queue was full
+            and `high_water` is the largest backlog seen; `busy` is the
+            number of workers running a job right now.
         """
         with self._lock:
+            ready = self.queue.qsize()
+            delayed = len(self._delayed)
             return {
-                'size': self.size(),
-                'maxsize': self.queue.maxsize,
+                'name': self.name,
+                'size': ready + delayed,
+                'ready': ready,
+                'delayed': delayed,
+                'maxsize': self.maxsize,
+                'utilization': round((ready + delayed) / self.maxsize, 3),
+                'high_water': self._high_water,
+                'rejected': self._rejected_count,
+                'workers': self.workers,
+                'busy': self._active,
                 'processed': self._processed_count,
                 'errors': self._error_count,
                 'running': self.started,
-                'worker_alive': self.worker_thread.is_alive() if self.worker_thread else False
+                'worker_alive': any(t.is_alive() for t in self.worker_threads)
             }
 
+    def _timer(self):
+        """Move delayed jobs onto the ready queue as they come due."""
+        with self._lock:
+            while not self.stop_event.is_set():
+                if not self._delayed:
+                    self._timer_cond.wait()
+                    continue
+                wait = self._delayed[0][0] - time.monotonic()
+                if wait > 0:
+                    self._timer_cond.wait(wait)
+                    continue
+                _, _, job = heapq.heappop(self._delayed)
+                self.queue.put_nowait(job)
+
     def _worker(self):
         """
         Worker thread main loop.
 
-        Continuously processes jobs from the queue until stopped.
-        Simple approach: get job, sleep if needed, execute, repeat.
+        Continuously processes ready jobs until stopped.
         """
-        logit.info("Local job worker thread started")
-
         while not self.stop_event.is_set():
             try:
                 # Get job from queue with timeout
@@ -191,27 +282,18 @@ class LocalQueue:
                 if job is None:
                     logit.debug("Worker received shutdown sentinel")
                     break
-
-                # Sleep if job has a delay
-                if job.delay_seconds > 0:
-                    logit.debug(f"Job {job.job_id} sleeping for {job.delay_seconds:.2f}s")
-
-                    # Sleep in small chunks to allow for quick shutdown
-                    sleep_remaining = job.delay_seconds
-                    while sleep_remaining > 0 and not self.stop_event.is_set():
-                        sleep_time = min(0.1, sleep_remaining)  # Sleep max 100ms at a time
-                        time.sleep(sleep_time)
-                        sleep_remaining -= sleep_time
-
-                    # If we were asked to stop during sleep, break
-                    if self.stop_event.is_set():
-                        break
-
-                # Execute the job
-                self._execute_job(job)
+                if self.stop_event.is_set():
+                    break
 
                 with self._lock:
-                    self._processed_count += 1
+                    self._active += 1
+                try:
+                    # Execute the job
+                    self._execute_job(job)
+                finally:
+                    with self._lock:
+                        self._active -= 1
+                        self._processed_count += 1
 
                 # Mark task as done for queue.join() if anyone uses it
                 self.queue.task_done()
@@ -223,8 +305,6 @@ class LocalQueue:
                 with self._lock:
                     self._error_count += 1
 
-        logit.info("Local job worker thread exiting")
-
     def _execute_job(self, job: LocalJob):
         """
         Execute a single job.
@@ -302,41 +382,55 @@ class LocalQueue:
 
 class LocalQueueManager:
     """
-    Manager for local queue singleton.
+    Manager for the named local queues.
 
-    Ensures only one queue instance exists per process.
+    Ensures only one queue instance exists per name per process. Queues
+    other than "default" take their workers/maxsize from JOBS_LOCAL_QUEUES.
     """
 
     def __init__(self):
-        self._queue = None
+        self._queues: Dict[str, LocalQueue] = {}
         self._lock = threading.RLock()
 
-    def get_queue(self) -> LocalQueue:
+    def get_queue(self, name: str = DEFAULT_QUEUE) -> LocalQueue:
         """
-        Get or create the local queue instance.
+        Get or create the local queue instance for `name`.
 
         Returns:
             LocalQueue instance
         """
         with self._lock:
-            if self._queue is None:
-                self._queue = LocalQueue()
-            return self._queue
+            local_queue = self._queues.get(name)
+            if local_queue is None:
+                config = (settings.get('JOBS_LOCAL_QUEUES', {}) or {}).get(name, {})
+                local_queue = self._queues[name] = LocalQueue(
+                    maxsize=config.get('maxsize'),
+                    workers=config.get('workers'),
+                    name=name,
+                )
+            return local_queue
+
+    def stats(self) -> Dict[str, dict]:
+        """stats() of every queue created so far, by name."""
+        with self._lock:
+            queues = dict(self._queues)
+        return {name: q.stats() for name, q in queues.items()}
 
     def stop_queue(self, timeout: float = 5.0):
         """
-        Stop the local queue if running.
+        Stop every local queue that is running.
 
         Args:
-            timeout: Maximum time to wait for stop
+            timeout: Maximum time to wait for each stop
         """
         with self._lock:
-            if self._queue:
-                self._queue.stop(timeout)
-                self._queue = None
+            queues = list(self._queues.values())
+            self._queues = {}
+        for local_queue in queues:
+            local_queue.stop(timeout)
 
     def reset(self):
-        """Reset the queue (useful for testing)."""
+        """Reset the queues (useful for testing)."""
         self.stop_queue()
 
 
@@ -344,19 +438,27 @@ class LocalQueueManager:
 _manager = LocalQueueManager()
 
 
-def get_local_queue() -> LocalQueue:
+def get_local_queue(name: str = DEFAULT_QUEUE) -> LocalQueue:
     """
-    Get the local job queue instance.
+    Get a local job queue instance.
+
+    Args:
+        name: Queue name (default "default")
 
     Returns:
-        LocalQueue singleton
+        LocalQueue singleton for that name
     """
-    return _manager.get_queue()
+    return _manager.get_queue(name)
+
+
+def local_queue_stats() -> Dict[str, dict]:
+    """Backpressure stats for every local queue in this process."""
+    return _manager.stats()
 
 
 def stop_local_queue(timeout: float = 5.0):
     """
-    Stop the local job queue.
+    Stop the local job queues.
 
     Args:
         timeout: Maximum time to wait
@@ -365,5 +467,5 @@ def stop_local_queue(timeout: float = 5.0):
 
 
 def reset_local_queue():
-    """Reset the local queue (useful for testing)."""
+    """Reset the local queues (useful for testing)."""
     _manager.reset()
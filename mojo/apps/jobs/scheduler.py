@@ -12,11 +12,12 @@ import json
 import uuid
 import random
 import threading
-from datetime import datetime, timedelta
-from typing import List, Optional, Set, Dict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Optional, Set
 
 from django.utils import timezone
 from django.db import close_old_connections
+from redis.cluster import RedisCluster
 from mojo.helpers.settings import settings
 
 from mojo.helpers import logit
@@ -33,6 +34,43 @@ JOBS_SCHEDULER_LOCK_TTL_MS = settings.get_static('JOBS_SCHEDULER_LOCK_TTL_MS', 5
 JOBS_STREAM_MAXLEN = settings.get_static('JOBS_STREAM_MAXLEN', 100000)
 JOBS_DEBUG = settings.get_static('JOBS_DEBUG', False)
 
+# Due ids moved per sched ZSET per script call. A channel that fills a batch
+# goes round again in the same pass; the cap keeps each script short so Redis
+# is never blocked for long by a large backlog.
+JOBS_SCHEDULER_PROMOTE_BATCH = settings.get_static('JOBS_SCHEDULER_PROMOTE_BATCH', 1000)
+# Ids per RPUSH/ZREM and per bulk JobEvent INSERT.
+PUSH_CHUNK = 500
+
+# KEYS[1..ARGV[3]] are sched ZSETs; KEYS[ARGV[3] + 1], when passed, is the
+# queue LIST. Moves up to ARGV[2] ids scored <= ARGV[1] out of each ZSET (and
+# onto the queue, oldest first). Returns a flat {zset_index, job_id, score}
+# list of everything removed.
+PROMOTE_DUE_LUA = """
+local now = ARGV[1]
+local limit = tonumber(ARGV[2])
+local nsets = tonumber(ARGV[3])
+local queue = KEYS[nsets + 1]
+local out = {}
+for k = 1, nsets do
+    local due = redis.call('ZRANGEBYSCORE', KEYS[k], '-inf', now, 'WITHSCORES', 'LIMIT', 0, limit)
+    local ids = {}
+    for i = 1, #due, 2 do
+        ids[#ids + 1] = due[i]
+        out[#out + 1] = k
+        out[#out + 1] = due[i]
+        out[#out + 1] = due[i + 1]
+    end
+    for i = 1, #ids, 500 do
+        local chunk = {unpack(ids, i, math.min(i + 499, #ids))}
+        redis.call('ZREM', KEYS[k], unpack(chunk))
+        if queue then
+            redis.call('RPUSH', queue, unpack(chunk))
+        end
+    end
+end
+return out
+"""
+
 # How often auto mode re-reads the sched registry. Cheap (one SMEMBERS on a
 # handful of names), but it runs inside the loop that must renew a 5s
 # leadership lock, so it is not done every cycle.
@@ -82,6 +120,8 @@ class Scheduler:
         self.stop_event = threading.Event()
         self.has_lock = False
 
+        self._promote_script = None
+
         # Stats
         self.jobs_scheduled = 0
         self.jobs_expired = 0
@@ -351,13 +391,12 @@ class Scheduler:
         # Close old DB connections at start
         close_old_connections()
 
-        for channel in self.channels:
-            try:
-                self._process_channel(channel, now, now_ms)
-            except Exception as e:
-                logger.error(f"Failed to process channel {channel}: {e}")
+        try:
+            self._promote(self.channels, now_ms)
+        except Exception as e:
+            logger.error(f"Failed to promote scheduled jobs: {e}")
 
-    def _process_channel(self, channel: str, now: datetime, now_ms: float):
+    def _process_channel(self, channel: str, now: datetime, now_ms: float) -> int:
         """
         Process scheduled jobs for a single channel.
 
@@ -365,103 +404,136 @@ class Scheduler:
             channel: Channel name
             now: Current datetime
             now_ms: Current time in milliseconds
+
+        Returns:
+            Number of jobs promoted onto the channel's queue
+        """
+        return self._promote([channel], now_ms)
+
+    def _promote(self, channels: List[str], now_ms: float) -> int:
+        """
+        Move every due job of `channels` from sched/sched_broadcast onto the
+        channel queue, then record their 'queued' events in one bulk insert.
+
+        Each round moves up to JOBS_SCHEDULER_PROMOTE_BATCH ids per ZSET with
+        a server-side script; channels that filled a batch go round again.
         """
-        # Skip channel if paused
+        channels = self._unpaused_channels(channels)
+        promoted = []
+        while channels:
+            saturated = []
+            for channel, entries in self._promote_round(channels, now_ms):
+                promoted.extend(entries)
+                counts = (sum(1 for e in entries if not e[3]), sum(1 for e in entries if e[3]))
+                if max(counts) >= JOBS_SCHEDULER_PROMOTE_BATCH:
+                    saturated.append(channel)
+            channels = saturated
+
+        self.jobs_scheduled += len(promoted)
+        self._record_queued(promoted)
+        return len(promoted)
+
+    def _unpaused_channels(self, channels: List[str]) -> List[str]:
+        """`channels` minus the paused ones, read in one pipeline."""
         try:
-            if self.redis.get(self.keys.channel_pause(channel)):
-                return
+            pipe = self.redis.get_client().pipeline(transaction=False)
+            for channel in channels:
+                pipe.get(self.keys.channel_pause(channel))
+            paused = pipe.execute()
         except Exception:
-            pass
-        # Process non-broadcast delayed jobs (Plan B: enqueue to List queue)
-        sched_key = self.keys.sched(channel)
-        while True:
-            results = self.redis.zpopmin(sched_key, count=10)
-            if not results:
-                break
-            not_due: Dict[str, float] = {}
-            for job_id, score in results:
-                if score > now_ms:
-                    # Collect not-due items to reinsert after the loop
-                    not_due[job_id] = score
-                else:
-                    queue_key = self.keys.queue(channel)
-                    # Enqueue to List queue
-                    try:
-                        self.redis.rpush(queue_key, job_id)
-                    except Exception as e:
-                        logger.error(f"Failed to enqueue job {job_id} to queue {queue_key}: {e}")
-                        # If enqueue fails, reinsert back to sched to avoid loss
-                        not_due[job_id] = score
-                        continue
-                    # Record DB event
-                    try:
-                        job = Job.objects.get(id=job_id)
-                        scheduled_at_dt = datetime.fromtimestamp(score / 1000.0)
-                        if timezone.is_naive(scheduled_at_dt):
-                            scheduled_at_dt = timezone.make_aware(scheduled_at_dt)
-                        if JOBS_DEBUG:
-                            print(f"Job {job_id} scheduled at {scheduled_at_dt}")
-                        JobEvent.objects.create(
-                            job=job,
-                            channel=channel,
-                            event='queued',
-                            details={
-                                'scheduler_id': self.scheduler_id,
-                                'queue': queue_key,
-                                'scheduled_at': scheduled_at_dt.isoformat()
-                            }
-                        )
-                    except Exception as e:
-                        logger.warn(f"Failed to record queued event for {job_id}: {e}")
-                    self.jobs_scheduled += 1
-            # Re-add all not-due jobs and break (remaining entries are ordered)
-            if not_due:
-                self.redis.zadd(sched_key, not_due)
-                break
-
-        # Process broadcast delayed jobs (Plan B: if broadcast retained, enqueue to same queue or a special one)
-        sched_b_key = self.keys.sched_broadcast(channel)
-        while True:
-            results = self.redis.zpopmin(sched_b_key, count=10)
-            if not results:
-                break
-            not_due_b: Dict[str, float] = {}
-            for job_id, score in results:
-                if score > now_ms:
-                    not_due_b[job_id] = score
-                else:
-                    # For simplicity, enqueue broadcast to the same queue; adjust if broadcast logic changes
-                    queue_key = self.keys.queue(channel)
-                    try:
-                        self.redis.rpush(queue_key, job_id)
-                    except Exception as e:
-                        logger.error(f"Failed to enqueue broadcast job {job_id} to queue {queue_key}: {e}")
-                        not_due_b[job_id] = score
-                        continue
-                    try:
-                        job = Job.objects.get(id=job_id)
-                        scheduled_at_dt = datetime.fromtimestamp(score / 1000.0)
-                        if timezone.is_naive(scheduled_at_dt):
-                            scheduled_at_dt = timezone.make_aware(scheduled_at_dt)
-                        if JOBS_DEBUG:
-                            print(f"Delayed Job {job_id} scheduled at {scheduled_at_dt}")
-                        JobEvent.objects.create(
-                            job=job,
-                            channel=channel,
-                            event='queued',
-                            details={
-                                'scheduler_id': self.scheduler_id,
-                                'queue': queue_key,
-                                'scheduled_at': scheduled_at_dt.isoformat(),
-                                'broadcast': True
-                            }
-                        )
-                    except Exception as e:
-                        logger.warn(f"Failed to record queued event for broadcast {job_id}: {e}")
-                    self.jobs_scheduled += 1
-            if not_due_b:
-                self.redis.zadd(sched_b_key, not_due_b)
-                break
+            return list(channels)
+        return [channel for channel, flag in zip(channels, paused) if not flag]
+
+    def _promote_round(self, channels: List[str], now_ms: float):
+        """
+        One promotion pass over `channels`.
+
+        Returns [(channel, [(channel, job_id, score_ms, broadcast), ...]), ...].
+        """
+        client = self.redis.get_client()
+        if self._promote_script is None:
+            self._promote_script = client.register_script(PROMOTE_DUE_LUA)
+
+        if isinstance(client, RedisCluster):
+            # sched, sched_broadcast and the {jobs}-tagged queue hash to
+            # different slots: pop each ZSET atomically, push from here.
+            return [(channel, self._promote_clustered(client, channel, now_ms))
+                    for channel in channels]
+
+        # Single node: one script per channel moves both ZSETs into the
+        # queue atomically, and every channel's script rides one pipeline.
+        pipe = client.pipeline(transaction=False)
+        for channel in channels:
+            self._promote_script(
+                keys=[self.keys.sched(channel), self.keys.sched_broadcast(channel),
+                      self.keys.queue(channel)],
+                args=[now_ms, JOBS_SCHEDULER_PROMOTE_BATCH, 2],
+                client=pipe)
+        results = pipe.execute(raise_on_error=False)
+
+        rounds = []
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to process channel {channel}: {result}")
+                continue
+            rounds.append((channel, [
+                (channel, result[i + 1], float(result[i + 2]), int(result[i]) == 2)
+                for i in range(0, len(result), 3)
+            ]))
+        return rounds
+
+    def _promote_clustered(self, client, channel: str, now_ms: float):
+        entries = []
+        queue_key = self.keys.queue(channel)
+        for broadcast, sched_key in ((False, self.keys.sched(channel)),
+                                     (True, self.keys.sched_broadcast(channel))):
+            try:
+                result = self._promote_script(
+                    keys=[sched_key], args=[now_ms, JOBS_SCHEDULER_PROMOTE_BATCH, 1], client=client)
+            except Exception as e:
+                logger.error(f"Failed to process {sched_key}: {e}")
+                continue
+            due = [(result[i + 1], float(result[i + 2])) for i in range(0, len(result), 3)]
+            if not due:
+                continue
+            try:
+                for i in range(0, len(due), PUSH_CHUNK):
+                    client.rpush(queue_key, *[job_id for job_id, _ in due[i:i + PUSH_CHUNK]])
+            except Exception as e:
+                logger.error(f"Failed to enqueue {len(due)} jobs to queue {queue_key}: {e}")
+                # If enqueue fails, reinsert back to sched to avoid loss
+                # (a partially pushed chunk is fenced by the engine's claim).
+                self.redis.zadd(sched_key, dict(due))
+                continue
+            entries.extend((channel, job_id, score, broadcast) for job_id, score in due)
+        return entries
+
+    def _record_queued(self, promoted):
+        """Write one 'queued' JobEvent per promoted job that still has a row."""
+        if not promoted:
+            return
+        try:
+            ids = [entry[1] for entry in promoted]
+            existing = set()
+            for i in range(0, len(ids), PUSH_CHUNK):
+                existing.update(Job.objects.filter(id__in=ids[i:i + PUSH_CHUNK]).values_list('id', flat=True))
+            events = []
+            for channel, job_id, score, broadcast in promoted:
+                if job_id not in existing:
+                    continue
+                details = {
+                    'scheduler_id': self.scheduler_id,
+                    'queue': self.keys.queue(channel),
+                    'scheduled_at': datetime.fromtimestamp(score / 1000.0, tz=dt_timezone.utc).isoformat(),
+                }
+                if broadcast:
+                    details['broadcast'] = True
+                events.append(JobEvent(job_id=job_id, channel=channel, event='queued', details=details))
+            JobEvent.objects.bulk_create(events, batch_size=PUSH_CHUNK)
+            if JOBS_DEBUG:
+                logger.info(f"Promoted {len(promoted)} scheduled jobs")
+        except Exception as e:
+            logger.warn(f"Failed to record queued events for {len(promoted)} jobs: {e}")
 
     def _enqueue_job(self, job_id: str, channel: str, now: datetime, stream_key: str, scheduled_at_ms: float):
         """
@@ -13,6 +13,10 @@ JOBS_ENGINE_MAX_WORKERS = 10          # Thread pool size per engine
 JOBS_ENGINE_CLAIM_BUFFER = 2          # Claim up to buffer * max_workers jobs
 JOBS_ENGINE_CLAIM_BATCH = 5           # Max jobs to claim in one request
 JOBS_ENGINE_READ_TIMEOUT = 100        # Redis XREADGROUP timeout in ms
+JOBS_EVENT_POLICY = "full"            # Runner JobEvents: "full", "failures" or "none"
+JOBS_CHANNEL_EVENT_POLICY = {}        # Per-channel override, e.g. {"ingest": "failures"}
+JOBS_EVENT_FLUSH_INTERVAL = 1.0       # Seconds between batched JobEvent/metric writes
+JOBS_EVENT_FLUSH_SIZE = 500           # Buffered JobEvents that force an early flush
 
 # Job Defaults
 JOBS_DEFAULT_CHANNEL = "default"
@@ -25,12 +29,15 @@ JOBS_DEFAULT_BACKOFF_MAX = 3600       # Max backoff 1 hour
 JOBS_PAYLOAD_MAX_BYTES = 1048576      # 1MB max payload size
 JOBS_STREAM_MAXLEN = 100000           # Max messages per stream
 JOBS_LOCAL_QUEUE_MAXSIZE = 1000       # Max local queue size
+JOBS_LOCAL_QUEUE_WORKERS = 1          # Worker threads for the default local queue
+JOBS_LOCAL_QUEUES = {}                # Named local queues, e.g. {"io": {"workers": 8, "maxsize": 5000}}
 
 # Timeouts
 JOBS_IDLE_TIMEOUT_MS = 60000          # Consider job stuck after 1 minute idle
 JOBS_XPENDING_IDLE_MS = 60000         # Reclaim jobs idle for 1 minute
 JOBS_RUNNER_HEARTBEAT_SEC = 5         # Heartbeat interval
 JOBS_SCHEDULER_LOCK_TTL_MS = 5000     # Scheduler leadership lock TTL
+JOBS_SCHEDULER_PROMOTE_BATCH = 1000   # Due jobs moved per sched ZSET per script call
 
 # Webhook-specific Configuration
 JOBS_WEBHOOK_MAX_RETRIES = 5          # More retries for webhooks (network issues)
@@ -72,6 +72,13 @@ class Log(dm.Model, MojoModel):
 
     @classmethod
     def logit(cls, request, log, kind="log", model_name=None, model_id=0, level="info", **kwargs):
+        entry = cls.build(request, log, kind, model_name, model_id, level, **kwargs)
+        entry.save(force_insert=True)
+        return entry
+
+    @classmethod
+    def build(cls, request, log, kind="log", model_name=None, model_id=0, level="info", **kwargs):
+        """Return an unsaved Log for logit()'s arguments (used by bulk writers)."""
         if isinstance(log, dict):
             # Convert unsupported types in dict values
             def convert_value(value):
@@ -132,7 +139,7 @@ class Log(dm.Model, MojoModel):
             elif isinstance(payload, dict):
                 payload = logit.sanitize_dict(payload)
 
-        return cls.objects.create(
+        return cls(
             level=level,
             kind=kind,
             method=method,
@@ -1,6 +1,11 @@
 from .redis_metrics import (
     record,
+    flush,
     fetch,
+    fetch_series,
+    rollup_series,
+    ROLLUPS,
+    migrate_storage,
     fetch_values,
     get_categories,
     fetch_by_category,
@@ -0,0 +1,63 @@
+"""
+Django management command to move metrics between storage layouts.
+
+Set METRICS_STORAGE to the target layout and deploy before running this, so
+nothing keeps writing to the layout being drained.
+
+Usage:
+    # See what would move to hash storage
+    python manage.py metrics_storage --to hash --dry-run
+
+    # Migrate one account, then everything
+    python manage.py metrics_storage --to hash --account group-42
+    python manage.py metrics_storage --to hash
+
+    # Roll back to one key per bucket
+    python manage.py metrics_storage --to keys
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mojo.apps.metrics import redis_metrics
+
+
+class Command(BaseCommand):
+    help = 'Migrate metrics time series between key-per-bucket and hash storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--to',
+            choices=[redis_metrics.STORAGE_HASH, redis_metrics.STORAGE_KEYS],
+            default=redis_metrics.STORAGE_HASH,
+            help='Target layout (default: hash)'
+        )
+        parser.add_argument(
+            '--account',
+            help='Only migrate this metrics account'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Keys read and rewritten per pipeline (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would move without writing anything'
+        )
+
+    def handle(self, *args, **options):
+        target = options['to']
+        if target != redis_metrics.METRICS_STORAGE and not options['dry_run']:
+            raise CommandError(
+                f"METRICS_STORAGE is '{redis_metrics.METRICS_STORAGE}'; set it to '{target}' "
+                "before migrating, or writes to the old layout will be lost")
+
+        stats = redis_metrics.migrate_storage(
+            to=target, account=options['account'], dry_run=options['dry_run'],
+            batch_size=max(1, options['batch_size']))
+
+        verb = "Would move" if options['dry_run'] else "Moved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats.moved} of {stats.scanned} source keys into {stats.written} {target} keys"))
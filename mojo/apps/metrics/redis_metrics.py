@@ -1,8 +1,12 @@
 from . import utils
-from mojo.helpers import redis, dates
+from mojo.helpers import redis, dates, logit
 from mojo.helpers.settings import settings
+import atexit
 import datetime
+import os
+import threading
 from objict import objict, nobjict
+from redis.crc import key_slot
 
 # =========================
 # Hash-slot tagging helpers
@@ -27,11 +31,18 @@ def tkeys(account: str, keys):
 # Cluster-safe multi-key read helper
 # ==================================
 
+METRICS_MGET_CHUNK = settings.get_static("METRICS_MGET_CHUNK", 1000)
+
+
+def _slot(key):
+    return key_slot(key.encode() if isinstance(key, str) else key)
+
+
 def mget_any(r, keys):
     """
     Cluster-safe MGET that preserves order:
       - Standalone: r.mget(keys)
-      - Cluster: if keys span slots, run MGET per slot and stitch results
+      - Cluster: if keys span slots, fall back to mget_slotted
     """
     if not keys:
         return []
@@ -42,23 +53,41 @@ def mget_any(r, keys):
         if ("same key slot" not in msg) and ("CROSSSLOT" not in msg):
             # Not a slot error; surface it.
             raise
+    return mget_slotted(r, keys)
 
-    # Fallback path for cluster: group keys by slot and scatter/gather.
-    try:
-        from redis.cluster import keyslot
-    except Exception:
-        # Old redis-py without cluster helpers: re-raise original
-        raise
 
+def mget_slotted(r, keys, chunk=None):
+    """
+    Order-preserving MGET of any number of keys in one round trip.
+
+    Keys are grouped by hash slot (one slot per account tag, see tkey) and
+    each group is read with MGETs of at most METRICS_MGET_CHUNK keys, all
+    queued on a single non-transactional pipeline. Every MGET stays within
+    one slot, so the same pipeline works on RedisCluster.
+    """
+    if not keys:
+        return []
+    chunk = max(1, int(chunk or METRICS_MGET_CHUNK))
     groups = {}
+    slots = {}
     for idx, k in enumerate(keys):
-        groups.setdefault(keyslot(k), []).append((idx, k))
+        tag = k[:k.index("}") + 1] if k.startswith("{") and "}" in k else k
+        slot = slots.get(tag)
+        if slot is None:
+            slot = slots[tag] = _slot(tag)
+        groups.setdefault(slot, []).append(idx)
+
+    batches = []
+    p = r.pipeline(transaction=False)
+    for idxs in groups.values():
+        for start in range(0, len(idxs), chunk):
+            part = idxs[start:start + chunk]
+            p.mget([keys[i] for i in part])
+            batches.append(part)
 
     out = [None] * len(keys)
-    for items in groups.values():
-        idxs, ks = zip(*items)
-        vals = r.mget(list(ks))
-        for i, v in zip(idxs, vals):
+    for part, vals in zip(batches, p.execute()):
+        for i, v in zip(part, vals):
             out[i] = v
     return out
 
@@ -67,81 +96,313 @@ def mget_any(r, keys):
 # Recording
 # =========
 
+# METRICS_BUFFER_MS > 0 turns on process-local buffering for record(): writes
+# are coalesced per key in memory and flushed in one pipeline every
+# METRICS_BUFFER_MS milliseconds, or as soon as METRICS_BUFFER_MAX_KEYS
+# distinct keys are pending, and at interpreter exit. 0 (default) writes
+# through on every call, so a record() is visible to the next fetch().
+METRICS_BUFFER_MS = settings.get_static("METRICS_BUFFER_MS", 0)
+METRICS_BUFFER_MAX_KEYS = settings.get_static("METRICS_BUFFER_MAX_KEYS", 1000)
+
+# Bucket layout. "keys": one string key per (slug, granularity, bucket), each
+# with its own EXPIREAT. "hash": one hash per slug and container period (see
+# utils.HASH_CONTAINER_LEN) with a field per bucket and one expiry for the
+# hash. Switch the setting first, then run migrate_storage() (or
+# `manage.py metrics_storage`) to move existing data across.
+STORAGE_KEYS = "keys"
+STORAGE_HASH = "hash"
+METRICS_STORAGE = settings.get_static("METRICS_STORAGE", STORAGE_KEYS)
+
+
 def record(slug, when=None, count=1, category=None, account="global",
            min_granularity="hours", max_granularity="years", timezone=None,
-           expires_at=None, disable_expiry=False):
+           expires_at=None, disable_expiry=False, buffered=None):
     """
     Records metrics by incrementing counters for various time granularities.
     Keys are hash-tagged per account to keep them in a single cluster slot.
+
+    `buffered` (default: METRICS_BUFFER_MS > 0) hands the increments to the
+    process-local MetricsBuffer instead of writing them now.
     """
     when = utils.normalize_datetime(when, timezone)
-    r = redis.get_connection()
-    p = r.pipeline(transaction=False)
 
+    members = [(utils.generate_accounts_key(), account),
+               (utils.generate_slugs_key(account), slug)]
     if category is not None:
-        add_category_slug(category, slug, p, account)
-
-    add_metrics_slug(slug, p, account)
+        members += [(utils.generate_category_slug(account, category), slug),
+                    (utils.generate_category_key(account), category)]
 
+    counters = []
     granularities = utils.generate_granularities(min_granularity, max_granularity)
     for granularity in granularities:
-        base_key = utils.generate_slug(slug, when, granularity, account)
-        k = tkey(account, base_key)
-        p.incr(k, count)
         exp_at = expires_at if expires_at is not None else utils.get_expires_at(granularity, slug, category)
-        if not disable_expiry and exp_at:
-            p.expireat(k, exp_at)
+        if disable_expiry:
+            exp_at = None
+        if METRICS_STORAGE == STORAGE_HASH:
+            container, field = utils.split_period(utils.format_period(when, granularity), granularity)
+            hash_key = utils.generate_hash_key(slug, container, granularity, account)
+            counters.append((tkey(account, hash_key), field, count, exp_at))
+        else:
+            base_key = utils.generate_slug(slug, when, granularity, account)
+            counters.append((tkey(account, base_key), None, count, exp_at))
+
+    if buffered is None:
+        buffered = METRICS_BUFFER_MS > 0
+    if buffered:
+        _buffer.add(counters, members)
+        return
+
+    p = redis.get_connection().pipeline(transaction=False)
+    _queue_writes(p, counters, members)
     p.execute()
 
 
+def _queue_writes(p, counters, members):
+    """
+    Queue SADDs and increments on pipeline `p`.
+
+    counters: iterable of (key, field, count, expires_at) — field None means a
+    string counter (INCRBY), otherwise a hash field (HINCRBY). Each key gets
+    one EXPIREAT, at the latest expiry seen for it.
+    """
+    for set_key, member in members:
+        p.sadd(set_key, member)
+    expiry = {}
+    for key, field, count, exp_at in counters:
+        if field is None:
+            p.incr(key, count)
+        else:
+            p.hincrby(key, field, count)
+        if exp_at:
+            expiry[key] = max(exp_at, expiry.get(key, 0))
+    for key, exp_at in expiry.items():
+        p.expireat(key, exp_at)
+
+
+class MetricsBuffer:
+    """
+    Process-local aggregator behind record(buffered=True).
+
+    Increments are summed per (key, field) and set memberships de-duplicated
+    in memory; flush() writes everything in one pipeline. A background thread
+    flushes every `interval_ms`, add() flushes inline once `max_keys`
+    distinct counters are pending, and an atexit hook flushes what is left.
+    A failed flush is logged and its increments dropped — metrics are
+    best-effort and must never back up into the caller.
+    """
+
+    def __init__(self, interval_ms=None, max_keys=None):
+        self.interval = max(10, int(interval_ms or METRICS_BUFFER_MS or 1000)) / 1000.0
+        self.max_keys = max(1, int(max_keys or METRICS_BUFFER_MAX_KEYS))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._members = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushes = 0
+        self.dropped = 0
+
+    def add(self, counters, members):
+        with self._lock:
+            self._ensure_thread()
+            for key, field, count, exp_at in counters:
+                entry = self._counters.get((key, field))
+                if entry is None:
+                    self._counters[(key, field)] = [count, exp_at]
+                else:
+                    entry[0] += count
+                    if exp_at and (entry[1] is None or exp_at > entry[1]):
+                        entry[1] = exp_at
+            self._members.update(members)
+            full = len(self._counters) >= self.max_keys
+        if full:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return len(self._counters)
+
+    def flush(self):
+        """Write everything pending in one pipeline; returns counters written."""
+        with self._lock:
+            counters, self._counters = self._counters, {}
+            members, self._members = self._members, set()
+        if not counters and not members:
+            return 0
+        try:
+            p = redis.get_connection().pipeline(transaction=False)
+            _queue_writes(p, [(key, field, count, exp_at)
+                              for (key, field), (count, exp_at) in counters.items()], members)
+            p.execute()
+        except Exception as e:
+            self.dropped += len(counters)
+            logit.error(f"metrics buffer flush failed, dropped {len(counters)} counters: {e}")
+            return 0
+        self.flushes += 1
+        return len(counters)
+
+    def _ensure_thread(self):
+        # Called under the lock. A forked worker inherits the buffer but not
+        # the thread (or the parent's pending counts), so start over there.
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        if self._pid is not None and self._pid != pid:
+            self._counters, self._members = {}, set()
+        self._pid = pid
+        self._thread = threading.Thread(target=self._run, name="mojo-metrics-buffer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logit.error(f"metrics buffer error: {e}")
+
+
+_buffer = MetricsBuffer()
+atexit.register(_buffer.flush)
+
+
+def flush():
+    """Write any buffered metric increments now (see METRICS_BUFFER_MS)."""
+    return _buffer.flush()
+
+
 # ========
 # Reading
 # ========
 
+ROLLUPS = ("sum", "avg", "max", "min")
+
+
 def fetch(slug, dt_start=None, dt_end=None, granularity="hours",
           redis_con=None, account="global", with_labels=False,
-          dr_slugs=None, allow_empty=True):
-    """
-    Fetches metrics for a slug/list of slugs. Uses cluster-safe MGET.
+          dr_slugs=None, allow_empty=True, rollup=None, every=None):
     """
-    if redis_con is None:
-        redis_con = redis.get_connection()
+    Fetches metrics for a slug/list of slugs with one pipelined MGET.
 
+    `every` re-buckets the series into groups of that many buckets and
+    `rollup` ("sum", "avg", "max", "min"; default "sum") combines each group.
+    A rollup without `every` treats the whole range as one bucket.
+    """
     if not slug:
         slug = "no_slugs_found"
 
-    if isinstance(slug, (list, set)):
-        resp = nobjict()
-        if with_labels:
-            resp.data = {}
-            resp.labels = utils.periods_from_dr_slugs(
-                utils.generate_slugs_for_range(slug[0], dt_start, dt_end, granularity, account)
-            )
-        for s in slug:
-            values = fetch(s, dt_start, dt_end, granularity, redis_con, account)
-            if not allow_empty and not any(values) and len(resp.data):
-                continue
-            trunc_slug = s.split(":")[-1]
-            if with_labels:
-                resp.data[trunc_slug] = values
-            else:
-                resp[trunc_slug] = values
-        return resp
+    multi = isinstance(slug, (list, set, tuple))
+    slugs = list(slug) if multi else [slug]
+    periods = utils.generate_periods(dt_start, dt_end, granularity)
+    series = fetch_series([(account, s) for s in slugs], periods, granularity, redis_con)
+    labels = utils.period_labels(periods, granularity) if with_labels else None
+    if rollup is not None or every is not None:
+        series = [rollup_series(values, rollup, every) for values in series]
+        if labels is not None:
+            labels = labels[::_group_size(len(labels), every)]
+
+    if not multi:
+        if not with_labels:
+            return series[0]
+        return nobjict(labels=labels, data={slug.split(":")[-1]: series[0]})
+
+    resp = nobjict()
+    data = {}
+    for s, values in zip(slugs, series):
+        if not allow_empty and not any(values) and data:
+            continue
+        data[s.split(":")[-1]] = values
+    if with_labels:
+        resp.data = data
+        resp.labels = labels
+    else:
+        resp.update(data)
+    return resp
 
-    dr_slugs = utils.generate_slugs_for_range(slug, dt_start, dt_end, granularity, account)
-    tagged = tkeys(account, dr_slugs)
-    raw = mget_any(redis_con, tagged)
+
+def fetch_series(pairs, periods, granularity="hours", redis_con=None):
+    """
+    Raw bucket values for many (account, slug) pairs over one range.
+
+    `periods` comes from utils.generate_periods(), built once for every pair;
+    each pair only adds its key prefix. Under key storage every key is read
+    with mget_slotted; under hash storage each container hash is one HMGET,
+    all on one pipeline. Either way a dashboard of N slugs (or a fan-out over
+    N accounts) is one round trip. Returns one list of ints per pair, in order.
+    """
+    if redis_con is None:
+        redis_con = redis.get_connection()
+    if METRICS_STORAGE == STORAGE_HASH:
+        raw = _hmget_series(redis_con, pairs, periods, granularity)
+    else:
+        gran_prefix = utils.GRANULARITY_PREFIX_MAP[granularity]
+        keys = []
+        for account, slug in pairs:
+            prefix = f"{_tag(account)}:{utils.generate_slug_prefix(slug, account)}:{gran_prefix}:"
+            keys.extend(prefix + period for period in periods)
+        raw = mget_slotted(redis_con, keys)
     values = [int(v) if v is not None else 0 for v in raw]
+    width = len(periods)
+    return [values[i * width:(i + 1) * width] for i in range(len(pairs))]
+
+
+def _hmget_series(r, pairs, periods, granularity):
+    # Periods are chronological, so each container's fields are contiguous
+    # and concatenating the HMGET replies restores period order.
+    containers = {}
+    for period in periods:
+        container, field = utils.split_period(period, granularity)
+        containers.setdefault(container, []).append(field)
+    if not pairs or not containers:
+        return []
+    p = r.pipeline(transaction=False)
+    for account, slug in pairs:
+        for container, fields in containers.items():
+            p.hmget(tkey(account, utils.generate_hash_key(slug, container, granularity, account)), fields)
+    raw = []
+    for reply in p.execute():
+        raw.extend(reply)
+    return raw
+
 
-    if not with_labels:
-        return values
-    trunc_slug = slug.split(":")[-1]
-    return nobjict(labels=utils.periods_from_dr_slugs(dr_slugs), data={trunc_slug: values})
+def _group_size(length, every):
+    if every is None:
+        return max(1, length)
+    every = int(every)
+    if every < 1:
+        raise ValueError("every must be a positive number of buckets")
+    return every
+
+
+def rollup_series(values, rollup=None, every=None):
+    """
+    Combine consecutive buckets: groups of `every` (default: all of them),
+    each reduced with `rollup` (default "sum"). A trailing partial group is
+    kept; "avg" divides by the buckets actually in the group.
+    """
+    rollup = rollup or "sum"
+    if rollup not in ROLLUPS:
+        raise ValueError(f"Invalid rollup '{rollup}', expected one of {', '.join(ROLLUPS)}")
+    size = _group_size(len(values), every)
+    out = []
+    for start in range(0, len(values), size):
+        group = values[start:start + size]
+        if rollup == "sum":
+            out.append(sum(group))
+        elif rollup == "avg":
+            out.append(round(sum(group) / len(group), 2))
+        elif rollup == "max":
+            out.append(max(group))
+        else:
+            out.append(min(group))
+    return out
 
 
 def fetch_values(slugs, when=None, granularity="hours", redis_con=None, account="global", timezone=None, with_delta=False):
     """
-    Fetch multiple slugs at a single point in time. Uses cluster-safe MGET.
+    Fetch multiple slugs at a single point in time, via fetch_series.
 
     When ``with_delta=True``, also fetch the previous bucket's value for each
     slug and return ``prev_data`` plus a ``deltas`` map. The deltas map carries
@@ -156,15 +417,13 @@ def fetch_values(slugs, when=None, granularity="hours", redis_con=None, account=
     if isinstance(slugs, str):
         slugs = [s.strip() for s in slugs.split(',')] if ',' in slugs else [slugs]
 
-    # Build keys and tag them
-    redis_keys = [utils.generate_slug(s, when, granularity, account) for s in slugs]
-    tagged = tkeys(account, redis_keys)
-
-    raw = mget_any(redis_con, tagged)
-    data = {}
-    for i, s in enumerate(slugs):
-        v = raw[i]
-        data[s] = int(v) if v is not None else 0
+    # The current bucket and, for deltas, the previous one in a single read.
+    periods = [utils.format_period(when, granularity)]
+    if with_delta:
+        prev_when = utils.previous_bucket(when, granularity)
+        periods.insert(0, utils.format_period(prev_when, granularity))
+    series = fetch_series([(account, s) for s in slugs], periods, granularity, redis_con)
+    data = {s: values[-1] for s, values in zip(slugs, series)}
 
     response = {
         'data': data,
@@ -175,14 +434,10 @@ def fetch_values(slugs, when=None, granularity="hours", redis_con=None, account=
     }
 
     if with_delta:
-        prev_when = utils.previous_bucket(when, granularity)
-        prev_keys = [utils.generate_slug(s, prev_when, granularity, account) for s in slugs]
-        prev_raw = mget_any(redis_con, tkeys(account, prev_keys))
         prev_data = {}
         deltas = {}
-        for i, s in enumerate(slugs):
-            v = prev_raw[i]
-            prev_val = int(v) if v is not None else 0
+        for s, values in zip(slugs, series):
+            prev_val = values[0]
             prev_data[s] = prev_val
             cur_val = data[s]
             delta_entry = {'delta': cur_val - prev_val}
@@ -425,7 +680,7 @@ def fetch_by_category(category, dt_start=None, dt_end=None, granularity="hours",
                       redis_con=None, account="global", with_labels=False):
     """
     Fetch metrics for all slugs in a category over a range/granularity.
-    Delegates to `fetch`, which is cluster-safe (hash tags + mget_any).
+    Delegates to `fetch`, which is cluster-safe (hash tags + mget_slotted).
     """
     slugs = get_category_slugs(category, redis_con, account)
     return fetch(slugs, dt_start=dt_start, dt_end=dt_end,
@@ -433,6 +688,121 @@ def fetch_by_category(category, dt_start=None, dt_end=None, granularity="hours",
                  account=account, with_labels=with_labels)
 
 
+# =================
+# Storage migration
+# =================
+
+def migrate_storage(to=STORAGE_HASH, account=None, dry_run=False, batch_size=500, redis_con=None):
+    """
+    Move time-series buckets between the "keys" and "hash" layouts.
+
+    Values are merged with INCRBY/HINCRBY and the source is deleted, so the
+    migration is additive and safe to re-run. Point METRICS_STORAGE at the
+    target layout first: anything still written to the old layout during the
+    run would be lost when its key is deleted. Expiry carries over — the
+    target gets the latest expiry of its sources, or none if any of them (or
+    the target itself) is persistent.
+
+    Returns {scanned, moved, written}: source keys found, source keys moved
+    (or that would be, with dry_run) and target keys written.
+    """
+    if to not in (STORAGE_KEYS, STORAGE_HASH):
+        raise ValueError(f"Invalid storage '{to}', expected '{STORAGE_KEYS}' or '{STORAGE_HASH}'")
+    if redis_con is None:
+        redis_con = redis.get_connection()
+    pattern = f"{_tag(account)}:mets:{account}::*" if account else "{mets:*}:mets:*::*"
+    from_hash = to == STORAGE_KEYS
+    stats = objict(scanned=0, moved=0, written=0)
+    batch = []
+    for key in redis_con.scan_iter(match=pattern, count=batch_size):
+        key = key.decode("utf-8") if isinstance(key, bytes) else key
+        parsed = _parse_bucket_key(key)
+        if parsed is None or parsed[3] != from_hash:
+            continue
+        stats.scanned += 1
+        batch.append((key,) + parsed)
+        if len(batch) >= batch_size:
+            _migrate_batch(redis_con, batch, from_hash, dry_run, stats)
+            batch = []
+    if batch:
+        _migrate_batch(redis_con, batch, from_hash, dry_run, stats)
+    return stats
+
+
+_GRANULARITY_BY_PREFIX = {v: k for k, v in utils.GRANULARITY_PREFIX_MAP.items()}
+
+
+def _parse_bucket_key(key):
+    """(head, granularity, period or container, is_hash) for a series key, else None."""
+    parts = key.rsplit(":", 2)
+    if len(parts) != 3:
+        return None
+    head, gran_lbl, last = parts
+    is_hash = gran_lbl == "h"
+    if is_hash:
+        head, _, gran_lbl = head.rpartition(":")
+    granularity = _GRANULARITY_BY_PREFIX.get(gran_lbl)
+    if granularity is None:
+        return None
+    return head, granularity, last, is_hash
+
+
+def _migrate_batch(r, batch, from_hash, dry_run, stats):
+    p = r.pipeline(transaction=False)
+    for key, *_ in batch:
+        p.hgetall(key) if from_hash else p.get(key)
+        p.pttl(key)
+    replies = p.execute()
+
+    # target key -> [{field or None: count}, [source pttls]]
+    targets = {}
+    for i, (key, head, granularity, last, _) in enumerate(batch):
+        value, pttl = replies[2 * i], replies[2 * i + 1]
+        if not value:
+            continue
+        gran_prefix = utils.GRANULARITY_PREFIX_MAP[granularity]
+        if from_hash:
+            for field, count in value.items():
+                field = field.decode() if isinstance(field, bytes) else field
+                period = utils.join_period(last, field, granularity)
+                entry = targets.setdefault(f"{head}:{gran_prefix}:{period}", [{}, []])
+                entry[0][None] = entry[0].get(None, 0) + int(count)
+                entry[1].append(pttl)
+        else:
+            container, field = utils.split_period(last, granularity)
+            entry = targets.setdefault(f"{head}:{gran_prefix}:h:{container}", [{}, []])
+            entry[0][field] = entry[0].get(field, 0) + int(value)
+            entry[1].append(pttl)
+    stats.moved += len(batch)
+    stats.written += len(targets)
+    if dry_run:
+        return
+
+    target_keys = list(targets)
+    p = r.pipeline(transaction=False)
+    for target in target_keys:
+        p.pttl(target)
+    target_ttls = p.execute() if target_keys else []
+
+    now_ms = int(datetime.datetime.now().timestamp() * 1000)
+    p = r.pipeline(transaction=False)
+    for target, existing in zip(target_keys, target_ttls):
+        counts, ttls = targets[target]
+        for field, count in counts.items():
+            if field is None:
+                p.incrby(target, count)
+            else:
+                p.hincrby(target, field, count)
+        ttls = ttls + ([existing] if existing != -2 else [])
+        if any(ttl == -1 for ttl in ttls):
+            p.persist(target)
+        else:
+            p.pexpireat(target, now_ms + max(ttls))
+    for key, *_ in batch:
+        p.delete(key)
+    p.execute()
+
+
 # ================================
 # Data-inferred discovery helpers
 # ================================
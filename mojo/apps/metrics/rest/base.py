@@ -94,6 +94,18 @@ def on_metrics_record(request):
             "in": "query",
             "schema": {"type": "string", "default": "hours"},
             "description": "Granularity of the data (e.g., 'hours')."
+        },
+        {
+            "name": "rollup",
+            "in": "query",
+            "schema": {"type": "string", "enum": ["sum", "avg", "max", "min"]},
+            "description": "Combine buckets server-side. Without `every` the whole range becomes one bucket."
+        },
+        {
+            "name": "every",
+            "in": "query",
+            "schema": {"type": "integer"},
+            "description": "Re-bucket into groups of this many buckets, combined with `rollup` (default sum)."
         }
     ],
     "responses": {
@@ -132,6 +144,12 @@ def on_metrics_data(request):
     granularity = request.DATA.get("granularity", "hours")
     child_kind = request.DATA.get("child_kind", None)
     breakdown = request.DATA.get_typed("breakdown", typed=bool, default=False)
+    rollup = request.DATA.get("rollup", None)
+    every = request.DATA.get_typed("every", typed=int, default=None)
+    if rollup is not None and rollup not in metrics.ROLLUPS:
+        raise mojo.errors.ValueException(f"invalid rollup: {rollup}")
+    if every is not None and every < 1:
+        raise mojo.errors.ValueException("every must be a positive integer")
     check_view_permissions(request, account)
 
     category = request.DATA.get("category", None)
@@ -166,6 +184,10 @@ def on_metrics_data(request):
             granularity=granularity, with_labels=True,
             breakdown=breakdown,
         )
+        if rollup is not None or every is not None:
+            records.data = {key: metrics.rollup_series(values, rollup, every)
+                            for key, values in records.data.items()}
+            records.labels = records.labels[::every or max(1, len(records.labels))]
         return JsonResponse(dict(status=True, data=records))
 
     if len(slugs) == 1:
@@ -173,5 +195,6 @@ def on_metrics_data(request):
     # Dashboard reads tolerate replica lag; permission reads above stay primary.
     records = metrics.fetch(slugs, dt_start=dt_start, dt_end=dt_end,
         granularity=granularity, account=account, with_labels=True,
-        allow_empty=allow_empty, redis_con=redis.get_connection(reader=True))
+        allow_empty=allow_empty, rollup=rollup, every=every,
+        redis_con=redis.get_connection(reader=True))
     return JsonResponse(dict(status=True, data=records))
@@ -172,73 +172,43 @@ def fetch_group_fanout(parent_id, child_kind, slugs, dt_start=None, dt_end=None,
             f"METRICS_FANOUT_MAX_CHILDREN ({max_children})"
         )
 
-    parent_account = f"group-{parent_id}"
-    label_slugs = utils.generate_slugs_for_range(
-        slug_list[0], dt_start, dt_end, granularity, parent_account
-    )
-    labels = utils.periods_from_dr_slugs(label_slugs)
-    bucket_count = len(labels)
+    periods = utils.generate_periods(dt_start, dt_end, granularity)
+    labels = utils.period_labels(periods, granularity)
 
     if breakdown:
-        return _build_breakdown(
-            children, slug_list[0], dt_start, dt_end, granularity,
-            bucket_count, labels, with_labels,
-        )
-    return _build_sum(
-        children, slug_list, dt_start, dt_end, granularity,
-        bucket_count, labels, with_labels,
-    )
-
+        return _build_breakdown(children, slug_list[0], periods, granularity, labels, with_labels)
+    return _build_sum(children, slug_list, periods, granularity, labels, with_labels)
 
-def _build_sum(children, slug_list, dt_start, dt_end, granularity,
-               bucket_count, labels, with_labels):
-    accumulator = {s.split(":")[-1]: [0] * bucket_count for s in slug_list}
 
-    for child in children:
-        child_account = f"group-{child['id']}"
-        result = metrics.fetch(
-            slug_list if len(slug_list) > 1 else slug_list[0],
-            dt_start=dt_start, dt_end=dt_end, granularity=granularity,
-            account=child_account, with_labels=False, allow_empty=True,
-        )
-        if len(slug_list) == 1:
-            trunc = slug_list[0].split(":")[-1]
-            for i, v in enumerate(result):
-                if i < bucket_count:
-                    accumulator[trunc][i] += int(v or 0)
-        else:
-            for trunc, series in result.items():
-                if trunc not in accumulator:
-                    continue
-                for i, v in enumerate(series):
-                    if i < bucket_count:
-                        accumulator[trunc][i] += int(v or 0)
+def _build_sum(children, slug_list, periods, granularity, labels, with_labels):
+    # One pipelined read for every child x slug; children sit in different
+    # slots, which mget_slotted groups for us.
+    pairs = [(f"group-{child['id']}", s) for child in children for s in slug_list]
+    series = metrics.fetch_series(pairs, periods, granularity)
+    accumulator = {s.split(":")[-1]: [0] * len(periods) for s in slug_list}
+    for (_, s), values in zip(pairs, series):
+        totals = accumulator[s.split(":")[-1]]
+        for i, v in enumerate(values):
+            totals[i] += v
 
     if with_labels:
         return nobjict(labels=labels, data=accumulator)
     return nobjict(**accumulator)
 
 
-def _build_breakdown(children, slug, dt_start, dt_end, granularity,
-                     bucket_count, labels, with_labels):
+def _build_breakdown(children, slug, periods, granularity, labels, with_labels):
     name_counts = {}
     for child in children:
         name_counts[child["name"]] = name_counts.get(child["name"], 0) + 1
 
+    series = metrics.fetch_series(
+        [(f"group-{child['id']}", slug) for child in children], periods, granularity)
     data = {}
     groups = {}
-    for child in children:
+    for child, values in zip(children, series):
         cid, name = child["id"], child["name"]
         key = f"{name}#{cid}" if name_counts[name] > 1 else name
-        series = metrics.fetch(
-            slug, dt_start=dt_start, dt_end=dt_end, granularity=granularity,
-            account=f"group-{cid}", with_labels=False, allow_empty=True,
-        )
-        bucket = [0] * bucket_count
-        for i, v in enumerate(series):
-            if i < bucket_count:
-                bucket[i] = int(v or 0)
-        data[key] = bucket
+        data[key] = values
         groups[key] = cid
 
     if with_labels:
@@ -32,6 +32,28 @@ GRANULARITY_OFFSET_MAP = {
     'years': 'years'
 }
 
+PERIOD_FORMATS = {
+    'minutes': '%Y-%m-%dT%H-%M',
+    'hours': '%Y-%m-%dT%H',
+    'days': '%Y-%m-%d',
+    'weeks': '%Y-%U',
+    'months': '%Y-%m',
+    'years': '%Y'
+}
+
+# Hash storage (METRICS_STORAGE="hash") packs a slug's buckets into one hash
+# per container period: the first N characters of the bucket's period string
+# name the hash and the rest is the field, e.g. minute "2025-05-02T01-23" is
+# field "01-23" of that day's hash. 0 puts every bucket in one "all" hash.
+HASH_CONTAINER_LEN = {
+    'minutes': 10,  # one hash per day
+    'hours': 7,     # per month
+    'days': 4,      # per year
+    'weeks': 4,
+    'months': 4,
+    'years': 0
+}
+
 GRANULARITY_END_MAP = {
     'minutes': timedelta(minutes=29),
     'hours': timedelta(hours=24),
@@ -94,27 +116,44 @@ def generate_slug(slug, date, granularity, account="global"):
     Raises:
         ValueError: If the specified granularity is invalid for slug generation.
     """
-    if granularity not in ['minutes', 'hours', 'days', 'weeks', 'months', 'years']:
+    if granularity not in PERIOD_FORMATS:
         raise ValueError("Invalid granularity for slug generation.")
     gran_prefix = GRANULARITY_PREFIX_MAP.get(granularity)
-    if granularity == 'minutes':
-        date_slug = date.strftime('%Y-%m-%dT%H-%M')
-    elif granularity == 'hours':
-        date_slug = date.strftime('%Y-%m-%dT%H')
-    elif granularity == 'days':
-        date_slug = date.strftime('%Y-%m-%d')
-    elif granularity == 'weeks':
-        date_slug = date.strftime('%Y-%U')
-    elif granularity == 'months':
-        date_slug = date.strftime('%Y-%m')
-    elif granularity == 'years':
-        date_slug = date.strftime('%Y')
-    else:
-        raise ValueError("Unhandled granularity.")
+    date_slug = date.strftime(PERIOD_FORMATS[granularity])
     prefix = generate_slug_prefix(slug, account)
     return f"{prefix}:{gran_prefix}:{date_slug}"
 
 
+def format_period(date, granularity):
+    """The date part of the bucket key for `date` at `granularity`."""
+    if granularity not in PERIOD_FORMATS:
+        raise ValueError("Invalid granularity for slug generation.")
+    return date.strftime(PERIOD_FORMATS[granularity])
+
+
+def split_period(period, granularity):
+    """(container, field) for a period string under hash storage."""
+    size = HASH_CONTAINER_LEN[granularity]
+    if not size:
+        return "all", period
+    return period[:size], period[size + 1:]
+
+
+def join_period(container, field, granularity):
+    """Inverse of split_period()."""
+    if not HASH_CONTAINER_LEN[granularity]:
+        return field
+    # The character split_period() drops: 'T' between a minute's day and time.
+    sep = "T" if granularity == "minutes" else "-"
+    return f"{container}{sep}{field}"
+
+
+def generate_hash_key(slug, container, granularity, account="global"):
+    """Key of the hash holding `slug`'s buckets for one container period."""
+    prefix = generate_slug_prefix(slug, account)
+    return f"{prefix}:{GRANULARITY_PREFIX_MAP[granularity]}:h:{container}"
+
+
 def generate_slug_prefix(slug, account):
     # this is the slug without the date
     slug = normalize_slug(slug)
@@ -137,28 +176,39 @@ def generate_slugs_for_range(slug, dt_start, dt_end, granularity, account="globa
     Raises:
         ValueError: If the specified granularity is invalid.
     """
+    periods = generate_periods(dt_start, dt_end, granularity)
+    prefix = f"{generate_slug_prefix(slug, account)}:{GRANULARITY_PREFIX_MAP[granularity]}:"
+    return [prefix + period for period in periods]
+
 
+def generate_periods(dt_start, dt_end, granularity):
+    """
+    The date part of every bucket key in the range, formatted once.
 
+    A range's keys differ only by slug and account, so multi-slug reads build
+    this list once and prefix it per slug (see generate_slugs_for_range).
+    """
     if granularity not in GRANULARITY_OFFSET_MAP:
         raise ValueError("Invalid granularity for slug generation.")
     dt_start, dt_end = get_date_range(dt_start, dt_end, granularity)
+    fmt = PERIOD_FORMATS[granularity]
     current = dt_start
-    slugs = []
+    periods = []
 
     if granularity in ['minutes', 'hours', 'days', 'weeks']:
         delta = GRANULARITY_OFFSET_MAP[granularity]
         while current <= dt_end:
-            slugs.append(generate_slug(slug, current, granularity, account))
+            periods.append(current.strftime(fmt))
             current += delta
     elif granularity == 'months':
         while current <= dt_end:
-            slugs.append(generate_slug(slug, current, granularity, account))
+            periods.append(current.strftime(fmt))
             current = datetime.datetime(current.year + (current.month // 12), ((current.month % 12) + 1), 1, tzinfo=current.tzinfo)
     elif granularity == 'years':
         while current <= dt_end:
-            slugs.append(generate_slug(slug, current, granularity, account))
+            periods.append(current.strftime(fmt))
             current = datetime.datetime(current.year + 1, 1, 1, tzinfo=current.tzinfo)
-    return slugs
+    return periods
 
 
 def generate_category_slug(account, category):
@@ -210,8 +260,16 @@ def periods_from_dr_slugs(slugs):
 
 def period_from_dr_slug(slug):
     parts = slug.split(":")
-    gran_lbl = parts[-2]
-    period = parts[-1]
+    return period_label(parts[-2], parts[-1])
+
+
+def period_labels(periods, granularity):
+    """Display labels for generate_periods() output."""
+    gran_lbl = GRANULARITY_PREFIX_MAP[granularity]
+    return [period_label(gran_lbl, period) for period in periods]
+
+
+def period_label(gran_lbl, period):
     if gran_lbl == GRANULARITY_PREFIX_MAP["hours"]:
         return f"{period[-2:]}:00"
     if gran_lbl == GRANULARITY_PREFIX_MAP["minutes"]:
@@ -20,6 +20,7 @@ from mojo.helpers.redis.client import get_connection
 from mojo.helpers.request import normalize_ip
 from mojo.helpers.settings import settings
 from .auth import async_validate_bearer_token
+from .hub import encode_frame, get_hub
 
 logger = logit.get_logger("realtime", "realtime.log")
 
@@ -116,13 +117,19 @@ class WebSocketHandler:
         self.remote_ip = self.resolve_remote_ip()
         self.user_agent = self.resolve_user_agent()
 
-        # Redis clients - separate for pub/sub.
-        # pubsub stays None until authentication succeeds (DM-042): an
-        # unauthenticated socket must not hold a dedicated Redis pub/sub
-        # connection — that's exactly the cost a reconnect storm multiplies.
+        # Pub/sub goes through the process-wide hub (see hub.py); this socket
+        # only owns a bounded queue of pre-encoded frames. hub stays None until
+        # authentication succeeds (DM-042): an unauthenticated socket must not
+        # hold channel subscriptions — that's what a reconnect storm multiplies.
         self.redis_client = get_connection()
-        self.pubsub = None
+        self.hub = None
+        self._channels = set()
+        self._inbox = None
         self._redis_task = None
+        try:
+            self.send_queue_size = settings.get("WS_SEND_QUEUE_SIZE", 256, kind="int")
+        except Exception:
+            self.send_queue_size = 256
 
         # Unauthenticated sockets get a short window to send their token.
         try:
@@ -224,8 +231,8 @@ class WebSocketHandler:
                 "timeout": self.unauth_timeout
             })
 
-            # Start background tasks. handle_redis_messages (the dedicated
-            # pub/sub connection) starts only after successful auth — see
+            # Start background tasks. handle_redis_messages (hub delivery)
+            # starts only after successful auth — see
             # start_redis_messages() called from handle_authenticate.
             tasks = [
                 asyncio.create_task(self.activity_timeout()),
@@ -357,55 +364,61 @@ class WebSocketHandler:
             self.running = False
 
     async def start_redis_messages(self):
-        """Create the pub/sub connection and start the delivery task.
+        """Subscribe to this socket's channels on the hub and start delivery.
 
         Called from handle_authenticate AFTER a successful auth (and before
-        any topic subscription — subscribe_to_topic needs self.pubsub). The
-        pub/sub connection is created synchronously here so there is no race
-        between auth completing and the first topic subscribe."""
-        if self.pubsub is not None:
+        any topic subscription). The SUBSCRIBEs are awaited here so there is
+        no race between auth completing and the first topic subscribe."""
+        if self.hub is not None:
             return
 
-        def create_pubsub():
-            pubsub = self.redis_client.pubsub()
-            # Subscribe to connection-specific channel
-            pubsub.subscribe(f"realtime:messages:{self.connection_id}")
-            pubsub.subscribe("realtime:broadcast")
-            return pubsub
-
-        self.pubsub = await asyncio.get_event_loop().run_in_executor(
-            None, create_pubsub
-        )
+        self.hub = get_hub()
+        self._inbox = asyncio.Queue(maxsize=max(1, self.send_queue_size))
         self._redis_task = asyncio.create_task(self.handle_redis_messages())
+        # Connection-specific channel, then the global broadcast channel
+        await self._subscribe_channel(f"realtime:messages:{self.connection_id}")
+        await self._subscribe_channel("realtime:broadcast")
+
+    async def _subscribe_channel(self, channel):
+        await self.hub.subscribe(channel, self)
+        self._channels.add(channel)
+
+    async def _unsubscribe_channel(self, channel):
+        self._channels.discard(channel)
+        await self.hub.unsubscribe(channel, self)
+
+    def deliver(self, channel, frame):
+        """Hub callback (event loop): queue a pre-encoded frame for this socket.
+
+        Returns False when the socket is too slow to keep up: its send queue
+        is full, so it is dropped rather than letting one stalled client hold
+        an unbounded backlog of every broadcast."""
+        if not self.running or self._inbox is None:
+            return None
+        try:
+            self._inbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            self._log(f"send queue full ({self._inbox.maxsize}), dropping slow consumer")
+            self.running = False
+            asyncio.ensure_future(self.close_connection(code=1013))
+            return False
+        return True
 
     async def handle_redis_messages(self):
-        """Handle messages from Redis pub/sub (started post-auth)"""
+        """Forward hub frames to the client (started post-auth)"""
         try:
-            # Listen for messages
             while self.running:
-                def get_message():
-                    return self.pubsub.get_message(timeout=1.0)
-
-                message = await asyncio.get_event_loop().run_in_executor(
-                    None, get_message
-                )
-
-                if message and message['type'] == 'message':
-                    try:
-                        data = json.loads(message['data'])
-                        await self.process_redis_message(data)
-                    except Exception as e:
-                        self._log(f"Error processing Redis message: {e}")
-
+                frame = await self._inbox.get()
+                try:
+                    await self.send_text(frame.text)
+                    if frame.close:
+                        await self.close_connection()
+                except Exception as e:
+                    self._log(f"Error processing Redis message: {e}")
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             self._log_exception(f"Error in Redis message handler: {e}")
-        finally:
-            if self.pubsub:
-                await asyncio.get_event_loop().run_in_executor(
-                    None, self.pubsub.close
-                )
-
-
 
     async def process_client_message(self, data):
         """Process message from client"""
@@ -719,20 +732,21 @@ class WebSocketHandler:
         """Subscribe connection to a topic"""
         if topic in self.subscribed_topics:
             return
+        if self.hub is None:
+            await self.start_redis_messages()
 
         def subscribe():
             try:
                 # Add to topic subscribers
                 self.redis_client.sadd(f"realtime:topic:{topic}", self.connection_id)
                 self.redis_client.expire(f"realtime:topic:{topic}", TOPIC_TTL_SECONDS)
-
-                # Subscribe to Redis channel
-                self.pubsub.subscribe(f"realtime:topic:{topic}")
             except Exception as e:
                 self._log(f"Failed to subscribe to topic {topic}: {e}")
                 raise
 
         await asyncio.get_event_loop().run_in_executor(None, subscribe)
+        # Subscribe to the Redis channel (shared with other local sockets)
+        await self._subscribe_channel(f"realtime:topic:{topic}")
         self.subscribed_topics.add(topic)
 
     async def unsubscribe_from_topic(self, topic):
@@ -744,45 +758,33 @@ class WebSocketHandler:
             try:
                 # Remove from topic subscribers
                 self.redis_client.srem(f"realtime:topic:{topic}", self.connection_id)
-
-                # Unsubscribe from Redis channel
-                self.pubsub.unsubscribe(f"realtime:topic:{topic}")
             except Exception as e:
                 self._log(f"Failed to unsubscribe from topic {topic}: {e}")
 
         await asyncio.get_event_loop().run_in_executor(None, unsubscribe)
+        try:
+            await self._unsubscribe_channel(f"realtime:topic:{topic}")
+        except Exception as e:
+            self._log(f"Failed to unsubscribe from topic {topic}: {e}")
         self.subscribed_topics.discard(topic)
 
     async def process_redis_message(self, data):
-        """Process message from Redis pub/sub"""
-        message_type = data.get("type")
-
-        if message_type in ["broadcast", "topic_message", "direct_message"]:
-            # Forward to client wrapped in {"type": "message", "data": ...}
-            client_message = {
-                "type": "message",
-                "data": data.get("data", {}),
-                "timestamp": data.get("timestamp")
-            }
-
-            if message_type == "topic_message":
-                client_message["topic"] = data.get("topic")
-
-            await self.send_message(client_message)
-        elif message_type == "direct_event":
-            # Forward payload directly — no wrapping. The payload's own
-            # "type" field (e.g., "assistant_response") becomes the
-            # top-level type the client sees.
-            await self.send_message(data.get("data", {}))
-        elif message_type == "disconnect":
-            await self.send_message(data)
+        """Process one decoded pub/sub message outside the hub fan-out path."""
+        frame = encode_frame(data)
+        if frame is None:
+            return
+        await self.send_text(frame.text)
+        if frame.close:
             await self.close_connection()
 
     async def send_message(self, message):
         """Send message to WebSocket client"""
-        # logger.debug(f"Sending WebSocket message to {self.connection_id}: {message}")
+        await self.send_text(json.dumps(message))
+
+    async def send_text(self, text):
+        """Send an already-encoded frame to the WebSocket client"""
         try:
-            await self.websocket.send(json.dumps(message))
+            await self.websocket.send(text)
         except Exception as e:
             if "closed" in str(e).lower():
                 self.running = False
@@ -860,11 +862,11 @@ class WebSocketHandler:
         except Exception as e:
             self._log_exception("failed to report incident")
 
-    async def close_connection(self):
+    async def close_connection(self, code=1000):
         """Close WebSocket connection"""
         self.running = False
         try:
-            await self.websocket.close()
+            await self.websocket.close(code=code)
         except:
             pass
 
@@ -872,7 +874,7 @@ class WebSocketHandler:
         """Clean up connection state in Redis"""
         self._log("disconnected")
 
-        # Stop the post-auth pub/sub task if it was started (it is not in
+        # Stop the post-auth delivery task if it was started (it is not in
         # handle_connection's task set, so it must be cancelled here).
         if self._redis_task is not None and not self._redis_task.done():
             self._redis_task.cancel()
@@ -913,9 +915,10 @@ class WebSocketHandler:
             except Exception as e:
                 self._log_exception("user disconnect hook failed")
 
-        # Close pubsub
-        if self.pubsub:
+        # Release this socket's hub subscriptions
+        if self.hub is not None:
             try:
-                await asyncio.get_event_loop().run_in_executor(None, self.pubsub.close)
+                await self.hub.unsubscribe_all(self, self._channels)
             except Exception as e:
-                self._log(f"Failed to close pubsub: {e}")
+                self._log(f"Failed to release pub/sub channels: {e}")
+            self._channels.clear()
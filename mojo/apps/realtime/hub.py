@@ -0,0 +1,263 @@
+"""
+Per-process Redis pub/sub hub for realtime WebSockets.
+
+Every socket used to open its own pub/sub connection and poll it from an
+executor thread. The hub instead holds WS_PUBSUB_CONNECTIONS redis.asyncio
+pub/sub connections per process (channels are spread across them by hash),
+subscribes each channel once no matter how many local sockets want it, and
+fans every message out to those sockets. Idle sockets cost no Redis
+connection and no thread.
+
+Subscribers are any object with a ``deliver(channel, frame)`` method, called
+on the event loop. Each published message is JSON-decoded once and encoded
+into its client frame once (see encode_frame); every local socket receives
+the same pre-encoded text. ``deliver`` must not block; WebSocketHandler puts
+the frame on its bounded send queue and returns False when that queue is
+full, which the hub counts as a dropped slow consumer.
+
+Plain PUBLISH/SUBSCRIBE is cluster-wide, so in cluster mode the hub simply
+connects to the configured endpoint like a standalone client.
+"""
+
+import asyncio
+import json
+import zlib
+from collections import namedtuple
+
+from mojo.helpers import logit
+from mojo.helpers.redis.client import create_async_client
+from mojo.helpers.settings import settings
+
+logger = logit.get_logger("realtime", "realtime.log")
+
+RECONNECT_DELAY_SECONDS = 1.0
+RECONNECT_DELAY_MAX_SECONDS = 30.0
+
+# Message types forwarded to the client as {"type": "message", "data": ...}
+WRAPPED_TYPES = ("broadcast", "topic_message", "direct_message")
+
+# text: the JSON frame to send (shared by every socket), close: close the
+# socket after sending it, data: the decoded pub/sub message.
+Frame = namedtuple("Frame", ["text", "close", "data"])
+
+
+def encode_frame(data):
+    """The client frame for one decoded pub/sub message, or None to ignore it."""
+    if not isinstance(data, dict):
+        return None
+    message_type = data.get("type")
+    if message_type in WRAPPED_TYPES:
+        client_message = {
+            "type": "message",
+            "data": data.get("data", {}),
+            "timestamp": data.get("timestamp")
+        }
+        if message_type == "topic_message":
+            client_message["topic"] = data.get("topic")
+        return Frame(json.dumps(client_message), False, data)
+    if message_type == "direct_event":
+        # Forward payload directly — no wrapping. The payload's own "type"
+        # (e.g., "assistant_response") becomes the type the client sees.
+        return Frame(json.dumps(data.get("data", {})), False, data)
+    if message_type == "disconnect":
+        return Frame(json.dumps(data), True, data)
+    return None
+
+
+class _Shard:
+    """One pub/sub connection and the reader task draining it.
+
+    The connection is only ever swapped under `lock`, so a subscribe racing
+    a reconnect cannot open a second client that the reconnect then
+    overwrites. `channels` is the set this shard should be subscribed to;
+    whenever the live pubsub has lost them (a reconnect, or a resubscribe
+    that failed during an outage) run() resubscribes under its backoff."""
+
+    def __init__(self, hub, index):
+        self.hub = hub
+        self.index = index
+        self.client = None
+        self.pubsub = None
+        self.task = None
+        self.channels = set()
+        self.lock = asyncio.Lock()
+        self.closing = False
+
+    async def ensure(self):
+        async with self.lock:
+            if self.pubsub is None:
+                self.client = create_async_client()
+                self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            if self.task is None or self.task.done():
+                self.closing = False
+                self.task = asyncio.create_task(self.run(), name=f"realtime-pubsub-{self.index}")
+            return self.pubsub
+
+    async def subscribe(self, channel):
+        pubsub = await self.ensure()
+        await pubsub.subscribe(channel)
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(channel)
+
+    async def run(self):
+        delay = RECONNECT_DELAY_SECONDS
+        while not self.closing:
+            try:
+                pubsub = self.pubsub
+                if pubsub is None or not pubsub.subscribed:
+                    if pubsub is not None and self.channels:
+                        # Lost after a reconnect or a failed resubscribe;
+                        # a failure here backs off and reconnects again.
+                        await pubsub.subscribe(*self.channels)
+                        continue
+                    # Nothing to read yet (or everything was unsubscribed);
+                    # get_message would return immediately.
+                    await asyncio.sleep(0.05)
+                    continue
+                message = await pubsub.get_message(timeout=1.0)
+                delay = RECONNECT_DELAY_SECONDS
+                if message and message.get("type") == "message":
+                    self.hub.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"realtime pub/sub shard {self.index} failed, reconnecting: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX_SECONDS)
+                await self._reconnect()
+
+    async def _reconnect(self):
+        """Swap in a fresh connection; run() resubscribes `channels` on it."""
+        async with self.lock:
+            if self.closing:
+                return
+            old = (self.pubsub, self.client)
+            self.client = create_async_client()
+            self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self._close_connection(*old)
+
+    @staticmethod
+    async def _close_connection(pubsub, client):
+        for closeable in (pubsub, client):
+            if closeable is None:
+                continue
+            try:
+                await closeable.aclose()
+            except Exception:
+                pass
+
+    async def close(self):
+        # The flag as well as cancel(): a read timeout inside get_message can
+        # swallow the CancelledError, and the loop must still stop.
+        self.closing = True
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
+        async with self.lock:
+            old = (self.pubsub, self.client)
+            self.pubsub = self.client = None
+        await self._close_connection(*old)
+        self.channels.clear()
+
+
+class PubSubHub:
+    """Reference-counted channel subscriptions shared by every local socket."""
+
+    def __init__(self, connections=None):
+        if connections is None:
+            connections = settings.get_static("WS_PUBSUB_CONNECTIONS", 4)
+        self.shards = [_Shard(self, i) for i in range(max(1, int(connections)))]
+        self.subscribers = {}  # channel -> set of subscribers
+        self.loop = None
+        self.delivered = 0
+        self.dropped = 0
+        self._lock = asyncio.Lock()
+
+    def _shard(self, channel):
+        return self.shards[zlib.crc32(channel.encode()) % len(self.shards)]
+
+    async def subscribe(self, channel, subscriber):
+        """Route `channel` to `subscriber`; SUBSCRIBEs in Redis on first use."""
+        async with self._lock:
+            local = self.subscribers.get(channel)
+            if local is None:
+                await self._shard(channel).subscribe(channel)
+                local = self.subscribers[channel] = set()
+            local.add(subscriber)
+
+    async def unsubscribe(self, channel, subscriber):
+        """Stop routing `channel` to `subscriber`; UNSUBSCRIBEs after the last one."""
+        async with self._lock:
+            local = self.subscribers.get(channel)
+            if local is None:
+                return
+            local.discard(subscriber)
+            if local:
+                return
+            del self.subscribers[channel]
+            try:
+                await self._shard(channel).unsubscribe(channel)
+            except Exception as e:
+                logger.warning(f"realtime pub/sub unsubscribe {channel} failed: {e}")
+
+    async def unsubscribe_all(self, subscriber, channels):
+        for channel in list(channels):
+            await self.unsubscribe(channel, subscriber)
+
+    def dispatch(self, channel, raw):
+        """Decode and encode one published message, then hand the frame to
+        every local subscriber."""
+        local = self.subscribers.get(channel)
+        if not local:
+            return
+        try:
+            frame = encode_frame(json.loads(raw))
+        except (TypeError, ValueError):
+            logger.warning(f"realtime pub/sub: undecodable message on {channel}")
+            return
+        if frame is None:
+            return
+        for subscriber in list(local):
+            try:
+                queued = subscriber.deliver(channel, frame)
+                if queued is False:
+                    self.dropped += 1
+                elif queued:
+                    self.delivered += 1
+            except Exception as e:
+                logger.warning(f"realtime pub/sub delivery on {channel} failed: {e}")
+
+    def stats(self):
+        return {
+            "connections": sum(1 for shard in self.shards if shard.pubsub is not None),
+            "channels": len(self.subscribers),
+            "subscriptions": sum(len(local) for local in self.subscribers.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    async def close(self):
+        for shard in self.shards:
+            await shard.close()
+        self.subscribers.clear()
+
+
+_HUB = None
+
+
+def get_hub():
+    """The hub for the running event loop, created on first use."""
+    global _HUB
+    loop = asyncio.get_running_loop()
+    if _HUB is None or _HUB.loop is not loop:
+        _HUB = PubSubHub()
+        _HUB.loop = loop
+    return _HUB
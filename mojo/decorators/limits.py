@@ -1,6 +1,10 @@
 import hashlib
+import math
+import secrets
 import time
+from collections import namedtuple
 from functools import wraps
+from redis.cluster import RedisCluster
 from mojo.helpers.redis import get_connection
 from mojo.helpers.response import JsonResponse
 from mojo.helpers.settings import settings
@@ -10,7 +14,8 @@ from mojo.apps import metrics
 logger = logit.get_logger("error", "error.log")
 
 __all__ = ["rate_limit", "strict_rate_limit", "endpoint_metrics", "clear_rate_limits",
-           "check_account_attempt", "read_account_attempt", "check_api_throttle"]
+           "check_account_attempt", "read_account_attempt", "check_api_throttle",
+           "check_limits"]
 
 
 def _hash_key(value):
@@ -22,8 +27,199 @@ def _retry_after_fixed(window_start, window):
     return max(1, window_start + window - int(time.time()))
 
 
-def _retry_after_sliding(window):
-    return max(1, window)
+# ---------------------------------------------------------------------------
+# Limiter engine
+#
+# Every decorator check runs through one Lua script: all of a request's
+# dimensions (ip, duid, muid, apikey, account) are checked in a single
+# EVALSHA, and either every dimension records the hit or none does — a
+# request rejected on its IP does not also spend its API key's budget.
+# Each key holds O(1) state, except the sliding log, which is capped at
+# `limit` members because rejected hits are never recorded.
+#
+#   fixed         string counter per window (rl:...:<window_start>)
+#   sliding       sorted set of accepted hit times (srl:...) — exact rolling window
+#   token_bucket  hash {tokens, ts}; refills limit/window per second, bursts to limit
+#   gcra          string holding the theoretical arrival time; smooth spacing of
+#                 window/limit seconds with a burst of up to `limit`
+#
+# `now` comes from the caller, as the window_start in fixed-window key names
+# always has. On Redis Cluster a request's keys live in different slots, so
+# each dimension is checked with its own call, stopping at the first denial.
+# ---------------------------------------------------------------------------
+
+FIXED = "fixed"
+SLIDING = "sliding"
+TOKEN_BUCKET = "token_bucket"
+GCRA = "gcra"
+ALGORITHMS = (FIXED, SLIDING, TOKEN_BUCKET, GCRA)
+
+# KEYS[i]: one key per check. ARGV[1]: now (seconds), ARGV[2]: unique member
+# for sliding logs, then (algorithm, limit, window) per check.
+# Returns {blocked check index or 0, retry-after ms, used_1, ..., used_n}.
+LIMIT_LUA = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local n = #KEYS
+local blocked = 0
+local retry = 0
+local state = {}
+local used = {}
+for i = 1, n do
+    local key = KEYS[i]
+    local algorithm = ARGV[3 * i]
+    local limit = tonumber(ARGV[3 * i + 1])
+    local window = tonumber(ARGV[3 * i + 2])
+    local wait = 0
+    if algorithm == 'fixed' then
+        local count = tonumber(redis.call('GET', key) or '0')
+        if count >= limit then
+            wait = window - (now % window)
+        end
+        used[i] = count
+    elseif algorithm == 'sliding' then
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+        local count = redis.call('ZCARD', key)
+        if count >= limit then
+            local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+            wait = math.max(tonumber(oldest[2]) + window - now, 0.001)
+        end
+        used[i] = count
+    elseif algorithm == 'token_bucket' then
+        local rate = limit / window
+        local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = limit
+        if bucket[1] then
+            local elapsed = math.max(0, now - tonumber(bucket[2]))
+            tokens = math.min(limit, tonumber(bucket[1]) + elapsed * rate)
+        end
+        if tokens < 1 then
+            wait = (1 - tokens) / rate
+        end
+        state[i] = tokens
+        used[i] = limit - math.floor(tokens)
+    elseif algorithm == 'gcra' then
+        local interval = window / limit
+        local tat = math.max(tonumber(redis.call('GET', key) or '0'), now)
+        local next_tat = tat + interval
+        if next_tat - window > now then
+            wait = next_tat - window - now
+        end
+        state[i] = next_tat
+        used[i] = math.ceil((tat - now) / interval)
+    else
+        return redis.error_reply('unknown rate limit algorithm: ' .. tostring(algorithm))
+    end
+    if wait > 0 then
+        if blocked == 0 then
+            blocked = i
+        end
+        retry = math.max(retry, wait)
+    end
+end
+if blocked == 0 then
+    for i = 1, n do
+        local key = KEYS[i]
+        local algorithm = ARGV[3 * i]
+        local window = tonumber(ARGV[3 * i + 2])
+        if algorithm == 'fixed' then
+            used[i] = redis.call('INCR', key)
+            if used[i] == 1 then
+                redis.call('EXPIRE', key, math.ceil(window * 2))
+            end
+        elseif algorithm == 'sliding' then
+            redis.call('ZADD', key, now, member)
+            redis.call('EXPIRE', key, math.ceil(window) + 1)
+            used[i] = used[i] + 1
+        elseif algorithm == 'token_bucket' then
+            redis.call('HSET', key, 'tokens', state[i] - 1, 'ts', now)
+            redis.call('EXPIRE', key, math.ceil(window) + 1)
+            used[i] = used[i] + 1
+        else
+            redis.call('SET', key, state[i], 'PX', math.ceil((state[i] - now) * 1000))
+            used[i] = used[i] + 1
+        end
+    end
+end
+local out = {blocked, math.ceil(retry * 1000)}
+for i = 1, n do
+    out[#out + 1] = used[i]
+end
+return out
+"""
+
+# allowed: bool, retry_after: whole seconds (0 when allowed), index: position
+# of the first denying check (None when allowed), used: per-check hits counted
+# in the current window (for token_bucket/gcra: budget spent, out of limit).
+LimitResult = namedtuple("LimitResult", ["allowed", "retry_after", "index", "used"])
+
+_limit_script = None
+
+
+def _get_limit_script(r):
+    global _limit_script
+    if _limit_script is None:
+        _limit_script = r.register_script(LIMIT_LUA)
+    return _limit_script
+
+
+def _limit_key(algorithm, key, dimension, ident, window, now):
+    """Redis key for one limiter check. Fixed windows are window-suffixed;
+    sliding logs keep the srl: family; token_bucket/gcra state is suffixed
+    with the algorithm so clear_rate_limits' rl: patterns still match it."""
+    if algorithm == SLIDING:
+        return f"srl:{key}:{dimension}:{ident}"
+    if algorithm == FIXED:
+        return f"rl:{key}:{dimension}:{ident}:{int(now) // window * window}"
+    return f"rl:{key}:{dimension}:{ident}:{algorithm}"
+
+
+def check_limits(checks, now=None, r=None):
+    """
+    Check (and, if every check passes, record) one hit against each check.
+
+    Args:
+        checks: list of (redis_key, algorithm, limit, window_seconds)
+        now:    Timestamp the fixed-window keys were built with (default time.time())
+        r:      Redis connection (default get_connection())
+
+    Returns a LimitResult. Raises on Redis errors — callers fail open.
+    """
+    if not checks:
+        return LimitResult(True, 0, None, [])
+    for _, algorithm, limit, window in checks:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown rate limit algorithm: {algorithm}")
+        if limit <= 0 or window <= 0:
+            raise ValueError(f"rate limit and window must be positive, got {limit}/{window}s")
+    if now is None:
+        now = time.time()
+    if r is None:
+        r = get_connection()
+    script = _get_limit_script(r)
+    member = f"{now:.6f}:{secrets.token_hex(4)}"
+    if isinstance(r, RedisCluster):
+        used = []
+        for index, check in enumerate(checks):
+            result = _run_limit_script(script, r, [check], now, member)
+            used.extend(result.used)
+            if not result.allowed:
+                return LimitResult(False, result.retry_after, index, used)
+        return LimitResult(True, 0, None, used)
+    return _run_limit_script(script, r, checks, now, member)
+
+
+def _run_limit_script(script, r, checks, now, member):
+    keys = [check[0] for check in checks]
+    args = [repr(float(now)), member]
+    for _, algorithm, limit, window in checks:
+        args.extend((algorithm, limit, window))
+    reply = script(keys=keys, args=args, client=r)
+    blocked, retry_ms = int(reply[0]), int(reply[1])
+    used = [int(value) for value in reply[2:]]
+    if blocked:
+        return LimitResult(False, max(1, math.ceil(retry_ms / 1000)), blocked - 1, used)
+    return LimitResult(True, 0, None, used)
 
 
 def _block(key, request, retry_after, min_granularity):
@@ -56,35 +252,6 @@ def _block(key, request, retry_after, min_granularity):
     return resp
 
 
-def _incr_fixed(r, redis_key, window):
-    """
-    Fixed-window counter. Increments and returns the count.
-    Sets TTL on first write only (window * 2 as safety margin).
-    """
-    count = r.incr(redis_key)
-    if count == 1:
-        r.expire(redis_key, window * 2)
-    return count
-
-
-def _check_sliding(r, redis_key, window, limit):
-    """
-    Sliding-window counter using a Redis sorted set.
-    Adds current timestamp, removes entries outside the window, returns current count.
-    Returns (count, allowed).
-    """
-    now = time.time()
-    cutoff = now - window
-    p = r.pipeline(transaction=False)
-    p.zremrangebyscore(redis_key, 0, cutoff)
-    p.zadd(redis_key, {str(now): now})
-    p.zcard(redis_key)
-    p.expire(redis_key, window * 2)
-    results = p.execute()
-    count = results[2]
-    return count, count <= limit
-
-
 def _get_apikey_limits(request, key, default_limit, default_window):
     """
     Resolve the effective limit and window for an api_key check.
@@ -158,15 +325,69 @@ def _get_dimension(request, dimension):
     return None
 
 
+def _request_checks(request, key, algorithm, now, ip_limit, duid_limit, muid_limit, apikey_limit,
+                    ip_window, duid_window, muid_window, apikey_window):
+    """Build the check_limits() list for every dimension this request carries."""
+    ip = getattr(request, "ip", None) or request.META.get("REMOTE_ADDR", "unknown")
+    checks = [(_limit_key(algorithm, key, "ip", ip, ip_window, now), algorithm, ip_limit, ip_window)]
+
+    if duid_limit is not None:
+        duid = request.DATA.get("duid")
+        if duid:
+            checks.append((_limit_key(algorithm, key, "duid", duid, duid_window, now),
+                           algorithm, duid_limit, duid_window))
+
+    # muid — server-set cookie, bypass-resistant
+    if muid_limit is not None:
+        muid = getattr(request, "muid", None)
+        if muid:
+            checks.append((_limit_key(algorithm, key, "muid", muid, muid_window, now),
+                           algorithm, muid_limit, muid_window))
+
+    if apikey_limit is not None:
+        resolved = _get_apikey_limits(request, key, apikey_limit, apikey_window)
+        if resolved:
+            group_pk, ak_limit, ak_window = resolved
+            checks.append((_limit_key(algorithm, key, "apikey", group_pk, ak_window, now),
+                           algorithm, ak_limit, ak_window))
+    return checks
+
+
+def _limit_decorator(name, key, algorithm, min_granularity, limits):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"{name}: unknown algorithm '{algorithm}', expected one of {ALGORITHMS}")
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            try:
+                now = time.time()
+                checks = _request_checks(request, key, algorithm, now, **limits)
+                result = check_limits(checks, now=now)
+                if not result.allowed:
+                    return _block(key, request, result.retry_after, min_granularity)
+            except Exception as err:
+                logger.error(f"{name}: Redis error for key '{key}': {err}")
+
+            return func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 def rate_limit(key, ip_limit, duid_limit=None, muid_limit=None, apikey_limit=None,
                ip_window=60, duid_window=60, muid_window=60, apikey_window=60,
-               min_granularity="hours"):
+               min_granularity="hours", algorithm=FIXED):
     """
     Fixed-window rate limiting decorator.
 
     Suitable for general API throughput limits where a small burst across a
     window boundary is acceptable. For security-sensitive endpoints (login,
-    password reset, MFA) use strict_rate_limit instead.
+    password reset, MFA) use strict_rate_limit instead. Pass
+    algorithm="token_bucket" or "gcra" to smooth bursts instead of resetting
+    at window boundaries.
+
+    All dimensions are checked in one Redis round-trip; a request blocked on
+    any dimension is not counted against the others.
 
     api_key limits are resolved from request.api_key.limits[key] if present,
     falling back to apikey_limit / apikey_window. Window overrides in
@@ -188,60 +409,17 @@ def rate_limit(key, ip_limit, duid_limit=None, muid_limit=None, apikey_limit=Non
         duid_window:     Window in seconds for duid counter (default 60)
         apikey_window:   Default window in seconds for API key counter (default 60)
         min_granularity: Granularity passed to metrics.record() (default "hours")
+        algorithm:       "fixed" (default), "sliding", "token_bucket" or "gcra"
     """
-    def decorator(func):
-        @wraps(func)
-        def wrapper(request, *args, **kwargs):
-            try:
-                r = get_connection()
-                now = int(time.time())
-
-                # --- IP check ---
-                ip = getattr(request, "ip", None) or request.META.get("REMOTE_ADDR", "unknown")
-                ip_window_start = now // ip_window * ip_window
-                ip_key = f"rl:{key}:ip:{ip}:{ip_window_start}"
-                if _incr_fixed(r, ip_key, ip_window) > ip_limit:
-                    return _block(key, request, _retry_after_fixed(ip_window_start, ip_window), min_granularity)
-
-                # --- duid check (optional) ---
-                if duid_limit is not None:
-                    duid = request.DATA.get("duid")
-                    if duid:
-                        duid_window_start = now // duid_window * duid_window
-                        duid_key = f"rl:{key}:duid:{duid}:{duid_window_start}"
-                        if _incr_fixed(r, duid_key, duid_window) > duid_limit:
-                            return _block(key, request, _retry_after_fixed(duid_window_start, duid_window), min_granularity)
-
-                # --- muid check (optional) — server-set cookie, bypass-resistant ---
-                if muid_limit is not None:
-                    muid = getattr(request, "muid", None)
-                    if muid:
-                        muid_window_start = now // muid_window * muid_window
-                        muid_key = f"rl:{key}:muid:{muid}:{muid_window_start}"
-                        if _incr_fixed(r, muid_key, muid_window) > muid_limit:
-                            return _block(key, request, _retry_after_fixed(muid_window_start, muid_window), min_granularity)
-
-                # --- api_key check (optional) ---
-                if apikey_limit is not None:
-                    resolved = _get_apikey_limits(request, key, apikey_limit, apikey_window)
-                    if resolved:
-                        group_pk, ak_limit, ak_window = resolved
-                        ak_window_start = now // ak_window * ak_window
-                        ak_key = f"rl:{key}:apikey:{group_pk}:{ak_window_start}"
-                        if _incr_fixed(r, ak_key, ak_window) > ak_limit:
-                            return _block(key, request, _retry_after_fixed(ak_window_start, ak_window), min_granularity)
-
-            except Exception as err:
-                logger.error(f"rate_limit: Redis error for key '{key}': {err}")
-
-            return func(request, *args, **kwargs)
-        return wrapper
-    return decorator
+    return _limit_decorator("rate_limit", key, algorithm, min_granularity, dict(
+        ip_limit=ip_limit, duid_limit=duid_limit, muid_limit=muid_limit, apikey_limit=apikey_limit,
+        ip_window=ip_window, duid_window=duid_window, muid_window=muid_window,
+        apikey_window=apikey_window))
 
 
 def strict_rate_limit(key, ip_limit, duid_limit=None, muid_limit=None, apikey_limit=None,
                       ip_window=60, duid_window=60, muid_window=60, apikey_window=60,
-                      min_granularity="hours"):
+                      min_granularity="hours", algorithm=SLIDING):
     """
     Sliding-window rate limiting decorator.
 
@@ -253,8 +431,10 @@ def strict_rate_limit(key, ip_limit, duid_limit=None, muid_limit=None, apikey_li
     falling back to apikey_limit / apikey_window. Window overrides in
     request.api_key.limits are in minutes.
 
-    Uses a Redis sorted set per key (slightly more memory than fixed-window
-    but the only correct approach for tight limits).
+    Uses a Redis sorted set per key holding at most `limit` accepted hits —
+    rejected requests are not logged, so a flood cannot grow it. Retry-After
+    is the time until the oldest logged hit leaves the window.
+    algorithm="gcra" gives the same guarantee in a single string per key.
 
     Usage:
         @md.POST("login")
@@ -272,54 +452,12 @@ def strict_rate_limit(key, ip_limit, duid_limit=None, muid_limit=None, apikey_li
         duid_window:     Window in seconds for duid sliding window (default 60)
         apikey_window:   Default window in seconds for API key sliding window (default 60)
         min_granularity: Granularity passed to metrics.record() (default "hours")
+        algorithm:       "sliding" (default), "fixed", "token_bucket" or "gcra"
     """
-    def decorator(func):
-        @wraps(func)
-        def wrapper(request, *args, **kwargs):
-            try:
-                r = get_connection()
-
-                # --- IP check ---
-                ip = getattr(request, "ip", None) or request.META.get("REMOTE_ADDR", "unknown")
-                ip_key = f"srl:{key}:ip:{ip}"
-                _, allowed = _check_sliding(r, ip_key, ip_window, ip_limit)
-                if not allowed:
-                    return _block(key, request, _retry_after_sliding(ip_window), min_granularity)
-
-                # --- duid check (optional) ---
-                if duid_limit is not None:
-                    duid = request.DATA.get("duid")
-                    if duid:
-                        duid_key = f"srl:{key}:duid:{duid}"
-                        _, allowed = _check_sliding(r, duid_key, duid_window, duid_limit)
-                        if not allowed:
-                            return _block(key, request, _retry_after_sliding(duid_window), min_granularity)
-
-                # --- muid check (optional) — server-set cookie, bypass-resistant ---
-                if muid_limit is not None:
-                    muid = getattr(request, "muid", None)
-                    if muid:
-                        muid_key = f"srl:{key}:muid:{muid}"
-                        _, allowed = _check_sliding(r, muid_key, muid_window, muid_limit)
-                        if not allowed:
-                            return _block(key, request, _retry_after_sliding(muid_window), min_granularity)
-
-                # --- api_key check (optional) ---
-                if apikey_limit is not None:
-                    resolved = _get_apikey_limits(request, key, apikey_limit, apikey_window)
-                    if resolved:
-                        group_pk, ak_limit, ak_window = resolved
-                        ak_key = f"srl:{key}:apikey:{group_pk}"
-                        _, allowed = _check_sliding(r, ak_key, ak_window, ak_limit)
-                        if not allowed:
-                            return _block(key, request, _retry_after_sliding(ak_window), min_granularity)
-
-            except Exception as err:
-                logger.error(f"strict_rate_limit: Redis error for key '{key}': {err}")
-
-            return func(request, *args, **kwargs)
-        return wrapper
-    return decorator
+    return _limit_decorator("strict_rate_limit", key, algorithm, min_granularity, dict(
+        ip_limit=ip_limit, duid_limit=duid_limit, muid_limit=muid_limit, apikey_limit=apikey_limit,
+        ip_window=ip_window, duid_window=duid_window, muid_window=muid_window,
+        apikey_window=apikey_window))
 
 
 def check_account_attempt(key, account_id, limit, window, request=None,
@@ -346,15 +484,16 @@ def check_account_attempt(key, account_id, limit, window, request=None,
         min_granularity: Granularity passed to metrics on block.
 
     Returns:
-        (count, response) — count is current attempts in window;
+        (count, response) — count is the accepted attempts in the window
+        (rejected attempts are not logged, so it never exceeds limit);
         response is a 429 JsonResponse if blocked, else None.
     """
     try:
-        r = get_connection()
-        redis_key = f"srl:{key}:account:{account_id}"
-        count, allowed = _check_sliding(r, redis_key, window, limit)
-        if not allowed and request is not None:
-            return count, _block(key, request, _retry_after_sliding(window), min_granularity)
+        redis_key = _limit_key(SLIDING, key, "account", account_id, window, 0)
+        result = check_limits([(redis_key, SLIDING, limit, window)])
+        count = result.used[0]
+        if not result.allowed and request is not None:
+            return count, _block(key, request, result.retry_after, min_granularity)
         return count, None
     except Exception as err:
         logger.error(f"check_account_attempt: Redis error for key '{key}' account '{account_id}': {err}")
@@ -417,15 +556,42 @@ def read_account_attempt(key, account_id, limit=None, window=None):
 # api key pk) — never by IP: anonymous traffic is covered by the per-endpoint
 # decorators above, and IP-keyed global limits punish CGNAT bystanders.
 #
-# Hot-path cost: one pipelined Redis round-trip (4 commands). Once per
-# identity per window (~1/min) an extra small round-trip flushes the previous
-# window's exact count into the traffic:top accounting zset that the
-# concentration detector (incident cron) reads. Fail-open on any Redis error.
+# Hot-path cost: one Redis round-trip (THROTTLE_LUA). Once per identity per
+# window (~1/min) the same script also flushes the previous window's exact
+# count into the traffic:top accounting zset that the concentration detector
+# (incident cron) reads. On Redis Cluster those keys span slots, so the
+# counters go out in one pipeline and the flush takes a second round-trip.
+# Fail-open on any Redis error.
 # ---------------------------------------------------------------------------
 
 TRAFFIC_BUCKET_SECONDS = 300   # accounting bucket the concentration detector reads
 TRAFFIC_KEY_TTL = 3600         # keep accounting keys around long enough to inspect
 
+# KEYS: identity counter, traffic total, previous window's identity counter,
+# previous window's traffic:top zset. ARGV: counter TTL, accounting TTL,
+# report floor, identity member, ip member ('' when unknown).
+# Returns the identity's count in the current window.
+THROTTLE_LUA = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    local prev = tonumber(redis.call('GET', KEYS[3]) or '0')
+    if prev > 0 and prev >= tonumber(ARGV[3]) then
+        redis.call('ZINCRBY', KEYS[4], prev, ARGV[4])
+        if ARGV[5] ~= '' then
+            redis.call('ZINCRBY', KEYS[4], prev, ARGV[5])
+        end
+        redis.call('EXPIRE', KEYS[4], ARGV[2])
+    end
+end
+if redis.call('INCR', KEYS[2]) == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+return count
+"""
+
+_throttle_script = None
+
 _throttle_config_cache = None
 _throttle_config_ts = 0.0
 
@@ -532,6 +698,49 @@ def _throttle_block(request, kind, pk, limit, window_start, window):
     return resp
 
 
+def _count_identity(r, request, kind, pk, now, window_start, window, report_floor):
+    """Count one request for the identity and the traffic bucket; returns the
+    identity's count in the current window."""
+    global _throttle_script
+    bucket = now // TRAFFIC_BUCKET_SECONDS * TRAFFIC_BUCKET_SECONDS
+    prev_start = window_start - window
+    ident_key = f"rl:api:{kind}:{pk}:{window_start}"
+    prev_key = f"rl:api:{kind}:{pk}:{prev_start}"
+    total_key = f"traffic:total:{bucket}"
+    top_key = f"traffic:top:{prev_start // TRAFFIC_BUCKET_SECONDS * TRAFFIC_BUCKET_SECONDS}"
+    # Approximate IP attribution — the identity's current IP is credited with
+    # its previous window. Informational only.
+    ip = getattr(request, "ip", None)
+    ip_member = f"ip:{ip}" if ip else ""
+
+    if not isinstance(r, RedisCluster):
+        if _throttle_script is None:
+            _throttle_script = r.register_script(THROTTLE_LUA)
+        return int(_throttle_script(
+            keys=[ident_key, total_key, prev_key, top_key],
+            args=[window * 2, TRAFFIC_KEY_TTL, report_floor, f"{kind}:{pk}", ip_member],
+            client=r))
+
+    p = r.pipeline(transaction=False)
+    p.incr(ident_key)
+    p.expire(ident_key, window * 2)
+    p.incr(total_key)
+    p.expire(total_key, TRAFFIC_KEY_TTL)
+    count = p.execute()[0]
+    if count == 1:
+        # First request of a new window: flush the previous window's exact
+        # count into the accounting zset (once per identity per window).
+        prev_count = int(r.get(prev_key) or 0)
+        if prev_count and prev_count >= report_floor:
+            p2 = r.pipeline(transaction=False)
+            p2.zincrby(top_key, prev_count, f"{kind}:{pk}")
+            if ip_member:
+                p2.zincrby(top_key, prev_count, ip_member)
+            p2.expire(top_key, TRAFFIC_KEY_TTL)
+            p2.execute()
+    return count
+
+
 def check_api_throttle(request):
     """Global per-identity throttle + traffic accounting for every dispatched
     REST request. Returns a 429 HttpResponse when the identity is over budget
@@ -567,33 +776,8 @@ def check_api_throttle(request):
 
         now = int(time.time())
         window_start = now // window * window
-        bucket = now // TRAFFIC_BUCKET_SECONDS * TRAFFIC_BUCKET_SECONDS
-        ident_key = f"rl:api:{kind}:{pk}:{window_start}"
-
-        r = get_connection()
-        p = r.pipeline(transaction=False)
-        p.incr(ident_key)
-        p.expire(ident_key, window * 2)
-        p.incr(f"traffic:total:{bucket}")
-        p.expire(f"traffic:total:{bucket}", TRAFFIC_KEY_TTL)
-        count = p.execute()[0]
-
-        if count == 1:
-            # First request of a new window: flush the previous window's exact
-            # count into the accounting zset (once per identity per window).
-            prev_count = r.get(f"rl:api:{kind}:{pk}:{window_start - window}")
-            if prev_count and int(prev_count) >= int(cfg["report_floor"]):
-                prev_bucket = (window_start - window) // TRAFFIC_BUCKET_SECONDS * TRAFFIC_BUCKET_SECONDS
-                top_key = f"traffic:top:{prev_bucket}"
-                p2 = r.pipeline(transaction=False)
-                p2.zincrby(top_key, int(prev_count), f"{kind}:{pk}")
-                ip = getattr(request, "ip", None)
-                if ip:
-                    # Approximate IP attribution — the identity's current IP is
-                    # credited with its previous window. Informational only.
-                    p2.zincrby(top_key, int(prev_count), f"ip:{ip}")
-                p2.expire(top_key, TRAFFIC_KEY_TTL)
-                p2.execute()
+        count = _count_identity(get_connection(), request, kind, pk, now, window_start,
+                                window, int(cfg["report_floor"]))
 
         if cfg["enabled"] and count > limit:
             return _throttle_block(request, kind, pk, limit, window_start, window)
@@ -641,17 +825,14 @@ def clear_rate_limits(ip=None, key=None, duid=None, muid=None, account_id=None,
             for k in r.scan_iter(pattern):
                 r.delete(k)
                 deleted += 1
-    if duid and key:
-        r.delete(f"srl:{key}:duid:{duid}")
-        r.delete(f"rl:{key}:duid:{duid}")
-        deleted += 1
-    if muid and key:
-        r.delete(f"srl:{key}:muid:{muid}")
-        deleted += 1
-        # rl: muid keys are window-suffixed; pattern-scan to clear them all
-        for k in r.scan_iter(f"rl:{key}:muid:{muid}:*"):
-            r.delete(k)
+    # rl: keys are suffixed (window start or algorithm); pattern-scan to clear them all
+    for dimension, ident in (("duid", duid), ("muid", muid)):
+        if ident and key:
+            r.delete(f"srl:{key}:{dimension}:{ident}")
             deleted += 1
+            for k in r.scan_iter(f"rl:{key}:{dimension}:{ident}:*"):
+                r.delete(k)
+                deleted += 1
     if account_id is not None and key:
         r.delete(f"srl:{key}:account:{account_id}")
         r.delete(f"rl:{key}:account:{account_id}")
@@ -0,0 +1,59 @@
+"""Per-request query-count assertions for list endpoints.
+
+Tests lock in query savings (graph-driven select_related / prefetch) by
+sending ``X-Mojo-Test-Max-Queries: <n>`` on a list request. When the
+test-mode gate passes (see mojo.helpers.test_mode), the list response counts
+every SQL statement it issues on any database alias, reports the total in an
+``X-Mojo-Query-Count`` response header, and fails the request when the count
+exceeds the budget. Outside test mode the header is ignored and nothing is
+counted.
+
+Usage (in-process):
+    from mojo.helpers.query_budget import count_queries
+
+    with count_queries() as counter:
+        Book.queryset_to_dict(Book.objects.all(), graph="list")
+    assert counter.count <= 2
+"""
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+from mojo.helpers import test_mode
+
+MAX_QUERIES_HEADER = "HTTP_X_MOJO_TEST_MAX_QUERIES"
+QUERY_COUNT_HEADER = "X-Mojo-Query-Count"
+
+
+class QueryCounter:
+    """execute_wrapper that counts statements passing through it."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements issued on every configured database alias."""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def get_request_budget(request):
+    """The X-Mojo-Test-Max-Queries budget for a test request, else None."""
+    if not test_mode.is_test_request(request):
+        return None
+    raw = request.META.get(MAX_QUERIES_HEADER)
+    if raw is None:
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
@@ -27,6 +27,7 @@ Notes:
 
 from urllib.parse import quote, unquote, urlparse
 import redis
+import redis.asyncio
 from redis.cluster import RedisCluster  # redis-py provides cluster client
 
 from mojo.helpers.settings import settings
@@ -230,3 +231,23 @@ def get_bounded_connection(timeout=1.0, max_connections=8,
         socket_connect_timeout=timeout, socket_timeout=timeout,
         max_connections=max_connections)
     return redis.Redis(connection_pool=pool)
+
+
+def create_async_client(max_connections=2):
+    """Return a new redis.asyncio client on the primary, with its own pool.
+
+    For long-lived async consumers such as the realtime pub/sub hub; the
+    caller owns it and must ``await client.aclose()``. Plain PUBLISH/SUBSCRIBE
+    is cluster-wide, so cluster mode gets a standalone client on the
+    configured endpoint too. No socket timeout: a subscribed connection is
+    legitimately silent for long stretches.
+    """
+    connect_timeout = float(settings.get_static("REDIS_CONNECT_TIMEOUT", 2))
+    return redis.asyncio.Redis.from_url(
+        _build_url(),
+        decode_responses=True,
+        socket_connect_timeout=connect_timeout,
+        socket_timeout=None,
+        health_check_interval=30,
+        max_connections=max(1, int(max_connections)),
+    )
@@ -1,6 +1,9 @@
+import atexit
 import json
 import threading
-from queue import Queue, Empty
+import time
+from queue import Queue, Empty, Full
+from django.db import close_old_connections
 from mojo.apps.logit.models import Log
 from mojo.helpers.settings import settings
 from mojo.helpers import logit, request as request_helper
@@ -16,43 +19,198 @@ LOGGER = logit.get_logger("requests", "requests.log")
 ERROR_LOGGER = logit.get_logger("error", "error.log")
 LOGIT_NO_LOG_PREFIX = settings.get_static("LOGIT_NO_LOG_PREFIX", ['GET:/api/user'])
 LOGIT_ALWAYS_LOG_PREFIX = settings.get_static("LOGIT_ALWAYS_LOG_PREFIX", ['POST:/api/user', 'GET:/api/user/'])
+# Background writer: queue bound, rows per INSERT, max seconds a row waits,
+# and the sampling policy once the queue is LOGIT_QUEUE_SAMPLE_AT full
+# (keep 1 in LOGIT_QUEUE_SAMPLE_RATE). A full queue drops.
+LOGIT_QUEUE_SIZE = settings.get_static("LOGIT_QUEUE_SIZE", 10000)
+LOGIT_BATCH_SIZE = settings.get_static("LOGIT_BATCH_SIZE", 200)
+LOGIT_FLUSH_INTERVAL = settings.get_static("LOGIT_FLUSH_INTERVAL", 1.0)
+LOGIT_QUEUE_SAMPLE_AT = settings.get_static("LOGIT_QUEUE_SAMPLE_AT", 0.8)
+LOGIT_QUEUE_SAMPLE_RATE = settings.get_static("LOGIT_QUEUE_SAMPLE_RATE", 10)
+
+
+class BulkLogWriter:
+    """
+    Bounded, batching sink for request logs.
+
+    The middleware hands items to put() without blocking. A background
+    thread writes "db" items with one bulk_create per LOGIT_BATCH_SIZE rows
+    or every LOGIT_FLUSH_INTERVAL seconds, whichever comes first; "file"
+    items go straight to the requests logger. Past the sampling watermark
+    only every Nth item is kept, and a full queue drops — both are counted
+    in stats() and reported to the error log once per flush. Pending rows
+    are flushed on shutdown.
+    """
+
+    def __init__(self, max_size=10000, batch_size=200, flush_interval=1.0,
+                 sample_at=0.8, sample_rate=10):
+        self.queue = Queue(maxsize=max_size)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.sample_watermark = int(max_size * sample_at) if sample_at and max_size else 0
+        self.sample_rate = max(1, int(sample_rate))
+        self.thread = None
+        self._lock = threading.Lock()
+        self._sample_tick = 0
+        self._reported = {"dropped": 0, "sampled": 0}
+        self.counters = {
+            "queued": 0, "written": 0, "failed": 0,
+            "dropped": 0, "sampled": 0, "flushes": 0,
+        }
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="mojo-log-writer", daemon=True)
+            self.thread.start()
+
+    def put(self, item):
+        """Queue (log_type, request, content, log_kind); False if sampled out or dropped."""
+        if self.sample_watermark and self.queue.qsize() >= self.sample_watermark:
+            with self._lock:
+                self._sample_tick += 1
+                keep = self._sample_tick % self.sample_rate == 0
+            if not keep:
+                self._count("sampled")
+                return False
+        try:
+            self.queue.put_nowait(item)
+        except Full:
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
 
-# Async logging setup
-log_queue = Queue()
-background_thread = None
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is written; False on timeout."""
+        if self.thread is None or not self.thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except Full:
+            return False
+        return done.wait(timeout)
 
-def background_logger():
-    """Background thread to process logs without blocking responses."""
-    while True:
+    def stop(self, timeout=5.0):
+        """Flush pending rows and stop the thread."""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except Full:
+            ERROR_LOGGER.error("Log writer queue full at shutdown; pending request logs were lost")
+            return
+        self.thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["pending"] = self.queue.qsize()
+        return stats
+
+    def run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except Empty:
+                item = False
+            try:
+                if item is None or isinstance(item, threading.Event):
+                    try:
+                        self._write_db(pending)
+                    finally:
+                        pending, deadline = [], None
+                        if item is not None:
+                            item.set()
+                    if item is None:
+                        break
+                elif item:
+                    if item[0] == "db":
+                        pending.append(item)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                    else:
+                        self._write_file(item)
+                if pending and (len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                    self._write_db(pending)
+                    pending, deadline = [], None
+            except Exception as e:
+                pending, deadline = [], None
+                ERROR_LOGGER.exception(f"Background logging error: {e}")
+
+    def _write_db(self, items):
+        if not items:
+            return
+        close_old_connections()
+        rows = []
+        for _, request, content, log_kind in items:
+            try:
+                rows.append(Log.build(request, content, log_kind))
+            except Exception as e:
+                self._count("failed")
+                ERROR_LOGGER.exception(f"Background logging error: {e}")
+        try:
+            Log.objects.bulk_create(rows, batch_size=self.batch_size)
+            written = len(rows)
+        except Exception as e:
+            # One bad row must not cost the whole batch.
+            ERROR_LOGGER.exception(f"Background bulk log write failed, retrying row by row: {e}")
+            close_old_connections()
+            written = 0
+            for row in rows:
+                try:
+                    row.save(force_insert=True)
+                    written += 1
+                except Exception:
+                    self._count("failed")
+        self._count("written", written)
+        self._count("flushes")
+        self._report_losses()
+
+    def _write_file(self, item):
+        _, request, content, log_kind = item
         try:
-            log_item = log_queue.get(timeout=30)  # 30s timeout
-            if log_item is None:  # Shutdown signal
-                break
-
-            log_type, request, content, log_kind = log_item
-
-            if log_type == "db":
-                Log.logit(request, content, log_kind)
-            elif log_type == "file":
-                method = request.method if request else "SYSTEM"
-                ip = getattr(request, 'ip', 'unknown') if request else 'system'
-                path = getattr(request, 'path', 'unknown') if request else 'system'
-                LOGGER.info(f"{log_kind.upper()} - {method} - {ip} - {path}", content)
-
-            log_queue.task_done()
-        except Empty:
-            continue
+            method = request.method if request else "SYSTEM"
+            ip = getattr(request, 'ip', 'unknown') if request else 'system'
+            path = getattr(request, 'path', 'unknown') if request else 'system'
+            LOGGER.info(f"{log_kind.upper()} - {method} - {ip} - {path}", content)
         except Exception as e:
             ERROR_LOGGER.exception(f"Background logging error: {e}")
 
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _report_losses(self):
+        with self._lock:
+            dropped = self.counters["dropped"] - self._reported["dropped"]
+            sampled = self.counters["sampled"] - self._reported["sampled"]
+            self._reported["dropped"] = self.counters["dropped"]
+            self._reported["sampled"] = self.counters["sampled"]
+        if dropped or sampled:
+            ERROR_LOGGER.warning(
+                f"Request log queue saturated: {dropped} dropped, {sampled} sampled out since last flush")
+
+
+log_writer = BulkLogWriter(
+    max_size=LOGIT_QUEUE_SIZE,
+    batch_size=LOGIT_BATCH_SIZE,
+    flush_interval=LOGIT_FLUSH_INTERVAL,
+    sample_at=LOGIT_QUEUE_SAMPLE_AT,
+    sample_rate=LOGIT_QUEUE_SAMPLE_RATE,
+)
+
+
 def start_background_logger():
-    global background_thread
-    if background_thread is None or not background_thread.is_alive():
-        background_thread = threading.Thread(target=background_logger, daemon=True)
-        background_thread.start()
+    log_writer.start()
 
-# Start the background logger
+
+# Start the background logger and flush it on interpreter shutdown
 start_background_logger()
+atexit.register(log_writer.stop)
 
 class LoggerMiddleware:
     def __init__(self, get_response):
@@ -166,12 +324,8 @@ class LoggerMiddleware:
         return response.content
 
     def queue_log(self, log_type, request, content, log_kind):
-        """Queue log for background processing."""
-        try:
-            log_queue.put((log_type, request, content, log_kind), block=False)
-        except:
-            # If queue is full, just skip this log to avoid blocking
-            pass
+        """Queue log for background processing (never blocks; see BulkLogWriter)."""
+        log_writer.put((log_type, request, content, log_kind))
 
     def log_request(self, request):
         if not self.can_log(request):
@@ -9,10 +9,12 @@ from django.db import transaction, models as dm
 import json
 import objict
 import datetime
-from mojo.helpers import dates, logit
+from mojo.helpers import dates, logit, query_budget
+from mojo.models import rest_cursor
 from mojo.helpers.request import (
     is_request_user, is_key_backed_session, is_override_user_session,
     restricted_identity)
+from contextlib import nullcontext
 from contextvars import ContextVar
 
 
@@ -1204,7 +1206,6 @@ class MojoModel:
         paged_queryset = queryset[page_start:page_end]
         graph = cls.rest_resolve_request_graph(request, "list")
         format = request.DATA.get("download_format", "json")
-        count = queryset.count()
         # Use serializer manager for optimal performance
         manager = get_serializer_manager()
         if format != "json":
@@ -1235,21 +1236,37 @@ class MojoModel:
             return serializer.serialize_queryset(
                 queryset,
                 fields=fields,
-                filename=request.DATA.get("filename", f"{cls.__name__}.csv"),
+                filename=request.DATA.get("filename", f"{cls.__name__}.{format_key}"),
                 localize=localize,
                 timezone=timezone
             )
-        serializer = manager.get_serializer(paged_queryset, graph=graph, many=True)
-        resp = serializer.to_response(request, count=count, start=page_start, size=page_size)
-        resp.log_context = {
-            "endpoint": "list",
-            "model": cls.__name__,
-            "page_size": page_size,
-            "page_start": page_start,
-            "page_end": page_end,
-            "graph": graph,
-            "count": count
-        }
+        # Test-mode query budget (X-Mojo-Test-Max-Queries); None in production.
+        budget = query_budget.get_request_budget(request)
+        with (query_budget.count_queries() if budget is not None else nullcontext()) as counter:
+            if rest_cursor.is_cursor_request(request):
+                # Keyset pagination (?_cursor=1 / ?_after= / ?_before=).
+                resp = rest_cursor.on_rest_list_cursor(
+                    cls, request, queryset, graph, page_size, manager)
+            else:
+                count = rest_cursor.get_count(request, queryset)
+                # The serializer applies graph-driven select_related /
+                # prefetch_related / only() before the page is evaluated.
+                serializer = manager.get_serializer(paged_queryset, graph=graph, many=True)
+                resp = serializer.to_response(request, count=count, start=page_start, size=page_size)
+                resp.log_context = {
+                    "endpoint": "list",
+                    "model": cls.__name__,
+                    "page_size": page_size,
+                    "page_start": page_start,
+                    "page_end": page_end,
+                    "graph": graph,
+                    "count": count
+                }
+        if budget is not None:
+            resp[query_budget.QUERY_COUNT_HEADER] = str(counter.count)
+            if counter.count > budget:
+                raise me.RestErrorException(
+                    f"{cls.__name__} list issued {counter.count} queries, budget is {budget}")
         return resp
 
     @classmethod
@@ -2353,6 +2370,18 @@ class MojoModel:
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=400)
 
+    @classmethod
+    def on_rest_prepare_rows(cls, rows, graph):
+        """
+        Prime per-page state before a list of rows is serialized.
+
+        Called once per page (and once per page of select_related rows a
+        parent graph embeds) with the model instances about to be serialized
+        with `graph`. Override to batch-load whatever per-row extras would
+        otherwise query for one row at a time. Must not change the output.
+        """
+        pass
+
     def to_dict(self, graph="default"):
         # Use serializer manager for optimal performance
         manager = get_serializer_manager()
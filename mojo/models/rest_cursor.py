@@ -0,0 +1,240 @@
+"""
+Keyset (cursor) pagination for MojoModel list endpoints.
+
+Offset pagination (`?start=&size=`) makes the database walk and discard every
+row before the page, and always pairs it with a full COUNT(*). On tables with
+millions of rows both cost seconds. Cursor mode seeks straight to the page
+through the sort index instead:
+
+    GET /api/logit/log?_cursor=1&size=50            first page
+    GET /api/logit/log?_after=<next token>&size=50  following page
+    GET /api/logit/log?_before=<prev token>&size=50 preceding page
+
+The list envelope gains `next` / `prev` tokens (null at either end). Tokens
+are opaque: base64 JSON of the active sort, the boundary row's sort value and
+its pk. The pk is the tiebreaker, so the order is total even when the sort
+column has duplicates.
+
+The queryset arriving here has had permissions, group scope, filters, search
+and sort applied — this module only reads the sort back off it. A single-field
+sort is required (the framework never builds anything else); nullable sort
+columns always order NULLs last, matching on_rest_list_sort's date handling.
+
+`_count=exact|estimate|none` (also honored by offset pagination) picks how the
+envelope's `count` is computed: `estimate` uses the PostgreSQL planner's row
+estimate (exact COUNT elsewhere), `none` skips it and returns null.
+
+Reserved query-param prefix: see mojo/models/rest_aggregation.py.
+"""
+import base64
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections, models as dm
+from django.db.models.expressions import OrderBy
+
+from mojo import errors as me
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def is_cursor_request(request):
+    """True when the request opted into keyset pagination."""
+    if request.DATA.get("_after") or request.DATA.get("_before"):
+        return True
+    return request.DATA.get_typed("_cursor", False, bool)
+
+
+def get_count(request, queryset):
+    """Envelope count for `_count=exact|estimate|none` (default exact)."""
+    mode = request.DATA.get("_count", "exact") or "exact"
+    if mode not in COUNT_MODES:
+        raise me.ValueException(f"_count must be one of {', '.join(COUNT_MODES)}")
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        estimate = estimate_count(queryset)
+        if estimate is not None:
+            return estimate
+    return queryset.count()
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate for queryset, or None when unavailable.
+
+    PostgreSQL only (EXPLAIN's top-level "Plan Rows"); other backends return
+    None so the caller falls back to an exact COUNT.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
+
+
+def on_rest_list_cursor(cls, request, queryset, graph, page_size, manager):
+    """
+    Serve one keyset page of an already filtered and sorted list queryset.
+
+    Returns the JSON response (envelope: data, count, size, next, prev).
+    """
+    sort = _resolve_sort(cls, queryset)
+    after = request.DATA.get("_after")
+    before = request.DATA.get("_before")
+    if after and before:
+        raise me.ValueException("_after and _before are mutually exclusive")
+
+    token = after or before
+    backwards = bool(before)
+    keyset = queryset.order_by(*sort.ordering(reverse=backwards))
+    if token:
+        value, pk = sort.decode(token)
+        keyset = keyset.filter(sort.seek(value, pk, reverse=backwards))
+
+    # size + 1 keys tells us whether another page exists past this one.
+    keys = list(keyset.values_list(sort.attname, "pk")[:page_size + 1])
+    has_more = len(keys) > page_size
+    keys = keys[:page_size]
+    if backwards:
+        keys.reverse()
+
+    pks = [pk for _, pk in keys]
+    page = queryset.filter(pk__in=pks).order_by(*sort.ordering())
+    if keys:
+        first, last = keys[0], keys[-1]
+        next_token = sort.encode(*last) if (has_more or backwards) else None
+        prev_token = sort.encode(*first) if (has_more if backwards else bool(after)) else None
+    else:
+        next_token = prev_token = None
+
+    count = get_count(request, queryset)
+    serializer = manager.get_serializer(page, graph=graph, many=True)
+    resp = serializer.to_response(request, count=count, size=page_size,
+                                  next=next_token, prev=prev_token)
+    resp.log_context = {
+        "endpoint": "list",
+        "model": cls.__name__,
+        "page_size": page_size,
+        "pagination": "cursor",
+        "sort": sort.spec,
+        "graph": graph,
+        "count": count,
+    }
+    return resp
+
+
+class _KeysetSort:
+    """The active single-field sort, with pk as a same-direction tiebreaker."""
+
+    def __init__(self, model, field, descending):
+        self.model = model
+        self.field = field
+        self.descending = descending
+        self.pk_field = model._meta.pk
+        self.is_pk = field is None or field.primary_key
+        self.attname = "pk" if self.is_pk else field.attname
+        self.nullable = not self.is_pk and field.null
+        name = "pk" if self.is_pk else field.name
+        self.spec = ("-" if descending else "") + name
+
+    def ordering(self, reverse=False):
+        descending = self.descending != reverse
+        # NULLs stay last in the presented order, so they come first when
+        # walking backwards.
+        nulls = {"nulls_last": True} if not reverse else {"nulls_first": True}
+        pk = dm.F("pk").desc() if descending else dm.F("pk").asc()
+        if self.is_pk:
+            return [pk]
+        expr = dm.F(self.attname)
+        if self.nullable:
+            expr = expr.desc(**nulls) if descending else expr.asc(**nulls)
+        else:
+            expr = expr.desc() if descending else expr.asc()
+        return [expr, pk]
+
+    def seek(self, value, pk, reverse=False):
+        """Q for rows strictly after (value, pk) in the walk direction."""
+        descending = self.descending != reverse
+        past = "lt" if descending else "gt"
+        if self.is_pk:
+            return dm.Q(**{f"pk__{past}": pk})
+        col = self.attname
+        if value is None:
+            # Inside the NULL block: forwards only NULLs remain, ordered by pk;
+            # backwards every non-NULL row is still ahead.
+            q = dm.Q(**{f"{col}__isnull": True, f"pk__{past}": pk})
+            if reverse:
+                q |= dm.Q(**{f"{col}__isnull": False})
+            return q
+        q = dm.Q(**{f"{col}__{past}": value}) | dm.Q(**{col: value, f"pk__{past}": pk})
+        if self.nullable and not reverse:
+            q |= dm.Q(**{f"{col}__isnull": True})
+        return q
+
+    def encode(self, value, pk):
+        payload = {"s": self.spec, "v": _to_json(value), "k": _to_json(pk)}
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, token):
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            spec, value, pk = payload["s"], payload["v"], payload["k"]
+        except (ValueError, TypeError, KeyError):
+            raise me.ValueException("invalid pagination cursor")
+        if spec != self.spec:
+            raise me.ValueException("pagination cursor does not match the requested sort")
+        try:
+            pk = self.pk_field.to_python(pk)
+            if not self.is_pk and value is not None:
+                value = self.field.target_field.to_python(value) if self.field.is_relation \
+                    else self.field.to_python(value)
+        except ValidationError:
+            raise me.ValueException("invalid pagination cursor")
+        return value, pk
+
+
+def _resolve_sort(cls, queryset):
+    """Read the single sort field back off the queryset (default -pk)."""
+    order_by = list(queryset.query.order_by) or list(cls._meta.ordering or [])
+    if not order_by:
+        return _KeysetSort(cls, None, True)
+    if len(order_by) > 1:
+        raise me.ValueException("cursor pagination requires a single sort field")
+    item = order_by[0]
+    if isinstance(item, OrderBy) and isinstance(item.expression, dm.F):
+        name, descending = item.expression.name, item.descending
+    elif isinstance(item, str) and item != "?":
+        name, descending = item.lstrip("-"), item.startswith("-")
+    else:
+        raise me.ValueException("cursor pagination does not support this sort")
+    if name == "pk":
+        return _KeysetSort(cls, None, descending)
+    try:
+        field = cls._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise me.ValueException(f"cannot paginate by cursor on '{name}'")
+    if not getattr(field, "concrete", False) or field.many_to_many:
+        raise me.ValueException(f"cannot paginate by cursor on '{name}'")
+    return _KeysetSort(cls, field, descending)
+
+
+def _to_json(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
@@ -6,7 +6,7 @@ TTL management based on RestMeta.GRAPHS configuration.
 
 Supported Backends:
 - MemoryCacheBackend: In-process LRU cache with TTL support
-- RedisCacheBackend: Distributed Redis-based caching (future)
+- RedisCacheBackend: Distributed Redis-based caching
 - DisabledCacheBackend: No-op cache for development/testing
 
 Key Features:
@@ -15,6 +15,7 @@ Key Features:
 - JSON serialization for Redis compatibility
 - Thread-safe operations
 - Safe defaults (cache_ttl=0 means no caching)
+- Tag-based invalidation on save/delete (see signals.py)
 
 Usage:
     from mojo.serializers.core.cache import get_cache_backend
@@ -74,7 +75,8 @@ from .utils import (
     get_cache_key,
     get_model_cache_ttl,
     get_cache_stats,
-    clear_all_caches
+    clear_all_caches,
+    invalidate_model_cache
 )
 
 # Check ujson availability for performance optimization
@@ -111,6 +113,7 @@ __all__ = [
     'get_model_cache_ttl',
     'get_cache_stats',
     'clear_all_caches',
+    'invalidate_model_cache',
 
     # Performance info
     'HAS_UJSON',
@@ -118,7 +118,8 @@ def create_cache_backend(backend_type: Optional[str] = None, **kwargs) -> CacheB
     :return: Cache backend instance
     """
     # Get configuration from Django settings
-    cache_config = getattr(settings, 'MOJO_SERIALIZER_CACHE', {})
+    # settings answers None for an unset key, not the getattr default
+    cache_config = getattr(settings, 'MOJO_SERIALIZER_CACHE', None) or {}
     config = {**DEFAULT_CACHE_CONFIG, **cache_config}
 
     # Determine backend type
@@ -8,7 +8,7 @@ All cache backends must implement this interface for plug-and-play compatibility
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterable, Tuple
 
 
 class CacheBackend(ABC):
@@ -100,3 +100,61 @@ class CacheBackend(ABC):
         :return: Dictionary with cache statistics
         """
         pass
+
+    def set_tagged(self, key: str, value: Any, ttl: int = 0, tags: Iterable[str] = ()) -> bool:
+        """
+        Store item and index its key under each tag for invalidate_tags().
+
+        Backends without a tag index store the item untagged; their
+        invalidate_tags() falls back to clear().
+
+        :param key: Cache key string
+        :param value: Value to cache (must be JSON serializable)
+        :param ttl: Time-to-live in seconds (0 = no caching/expiration)
+        :param tags: Tag names (see cache.utils get_*_tag helpers)
+        :return: True if successfully cached, False otherwise
+        """
+        return self.set(key, value, ttl)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Remove every item stored under any of tags.
+
+        The default clears the whole cache — always correct, never cheap.
+        Backends that index tags override this.
+
+        :param tags: Tag names
+        :return: Number of items removed (0 when unknown)
+        """
+        self.clear()
+        return 0
+
+    def batch_get(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Retrieve several items at once.
+
+        The default calls get() per key; distributed backends override it
+        with a single round-trip.
+
+        :param keys: Cache key strings
+        :return: {key: value} for the keys that were found
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def batch_set_tagged(self, entries: Dict[str, Tuple[Any, Iterable[str]]], ttl: int = 0) -> bool:
+        """
+        Store several tagged items with one TTL.
+
+        :param entries: {key: (value, tags)}
+        :param ttl: Time-to-live in seconds (0 = no caching/expiration)
+        :return: True if every item was cached
+        """
+        ok = True
+        for key, (value, tags) in entries.items():
+            ok = self.set_tagged(key, value, ttl, tags) and ok
+        return ok
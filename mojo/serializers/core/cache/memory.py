@@ -13,6 +13,7 @@ Key Features:
 - Performance statistics tracking
 - Configurable size limits with safe defaults
 - TTL of 0 means no caching (safe default behavior)
+- Tag index for targeted invalidation (set_tagged / invalidate_tags)
 
 Usage:
     cache = MemoryCacheBackend(max_size=5000, enable_stats=True)
@@ -35,7 +36,7 @@ except ImportError:
 import time
 import threading
 from collections import OrderedDict
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterable
 
 # Use logit with graceful fallback
 try:
@@ -61,6 +62,8 @@ class MemoryCacheBackend(CacheBackend):
     - Each entry: {key: (json_value, expires_at_timestamp)}
     - Thread-safe with RLock for concurrent access
     - Automatic cleanup on access (lazy expiration)
+    - Tag index: {tag: set(keys)} plus {key: tags} so evicted, expired and
+      deleted keys leave the index too
     """
 
     def __init__(self, max_size: int = 5000, enable_stats: bool = True):
@@ -76,6 +79,8 @@ class MemoryCacheBackend(CacheBackend):
         # Thread-safe LRU cache storage
         # Format: {key: (json_serialized_value, expires_at_timestamp)}
         self._cache = OrderedDict()
+        self._tags = {}
+        self._key_tags = {}
         self._lock = threading.RLock()
 
         # Performance statistics tracking
@@ -110,6 +115,7 @@ class MemoryCacheBackend(CacheBackend):
                 # Check TTL expiration
                 if expires_at != 0 and time.time() > expires_at:
                     # Item expired - don't re-add to cache
+                    self._unindex(key)
                     self._increment_stat('expired_items')
                     self._increment_stat('misses')
                     return None
@@ -125,6 +131,7 @@ class MemoryCacheBackend(CacheBackend):
                 logger.warning(f"Cache get error for key '{key}': {e}")
                 # Remove corrupted entry
                 self._cache.pop(key, None)
+                self._unindex(key)
                 self._increment_stat('errors')
                 self._increment_stat('misses')
                 return None
@@ -151,6 +158,7 @@ class MemoryCacheBackend(CacheBackend):
                 # Remove existing entry if present (updates position)
                 if key in self._cache:
                     self._cache.pop(key)
+                    self._unindex(key)
 
                 # Evict LRU items if at capacity
                 while len(self._cache) >= self.max_size:
@@ -177,10 +185,53 @@ class MemoryCacheBackend(CacheBackend):
         with self._lock:
             if key in self._cache:
                 self._cache.pop(key)
+                self._unindex(key)
                 self._increment_stat('deletes')
                 return True
             return False
 
+    def set_tagged(self, key: str, value: Any, ttl: int = 0, tags: Iterable[str] = ()) -> bool:
+        """
+        Store item and index its key under each tag.
+        """
+        with self._lock:
+            if ttl == 0:
+                return True
+            if not self.set(key, value, ttl):
+                return False
+            tags = tuple(tags)
+            if tags:
+                self._key_tags[key] = tags
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+            return True
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Remove every item indexed under any of tags.
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.pop(tag, ()))
+            removed = 0
+            for key in keys:
+                if self._cache.pop(key, None) is not None:
+                    removed += 1
+                self._unindex(key)
+            if removed and self.enable_stats:
+                self._stats['deletes'] += removed
+            return removed
+
+    def _unindex(self, key: str):
+        """Drop key from the tag index."""
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
     def clear(self) -> bool:
         """
         Clear all cached items and reset statistics.
@@ -190,6 +241,8 @@ class MemoryCacheBackend(CacheBackend):
         with self._lock:
             cleared_count = len(self._cache)
             self._cache.clear()
+            self._tags.clear()
+            self._key_tags.clear()
 
             if cleared_count > 0:
                 logger.info(f"Cleared {cleared_count} items from memory cache")
@@ -234,6 +287,7 @@ class MemoryCacheBackend(CacheBackend):
         if self._cache:
             # OrderedDict: first item (index 0) is least recently used
             evicted_key, _ = self._cache.popitem(last=False)
+            self._unindex(evicted_key)
             self._increment_stat('evictions')
             logger.debug(f"Evicted LRU item: {evicted_key}")
 
@@ -12,6 +12,7 @@ Key Features:
 - Connection pooling for high performance
 - Configurable key prefixes for multi-tenancy
 - Pipeline operations for batch operations
+- Tag sets for targeted invalidation (set_tagged / invalidate_tags)
 - Thread-safe operations
 - Graceful error handling and fallback behavior
 - Comprehensive statistics tracking
@@ -51,7 +52,7 @@ except ImportError:
     import json
 import time
 import threading
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterable, Tuple
 # Use logit with graceful fallback
 try:
     from mojo.helpers import logit
@@ -77,6 +78,36 @@ except ImportError:
     HAS_REDIS = False
 
 
+# Store one entry and add its key to each tag set (KEYS[2..]). A tag set
+# lives at least as long as the longest entry in it, so it never expires
+# ahead of a key it indexes.
+SET_TAGGED_LUA = """
+local ttl = tonumber(ARGV[1])
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ttl)
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if redis.call('TTL', KEYS[i]) < ttl then
+        redis.call('EXPIRE', KEYS[i], ttl)
+    end
+end
+return 1
+"""
+
+# Unlink every key in the given tag sets, then the sets. Members go out in
+# slices to stay under Lua's unpack() limit.
+INVALIDATE_TAGS_LUA = """
+local removed = 0
+for i = 1, #KEYS do
+    local members = redis.call('SMEMBERS', KEYS[i])
+    for j = 1, #members, 500 do
+        removed = removed + redis.call('UNLINK', unpack(members, j, math.min(j + 499, #members)))
+    end
+    redis.call('UNLINK', KEYS[i])
+end
+return removed
+"""
+
+
 class RedisCacheBackend(CacheBackend):
     """
     Redis-based distributed cache backend with connection pooling and high availability.
@@ -94,6 +125,12 @@ class RedisCacheBackend(CacheBackend):
     - Graceful error handling and fallback behavior
     - Pipeline operations for batch operations
     - Comprehensive monitoring and statistics
+
+    Tags: set_tagged() adds the entry's key to one Redis set per tag
+    ("<prefix>tag:<tag>"); invalidate_tags() unlinks the members of those sets
+    in a single script call. Entries that expire on their own leave a stale
+    member behind until the set's own TTL runs out — unlinking a missing key
+    is harmless.
     """
 
     def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
@@ -155,6 +192,8 @@ class RedisCacheBackend(CacheBackend):
 
             # Test connection
             self._redis_client.ping()
+            self._set_tagged_script = self._redis_client.register_script(SET_TAGGED_LUA)
+            self._invalidate_tags_script = self._redis_client.register_script(INVALIDATE_TAGS_LUA)
             logger.info(f"Redis cache backend initialized: {host}:{port}/{db}")
 
         except Exception as e:
@@ -285,6 +324,70 @@ class RedisCacheBackend(CacheBackend):
             self._increment_stat('errors')
             return False
 
+    def set_tagged(self, key: str, value: Any, ttl: int = 0, tags: Iterable[str] = ()) -> bool:
+        """
+        Store item with TTL and add its key to each tag set, atomically.
+
+        One script call: SET EX plus SADD/EXPIRE per tag.
+        """
+        if ttl == 0:
+            return True  # TTL of 0 means no caching - safe default
+        tags = list(tags)
+        if not tags or ttl < 0:
+            return self.set(key, value, ttl)
+
+        try:
+            try:
+                json_data = json.dumps(value, default=str)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"JSON encode error for key '{key}': {e}")
+                self._increment_stat('json_errors')
+                return False
+
+            keys = [f"{self.key_prefix}{key}"] + [self._tag_key(tag) for tag in tags]
+            self._set_tagged_script(keys=keys, args=[ttl, json_data])
+            self._increment_stat('sets')
+            return True
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.warning(f"Redis connection error for set_tagged '{key}': {e}")
+            self._increment_stat('connection_errors')
+            return False
+
+        except RedisError as e:
+            logger.warning(f"Redis error for set_tagged '{key}': {e}")
+            self._increment_stat('errors')
+            return False
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Remove every key indexed under any of tags, and the tag sets.
+
+        One script call regardless of how many tags or keys are involved.
+        """
+        tags = list(tags)
+        if not tags:
+            return 0
+        try:
+            removed = self._invalidate_tags_script(keys=[self._tag_key(tag) for tag in tags])
+            if removed and self.enable_stats:
+                with self._stats_lock:
+                    self._stats['deletes'] += removed
+            return removed or 0
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.warning(f"Redis connection error for invalidate_tags {tags}: {e}")
+            self._increment_stat('connection_errors')
+            return 0
+
+        except RedisError as e:
+            logger.warning(f"Redis error for invalidate_tags {tags}: {e}")
+            self._increment_stat('errors')
+            return 0
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.key_prefix}tag:{tag}"
+
     def clear(self) -> bool:
         """
         Clear all cache items with matching key prefix.
@@ -417,28 +520,22 @@ class RedisCacheBackend(CacheBackend):
             logger.warning(f"Error getting key count: {e}")
             return 0
 
-    def batch_get(self, keys: list) -> Dict[str, Any]:
+    def batch_get(self, keys: Iterable[str]) -> Dict[str, Any]:
         """
-        Get multiple keys in a single Redis operation using pipeline.
+        Get multiple keys in a single Redis MGET.
 
         More efficient than individual get operations for multiple keys.
         """
+        keys = list(keys)
         if not keys:
             return {}
 
         try:
-            redis_keys = [f"{self.key_prefix}{key}" for key in keys]
-
-            # Use pipeline for batch operations
-            pipe = self._redis_client.pipeline(transaction=False)
-            for redis_key in redis_keys:
-                pipe.get(redis_key)
-
-            results = pipe.execute()
+            results = self._redis_client.mget([f"{self.key_prefix}{key}" for key in keys])
 
             # Process results
             batch_results = {}
-            for i, (original_key, json_data) in enumerate(zip(keys, results)):
+            for original_key, json_data in zip(keys, results):
                 if json_data is not None:
                     try:
                         value = json.loads(json_data.decode('utf-8'))
@@ -497,6 +594,48 @@ class RedisCacheBackend(CacheBackend):
             self._increment_stat('errors')
             return False
 
+    def batch_set_tagged(self, entries: Dict[str, Tuple[Any, Iterable[str]]], ttl: int = 0) -> bool:
+        """
+        Store several tagged items in one pipelined round-trip.
+
+        Each item is the same script call set_tagged() makes, so the key and
+        its tag sets stay consistent per item.
+        """
+        if not entries or ttl == 0:
+            return True
+        if ttl < 0:
+            return super().batch_set_tagged(entries, ttl)
+
+        try:
+            pipe = self._redis_client.pipeline(transaction=False)
+            queued = 0
+            for key, (value, tags) in entries.items():
+                try:
+                    json_data = json.dumps(value, default=str)
+                except (TypeError, ValueError):
+                    logger.warning(f"JSON encode error for key '{key}' in batch_set_tagged")
+                    self._increment_stat('json_errors')
+                    continue
+                keys = [f"{self.key_prefix}{key}"] + [self._tag_key(tag) for tag in tags]
+                self._set_tagged_script(keys=keys, args=[ttl, json_data], client=pipe)
+                queued += 1
+
+            results = pipe.execute()
+            if self.enable_stats:
+                with self._stats_lock:
+                    self._stats['sets'] += sum(1 for result in results if result)
+            return queued == len(entries)
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.warning(f"Redis connection error in batch_set_tagged: {e}")
+            self._increment_stat('connection_errors')
+            return False
+
+        except RedisError as e:
+            logger.warning(f"Redis error in batch_set_tagged: {e}")
+            self._increment_stat('errors')
+            return False
+
     def close(self):
         """
         Close Redis connection and cleanup resources.
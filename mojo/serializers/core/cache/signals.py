@@ -0,0 +1,53 @@
+"""
+Automatic serializer cache invalidation.
+
+post_save / post_delete of a model that can appear in a cached graph (see
+plan.get_cache_dependent_models) invalidate that instance's tags once the
+transaction commits — invalidating earlier would let a concurrent reader
+re-cache the pre-commit row. m2m_changed does the same for both ends of the
+relation.
+
+Saves of models no cached graph touches cost one set lookup. Bulk writes that
+bypass signals (QuerySet.update(), bulk_create()) still need an explicit
+invalidate_model_cache(Model).
+
+Connected from the account app's AppConfig.ready().
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .utils import invalidate_model_cache
+
+M2M_ACTIONS = ("post_add", "post_remove", "post_clear")
+
+
+def connect():
+    """Wire the invalidation receivers (idempotent)."""
+    post_save.connect(on_instance_changed, dispatch_uid="mojo_serializer_cache_save")
+    post_delete.connect(on_instance_changed, dispatch_uid="mojo_serializer_cache_delete")
+    m2m_changed.connect(on_m2m_changed, dispatch_uid="mojo_serializer_cache_m2m")
+
+
+def on_instance_changed(sender, instance, using=None, **kwargs):
+    if instance.pk is None or not _is_tracked(sender):
+        return
+    transaction.on_commit(partial(invalidate_model_cache, sender, instance.pk), using=using)
+
+
+def on_m2m_changed(sender, instance, action, model=None, pk_set=None, using=None, **kwargs):
+    if action not in M2M_ACTIONS:
+        return
+    owner = instance.__class__
+    if _is_tracked(owner) and instance.pk is not None:
+        transaction.on_commit(partial(invalidate_model_cache, owner, instance.pk), using=using)
+    if model is not None and _is_tracked(model):
+        for pk in pk_set or ():
+            transaction.on_commit(partial(invalidate_model_cache, model, pk), using=using)
+
+
+def _is_tracked(model):
+    from ..plan import get_cache_dependent_models
+    return model in get_cache_dependent_models()
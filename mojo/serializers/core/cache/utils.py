@@ -9,6 +9,7 @@ Key Features:
 - Extract cache_ttl from RestMeta.GRAPHS configuration (defaults to 0)
 - Collect statistics from all cache backends
 - Provide cache management operations
+- Tag names for per-model / per-instance invalidation
 - Thread-safe utility functions
 """
 
@@ -45,6 +46,38 @@ def get_cache_key(instance: Model, graph: str = "default") -> Optional[str]:
     return instance.__class__.__name__ + "_" + str(pk) + "_" + graph
 
 
+def get_cache_key_for(model, pk: Any, graph: str = "default") -> str:
+    """get_cache_key() for a model class and pk, without an instance."""
+    return model.__name__ + "_" + str(pk) + "_" + graph
+
+
+def get_model_tag(model) -> str:
+    """
+    Tag on every cached entry of ``model`` and on every entry embedding it.
+
+    Invalidating it drops the whole model from the cache.
+    """
+    return model.__name__
+
+
+def get_instance_tag(model, pk: Any) -> str:
+    """
+    Tag on the cached entries of one instance and on entries embedding it
+    through a forward FK. Same "ModelName_pk" prefix as the cache keys.
+    """
+    return model.__name__ + "_" + str(pk)
+
+
+def get_change_tag(model) -> str:
+    """
+    Tag on entries that embed ``model`` through a relation whose members are
+    not known per instance (reverse FK, M2M, nested deeper than one level).
+
+    Invalidated by every save or delete of a ``model`` instance.
+    """
+    return model.__name__ + "~"
+
+
 def get_model_cache_ttl(instance: Model, graph: str = "default") -> int:
     """
     Extract cache TTL from model's RestMeta.GRAPHS configuration.
@@ -194,9 +227,14 @@ def invalidate_model_cache(model_class, instance_pk: Any = None, graph: str = No
     """
     Invalidate cache entries for a specific model.
 
+    Entries are dropped through their tags (see GraphPlan.cache_tags), so
+    nothing outside the model and the entries embedding it is touched.
+
     :param model_class: Django model class
     :param instance_pk: Specific instance PK to invalidate (None = all instances)
-    :param graph: Specific graph to invalidate (None = all graphs)
+    :param graph: Specific graph to invalidate (None = all graphs); only
+        narrows a single-instance invalidation
+    :return: Number of cache entries removed
     """
     try:
         from .backends import get_cache_backend
@@ -204,32 +242,24 @@ def invalidate_model_cache(model_class, instance_pk: Any = None, graph: str = No
         backend = get_cache_backend()
         model_name = model_class.__name__
 
-        # Get current cache stats to see what we're working with
-        stats = backend.stats()
-        if stats.get('current_size', 0) == 0:
-            return  # Nothing to invalidate
-
-        deleted_count = 0
-
         if instance_pk is not None and graph is not None:
             # Invalidate specific instance + graph
-            cache_key = f"{model_name}_{instance_pk}_{graph}"
-            if backend.delete(cache_key):
-                deleted_count += 1
+            deleted_count = 1 if backend.delete(get_cache_key_for(model_class, instance_pk, graph)) else 0
+        elif instance_pk is not None:
+            # The instance, whatever embeds it, and whatever lists its model
+            deleted_count = backend.invalidate_tags([
+                get_instance_tag(model_class, instance_pk),
+                get_change_tag(model_class)])
         else:
-            # We need to iterate through cache to find matching keys
-            # Note: This is not efficient for large caches, but necessary without key scanning
-            logger.warning(f"Bulk invalidation not optimized for {model_name}")
-            # For now, just clear all caches
-            # TODO: Implement more efficient bulk invalidation when we add Redis
-            if backend.clear():
-                logger.info(f"Cleared all caches due to {model_name} invalidation")
+            deleted_count = backend.invalidate_tags([get_model_tag(model_class)])
 
         if deleted_count > 0:
             logger.info(f"Invalidated {deleted_count} cache entries for {model_name}")
+        return deleted_count
 
     except Exception as e:
         logger.error(f"Error invalidating cache for {model_class.__name__}: {e}")
+        return 0
 
 
 def get_cache_info() -> Dict[str, Any]:
@@ -48,7 +48,8 @@ DEFAULT_SERIALIZERS = {
 }
 
 FORMAT_SERIALIZERS = {
-    'csv': 'mojo.serializers.formats.csv.CsvFormatter'
+    'csv': 'mojo.serializers.formats.csv.CsvFormatter',
+    'jsonl': 'mojo.serializers.formats.jsonl.JsonLinesFormatter'
 }
 
 # Global serializer registry
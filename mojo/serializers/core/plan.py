@@ -0,0 +1,461 @@
+"""
+Compiled graph plans for OptimizedGraphSerializer
+
+Resolving a graph is the same work for every row of a model: look up
+RestMeta.GRAPHS, fall back to ``default``, apply ``exclude`` + NO_SHOW_FIELDS +
+``mojo_secrets``, and resolve each name to its Django field. A GraphPlan does
+that once per (model, graph) and keeps the result, so the serializer's per-row
+loop only does attribute reads and value conversion.
+
+Plans are cached per process. The cache entry remembers the graph dict it was
+compiled from and is rebuilt when ``RestMeta.GRAPHS[graph]`` is replaced (tests
+install and pop temporary graphs at runtime). Mutating a graph dict in place is
+not detected — call ``clear_graph_plans()`` after doing that.
+
+A plan also knows the query shape its graph needs. ``optimize_queryset()``
+applies the select_related / prefetch_related / only() derived from the plan
+(recursively through nested graphs) to a list queryset before it is evaluated,
+so a nested graph costs one JOIN or one prefetch query per page instead of one
+query per row.
+
+Plans with a ``cache_ttl`` also know the invalidation tags of each cached
+entry (``cache_tags()``): the instance itself, each forward-FK object it
+embeds, and a coarse per-model change tag for anything else it embeds.
+``get_cache_dependent_models()`` lists every model whose saves can stale a
+cached entry; the post_save / post_delete wiring in cache/signals.py uses it.
+"""
+
+from threading import RLock
+
+from django.core.exceptions import FieldDoesNotExist
+from django.apps import apps
+from django.db.models import ForeignKey, Prefetch
+from django.db.models.fields.reverse_related import ManyToManyRel, ManyToOneRel
+from django.db.models.query import ModelIterable
+
+from mojo import errors as me
+from .cache.utils import get_model_tag, get_instance_tag, get_change_tag
+
+# Kinds for a related-graph entry. Resolved once at compile time from the
+# model field; KIND_OTHER defers to the runtime `.all` check the serializer
+# has always done for properties that return a manager.
+KIND_SINGLE = "single"
+KIND_MANY = "many"
+KIND_OTHER = "other"
+
+# Nested graphs deeper than this are still serialized, just not pre-joined.
+MAX_QUERY_DEPTH = 4
+
+_MISSING = object()
+
+_plans = {}
+_plans_lock = RLock()
+_cache_dependents = None
+
+
+class RelatedEntry:
+    """One ``graphs`` entry of a plan: a relation plus its nested graph."""
+
+    __slots__ = ("name", "field", "graph", "kind", "related_model", "_sub_plan")
+
+    def __init__(self, name, field, graph, kind, related_model):
+        self.name = name
+        self.field = field
+        self.graph = graph
+        self.kind = kind
+        self.related_model = related_model
+        self._sub_plan = None
+
+    def sub_plan(self, model):
+        """Plan for the nested graph on ``model`` (memoized for the declared model)."""
+        if model is not self.related_model:
+            return get_graph_plan(model, self.graph)
+        plan = self._sub_plan
+        if plan is None or not plan.is_current():
+            plan = self._sub_plan = get_graph_plan(model, self.graph)
+        return plan
+
+
+class GraphPlan:
+    """
+    Precompiled serialization plan for one (model, graph) pair.
+
+    :ivar fallback: True when the model declares no GRAPHS (whole-model output)
+    :ivar fields: list of ``(name, field_or_None, attr)`` in output order; attr
+        is the attribute actually read (a forward FK to a pk reads ``<fk>_id``
+        so serializing it never loads the related row)
+    :ivar extras: list of ``(method_name, alias)``
+    :ivar related: list of RelatedEntry
+    :ivar cache_ttl: persistent cache TTL from the resolved graph config
+    :ivar only_safe: True when the graph reads nothing but its listed concrete
+        columns, so the queryset may be pruned with only()
+    """
+
+    __slots__ = ("model", "graph", "config", "fallback", "fields", "extras",
+                 "related", "cache_ttl", "only_safe", "_source", "_query_spec",
+                 "_tag_spec")
+
+    def __init__(self, model, graph):
+        self.model = model
+        self.graph = graph
+        self.config = None
+        self.fallback = False
+        self.fields = []
+        self.extras = []
+        self.related = []
+        self.cache_ttl = 0
+        self.only_safe = False
+        self._source = _graph_source(model, graph)
+        self._query_spec = None
+        self._tag_spec = None
+        self._compile()
+        if self.cache_ttl:
+            _reset_cache_dependents()
+
+    def is_current(self):
+        """True while RestMeta.GRAPHS still holds the dict this plan came from."""
+        return _graph_source(self.model, self.graph) is self._source
+
+    def _compile(self):
+        model = self.model
+        meta = model._meta
+        rest_meta = getattr(model, "RestMeta", None)
+        graphs = getattr(rest_meta, "GRAPHS", None) if rest_meta is not None else None
+        no_show = set(getattr(rest_meta, "NO_SHOW_FIELDS", []) or []) if rest_meta is not None else set()
+
+        if not graphs:
+            # Same opt-out as the serializer: whole-object output, NO_SHOW_FIELDS
+            # still enforced.
+            self.fallback = True
+            self.fields = [(f.name, f, f.name) for f in meta.fields if f.name not in no_show]
+            return
+
+        graph_config = graphs.get(self.graph)
+        if graph_config is None and self.graph != "default":
+            graph_config = graphs.get("default")
+        if graph_config is None:
+            raise me.RestErrorException(
+                f"{model.__name__} has no '{self.graph}' graph and "
+                "no 'default' graph to fall back to")
+        self.config = graph_config
+
+        names = graph_config.get("fields", [])
+        if not names:
+            names = [f.name for f in meta.fields]
+        exclude = set(graph_config.get("exclude", []))
+        exclude.add("mojo_secrets")
+        exclude.update(no_show)
+        for name in names:
+            if name in exclude:
+                continue
+            field = _get_field(meta, name)
+            self.fields.append((name, field, _read_attr(name, field)))
+
+        for spec in graph_config.get("extra", []):
+            if isinstance(spec, (tuple, list)):
+                method_name, alias = spec
+            else:
+                method_name, alias = spec, spec
+            self.extras.append((method_name, alias))
+
+        # Imported here to keep the relation tuples defined in one place.
+        from .serializer import SINGLE_RELATIONS, MANY_RELATIONS
+        for name, sub_graph in graph_config.get("graphs", {}).items():
+            field = _get_field(meta, name)
+            # SINGLE_RELATIONS first — OneToOneRel subclasses ManyToOneRel.
+            if isinstance(field, SINGLE_RELATIONS):
+                kind = KIND_SINGLE
+            elif isinstance(field, MANY_RELATIONS + (ManyToManyRel,)):
+                kind = KIND_MANY
+            else:
+                kind = KIND_OTHER
+            related_model = getattr(field, "related_model", None) if field is not None else None
+            self.related.append(RelatedEntry(name, field, sub_graph, kind, related_model))
+
+        ttl = graph_config.get("cache_ttl", 0)
+        self.cache_ttl = ttl if isinstance(ttl, int) and ttl > 0 else 0
+
+        # Extras, properties, callables and non-relation "graphs" entries can
+        # read any attribute, and a deferred column read is a query per row —
+        # worse than not pruning. Only an explicit list of concrete columns is
+        # safe to hand to only().
+        self.only_safe = (
+            bool(graph_config.get("fields"))
+            and not self.extras
+            and all(f is not None and getattr(f, "concrete", False) for _, f, _ in self.fields)
+            and all(entry.kind != KIND_OTHER for entry in self.related)
+        )
+
+    def query_spec(self):
+        """
+        The ``(select_related, prefetch, only)`` this graph needs, memoized.
+
+        ``prefetch`` is a list of Prefetch objects; ``only`` is None when the
+        graph (or anything it pre-joins) must load full rows.
+        """
+        if self._query_spec is None:
+            self._query_spec = _build_query_spec(self, "", 0)
+        return self._query_spec
+
+
+    def cache_tags(self, obj):
+        """
+        Invalidation tags for obj's cached serialization under this plan.
+
+        The model and instance tags, plus for each nested graph: the instance
+        tag of a forward FK read off obj's ``<fk>_id`` column, and the model +
+        change tags of anything whose members are not known up front (reverse
+        and M2M relations, every level below the first).
+        """
+        if self._tag_spec is None:
+            self._tag_spec = _build_tag_spec(self)
+        static, forward = self._tag_spec
+        tags = [get_model_tag(self.model), get_instance_tag(self.model, obj.pk)]
+        for attname, related_model in forward:
+            value = getattr(obj, attname, None)
+            if value is not None:
+                tags.append(get_instance_tag(related_model, value))
+        tags.extend(static)
+        return tags
+
+    def dependent_models(self):
+        """Every model embedded (at any depth) in this graph's output."""
+        models = set()
+        _collect_related_models(self, models, set())
+        return models
+
+
+def _build_tag_spec(plan):
+    """(static tags, [(fk attname, related model)]) for GraphPlan.cache_tags."""
+    static = []
+    forward = []
+    for entry in plan.related:
+        model = entry.related_model
+        if model is None:
+            continue
+        field = entry.field
+        if (entry.kind == KIND_SINGLE and getattr(field, "concrete", False)
+                and field.target_field.primary_key):
+            forward.append((field.attname, model))
+            static.append(get_model_tag(model))
+        else:
+            static.extend((get_model_tag(model), get_change_tag(model)))
+        # Anything the nested graph embeds in turn is only known by model.
+        nested = set()
+        _collect_related_models(entry.sub_plan(model), nested, {plan.model, model})
+        for nested_model in nested:
+            static.extend((get_model_tag(nested_model), get_change_tag(nested_model)))
+    return list(dict.fromkeys(static)), forward
+
+
+def _collect_related_models(plan, models, seen):
+    if plan.fallback:
+        return
+    for entry in plan.related:
+        model = entry.related_model
+        if model is None:
+            continue
+        models.add(model)
+        key = (model, entry.graph)
+        if key in seen:
+            continue
+        seen.add(key)
+        _collect_related_models(entry.sub_plan(model), models, seen)
+
+
+def _get_field(meta, name):
+    try:
+        return meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _read_attr(name, field):
+    """Attribute to read for a graph field: a pk-targeting forward FK reads its column."""
+    if isinstance(field, ForeignKey) and field.target_field.primary_key:
+        return field.attname
+    return name
+
+
+def _build_query_spec(plan, prefix, depth):
+    """Walk a plan (and its nested plans) into select_related/prefetch/only lists."""
+    select_related = []
+    prefetch = []
+    only = [prefix + name for name, _, _ in plan.fields] if plan.only_safe else None
+
+    for entry in plan.related:
+        path = prefix + entry.name
+        model = entry.related_model
+        if entry.kind == KIND_OTHER or model is None:
+            continue
+        try:
+            sub_plan = entry.sub_plan(model)
+        except Exception:
+            # Missing nested graph: the serializer reports it per row as None.
+            continue
+
+        if entry.kind == KIND_SINGLE:
+            select_related.append(path)
+            if only is not None and entry.field.concrete:
+                only.append(path)
+            if depth + 1 >= MAX_QUERY_DEPTH:
+                continue
+            sub_select, sub_prefetch, sub_only = _build_query_spec(sub_plan, path + "__", depth + 1)
+            select_related.extend(sub_select)
+            # Prefetches below a select_related join are looked up from the
+            # parent queryset through the joined path.
+            prefetch.extend(sub_prefetch)
+            if only is not None and sub_only:
+                only.extend(sub_only)
+            # No sub_only (nested graph not prunable): naming no column of the
+            # joined model makes only() load all of them, which is what we want.
+        else:
+            child = model._default_manager.all()
+            if depth + 1 < MAX_QUERY_DEPTH:
+                sub_select, sub_prefetch, sub_only = _build_query_spec(sub_plan, "", depth + 1)
+                if sub_select:
+                    child = child.select_related(*sub_select)
+                if sub_prefetch:
+                    child = child.prefetch_related(*sub_prefetch)
+                if sub_only:
+                    # A reverse FK prefetch matches children back to parents
+                    # through the FK column, so it must not be deferred.
+                    if isinstance(entry.field, ManyToOneRel):
+                        sub_only = sub_only + [entry.field.field.name]
+                    child = child.only(*sub_only)
+            prefetch.append(Prefetch(path, queryset=child))
+
+    return select_related, prefetch, only
+
+
+def optimize_queryset(queryset, graph="default"):
+    """
+    Apply the graph's select_related / prefetch_related / only() to a queryset.
+
+    Leaves the queryset alone when it is not a plain model queryset (values(),
+    union()), when it already holds results (a prefetched related manager's
+    ``.all()`` — cloning it would re-query per parent row), or when the caller
+    already chose deferred columns. Safe on a sliced queryset.
+
+    :param queryset: QuerySet to be serialized with ``graph``
+    :param graph: Graph name from RestMeta.GRAPHS
+    :return: optimized QuerySet
+    """
+    if not _is_unevaluated_model_queryset(queryset):
+        return queryset
+    try:
+        plan = get_graph_plan(queryset.model, graph)
+    except Exception:
+        # Misconfigured graph — let serialization raise its own error.
+        return queryset
+    if plan.fallback:
+        return queryset
+
+    select_related, prefetch, only = plan.query_spec()
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only and queryset.query.deferred_loading == (frozenset(), True):
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def flat_values_plan(queryset, graph="default"):
+    """
+    The plan for ``graph`` when its rows can be built from values_list() tuples.
+
+    Flat means every graph field is a concrete column, with no extras, no
+    nested graphs and no persistent cache_ttl (cached rows are keyed per
+    instance). Returns None when the queryset must hydrate model instances.
+    """
+    if not _is_unevaluated_model_queryset(queryset):
+        return None
+    if queryset.query.deferred_loading != (frozenset(), True):
+        return None
+    try:
+        plan = get_graph_plan(queryset.model, graph)
+    except Exception:
+        return None
+    if plan.fallback or not plan.only_safe or plan.related or plan.cache_ttl:
+        return None
+    return plan
+
+
+def _is_unevaluated_model_queryset(queryset):
+    return (queryset._result_cache is None
+            and queryset._iterable_class is ModelIterable
+            and not queryset.query.combinator)
+
+
+def _graph_source(model, graph):
+    """The graph dict a plan for (model, graph) would be compiled from."""
+    graphs = getattr(getattr(model, "RestMeta", None), "GRAPHS", None)
+    if not graphs:
+        return None
+    source = graphs.get(graph, _MISSING)
+    if source is _MISSING and graph != "default":
+        source = graphs.get("default", _MISSING)
+    return source
+
+
+def get_graph_plan(model, graph="default"):
+    """
+    Get the compiled plan for ``model`` and ``graph``, building it on first use.
+
+    :param model: Django model class
+    :param graph: Graph name from RestMeta.GRAPHS
+    :return: GraphPlan
+    :raises RestErrorException: model declares GRAPHS but neither graph nor default
+    """
+    key = (model, graph)
+    plan = _plans.get(key)
+    if plan is not None and plan.is_current():
+        return plan
+    with _plans_lock:
+        plan = _plans.get(key)
+        if plan is None or not plan.is_current():
+            plan = GraphPlan(model, graph)
+            _plans[key] = plan
+        return plan
+
+
+def clear_graph_plans():
+    """Drop every compiled plan (e.g. after mutating a graph dict in place)."""
+    with _plans_lock:
+        _plans.clear()
+    _reset_cache_dependents()
+
+
+def get_cache_dependent_models():
+    """
+    Models whose saves or deletes can stale a persistent cache entry.
+
+    A model is included when one of its graphs has a ``cache_ttl``, or when it
+    is embedded in such a graph. Computed once from every installed model's
+    RestMeta.GRAPHS; compiling a cached plan or clear_graph_plans() resets it.
+    """
+    global _cache_dependents
+    dependents = _cache_dependents
+    if dependents is None:
+        dependents = set()
+        for model in apps.get_models():
+            graphs = getattr(getattr(model, "RestMeta", None), "GRAPHS", None)
+            if not isinstance(graphs, dict):
+                continue
+            for graph, config in list(graphs.items()):
+                ttl = config.get("cache_ttl", 0) if isinstance(config, dict) else 0
+                if not isinstance(ttl, int) or ttl <= 0:
+                    continue
+                dependents.add(model)
+                try:
+                    dependents.update(get_graph_plan(model, graph).dependent_models())
+                except me.RestErrorException:
+                    continue
+        _cache_dependents = dependents
+    return dependents
+
+
+def _reset_cache_dependents():
+    global _cache_dependents
+    _cache_dependents = None
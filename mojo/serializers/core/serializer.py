@@ -49,9 +49,10 @@ except Exception:
     import logging
     logger = logging.getLogger("optimized_serializer")
 
-from mojo import errors as me
 from mojo.helpers.settings import settings
 from .cache import get_cache_backend, get_cache_key, get_model_cache_ttl
+from .plan import (get_graph_plan, clear_graph_plans, optimize_queryset, flat_values_plan,
+                   KIND_SINGLE, KIND_MANY, MAX_QUERY_DEPTH)
 
 # Load setting once at module import time for performance
 SERIALIZE_DATETIME_TO_FLOAT = settings.get_static('SERIALIZE_DATETIME_TO_FLOAT', False)
@@ -94,12 +95,25 @@ class OptimizedGraphSerializer:
         self.simple_mode = simple_mode or bypass_cache  # simple_mode implies bypass_cache
         self._cache_backend = None
         self._request_cache = None
+        # List pages: keys batch_get already missed, and writes queued for
+        # one batch_set_tagged (see _batch_cache_lookup)
+        self._cache_misses = ()
+        self._pending_writes = None
+        self._flat_plan = None
 
         # Handle QuerySet detection - same as simple serializer
         if isinstance(instance, QuerySet):
             self.many = True
-            self.qset = instance
-            self.instance = list(instance)  # Convert QuerySet to list for iteration
+            self._flat_plan = flat_values_plan(instance, graph)
+            if self._flat_plan is not None:
+                # Flat graph: rows are values_list() tuples, no model instances.
+                self.qset = instance
+                self.instance = list(instance.values_list(*[attr for _, _, attr in self._flat_plan.fields]))
+            else:
+                # Derive joins/prefetches/column pruning from the graph before
+                # the QuerySet is evaluated (one query per relation, not per row).
+                self.qset = self._apply_query_optimizations(instance)
+                self.instance = list(self.qset)
         elif many and not isinstance(instance, (list, tuple)):
             # Convert single instance to list for many=True case
             self.instance = [instance]
@@ -116,28 +130,147 @@ class OptimizedGraphSerializer:
         """
         Main serialization method with caching and optimization.
         """
+        if self._flat_plan is not None:
+            return self._serialize_values(self.instance, self._flat_plan)
         if self.many:
-            return [self._serialize_instance_cached(obj) for obj in self.instance]
+            # Resolve the compiled plan once per model class, not once per row.
+            plans = {}
+            pairs = []
+            for obj in self.instance:
+                cls = obj.__class__
+                plan = plans.get(cls)
+                if plan is None:
+                    plan = plans[cls] = self._get_plan(obj)
+                pairs.append((obj, plan))
+            self._prepare_rows(pairs)
+            batched = self._batch_cache_lookup(pairs)
+            rows = [self._serialize_instance_cached(obj, plan) for obj, plan in pairs]
+            if batched:
+                self._flush_cache_writes()
+            return rows
         return self._serialize_instance_cached(self.instance)
 
+    def _prepare_rows(self, pairs, depth=0):
+        """
+        Call each model's on_rest_prepare_rows(rows, graph) once for the page.
+
+        Recurses into single-relation graphs whose rows are already loaded
+        (select_related), so e.g. a page of users can prime every embedded
+        avatar File in one call instead of one call per user.
+        """
+        groups = {}
+        for obj, plan in pairs:
+            if plan is None or plan.fallback:
+                continue
+            groups.setdefault((obj.__class__, plan), []).append(obj)
+        for (cls, plan), rows in groups.items():
+            prepare = getattr(cls, "on_rest_prepare_rows", None)
+            if prepare is not None:
+                try:
+                    prepare(rows, plan.graph)
+                except Exception as e:
+                    logger.warning(f"{cls.__name__}.on_rest_prepare_rows failed: {e}")
+            if depth + 1 >= MAX_QUERY_DEPTH:
+                continue
+            for entry in plan.related:
+                if entry.kind != KIND_SINGLE or entry.field is None:
+                    continue
+                nested = []
+                for obj in rows:
+                    if not entry.field.is_cached(obj):
+                        continue
+                    related_obj = entry.field.get_cached_value(obj)
+                    if related_obj is None or not hasattr(related_obj, "_meta"):
+                        continue
+                    try:
+                        nested.append((related_obj, entry.sub_plan(related_obj.__class__)))
+                    except Exception:
+                        # Missing nested graph: reported per row as None.
+                        break
+                if nested:
+                    self._prepare_rows(nested, depth + 1)
+
+    def _batch_cache_lookup(self, pairs):
+        """
+        One batch_get for every persistently cached row of a list.
+
+        Hits land in the request cache, so the per-row pass returns them
+        directly; misses are remembered so the per-row pass does not ask the
+        backend again, and their results are queued for _flush_cache_writes().
+        Returns False (nothing batched) for fewer than two cacheable rows.
+        """
+        if self.simple_mode or self.bypass_cache:
+            return False
+        request_cache = self._request_cache or {}
+        keys = []
+        for obj, plan in pairs:
+            if plan is None or not plan.cache_ttl:
+                continue
+            key = get_cache_key(obj, plan.graph)
+            if key and key not in request_cache:
+                keys.append(key)
+        if len(keys) < 2:
+            return False
+
+        if self._cache_backend is None:
+            self._cache_backend = get_cache_backend()
+        hits = self._cache_backend.batch_get(keys)
+        if self._request_cache is None:
+            self._request_cache = {}
+        self._request_cache.update(hits)
+        self._cache_misses = set(keys).difference(hits)
+        self._pending_writes = {}
+        return True
+
+    def _flush_cache_writes(self):
+        """Write the rows queued by the batched pass, one batch per TTL."""
+        pending, self._pending_writes = self._pending_writes, None
+        self._cache_misses = ()
+        for ttl, entries in (pending or {}).items():
+            self._cache_backend.batch_set_tagged(entries, ttl)
+
+    def _serialize_values(self, rows, plan):
+        """
+        Build dicts from values_list() tuples for a flat graph.
 
+        Produces the same output as _serialize_instance_direct on hydrated
+        instances: every field is a concrete column, so the tuple value is what
+        getattr would have returned (a pk-targeting FK reads its id column in
+        both paths).
+        """
+        serialize_value = self._serialize_value_fast
+        columns = [(name, field) for name, field, _ in plan.fields]
+        return [
+            {name: serialize_value(value, field) for (name, field), value in zip(columns, row)}
+            for row in rows
+        ]
+
+    def _get_plan(self, obj, graph=None):
+        """Compiled GraphPlan for obj's model, or None for non-model objects."""
+        if not hasattr(obj, "_meta"):
+            return None
+        return get_graph_plan(obj.__class__, graph or self.graph)
 
-    def _serialize_instance_cached(self, obj):
+    def _serialize_instance_cached(self, obj, plan=None):
         """
         Serialize single instance with intelligent caching.
         """
+        if plan is None:
+            plan = self._get_plan(obj)
+
         # Simple mode: behave exactly like simple serializer
         if self.simple_mode:
-            return self._serialize_instance_direct(obj)
+            return self._serialize_instance_direct(obj, plan)
 
         # Skip all caching if bypass_cache is enabled
         if self.bypass_cache:
-            return self._serialize_instance_direct(obj)
+            return self._serialize_instance_direct(obj, plan)
 
         # Always do request-scoped caching for performance
-        cache_key = get_cache_key(obj, self.graph)
+        graph = plan.graph if plan is not None else self.graph
+        cache_key = get_cache_key(obj, graph)
         if not cache_key:
-            return self._serialize_instance_direct(obj)
+            return self._serialize_instance_direct(obj, plan)
 
         # Initialize request cache only when needed
         if self._request_cache is None:
@@ -148,7 +281,7 @@ class OptimizedGraphSerializer:
             return self._request_cache[cache_key]
 
         # Check if persistent caching is configured
-        cache_ttl = get_model_cache_ttl(obj, self.graph)
+        cache_ttl = plan.cache_ttl if plan is not None else get_model_cache_ttl(obj, graph)
         cached_result = None
 
         if cache_ttl > 0:
@@ -156,105 +289,77 @@ class OptimizedGraphSerializer:
             if self._cache_backend is None:
                 self._cache_backend = get_cache_backend()
 
-            cached_result = self._cache_backend.get(cache_key)
+            if cache_key not in self._cache_misses:
+                cached_result = self._cache_backend.get(cache_key)
             if cached_result is not None:
                 # Store in request cache too for faster subsequent access
                 self._request_cache[cache_key] = cached_result
                 return cached_result
 
         # Serialize the result
-        result = self._serialize_instance_direct(obj)
+        result = self._serialize_instance_direct(obj, plan)
 
         # Always store in request cache (provides performance gain even when TTL=0)
         self._request_cache[cache_key] = result
 
         # Store in persistent cache only if TTL > 0
         if cache_ttl > 0 and self._cache_backend is not None:
-            self._cache_backend.set(cache_key, result, cache_ttl)
+            tags = plan.cache_tags(obj) if plan is not None else ()
+            if self._pending_writes is not None:
+                self._pending_writes.setdefault(cache_ttl, {})[cache_key] = (result, tags)
+            else:
+                self._cache_backend.set_tagged(cache_key, result, cache_ttl, tags)
 
         return result
 
-    def _serialize_instance_direct(self, obj):
+    def _serialize_instance_direct(self, obj, plan=None):
         """
-        Direct serialization using RestMeta.GRAPHS configuration.
+        Direct serialization using the compiled RestMeta.GRAPHS plan.
+
+        Graph resolution (default fallback, exclude, NO_SHOW_FIELDS,
+        mojo_secrets, field lookup) lives in plan.GraphPlan and runs once per
+        (model, graph); this method only executes the plan for one row.
         """
+        if plan is None:
+            plan = self._get_plan(obj)
+        if plan is None:
+            return str(obj)
+
         # No RestMeta/GRAPHS at all — or an empty GRAPHS map — is a model that
         # opts out of graph-based serialization: whole-object output is its
         # deliberate, VIEW_PERMS-gated API. This branch stays forgiving.
-        if (not hasattr(obj, "RestMeta") or not hasattr(obj.RestMeta, "GRAPHS")
-                or not obj.RestMeta.GRAPHS):
+        # (A model that declares GRAPHS but has neither the requested graph nor
+        # `default` raised RestErrorException while the plan was compiled.)
+        if plan.fallback:
             if self._debug_enabled:
                 logger.warning(f"RestMeta.GRAPHS not found for {obj.__class__.__name__}")
-            return self._fallback_serialization(obj)
-
-        graph_config = obj.RestMeta.GRAPHS.get(self.graph)
-        if graph_config is None:
-            if self.graph != "default":
-                graph_config = obj.RestMeta.GRAPHS.get("default")
-
-            if graph_config is None:
-                # The requested graph AND `default` are both undefined on a
-                # model that DOES declare graphs. Falling through to a
-                # whole-model dump would silently serialize every field — the
-                # leak this guard exists to stop. A caller-facing boundary
-                # (REST / assistant tools) refuses an unknown *special* graph
-                # name before reaching here, so arriving here means the model
-                # ships a partial graph set with no `default`: a server
-                # misconfiguration. Fail loud rather than expose everything.
-                raise me.RestErrorException(
-                    f"{obj.__class__.__name__} has no '{self.graph}' graph and "
-                    "no 'default' graph to fall back to")
-
-        # Serialize based on graph configuration
-        data = {}
+            return self._fallback_serialization(obj, plan)
 
-        # Enforce NO_SHOW_FIELDS from RestMeta (never expose, even if requested)
-        no_show_fields = set(getattr(obj.RestMeta, "NO_SHOW_FIELDS", []) or [])
-
-        # Basic model fields - if no fields specified, use all model fields
-        fields = graph_config.get("fields", [])
-        if not fields:
-            fields = [field.name for field in obj._meta.fields]
-
-        # Apply exclude filter to remove sensitive fields
-        exclude_fields = list(graph_config.get("exclude", []))
-        exclude_fields.append("mojo_secrets")
-        # Always exclude NO_SHOW_FIELDS
-        if no_show_fields:
-            exclude_fields.extend(no_show_fields)
-        if exclude_fields:
-            fields = [field for field in fields if field not in exclude_fields]
+        data = {}
+        serialize_value = self._serialize_value_fast
 
-        for field_name in fields:
+        for field_name, field, attr in plan.fields:
             try:
-                field_value = getattr(obj, field_name)
-                field = self._get_model_field(obj, field_name)
-
-                # Handle callable attributes
-                if callable(field_value):
-                    try:
-                        field_value = field_value()
-                    except Exception as e:
-                        if self._debug_enabled:
-                            logger.warning(f"Error calling {field_name}: {e}")
-                        continue
-
-                # Serialize the value
-                data[field_name] = self._serialize_value_fast(field_value, field)
-
+                field_value = getattr(obj, attr)
             except AttributeError:
                 if self._debug_enabled:
                     logger.debug(f"Field '{field_name}' not found on {obj.__class__.__name__}")
                 continue
 
-        # Extra fields (methods, properties)
-        extra_fields = graph_config.get("extra", [])
-        for field_spec in extra_fields:
-            if isinstance(field_spec, (tuple, list)):
-                method_name, alias = field_spec
-            else:
-                method_name, alias = field_spec, field_spec
+            # Handle callable attributes
+            if callable(field_value):
+                try:
+                    field_value = field_value()
+                except Exception as e:
+                    if self._debug_enabled:
+                        logger.warning(f"Error calling {field_name}: {e}")
+                    continue
 
+            # Serialize the value
+            data[field_name] = serialize_value(field_value, field)
+
+        # Extra fields (methods, properties)
+        for method_name, alias in plan.extras:
             try:
                 if hasattr(obj, method_name):
                     attr = getattr(obj, method_name)
@@ -270,30 +375,29 @@ class OptimizedGraphSerializer:
                 data[alias] = None
 
         # Related object graphs
-        related_graphs = graph_config.get("graphs", {})
-        for field_name, sub_graph in related_graphs.items():
+        for entry in plan.related:
+            field_name = entry.name
             try:
                 related_obj = getattr(obj, field_name, None)
                 if related_obj is None:
                     data[field_name] = None
                     continue
 
-                field = self._get_model_field(obj, field_name)
-
-                if isinstance(field, SINGLE_RELATIONS):
+                if entry.kind == KIND_SINGLE:
                     # Single related object (incl. a REVERSE OneToOne) - share
                     # request cache for performance. Must precede the many
                     # branch; see SINGLE_RELATIONS.
-                    related_serializer = OptimizedGraphSerializer(related_obj, graph=sub_graph, bypass_cache=self.bypass_cache)
+                    related_serializer = OptimizedGraphSerializer(related_obj, graph=entry.graph, bypass_cache=self.bypass_cache)
                     # Share the request cache to avoid re-serializing same objects
                     related_serializer._request_cache = self._request_cache
-                    data[field_name] = related_serializer._serialize_instance_cached(related_obj)
+                    data[field_name] = related_serializer._serialize_instance_cached(
+                        related_obj, entry.sub_plan(related_obj.__class__))
 
-                elif isinstance(field, MANY_RELATIONS) or hasattr(related_obj, 'all'):
+                elif entry.kind == KIND_MANY or hasattr(related_obj, 'all'):
                     # Many-to-many or reverse relationship - share request cache
                     if hasattr(related_obj, 'all'):
                         related_qset = related_obj.all()
-                        related_serializer = OptimizedGraphSerializer(related_qset, graph=sub_graph, many=True, bypass_cache=self.bypass_cache)
+                        related_serializer = OptimizedGraphSerializer(related_qset, graph=entry.graph, many=True, bypass_cache=self.bypass_cache)
                         # Share the request cache to avoid re-serializing same objects
                         related_serializer._request_cache = self._request_cache
                         data[field_name] = related_serializer.serialize()
@@ -311,69 +415,25 @@ class OptimizedGraphSerializer:
 
     def _apply_query_optimizations(self, queryset):
         """
-        Apply select_related and prefetch_related optimizations based on graph.
-        """
-        if not hasattr(queryset.model, 'RestMeta') or not hasattr(queryset.model.RestMeta, 'GRAPHS'):
-            return queryset
-
-        graph_config = queryset.model.RestMeta.GRAPHS.get(self.graph, {})
-        if not graph_config:
-            return queryset
-
-        # Analyze fields for optimization
-        select_related_fields = []
-        prefetch_related_fields = []
-
-        # Check main fields
-        for field_name in graph_config.get("fields", []):
-            try:
-                field = queryset.model._meta.get_field(field_name)
-                if isinstance(field, (ForeignKey, OneToOneField)):
-                    select_related_fields.append(field_name)
-            except FieldDoesNotExist:
-                continue
-
-        # Check related graphs
-        for field_name in graph_config.get("graphs", {}).keys():
-            try:
-                field = queryset.model._meta.get_field(field_name)
-                # SINGLE_RELATIONS first — a reverse OneToOne is one object, so
-                # it belongs in select_related (a nullable one is a LEFT JOIN,
-                # which can neither duplicate nor drop parent rows because the
-                # backing column is unique).
-                if isinstance(field, SINGLE_RELATIONS):
-                    select_related_fields.append(field_name)
-                elif isinstance(field, MANY_RELATIONS):
-                    prefetch_related_fields.append(field_name)
-            except FieldDoesNotExist:
-                continue
-
-        # Apply optimizations
-        optimized_queryset = queryset
-
-        if select_related_fields:
-            optimized_queryset = optimized_queryset.select_related(*select_related_fields)
+        Apply select_related, prefetch_related and only() derived from the graph.
 
-        if prefetch_related_fields:
-            optimized_queryset = optimized_queryset.prefetch_related(*prefetch_related_fields)
-
-        return optimized_queryset
+        See plan.optimize_queryset; runs on every QuerySet handed to the
+        serializer before it is evaluated.
+        """
+        return optimize_queryset(queryset, self.graph)
 
-    def _fallback_serialization(self, obj):
+    def _fallback_serialization(self, obj, plan=None):
         """
         Fallback serialization when no RestMeta.GRAPHS available.
         """
         if hasattr(obj, '_meta'):
-            fields = [field.name for field in obj._meta.fields]
-            # Enforce NO_SHOW_FIELDS even in fallback mode
-            no_show_fields = set(getattr(obj.RestMeta, "NO_SHOW_FIELDS", []) or []) if hasattr(obj, "RestMeta") else set()
-            if no_show_fields:
-                fields = [field for field in fields if field not in no_show_fields]
+            if plan is None:
+                plan = self._get_plan(obj)
+            # plan.fields already enforces NO_SHOW_FIELDS in fallback mode
             data = {}
-            for field_name in fields:
+            for field_name, field, _ in plan.fields:
                 try:
                     field_value = getattr(obj, field_name)
-                    field = self._get_model_field(obj, field_name)
                     if callable(field_value):
                         field_value = field_value()
                     data[field_name] = self._serialize_value_fast(field_value, field)
@@ -436,6 +496,11 @@ class OptimizedGraphSerializer:
         except FieldDoesNotExist:
             return None
 
+    @classmethod
+    def clear_caches(cls):
+        """Drop compiled graph plans; called by SerializerManager.clear_caches()."""
+        clear_graph_plans()
+
     def to_json(self, **kwargs):
         """
         Convert serialized data to JSON string using ujson.
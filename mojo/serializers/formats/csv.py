@@ -2,9 +2,9 @@ import csv
 import io
 from decimal import Decimal
 from datetime import datetime, date
-from django.http import StreamingHttpResponse, HttpResponse
-from django.db.models import QuerySet
+from django.http import HttpResponse
 from mojo.helpers import logit
+from mojo.serializers.formats.rows import RowPlan, StreamingExportResponse, stream_blocks
 
 logger = logit.get_logger("csv_formatter", "csv_formatter.log")
 
@@ -14,6 +14,8 @@ class CsvFormatter:
     Advanced CSV formatter with streaming support and RestMeta.GRAPHS integration.
     """
 
+    content_type = 'text/csv'
+
     def __init__(self, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL,
                  encoding='utf-8', streaming_threshold=1000):
         """
@@ -23,7 +25,8 @@ class CsvFormatter:
         :param quotechar: Quote character for fields containing special chars
         :param quoting: Quoting behavior (csv.QUOTE_MINIMAL, etc.)
         :param encoding: Character encoding for output
-        :param streaming_threshold: Minimum rows to trigger streaming response
+        :param streaming_threshold: Unused; kept for callers that still pass it
+            (querysets always stream now, without a COUNT to decide)
         """
         self.delimiter = delimiter
         self.quotechar = quotechar
@@ -36,26 +39,26 @@ class CsvFormatter:
         """
         Serialize a Django QuerySet to CSV format.
 
+        Rows are read through a RowPlan (see rows.py): values_list() tuples
+        when every field is a column or FK/JSON path, instances otherwise,
+        always over a chunked server-side cursor.
+
         :param queryset: Django QuerySet to serialize
         :param fields: List of field names or tuples (field_name, display_name)
         :param graph: RestMeta graph name to use for field configuration
         :param filename: Output filename
         :param headers: Custom header names (overrides field names)
         :param localize: Localization configuration
-        :param stream: Enable streaming for large datasets
+        :param stream: Stream the response (memory stays flat at any row count)
         :param timezone: Timezone string for datetime localization (e.g., 'America/New_York')
-        :return: HttpResponse or StreamingHttpResponse
+        :param raw_data: Return the serialized text instead of a response
+        :return: HttpResponse, StreamingHttpResponse or str
         """
-        # Determine if we should stream based on queryset size
-        should_stream = stream and queryset.count() > self.streaming_threshold
-
-        # Get fields configuration
         field_config = self._get_field_config(queryset, fields, graph)
 
         if raw_data:
-            return self._create_standard_response(queryset, field_config, filename,
-                                                headers, localize, timezone, raw_data=True)
-        elif should_stream:
+            return "".join(self._iter_lines(queryset, field_config, localize, timezone))
+        elif stream:
             return self._create_streaming_response(queryset, field_config, filename,
                                                  headers, localize, timezone)
         else:
@@ -126,15 +129,18 @@ class CsvFormatter:
         """
         field_names = []
         field_headers = []
+        field_keys = []
 
         for i, field in enumerate(fields):
             if isinstance(field, (tuple, list)):
                 field_name, display_name = field
                 field_names.append(field_name)
                 field_headers.append(display_name)
+                field_keys.append(display_name)
             else:
                 field_names.append(field)
                 field_headers.append(field.replace('_', ' ').replace('.', ' ').title())
+                field_keys.append(field)
 
         # Override with custom headers if provided
         if headers:
@@ -142,67 +148,56 @@ class CsvFormatter:
 
         return {
             'field_names': field_names,
-            'headers': field_headers
+            'headers': field_headers,
+            'keys': field_keys
         }
 
     def _create_streaming_response(self, queryset, field_config, filename,
                                  headers, localize, timezone=None):
         """
-        Create streaming HTTP response for large datasets.
+        Create streaming HTTP response; rows are encoded as they are read.
         """
-        logger.info(f"Creating streaming CSV response for {queryset.count()} records")
-
-        def csv_generator():
-            # Create CSV writer with pseudo-buffer
-            pseudo_buffer = PseudoBuffer()
-            writer = csv.writer(pseudo_buffer, delimiter=self.delimiter,
-                              quotechar=self.quotechar, quoting=self.quoting)
-
-            # Yield header row
-            yield writer.writerow(field_config['headers'])
-
-            # Yield data rows
-            for obj in queryset.iterator():  # Use iterator for memory efficiency
-                try:
-                    row = self._extract_row_data(obj, field_config['field_names'], localize, timezone)
-                    yield writer.writerow(row)
-                except Exception as e:
-                    logger.error(f"Error processing row for object {obj.pk}: {e}")
-                    # Continue with next row instead of failing completely
-                    continue
-
-        response = StreamingHttpResponse(csv_generator(), content_type='text/csv')
+        lines = self._iter_lines(queryset, field_config, localize, timezone)
+        response = StreamingExportResponse(stream_blocks(lines), content_type=self.content_type)
         response['Content-Disposition'] = f'attachment; filename={filename}'
         response['Cache-Control'] = 'no-cache'
         return response
 
     def _create_standard_response(self, queryset, field_config, filename,
-                                headers, localize, timezone=None, raw_data=False):
+                                headers, localize, timezone=None):
         """
-        Create standard HTTP response for smaller datasets.
+        Create standard HTTP response with the whole export in the body.
         """
-        output = io.StringIO()
-        writer = csv.writer(output, delimiter=self.delimiter,
-                          quotechar=self.quotechar, quoting=self.quoting)
+        content = "".join(self._iter_lines(queryset, field_config, localize, timezone))
+        response = HttpResponse(content, content_type=self.content_type)
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
 
-        # Write header
-        writer.writerow(field_config['headers'])
+    def _iter_lines(self, queryset, field_config, localize=None, timezone=None):
+        """
+        Yield the export line by line: the header, then one line per row.
+        """
+        writer = csv.writer(PseudoBuffer(), delimiter=self.delimiter,
+                          quotechar=self.quotechar, quoting=self.quoting)
+        yield writer.writerow(field_config['headers'])
+        for row in self._iter_rows(queryset, field_config['field_names'], localize, timezone):
+            yield writer.writerow(row)
 
-        # Write data rows
-        for obj in queryset:
+    def _iter_rows(self, queryset, field_names, localize=None, timezone=None):
+        """
+        Yield one built row per queryset row, skipping rows that fail to build.
+        """
+        plan = RowPlan(queryset, field_names)
+        count = 0
+        for label, values in plan.iter_rows(queryset, self._read_field):
             try:
-                row = self._extract_row_data(obj, field_config['field_names'], localize, timezone)
-                writer.writerow(row)
+                row = self._build_row(values, field_names, localize, timezone)
             except Exception as e:
-                logger.error(f"Error processing row for object {obj.pk}: {e}")
+                logger.error(f"Error processing row {label}: {e}")
                 continue
-
-        if raw_data:
-            return output.getvalue()
-
-        response = HttpResponse(output.getvalue(), content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
+            count += 1
+            yield row
+        logger.info(f"Exported {count} rows ({'values' if plan.values_mode else 'instances'})")
 
     def _create_empty_response(self, filename):
         """
@@ -229,6 +224,26 @@ class CsvFormatter:
 
         return row
 
+    def _read_field(self, obj, field_name):
+        """Instance-mode field read; a failing field exports as N/A."""
+        try:
+            return self._get_field_value(obj, field_name)
+        except Exception as e:
+            logger.warning(f"Error extracting field '{field_name}': {e}")
+            return "N/A"
+
+    def _build_row(self, values, field_names, localize=None, timezone=None):
+        """Format one row of raw field values exactly like _extract_row_data formats an instance."""
+        row = []
+        for value, field_name in zip(values, field_names):
+            try:
+                value = self._process_field_value(value, field_name, localize, timezone)
+                row.append(self._format_csv_value(value))
+            except Exception as e:
+                logger.warning(f"Error extracting field '{field_name}': {e}")
+                row.append("N/A")
+        return row
+
     def _get_field_value(self, obj, field_name):
         """
         Get field value from object, supporting nested field access, foreign keys, and JSONField traversal.
@@ -356,8 +371,8 @@ class CsvFormatter:
         if value is None:
             return ""
 
-        # Handle model instances
-        if hasattr(value, 'pk'):
+        # Handle model instances (objict answers every attribute, so not dicts)
+        if hasattr(value, 'pk') and not isinstance(value, dict):
             return str(value.pk)
 
         # Handle datetime objects
@@ -59,3 +59,69 @@ def test_corrupt_group_cycle_fails_closed(opts):
         assert False, "a pre-existing corrupt ancestry cycle must raise instead of looping"
     assert child.is_effectively_active() is False, \
         "authorization-facing active checks must deny a corrupt hierarchy"
+
+
+def _path_tree():
+    from mojo.apps.account.models import Group
+
+    top = Group.objects.create(name=f"{PREFIX}path_top")
+    mid = Group.objects.create(name=f"{PREFIX}path_mid", parent=top)
+    leaf = Group.objects.create(name=f"{PREFIX}path_leaf", parent=mid)
+    other = Group.objects.create(name=f"{PREFIX}path_other")
+    return top, mid, leaf, other
+
+
+@th.django_unit_test("materialized path: ancestry and descendants are single queries")
+def test_group_path_queries(opts):
+    from mojo.apps.account.models import Group
+    from mojo.apps.account.services import group_hierarchy
+    from mojo.helpers.query_budget import count_queries
+
+    top, mid, leaf, _ = _path_tree()
+    leaf = Group.objects.get(pk=leaf.pk)
+    assert leaf.path == f"/{top.pk}/{mid.pk}/{leaf.pk}/", f"path drift: {leaf.path}"
+
+    with count_queries() as counter:
+        chain = group_hierarchy.ancestors(leaf, include_self=True)
+    assert [g.pk for g in chain] == [leaf.pk, mid.pk, top.pk], "ancestors stay nearest-first"
+    assert counter.count == 1, f"the whole chain must load in one query, ran {counter.count}"
+
+    top = Group.objects.get(pk=top.pk)
+    with count_queries() as counter:
+        children = top._get_all_child_ids()
+    assert set(children) == {mid.pk, leaf.pk}, f"descendants drift: {children}"
+    assert counter.count == 1, f"descendants must load in one query, ran {counter.count}"
+
+
+@th.django_unit_test("materialized path: moving a group re-points its whole subtree")
+def test_group_path_reparent(opts):
+    from mojo.apps.account.models import Group
+
+    top, mid, leaf, other = _path_tree()
+    mid.parent = other
+    mid.save()
+
+    leaf = Group.objects.get(pk=leaf.pk)
+    assert leaf.path == f"/{other.pk}/{mid.pk}/{leaf.pk}/", f"subtree path not rewritten: {leaf.path}"
+    assert Group.objects.get(pk=top.pk)._get_all_child_ids() == [], "the old parent loses the subtree"
+    assert leaf.is_child_of(other) and not leaf.is_child_of(top), "ancestry follows the move"
+
+    other.is_active = False
+    other.save()
+    assert leaf.is_effectively_active() is False, "the new ancestor's activity now governs the subtree"
+
+
+@th.django_unit_test("a stale path is never trusted over parent_id")
+def test_group_stale_path_falls_back(opts):
+    from mojo.apps.account.models import Group
+    from mojo.apps.account.services import group_hierarchy
+
+    top, mid, leaf, other = _path_tree()
+    # Bypass save(): the path still claims top is an ancestor.
+    Group.objects.filter(pk=mid.pk).update(parent_id=other.pk)
+    leaf = Group.objects.get(pk=leaf.pk)
+    chain = group_hierarchy.ancestors(leaf)
+    assert [g.pk for g in chain] == [mid.pk, other.pk], "a stale path must fall back to the parent walk"
+
+    assert group_hierarchy.rebuild_paths() >= 2, "rebuild_paths rewrites the moved subtree"
+    assert Group.objects.get(pk=leaf.pk).path == f"/{other.pk}/{mid.pk}/{leaf.pk}/", "rebuilt path drift"
@@ -0,0 +1,140 @@
+"""Authenticated-principal cache: hits skip the DB, version bumps invalidate.
+
+Turns principal_cache.AUTH_PRINCIPAL_CACHE_TTL on for the duration of each
+test, so it runs in the serial tier.
+"""
+import uuid as _uuid
+from unittest import mock
+
+from testit import helpers as th
+
+
+def _make_user():
+    from mojo.apps.account.models import User
+    email = f"pcache_{_uuid.uuid4().hex[:8]}@principal.test"
+    user = User.objects.create_user(username=email, email=email, password="Pcache##1234")
+    user.is_active = True
+    user.save()
+    return user
+
+
+def _access_token(user, **claims):
+    from mojo.apps.account.utils.jwtoken import JWToken
+    return JWToken(user.get_auth_key()).create(uid=user.pk, **claims).access_token
+
+
+@th.django_unit_setup()
+def setup_principal_cache(opts):
+    from mojo.apps.account.models import ApiKey, Group, User
+
+    ApiKey.objects.filter(name__startswith="pcache_").delete()
+    Group.objects.filter(name__startswith="pcache_").delete()
+    User.objects.filter(username__endswith="@principal.test").delete()
+
+
+@th.django_unit_test("bearer: a cached principal costs no queries and dies with the user")
+def test_bearer_principal_cache(opts):
+    from mojo.apps.account.models import User
+    from mojo.apps.account.services import disable as disable_service
+    from mojo.apps.account.services import principal_cache
+    from mojo.helpers.query_budget import count_queries
+    from testit.helpers import get_mock_request
+
+    user = _make_user()
+    token = _access_token(user)
+    with mock.patch.object(principal_cache, "AUTH_PRINCIPAL_CACHE_TTL", 30):
+        principal_cache.clear_local()
+        first, err = User.validate_jwt(token, get_mock_request())
+        assert err is None and first.pk == user.pk, f"fresh token must validate: {err}"
+
+        with count_queries() as counter:
+            cached, err = User.validate_jwt(token, get_mock_request())
+        assert err is None and cached.pk == user.pk, f"cached token must validate: {err}"
+        assert counter.count == 0, f"a cache hit must not touch the DB, ran {counter.count} queries"
+        assert cached is not first, "every hit gets its own instance"
+        assert "auth_key" in cached.get_deferred_fields(), "credential fields are never cached"
+
+        bound = _access_token(user, allowed_ips=["10.0.0.1"])
+        User.validate_jwt(bound, get_mock_request(ip="10.0.0.1"))
+        _, err = User.validate_jwt(bound, get_mock_request(ip="203.0.113.9"))
+        assert err == "Not allowed from location", f"allowed_ips is enforced on every hit, got {err}"
+
+        # disable_entity flips is_active with a QuerySet.update(): no post_save.
+        disable_service.disable_entity(user, reason="admin", reporter=lambda **kwargs: None)
+        _, err = User.validate_jwt(token, get_mock_request())
+        assert err is not None, "a disabled user's cached principal must be rejected at once"
+
+
+@th.django_unit_test("apikey: group deactivation and revoke invalidate the cached key")
+def test_api_key_principal_cache(opts):
+    from mojo.apps.account.models import ApiKey, Group
+    from mojo.apps.account.services import principal_cache
+    from mojo.helpers.query_budget import count_queries
+    from testit.helpers import get_mock_request
+
+    group = Group.objects.create(name=f"pcache_{_uuid.uuid4().hex[:8]}", kind="organization")
+    key, token = ApiKey.create_for_group(group=group, name="pcache_key", permissions={"groups": True})
+    with mock.patch.object(principal_cache, "AUTH_PRINCIPAL_CACHE_TTL", 30):
+        principal_cache.clear_local()
+        request = get_mock_request()
+        ApiKey.validate_token(token, request)
+        request = get_mock_request()
+        with count_queries() as counter:
+            identity, err = ApiKey.validate_token(token, request)
+        assert err is None and identity.pk == key.pk, f"cached key must validate: {err}"
+        assert counter.count == 0, f"a cache hit must not touch the DB, ran {counter.count} queries"
+        assert request.group is not None and request.group.pk == group.pk, "active group context survives the cache"
+
+        group.is_active = False
+        group.save()
+        request = get_mock_request()
+        identity, err = ApiKey.validate_token(token, request)
+        assert err is None and request.group is None, "deactivating the group strips context immediately"
+
+        key.is_active = False
+        key.save()
+        identity, err = ApiKey.validate_token(token, get_mock_request())
+        assert identity is None and err == "API key is inactive", f"a revoked key must be rejected: {err}"
+
+
+@th.django_unit_test("apikey: group touch() and other saves keep the cached key warm")
+def test_api_key_survives_group_touch(opts):
+    from mojo.apps.account.models import ApiKey, Group
+    from mojo.apps.account.services import principal_cache
+    from mojo.helpers.query_budget import count_queries
+    from testit.helpers import get_mock_request
+
+    group = Group.objects.create(name=f"pcache_{_uuid.uuid4().hex[:8]}", kind="organization")
+    key, token = ApiKey.create_for_group(group=group, name="pcache_touch", permissions={"groups": True})
+    with mock.patch.object(principal_cache, "AUTH_PRINCIPAL_CACHE_TTL", 30):
+        principal_cache.clear_local()
+        ApiKey.validate_token(token, get_mock_request())
+
+        group.last_activity = None
+        group.touch()
+        group.name = f"{group.name}_renamed"
+        group.save()
+        with count_queries() as counter:
+            identity, err = ApiKey.validate_token(token, get_mock_request())
+        assert err is None and identity.pk == key.pk, f"cached key must validate: {err}"
+        assert counter.count == 0, f"a group touch must not invalidate cached keys, ran {counter.count} queries"
+
+        group.is_active = False
+        group.save()
+        request = get_mock_request()
+        with count_queries() as counter:
+            identity, err = ApiKey.validate_token(token, request)
+        assert counter.count > 0, "deactivating the group must still invalidate the cached key"
+        assert err is None and request.group is None, "deactivated group context is stripped"
+
+
+@th.django_unit_test("teardown: principal cache fixtures removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.account.models import ApiKey, Group, User
+    from mojo.apps.account.services import principal_cache
+
+    ApiKey.objects.filter(name__startswith="pcache_").delete()
+    Group.objects.filter(name__startswith="pcache_").delete()
+    User.objects.filter(username__endswith="@principal.test").delete()
+    principal_cache.clear_local()
+    assert not User.objects.filter(username__endswith="@principal.test").exists(), "users must be removed"
@@ -0,0 +1,140 @@
+"""Page-scoped URL resolution for File / FileRendition list graphs.
+
+File.on_rest_prepare_rows primes a serialized page before any `url`,
+`thumbnail` or `renditions` extra runs: one FileManager instance per manager,
+one renditions query, one public-access answer per manager. The query count
+of a list page must therefore not grow with the number of rows.
+
+Shortlinks are switched off on the fixture manager so the test measures the
+direct-URL path only (the shortlink suite covers the short URLs).
+"""
+import os
+import tempfile
+import shutil as _shutil
+
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+ROWS = 6
+
+
+def _write_stub(tmpdir, storage_path, data=b"hi"):
+    full = os.path.join(tmpdir, storage_path.lstrip("/"))
+    os.makedirs(os.path.dirname(full) or tmpdir, exist_ok=True)
+    with open(full, "wb") as fh:
+        fh.write(data)
+
+
+@th.django_unit_setup()
+def setup_list_url_batching(opts):
+    from mojo.apps.fileman.models import FileManager, File, FileRendition
+
+    FileRendition.objects.filter(original_file__filename__startswith="ub_").delete()
+    File.objects.filter(filename__startswith="ub_").delete()
+    FileManager.objects.filter(name="ub_fm").delete()
+
+    opts.tmpdir = tempfile.mkdtemp(prefix="mojo_ub_test_")
+    fm = FileManager.objects.create(
+        name="ub_fm", backend_type="file", backend_url="file://",
+        is_active=True, is_public=False,
+    )
+    fm.set_setting("base_path", opts.tmpdir)
+    fm.set_setting("use_shortlinks", False)
+    fm.save(update_fields=["mojo_secrets", "modified"])
+    opts.fm_id = fm.pk
+
+    opts.file_ids = []
+    for i in range(ROWS):
+        fobj = File(
+            filename=f"ub_{i}.jpg", content_type="image/jpeg", category="image",
+            file_size=2, file_manager=fm, upload_status=File.COMPLETED,
+        )
+        fobj.generate_storage_filename()
+        fobj.save()
+        _write_stub(opts.tmpdir, fobj.storage_file_path)
+        for role in ("thumbnail", "square_sm"):
+            FileRendition.objects.create(
+                original_file=fobj, role=role, filename=f"ub_{i}_{role}.jpg",
+                storage_path=f"ub/{i}/{role}.jpg", content_type="image/jpeg",
+                category="image", upload_status=FileRendition.COMPLETED,
+            )
+        opts.file_ids.append(fobj.pk)
+
+
+def _serialize(ids, graph):
+    from mojo.apps.fileman.models import File
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = File.objects.filter(pk__in=ids).order_by("id")
+    with count_queries() as counter:
+        data = OptimizedGraphSerializer(qs, graph=graph, many=True).serialize()
+    return data, counter.count
+
+
+@th.django_unit_test("list graphs: url/thumbnail/renditions cost a fixed number of queries per page")
+def test_query_count_flat_in_rows(opts):
+    for graph in ("basic", "list"):
+        _, one = _serialize(opts.file_ids[:1], graph)
+        data, many = _serialize(opts.file_ids, graph)
+        assert_eq(len(data), ROWS, f"{graph}: expected {ROWS} rows, got {len(data)}")
+        assert_eq(many, one, f"{graph}: {ROWS} rows ran {many} queries, one row ran {one}")
+
+
+@th.django_unit_test("list graphs: primed rows render the same URLs as a single row")
+def test_primed_urls_match_single_row(opts):
+    from mojo.apps.fileman.models import File
+
+    data, _ = _serialize(opts.file_ids, "basic")
+    for row in data:
+        single = File.objects.get(pk=row["id"])
+        assert_eq(row["url"], single.url, f"file {row['id']}: url differs from the unbatched path")
+        assert_true(row["thumbnail"] and row["thumbnail"].endswith("thumbnail.jpg"),
+                    f"file {row['id']}: thumbnail must come from the thumbnail rendition, got {row['thumbnail']}")
+        assert_eq(row["thumbnail"], single.thumbnail, f"file {row['id']}: thumbnail differs")
+
+    data, _ = _serialize(opts.file_ids, "list")
+    roles = set(data[0]["renditions"].keys())
+    assert_eq(roles, {"thumbnail", "square_sm"}, f"every rendition role is listed, got {roles}")
+
+
+@th.django_unit_test("signed_url: one signature per manager/path per bucket, short expiries bypass")
+def test_signed_url_cache(opts):
+    from objict import objict
+    from mojo.apps.fileman.services import urls
+
+    calls = []
+
+    def get_url(path, expires_in=None):
+        calls.append((path, expires_in))
+        return f"https://signed.test/{path}?n={len(calls)}"
+
+    manager = objict(pk=-1, modified=0, backend=objict(get_url=get_url))
+    urls.clear_signed_urls()
+    first = urls.signed_url(manager, "a.jpg", 86400)
+    again = urls.signed_url(manager, "a.jpg", 86400)
+    assert_eq(first, again, "the same path and expiry must reuse the cached URL")
+    assert_eq(len(calls), 1, f"expected one signature, got {len(calls)}")
+
+    urls.signed_url(manager, "b.jpg", 86400)
+    assert_eq(len(calls), 2, "a different path signs again")
+
+    manager.modified = 1
+    urls.signed_url(manager, "a.jpg", 86400)
+    assert_eq(len(calls), 3, "a saved manager never serves a URL signed before the save")
+
+    urls.signed_url(manager, "a.jpg", 60)
+    urls.signed_url(manager, "a.jpg", 60)
+    assert_eq(len(calls), 5, "expiries shorter than two buckets are signed every call")
+    urls.clear_signed_urls()
+
+
+@th.django_unit_test("teardown: list URL batching fixtures removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.fileman.models import FileManager, File, FileRendition
+
+    FileRendition.objects.filter(original_file__filename__startswith="ub_").delete()
+    File.objects.filter(filename__startswith="ub_").delete()
+    FileManager.objects.filter(name="ub_fm").delete()
+    _shutil.rmtree(opts.tmpdir, ignore_errors=True)
+    assert_true(not File.objects.filter(filename__startswith="ub_").exists(), "files must be removed")
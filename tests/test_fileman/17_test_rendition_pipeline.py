@@ -0,0 +1,147 @@
+"""Single-decode image rendition pipeline.
+
+ImageRenderer downloads the original once per batch of roles, decodes it once
+(renderer/pipeline.py) and uploads the results together. These tests check
+the one-download contract through the renderer and the output geometry of
+pipeline.render() directly.
+"""
+import io
+import os
+import tempfile
+import shutil as _shutil
+
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+
+def _image_bytes(size, mode="RGB", color=(200, 50, 50), fmt="JPEG"):
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new(mode, size, color=color).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _write_file(tmpdir, storage_file_path, data):
+    full_path = os.path.join(tmpdir, storage_file_path.lstrip('/'))
+    os.makedirs(os.path.dirname(full_path) or tmpdir, exist_ok=True)
+    with open(full_path, 'wb') as fh:
+        fh.write(data)
+
+
+def _count_downloads(renderer):
+    """Wrap this renderer's own backend instance; nothing shared is patched."""
+    backend = renderer.file.file_manager.backend
+    calls = []
+    original = backend.download
+
+    def download(*args, **kwargs):
+        calls.append(args[0] if args else None)
+        return original(*args, **kwargs)
+
+    backend.download = download
+    return calls
+
+
+@th.django_unit_setup()
+def setup_rendition_pipeline(opts):
+    from mojo.apps.fileman.models import FileManager, File
+
+    File.objects.filter(filename__startswith="rp_").delete()
+    FileManager.objects.filter(name="rp_fm").delete()
+
+    opts.tmpdir = tempfile.mkdtemp(prefix="mojo_rp_test_")
+    fm = FileManager.objects.create(
+        name="rp_fm", backend_type="file", backend_url="file://",
+        is_active=True, is_public=False,
+    )
+    fm.set_setting("base_path", opts.tmpdir)
+    fm.save(update_fields=["mojo_secrets", "modified"])
+
+    jpeg = _image_bytes((1200, 600))
+    f = File(filename="rp_wide.jpg", content_type="image/jpeg", category="image",
+             file_size=len(jpeg), file_manager=fm, upload_status=File.COMPLETED)
+    f.generate_storage_filename()
+    f.save()
+    _write_file(opts.tmpdir, f.storage_file_path, jpeg)
+    opts.file_id = f.pk
+
+
+@th.django_unit_test("pipeline: every default role comes from one download")
+def test_all_roles_one_download(opts):
+    from PIL import Image
+    from mojo.apps.fileman.models import File, FileRendition
+    from mojo.apps.fileman.renderer import get_renderer_for_file
+
+    renderer = get_renderer_for_file(File.objects.get(pk=opts.file_id))
+    downloads = _count_downloads(renderer)
+    created = renderer.create_all_renditions()
+
+    roles = {r.role for r in created}
+    assert_eq(roles, set(renderer.default_renditions), f"every default role is created, got {roles}")
+    assert_eq(len(downloads), 1, f"the original must be downloaded once, was {len(downloads)} times")
+
+    sizes = {}
+    for rendition in FileRendition.objects.filter(original_file_id=opts.file_id):
+        path = os.path.join(opts.tmpdir, rendition.storage_path.lstrip('/'))
+        with Image.open(path) as img:
+            sizes[rendition.role] = img.size
+    assert_eq(sizes["thumbnail"], (150, 75), f"contain keeps the 2:1 aspect, got {sizes['thumbnail']}")
+    assert_eq(sizes["square_sm"], (100, 100), f"crop fills the box, got {sizes['square_sm']}")
+
+
+@th.django_unit_test("pipeline: regenerating several roles downloads once")
+def test_regenerate_roles_one_download(opts):
+    from mojo.apps.fileman.models import File, FileRendition
+    from mojo.apps.fileman.renderer import get_renderer_for_file
+
+    roles = ["thumbnail", "thumbnail_lg", "square_sm"]
+    FileRendition.objects.filter(original_file_id=opts.file_id, role__in=roles).delete()
+    renderer = get_renderer_for_file(File.objects.get(pk=opts.file_id))
+    downloads = _count_downloads(renderer)
+    created = renderer.create_renditions(roles)
+
+    assert_eq([r.role for r in created], roles, f"roles are created in request order, got {created}")
+    assert_eq(len(downloads), 1, f"one download for {len(roles)} roles, got {len(downloads)}")
+    assert_eq(FileRendition.objects.filter(original_file_id=opts.file_id, role="thumbnail").count(), 1,
+              "regenerate must not duplicate a role")
+
+
+@th.django_unit_test("pipeline: render() sizes, flattens alpha and isolates bad roles")
+def test_render_outputs(opts):
+    from PIL import Image
+    from mojo.apps.fileman.renderer import pipeline
+
+    path = os.path.join(opts.tmpdir, "rp_alpha.png")
+    with open(path, "wb") as fh:
+        fh.write(_image_bytes((800, 1600), mode="RGBA", color=(0, 0, 0, 0), fmt="PNG"))
+
+    specs = [
+        pipeline.RenditionSpec("large", 1000, 1000, "contain", "PNG", ".png", 85),
+        pipeline.RenditionSpec("thumb", 150, 150, "contain", "JPEG", ".jpg", 85),
+        pipeline.RenditionSpec("square", 64, 64, "crop", "PNG", ".png", 85),
+        pipeline.RenditionSpec("broken", 64, 64, "crop", "NOPE", ".nope", 85),
+    ]
+    results = pipeline.render(path, specs)
+    assert_eq([r.role for r in results], ["large", "thumb", "square", "broken"],
+              "results come back in spec order")
+
+    large, thumb, square, broken = results
+    with Image.open(io.BytesIO(large.data)) as img:
+        assert_eq((img.size, img.mode), ((500, 1000), "RGBA"), f"PNG keeps alpha, got {img.size} {img.mode}")
+    with Image.open(io.BytesIO(thumb.data)) as img:
+        assert_eq(img.size, (75, 150), f"contain fits the box, got {img.size}")
+        assert_true(min(img.getpixel((10, 10))) > 240,
+                    f"transparent pixels flatten to white for JPEG, got {img.getpixel((10, 10))}")
+    with Image.open(io.BytesIO(square.data)) as img:
+        assert_eq(img.size, (64, 64), f"crop fills the box, got {img.size}")
+    assert_true(broken.data is None and broken.error, "an unknown format fails only its own role")
+
+
+@th.django_unit_test("teardown: rendition pipeline fixtures removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.fileman.models import FileManager, File
+
+    File.objects.filter(filename__startswith="rp_").delete()
+    FileManager.objects.filter(name="rp_fm").delete()
+    _shutil.rmtree(opts.tmpdir, ignore_errors=True)
+    assert_true(not File.objects.filter(filename__startswith="rp_").exists(), "files must be removed")
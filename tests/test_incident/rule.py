@@ -319,6 +319,39 @@ def test_ruleset_with_no_rules_is_a_category_catch_all(opts):
         RuleSet.objects.filter(pk=catch_all.pk).delete()
 
 
+@th.django_unit_test()
+def test_check_by_category_reuses_compiled_rules(opts):
+    """check_by_category() matches against compiled, cached rules: repeat
+    lookups touch no database, and saving a Rule recompiles the category."""
+    from mojo.apps.incident.models.rule import Rule, RuleSet
+    from mojo.helpers.query_budget import count_queries
+
+    RuleSet.objects.filter(category="testing_compiled").delete()
+    rule_set = RuleSet.objects.create(
+        name="Compiled RuleSet", category="testing_compiled", priority=1, match_by=0)
+    try:
+        rule = Rule.objects.create(
+            parent=rule_set, name="Failure regex", comparator="regex",
+            field_name="message", value="fail(ure|ed)", value_type="str")
+        event = objict()
+        event.metadata = {"message": "Authentication FAILURE"}
+
+        assert RuleSet.check_by_category("testing_compiled", event).id == rule_set.id, (
+            "the precompiled regex must match case-insensitively")
+        with count_queries() as counter:
+            for _ in range(5):
+                matched = RuleSet.check_by_category("testing_compiled", event)
+        assert counter.count == 0, f"cached lookups must not query, got {counter.count}"
+        assert matched is not None and matched.id == rule_set.id, "cached lookups must still match"
+
+        rule.value = "^denied"
+        rule.save()
+        assert RuleSet.check_by_category("testing_compiled", event) is None, (
+            "saving a Rule must invalidate the compiled category")
+    finally:
+        RuleSet.objects.filter(pk=rule_set.pk).delete()
+
+
 @th.django_unit_test()
 def test_ruleset_run_handler(opts):
     from mojo.apps.incident.models.rule import RuleSet
@@ -0,0 +1,97 @@
+"""
+Tests for batch event ingestion (reporter.report_events / services.ingest).
+
+Covers:
+- a burst is inserted and bundled into one incident per bundle key
+- trigger_count is evaluated once for the group and the crossing event dispatches
+- events that match no RuleSet and stay below the level threshold open nothing
+"""
+from testit import helpers as th
+
+
+CATEGORY = "batch_ingest_test"
+
+
+def _cleanup():
+    from mojo.apps.incident.models import Event, RuleSet, Incident
+    RuleSet.objects.filter(category=CATEGORY).delete()
+    Event.objects.filter(category=CATEGORY).delete()
+    Incident.objects.filter(category=CATEGORY).delete()
+
+
+def _make_ruleset(**kwargs):
+    from mojo.apps.incident.models import RuleSet, Rule
+    rs = RuleSet.objects.create(
+        name="Batch Ingest Ruleset",
+        category=CATEGORY,
+        priority=1,
+        match_by=0,  # ALL
+        bundle_by=4,  # SOURCE_IP
+        bundle_minutes=60,
+        handler="job://test.handler",
+        **kwargs
+    )
+    Rule.objects.create(
+        parent=rs,
+        name="Severity",
+        field_name="severity",
+        comparator=">=",
+        value="5",
+        value_type="int",
+    )
+    return rs
+
+
+def _entries(count, source_ip="10.9.8.7", severity=7):
+    return [{
+        "details": f"batch event {i}",
+        "category": CATEGORY,
+        "level": 3,
+        "source_ip": source_ip,
+        "severity": severity,
+    } for i in range(count)]
+
+
+@th.django_unit_test()
+def test_burst_bundles_into_one_incident(opts):
+    from mojo.apps.incident import reporter
+    from mojo.apps.incident.models import Incident
+    from mojo.apps.incident.services.ingest import publish_events
+    _cleanup()
+    _make_ruleset(trigger_count=3)
+
+    events = reporter.record_events(_entries(6) + _entries(2, source_ip="10.9.8.6"))
+    results = publish_events(events, dispatch_handlers=False)
+
+    assert all(event.pk for event in events), "every event must be inserted"
+    incidents = list(Incident.objects.filter(category=CATEGORY).order_by("id"))
+    assert len(incidents) == 2, f"one incident per source IP expected, got {len(incidents)}"
+    first = incidents[0]
+    assert first.events.count() == 6, f"all six events must link, got {first.events.count()}"
+    assert first.status == "new", f"threshold met inside the batch, got {first.status}"
+    assert first.metadata.get("event_count") == 6, f"event_count drift: {first.metadata!r}"
+    assert incidents[1].status == "pending", "two events stay below trigger_count=3"
+
+    dispatched = [i for i, result in enumerate(results) if result["should_dispatch"]]
+    assert dispatched == [2], f"only the event crossing the threshold dispatches, got {dispatched}"
+    assert all(result["incident"] is not None for result in results), "every matched event has an incident"
+
+
+@th.django_unit_test()
+def test_unmatched_low_level_events_open_nothing(opts):
+    from mojo.apps.incident import reporter
+    from mojo.apps.incident.models import Event, Incident
+    _cleanup()
+    _make_ruleset()
+
+    events = reporter.report_events(_entries(4, severity=1), use_catchall=False)
+
+    assert Event.objects.filter(pk__in=[e.pk for e in events]).count() == 4, "events are still recorded"
+    assert not Incident.objects.filter(category=CATEGORY).exists(), "no RuleSet matched, no incident"
+
+
+@th.django_unit_test()
+def test_zz_cleanup(opts):
+    from mojo.apps.incident.models import RuleSet
+    _cleanup()
+    assert not RuleSet.objects.filter(category=CATEGORY).exists(), "batch ingest rulesets must be removed"
@@ -0,0 +1,49 @@
+"""Per-channel JobEvent policy.
+
+Patches the process-wide JOBS_CHANNEL_EVENT_POLICY map, which every parallel
+test thread sees, so it runs in the serial tier.
+"""
+import uuid
+from unittest import mock
+
+from testit import helpers as th
+
+
+LEAN = "tep-lean-engine"
+QUIET = "tep-quiet-engine"
+
+
+@th.django_unit_setup()
+def setup_event_policy(opts):
+    from mojo.apps.jobs.models import Job
+
+    Job.objects.filter(channel__in=[LEAN, QUIET]).delete()
+
+
+@th.django_unit_test("failures-only and none policies skip success events")
+def test_channel_event_policy(opts):
+    from mojo.apps.jobs import lifecycle
+    from mojo.apps.jobs.models import Job, JobEvent
+
+    policies = {LEAN: "failures", QUIET: "none"}
+    with mock.patch.dict(lifecycle.JOBS_CHANNEL_EVENT_POLICY, policies):
+        writer = lifecycle.LifecycleWriter()
+        lean = Job.objects.create(id=uuid.uuid4().hex, channel=LEAN, func="x.y")
+        quiet = Job.objects.create(id=uuid.uuid4().hex, channel=QUIET, func="x.y")
+        for job in (lean, quiet):
+            for event in ("running", "completed", "failed"):
+                writer.event(job, event, "tep-runner")
+
+    lean_events = set(JobEvent.objects.filter(job_id=lean.id).values_list("event", flat=True))
+    assert lean_events == {"failed"}, f"failures-only keeps failure events only, got {lean_events}"
+    assert not JobEvent.objects.filter(job_id=quiet.id).exists(), "policy 'none' records no events"
+    assert lifecycle.event_policy("tep-unset-engine") == lifecycle.JOBS_EVENT_POLICY, \
+        "unlisted channels use JOBS_EVENT_POLICY"
+
+
+@th.django_unit_test("teardown: event policy jobs removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.jobs.models import Job
+
+    Job.objects.filter(channel__in=[LEAN, QUIET]).delete()
+    assert not Job.objects.filter(channel__in=[LEAN, QUIET]).exists(), "policy jobs must be removed"
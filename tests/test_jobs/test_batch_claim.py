@@ -0,0 +1,57 @@
+"""JobEngine._claim_batch: one Lua call fills free capacity across channels.
+
+Ids are pushed straight onto box-direct queues (no Job rows needed) and
+claimed without starting the engine.
+"""
+from testit import helpers as th
+
+
+FIRST = "tbc-first-engine"
+SECOND = "tbc-second-engine"
+
+
+def _clear(opts):
+    for channel in (FIRST, SECOND):
+        opts.redis.delete(opts.keys.queue(channel), opts.keys.processing(channel))
+
+
+@th.django_unit_setup()
+def setup_batch_claim(opts):
+    from mojo.apps.jobs.adapters import get_adapter
+    from mojo.apps.jobs.keys import JobKeys
+
+    opts.redis = get_adapter()
+    opts.keys = JobKeys()
+    _clear(opts)
+
+
+@th.django_unit_test("_claim_batch pops in channel order and tracks every id as in-flight")
+def test_claim_batch_fills_capacity(opts):
+    from mojo.apps.jobs.job_engine import JobEngine
+
+    _clear(opts)
+    opts.redis.rpush(opts.keys.queue(FIRST), "a1", "a2")
+    opts.redis.rpush(opts.keys.queue(SECOND), "b1", "b2", "b3")
+
+    engine = JobEngine(channels=[FIRST, SECOND], runner_id="tbc-runner-engine")
+    try:
+        claimed = engine._claim_batch([FIRST, SECOND], 4)
+        assert [c for c, _ in claimed] == [FIRST, FIRST, SECOND, SECOND], \
+            f"the first channel must drain before the second, got {claimed}"
+        # RPOP matches BRPOP: the tail of each list comes first.
+        assert [j for _, j in claimed] == ["a2", "a1", "b3", "b2"], f"unexpected claim order {claimed}"
+        for channel, job_id in claimed:
+            assert opts.redis.zscore(opts.keys.processing(channel), job_id) is not None, \
+                f"{job_id} must be recorded in the {channel} processing ZSET"
+        assert opts.redis.llen(opts.keys.queue(SECOND)) == 1, "the claim must stop at the requested count"
+
+        assert engine._claim_batch([FIRST, SECOND], 4) == [(SECOND, "b1")], "a second call takes the remainder"
+        assert engine._claim_batch([FIRST, SECOND], 4) == [], "empty queues claim nothing"
+    finally:
+        engine.executor.shutdown(wait=True)
+
+
+@th.django_unit_test("teardown: batch claim keys removed")
+def test_zz_cleanup(opts):
+    _clear(opts)
+    assert opts.redis.llen(opts.keys.queue(SECOND)) == 0, "batch claim queues must be removed"
@@ -0,0 +1,83 @@
+"""JobEngine lifecycle: the single-statement claim and batched JobEvent/metric writes."""
+import uuid
+from datetime import timedelta
+
+from testit import helpers as th
+
+
+CHANNEL = "tlc-lifecycle-engine"
+
+
+def _job(**kwargs):
+    from mojo.apps.jobs.models import Job
+
+    return Job.objects.create(
+        id=uuid.uuid4().hex, channel=CHANNEL,
+        func="mojo.apps.jobs.examples.sample_jobs.process_file_upload", **kwargs)
+
+
+@th.django_unit_setup()
+def setup_lifecycle(opts):
+    from mojo.apps.jobs.models import Job
+
+    Job.objects.filter(channel=CHANNEL).delete()
+
+
+@th.django_unit_test("claim_pending_job claims once and returns the running row")
+def test_claim_pending_job(opts):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from mojo.apps.jobs.job_engine import claim_pending_job
+
+    job = _job(payload={"n": 1})
+    with CaptureQueriesContext(connection) as ctx:
+        claimed = claim_pending_job(job.id, "tlc-runner")
+    assert claimed is not None, "a pending job must be claimable"
+    assert (claimed.status, claimed.attempt, claimed.runner_id) == ("running", 1, "tlc-runner"), \
+        f"claim must return the updated row, got {claimed.status}/{claimed.attempt}/{claimed.runner_id}"
+    assert claimed.payload == {"n": 1}, "the returned row must carry the job's fields"
+    if connection.vendor == "postgresql":
+        assert len(ctx.captured_queries) == 1, f"claim must be one statement, ran {len(ctx.captured_queries)}"
+    assert claim_pending_job(job.id, "tlc-other") is None, "a running job must not be claimed twice"
+
+
+@th.django_unit_test("claim_pending_job refuses expired and missing jobs")
+def test_claim_pending_job_refuses_expired(opts):
+    from mojo.apps.jobs.job_engine import claim_pending_job
+    from mojo.apps.jobs.models import Job
+    from mojo.helpers import dates
+
+    job = _job(expires_at=dates.utcnow() - timedelta(seconds=5))
+    assert claim_pending_job(job.id, "tlc-runner") is None, "an expired job must not be claimed"
+    assert Job.objects.get(pk=job.id).status == "pending", "a refused claim must not touch the row"
+    assert claim_pending_job(uuid.uuid4().hex, "tlc-runner") is None, "a missing job claims nothing"
+
+
+@th.django_unit_test("LifecycleWriter buffers events while started and writes them on stop")
+def test_lifecycle_writer_batches_events(opts):
+    from mojo.apps.jobs.lifecycle import LifecycleWriter
+    from mojo.apps.jobs.models import JobEvent
+
+    job = _job()
+    writer = LifecycleWriter(flush_interval=60, batch_size=100)
+    writer.event(job, "running", "tlc-runner")
+    assert JobEvent.objects.filter(job_id=job.id).count() == 1, "an unstarted writer writes through"
+
+    writer.start()
+    try:
+        for _ in range(3):
+            writer.event(job, "completed", "tlc-runner")
+        assert writer.pending() == 3, f"started writer must buffer, pending={writer.pending()}"
+        assert JobEvent.objects.filter(job_id=job.id).count() == 1, "buffered events are not written yet"
+    finally:
+        writer.stop()
+    assert writer.pending() == 0, "stop() must flush the buffer"
+    assert JobEvent.objects.filter(job_id=job.id, event="completed").count() == 3, "stop() must write buffered events"
+
+
+@th.django_unit_test("teardown: lifecycle jobs removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.jobs.models import Job
+
+    Job.objects.filter(channel=CHANNEL).delete()
+    assert not Job.objects.filter(channel=CHANNEL).exists(), "lifecycle jobs must be removed"
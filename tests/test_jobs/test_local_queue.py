@@ -369,3 +369,76 @@ def test_local_queue_graceful_shutdown(opts):
     assert not stats['running'], "Queue should be stopped"
 
     reset_local_queue()
+
+
+@th.django_unit_test()
+def test_delayed_job_does_not_block_ready_jobs(opts):
+    """A delayed job waits in the delay heap, not in the worker."""
+    reset_local_queue()
+
+    results = []
+    publish_local(results.append, 'late', delay=0.5)
+    publish_local(results.append, 'now')
+
+    time.sleep(0.2)
+    assert results == ['now'], f"Ready job must run while the delayed one waits, got {results}"
+    assert get_local_queue().stats()['delayed'] == 1, "Delayed job should be counted in stats"
+
+    time.sleep(0.5)
+    assert results == ['now', 'late'], f"Delayed job should run once due, got {results}"
+
+    reset_local_queue()
+
+
+@th.django_unit_test()
+def test_local_queue_worker_pool_and_backpressure(opts):
+    """A multi-worker queue runs jobs concurrently and counts rejections."""
+    from mojo.apps.jobs.local_queue import LocalQueue
+
+    local_queue = LocalQueue(maxsize=4, workers=4, name="test-pool")
+    done = []
+    try:
+        start_time = time.time()
+        for i in range(4):
+            assert local_queue.put(lambda: (time.sleep(0.2), done.append(1)), (), {}, f"pool{i}"), \
+                "Jobs within maxsize should be accepted"
+        deadline = time.time() + 2
+        while len(done) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        elapsed = time.time() - start_time
+        assert len(done) == 4, f"Expected 4 completed jobs, got {len(done)}"
+        assert elapsed < 0.6, f"Four 0.2s jobs on four workers should overlap, took {elapsed:.2f}s"
+
+        # Fill with delayed jobs: maxsize bounds ready + delayed together
+        later = timezone.now() + timedelta(seconds=30)
+        for i in range(4):
+            local_queue.put(done.append, (i,), {}, f"later{i}", run_at=later)
+        assert not local_queue.put(done.append, (9,), {}, "overflow"), "A full queue must reject"
+
+        stats = local_queue.stats()
+        assert stats['workers'] == 4, f"Expected 4 workers, got {stats}"
+        assert stats['delayed'] == 4 and stats['rejected'] == 1, f"Unexpected backpressure stats {stats}"
+        assert stats['utilization'] == 1.0, f"A full queue reports utilization 1.0, got {stats}"
+    finally:
+        local_queue.stop(timeout=1.0)
+
+
+@th.django_unit_test()
+def test_publish_local_reports_rejection(opts):
+    """publish_local returns None for a job a full queue rejected."""
+    from mojo.apps.jobs.local_queue import LocalQueue
+
+    full_queue = LocalQueue(maxsize=1, workers=1, name="test-full")
+    results = []
+    try:
+        with patch('mojo.apps.jobs.local_queue.get_local_queue', return_value=full_queue):
+            first = publish_local(results.append, 'first', delay=30)
+            second = publish_local(results.append, 'second')
+        assert first and first.startswith('local-'), f"The first job fits and gets an id, got {first}"
+        assert second is None, f"A rejected job must not get a job id, got {second}"
+        stats = full_queue.stats()
+        assert stats['rejected'] == 1 and stats['delayed'] == 1, f"Unexpected backpressure stats {stats}"
+        time.sleep(0.1)
+        assert results == [], f"The rejected job must never run, got {results}"
+    finally:
+        full_queue.stop(timeout=1.0)
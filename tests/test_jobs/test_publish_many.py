@@ -0,0 +1,107 @@
+"""jobs.publish_many: one batch, publish()'s contract per item.
+
+Job and JobEvent rows are bulk-created and ids reach Redis in one pipelined
+RPUSH / ZADD; idempotency keys, per-item delays and channel validation behave
+exactly as they do for publish().
+
+The channel is box-direct (ends '-engine') so it is allowed without touching
+JOBS_ALLOWED_CHANNELS, and nothing consumes it — the jobs stay where
+publish_many put them until the cleanup test removes them.
+"""
+import uuid
+
+from testit import helpers as th
+
+
+CHANNEL = "tpm-batch-engine"
+HANDLER = "mojo.apps.jobs.examples.sample_jobs.process_file_upload"
+
+
+def _clear(opts):
+    from mojo.apps.jobs.models import Job
+
+    opts.redis.delete(opts.keys.queue(CHANNEL))
+    opts.redis.delete(opts.keys.sched(CHANNEL))
+    opts.redis.get_client().srem(opts.keys.sched_registry(), CHANNEL)
+    Job.objects.filter(channel=CHANNEL).delete()
+
+
+@th.django_unit_setup()
+def setup_publish_many(opts):
+    from mojo.apps.jobs.adapters import get_adapter
+    from mojo.apps.jobs.keys import JobKeys
+
+    opts.redis = get_adapter()
+    opts.keys = JobKeys()
+    _clear(opts)
+
+
+@th.django_unit_test("publish_many queues every job in order with its created/queued events")
+def test_publish_many_queues_in_order(opts):
+    _clear(opts)
+    from mojo.apps import jobs
+    from mojo.apps.jobs.models import Job, JobEvent
+
+    job_ids = jobs.publish_many(HANDLER, [{"n": i} for i in range(5)], channel=CHANNEL)
+
+    assert len(job_ids) == 5 and len(set(job_ids)) == 5, f"expected five distinct ids, got {job_ids}"
+    queued = opts.redis.get_client().lrange(opts.keys.queue(CHANNEL), 0, -1)
+    assert queued == job_ids, f"ids must be queued in input order, queue holds {queued}"
+    rows = dict(Job.objects.filter(id__in=job_ids).values_list("id", "payload"))
+    assert [rows[job_id]["n"] for job_id in job_ids] == list(range(5)), "payloads must map to their ids"
+    for event in ("created", "queued"):
+        count = JobEvent.objects.filter(job_id__in=job_ids, event=event).count()
+        assert count == 5, f"expected one {event!r} event per job, got {count}"
+
+
+@th.django_unit_test("publish_many honors idempotency keys inside and across batches")
+def test_publish_many_idempotency(opts):
+    _clear(opts)
+    from mojo.apps import jobs
+    from mojo.apps.jobs.models import Job
+
+    tag = uuid.uuid4().hex[:8]
+    a, b, c = f"tpm-{tag}-a", f"tpm-{tag}-b", f"tpm-{tag}-c"
+    first = jobs.publish_many(HANDLER, [{}, {}, {}], channel=CHANNEL, idempotency_keys=[a, b, a])
+    assert first[0] == first[2], "a key repeated inside the batch must publish once"
+    assert Job.objects.filter(channel=CHANNEL).count() == 2, "two distinct keys, two rows"
+
+    second = jobs.publish_many(HANDLER, [{}, {}], channel=CHANNEL, idempotency_keys=[a, c])
+    assert second[0] == first[0], "an existing key must return the existing job id"
+    assert Job.objects.filter(channel=CHANNEL).count() == 3, "only the new key may add a row"
+
+
+@th.django_unit_test("publish_many schedules delayed items in the sched ZSET")
+def test_publish_many_delays(opts):
+    _clear(opts)
+    from mojo.apps import jobs
+    from mojo.apps.jobs.models import JobEvent
+
+    now_id, later_id = jobs.publish_many(HANDLER, [{}, {}], channel=CHANNEL, delays=[None, 300])
+
+    client = opts.redis.get_client()
+    assert client.lrange(opts.keys.queue(CHANNEL), 0, -1) == [now_id], "only the immediate job is queued"
+    assert client.zscore(opts.keys.sched(CHANNEL), later_id) is not None, "the delayed job must be scheduled"
+    assert JobEvent.objects.filter(job_id=later_id, event="scheduled").exists(), "delayed job records 'scheduled'"
+
+
+@th.django_unit_test("publish_many validates the channel before writing anything")
+def test_publish_many_rejects_bad_channel(opts):
+    from mojo.apps import jobs
+    from mojo.apps.jobs.models import Job
+
+    try:
+        jobs.publish_many(HANDLER, [{}], channel="bad channel")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("an invalid channel name must raise ValueError")
+    assert not Job.objects.filter(channel="bad channel").exists(), "a rejected batch must not leave rows"
+
+
+@th.django_unit_test("teardown: publish_many jobs removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.jobs.models import Job
+
+    _clear(opts)
+    assert not Job.objects.filter(channel=CHANNEL).exists(), "publish_many jobs must be removed"
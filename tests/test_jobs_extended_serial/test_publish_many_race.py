@@ -0,0 +1,71 @@
+"""publish_many: an idempotency key claimed between the lookup and the insert.
+
+Wraps Job.objects.filter so the batch's key lookup misses a key that a
+"concurrent" publish() claims at that moment. The bulk insert then hits the
+unique index and publish_many falls back to item-by-item publishing. Patching
+the shared manager is process-global, so this runs in the serial tier.
+"""
+import uuid
+from unittest import mock
+
+from testit import helpers as th
+
+
+CHANNEL = "tpmr-race-engine"
+HANDLER = "mojo.apps.jobs.examples.sample_jobs.process_file_upload"
+
+
+def _clear(opts):
+    from mojo.apps.jobs.models import Job
+
+    opts.redis.delete(opts.keys.queue(CHANNEL))
+    opts.redis.delete(opts.keys.sched(CHANNEL))
+    opts.redis.get_client().srem(opts.keys.sched_registry(), CHANNEL)
+    Job.objects.filter(channel=CHANNEL).delete()
+
+
+@th.django_unit_setup()
+def setup_publish_many_race(opts):
+    from mojo.apps.jobs.adapters import get_adapter
+    from mojo.apps.jobs.keys import JobKeys
+
+    opts.redis = get_adapter()
+    opts.keys = JobKeys()
+    _clear(opts)
+
+
+@th.django_unit_test("publish_many race: every id returned, repeated keys included, exists")
+def test_publish_many_idempotency_race(opts):
+    from mojo.apps import jobs
+    from mojo.apps.jobs.models import Job
+
+    tag = uuid.uuid4().hex[:8]
+    raced, other = f"tpmr-{tag}-raced", f"tpmr-{tag}-other"
+    claimed = []
+    original_filter = Job.objects.filter
+
+    def stale_lookup(*args, **kwargs):
+        if "idempotency_key__in" not in kwargs:
+            return original_filter(*args, **kwargs)
+        # Another publisher wins the key right after this lookup ran.
+        claimed.append(jobs.publish(HANDLER, {}, channel=CHANNEL, idempotency_key=raced))
+        return original_filter(pk__in=[])
+
+    with mock.patch.object(Job.objects, "filter", side_effect=stale_lookup):
+        job_ids = jobs.publish_many(HANDLER, [{}, {}, {}], channel=CHANNEL,
+                                    idempotency_keys=[raced, other, raced])
+
+    assert claimed, "the stale lookup must have run"
+    assert job_ids[0] == job_ids[2] == claimed[0], (
+        f"both items with the raced key resolve to the winner's job, got {job_ids} vs {claimed}")
+    existing = set(Job.objects.filter(id__in=job_ids).values_list("id", flat=True))
+    assert existing == set(job_ids), f"every returned id must exist, missing {set(job_ids) - existing}"
+    assert Job.objects.filter(channel=CHANNEL).count() == 2, "one row per distinct key"
+
+
+@th.django_unit_test("teardown: publish_many race jobs removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.jobs.models import Job
+
+    _clear(opts)
+    assert not Job.objects.filter(channel=CHANNEL).exists(), "race jobs must be removed"
@@ -0,0 +1,72 @@
+"""Scheduler promotion throughput benchmark.
+
+Parks a backlog of already-due jobs in one channel's sched ZSET and times a
+single Scheduler pass over it. The timing bound is deliberately loose (it
+guards against a return to per-job round trips, not against a slow CI box),
+and the measured rate is printed for comparison across changes. It runs in
+the serial tier because a wall-clock bound is meaningless while other test
+modules compete for the same Redis and database.
+"""
+import time
+
+from testit import helpers as th
+
+
+CHANNEL = "tsp-promote-engine"
+HANDLER = "mojo.apps.jobs.examples.sample_jobs.process_file_upload"
+BACKLOG = 2500  # more than two JOBS_SCHEDULER_PROMOTE_BATCH rounds
+MAX_SECONDS = 15.0
+
+
+def _clear(opts):
+    from mojo.apps.jobs.models import Job
+
+    opts.redis.delete(opts.keys.queue(CHANNEL), opts.keys.sched(CHANNEL),
+                      opts.keys.sched_broadcast(CHANNEL))
+    opts.redis.get_client().srem(opts.keys.sched_registry(), CHANNEL)
+    Job.objects.filter(channel=CHANNEL).delete()
+
+
+@th.django_unit_setup()
+def setup_scheduler_promotion(opts):
+    from mojo.apps.jobs.adapters import get_adapter
+    from mojo.apps.jobs.keys import JobKeys
+
+    opts.redis = get_adapter()
+    opts.keys = JobKeys()
+    _clear(opts)
+
+
+@th.django_unit_test("benchmark: one scheduler pass promotes a large due backlog")
+def test_promotion_throughput(opts):
+    from mojo.apps import jobs
+    from mojo.apps.jobs.models import JobEvent
+    from mojo.apps.jobs.scheduler import Scheduler
+
+    _clear(opts)
+    job_ids = jobs.publish_many(HANDLER, [{"n": i} for i in range(BACKLOG)],
+                                channel=CHANNEL, delay=3600)
+    sched_key = opts.keys.sched(CHANNEL)
+    assert opts.redis.zcard(sched_key) == BACKLOG, "the whole backlog must start out scheduled"
+
+    scheduler = Scheduler(channels=[CHANNEL], scheduler_id="tsp-bench")
+    now_ms = (time.time() + 7200) * 1000  # an hour past every run_at
+    started = time.perf_counter()
+    promoted = scheduler._process_channel(CHANNEL, None, now_ms)
+    elapsed = time.perf_counter() - started
+    print(f"promoted {promoted} jobs in {elapsed:.3f}s ({promoted / max(elapsed, 1e-6):.0f} jobs/s)")
+
+    assert promoted == BACKLOG, f"every due job must be promoted in one pass, got {promoted}"
+    assert opts.redis.zcard(sched_key) == 0, "promotion must empty the sched ZSET"
+    assert opts.redis.llen(opts.keys.queue(CHANNEL)) == BACKLOG, "every promoted id must be queued once"
+    queued = JobEvent.objects.filter(job_id__in=job_ids, event="queued").count()
+    assert queued == BACKLOG, f"one 'queued' event per promoted job, got {queued}"
+    assert elapsed < MAX_SECONDS, f"promoting {BACKLOG} jobs took {elapsed:.1f}s"
+
+
+@th.django_unit_test("teardown: promotion benchmark jobs removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.jobs.models import Job
+
+    _clear(opts)
+    assert not Job.objects.filter(channel=CHANNEL).exists(), "benchmark jobs must be removed"
@@ -0,0 +1,112 @@
+"""Lua limiter engine behind rate_limit / strict_rate_limit / check_account_attempt.
+
+Drives check_limits() directly with a synthetic, window-aligned clock and a
+random bucket name per run, so the keys never collide with live traffic.
+"""
+import uuid as _uuid
+
+from testit import helpers as th
+
+NOW = 1_700_000_020.0   # 40s into a 60s window
+
+
+@th.django_unit_setup()
+def setup_limiter(opts):
+    opts.bucket = f"testit_engine_{_uuid.uuid4().hex[:8]}"
+
+
+def _clean(opts):
+    from mojo.helpers.redis import get_connection
+    r = get_connection()
+    for pattern in (f"rl:{opts.bucket}:*", f"srl:{opts.bucket}:*"):
+        for key in r.scan_iter(pattern):
+            r.delete(key)
+
+
+def _hits(opts, algorithm, limit, window, count, step=0.0, dimension="ip"):
+    from mojo.decorators.limits import check_limits, _limit_key
+    results = []
+    for i in range(count):
+        now = NOW + i * step
+        key = _limit_key(algorithm, opts.bucket, dimension, algorithm, window, now)
+        results.append(check_limits([(key, algorithm, limit, window)], now=now))
+    return results
+
+
+@th.django_unit_test("engine: every algorithm admits `limit` hits, then blocks with a Retry-After")
+def test_algorithms_enforce_limit(opts):
+    from mojo.decorators.limits import ALGORITHMS
+
+    _clean(opts)
+    expected_retry = {"fixed": 20, "sliding": 60, "token_bucket": 20, "gcra": 20}
+    for algorithm in ALGORITHMS:
+        results = _hits(opts, algorithm, 3, 60, 5)
+        allowed = [res.allowed for res in results]
+        assert allowed == [True, True, True, False, False], (
+            f"{algorithm}: limit 3 must admit exactly 3 of 5 hits, got {allowed}")
+        blocked = results[-1]
+        assert blocked.retry_after == expected_retry[algorithm], (
+            f"{algorithm}: expected retry_after {expected_retry[algorithm]}s, got {blocked.retry_after}")
+        assert blocked.used == [3], f"{algorithm}: a blocked hit reports the full budget, got {blocked.used}"
+    _clean(opts)
+
+
+@th.django_unit_test("engine: a flood never grows the sliding log past its limit")
+def test_sliding_log_is_bounded(opts):
+    from mojo.helpers.redis import get_connection
+
+    _clean(opts)
+    results = _hits(opts, "sliding", 5, 60, 200, step=0.01)
+    assert sum(res.allowed for res in results) == 5, "only 5 hits fit in the window"
+    size = get_connection().zcard(f"srl:{opts.bucket}:ip:sliding")
+    assert size == 5, f"rejected hits must not be logged, zset holds {size} members"
+    _clean(opts)
+
+
+@th.django_unit_test("engine: token_bucket and gcra refill at limit/window")
+def test_smooth_algorithms_refill(opts):
+    _clean(opts)
+    for algorithm in ("token_bucket", "gcra"):
+        # 2 per 10s => one hit regained every 5s; hits arrive every 2.5s.
+        allowed = [res.allowed for res in _hits(opts, algorithm, 2, 10, 6, step=2.5)]
+        assert allowed == [True, True, True, False, True, False], (
+            f"{algorithm}: expected burst of 2 then one hit per 5s, got {allowed}")
+    _clean(opts)
+
+
+@th.django_unit_test("engine: dimensions are all-or-nothing in one call")
+def test_dimensions_all_or_nothing(opts):
+    from mojo.decorators.limits import check_limits
+    from mojo.helpers.redis import get_connection
+
+    _clean(opts)
+    ip_key = f"rl:{opts.bucket}:ip:1.2.3.4:{int(NOW) // 60 * 60}"
+    duid_key = f"srl:{opts.bucket}:duid:abc"
+    checks = [(ip_key, "fixed", 10, 60), (duid_key, "sliding", 1, 300)]
+
+    first = check_limits(checks, now=NOW)
+    assert first.allowed and first.used == [1, 1], f"first hit is counted on both, got {first}"
+    second = check_limits(checks, now=NOW + 1)
+    assert not second.allowed and second.index == 1, f"duid must block the second hit, got {second}"
+    assert second.retry_after == 299, f"retry_after is the duid log's, got {second.retry_after}"
+    assert int(get_connection().get(ip_key)) == 1, "a blocked request must not spend the ip budget"
+    _clean(opts)
+
+
+@th.django_unit_test("engine: unknown algorithms are rejected at decoration time")
+def test_unknown_algorithm(opts):
+    import mojo.decorators as md
+
+    try:
+        md.rate_limit(opts.bucket, ip_limit=1, algorithm="leaky_bucket")
+    except ValueError:
+        return
+    assert False, "rate_limit must reject an unknown algorithm"
+
+
+@th.django_unit_test("teardown: limiter engine keys removed")
+def test_zz_cleanup(opts):
+    from mojo.helpers.redis import get_connection
+
+    _clean(opts)
+    assert not list(get_connection().scan_iter(f"*{opts.bucket}*")), "engine keys must be removed"
@@ -0,0 +1,68 @@
+from testit import helpers as th
+
+
+KIND = "test:bulk_writer"
+
+
+@th.django_unit_setup()
+def setup(opts):
+    from mojo.apps.logit.models import Log
+    # clean up from previous runs
+    Log.objects.filter(kind=KIND).delete()
+
+
+def _mock_request():
+    from objict import objict
+    return objict(
+        user=objict(is_authenticated=False, username=None, pk=None),
+        group=None,
+        path="/test/bulk",
+        duid="test-duid",
+        ip="127.0.0.1",
+        method="POST",
+        user_agent="test-agent"
+    )
+
+
+@th.django_unit_test()
+def test_bulk_writer_flushes_batches(opts):
+    """BulkLogWriter writes queued rows with bulk_create and flush() waits for them"""
+    from mojo.apps.logit.models import Log
+    from mojo.middleware.logging import BulkLogWriter
+
+    writer = BulkLogWriter(max_size=100, batch_size=10, flush_interval=5.0, sample_at=0)
+    writer.start()
+    try:
+        request = _mock_request()
+        for i in range(25):
+            writer.put(("db", request, f"bulk row {i}", KIND))
+        assert writer.flush(timeout=5.0), "flush() timed out"
+        stats = writer.stats()
+        assert Log.objects.filter(kind=KIND).count() == 25, "every queued row must be written"
+        assert stats["written"] == 25, f"Expected written=25, got {stats}"
+        assert stats["flushes"] == 3, f"25 rows at batch_size=10 is three INSERTs, got {stats}"
+    finally:
+        writer.stop()
+    assert not writer.thread.is_alive(), "stop() must end the writer thread"
+
+
+@th.django_unit_test()
+def test_bulk_writer_samples_then_drops_when_saturated(opts):
+    """A saturated queue samples past the watermark and drops when full, counting both"""
+    from mojo.middleware.logging import BulkLogWriter
+
+    # never started: nothing drains the queue
+    writer = BulkLogWriter(max_size=10, sample_at=0.5, sample_rate=5)
+    accepted = sum(writer.put(("db", None, "x", KIND)) for _ in range(100))
+    stats = writer.stats()
+    assert accepted == 10, f"a 10-slot queue accepts 10 items, got {accepted}"
+    assert stats["pending"] == 10, f"Expected a full queue, got {stats}"
+    assert stats["sampled"] > 0 and stats["dropped"] > 0, f"Expected sampled and dropped counts, got {stats}"
+    assert stats["queued"] + stats["sampled"] + stats["dropped"] == 100, f"every put must be accounted for, got {stats}"
+
+
+@th.django_unit_test()
+def test_zz_cleanup(opts):
+    from mojo.apps.logit.models import Log
+    Log.objects.filter(kind=KIND).delete()
+    assert not Log.objects.filter(kind=KIND).exists(), "bulk writer rows must be removed"
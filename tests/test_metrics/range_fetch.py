@@ -0,0 +1,98 @@
+"""Multi-slug range fetch: one pipelined read, server-side rollups."""
+
+import datetime
+
+from testit import helpers as th
+
+
+ACCOUNT = "tmr_range"
+OTHER_ACCOUNT = "tmr_range_other"
+SLUGS = ("tmr_views", "tmr_clicks")
+START = datetime.datetime(2025, 3, 1, tzinfo=datetime.timezone.utc)
+END = datetime.datetime(2025, 3, 10, tzinfo=datetime.timezone.utc)
+
+
+def _clear():
+    from mojo.apps import metrics
+
+    for account in (ACCOUNT, OTHER_ACCOUNT):
+        for slug in SLUGS:
+            metrics.delete_metrics_slug(slug, account=account)
+        metrics.delete_account(account)
+
+
+@th.django_unit_setup()
+def setup_range_fetch(opts):
+    from mojo.apps import metrics
+
+    _clear()
+    for day in range(10):
+        when = START + datetime.timedelta(days=day)
+        metrics.record(SLUGS[0], when=when, count=day + 1, account=ACCOUNT,
+                       min_granularity="days", max_granularity="days", buffered=False)
+        metrics.record(SLUGS[1], when=when, count=2, account=OTHER_ACCOUNT,
+                       min_granularity="days", max_granularity="days", buffered=False)
+
+
+@th.django_unit_test("generate_slugs_for_range matches generate_slug bucket for bucket")
+def test_range_keys_match_single_keys(opts):
+    from mojo.apps.metrics import utils
+
+    for granularity in ("hours", "days", "weeks", "months"):
+        keys = utils.generate_slugs_for_range("a:b", START, END, granularity, ACCOUNT)
+        assert keys[0] == utils.generate_slug("a:b", START, granularity, ACCOUNT), \
+            f"{granularity}: first range key must equal generate_slug, got {keys[0]}"
+        assert len(keys) == len(utils.generate_periods(START, END, granularity)), \
+            f"{granularity}: one key per period"
+
+
+@th.django_unit_test("multi-slug fetch returns every series in order")
+def test_multi_slug_fetch(opts):
+    from mojo.apps import metrics
+
+    data = metrics.fetch(list(SLUGS), START, END, granularity="days", account=ACCOUNT, with_labels=True)
+    assert data.data[SLUGS[0]] == list(range(1, 11)), f"views series drift: {data.data}"
+    assert data.data[SLUGS[1]] == [0] * 10, "a slug with no data in this account reads as zeros"
+    assert data.labels[0] == "2025-03-01" and len(data.labels) == 10, f"labels drift: {data.labels}"
+
+
+@th.django_unit_test("rollup and every aggregate server-side")
+def test_rollups(opts):
+    from mojo.apps import metrics
+
+    total = metrics.fetch(SLUGS[0], START, END, granularity="days", account=ACCOUNT, rollup="sum")
+    assert total == [55], f"sum over the range, got {total}"
+    peak = metrics.fetch(SLUGS[0], START, END, granularity="days", account=ACCOUNT, rollup="max")
+    assert peak == [10], f"max over the range, got {peak}"
+
+    weekly = metrics.fetch(SLUGS[0], START, END, granularity="days", account=ACCOUNT,
+                           every=4, rollup="avg", with_labels=True)
+    assert weekly.data[SLUGS[0]] == [2.5, 6.5, 9.5], f"groups of 4 with a partial tail, got {weekly.data}"
+    assert weekly.labels == ["2025-03-01", "2025-03-05", "2025-03-09"], f"group labels drift: {weekly.labels}"
+
+    try:
+        metrics.fetch(SLUGS[0], START, END, granularity="days", account=ACCOUNT, rollup="median")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("an unknown rollup must raise ValueError")
+
+
+@th.django_unit_test("fetch_series reads pairs across accounts in one call")
+def test_fetch_series_across_accounts(opts):
+    from mojo.apps import metrics
+    from mojo.apps.metrics import utils
+
+    periods = utils.generate_periods(START, END, "days")
+    views, clicks = metrics.fetch_series(
+        [(ACCOUNT, SLUGS[0]), (OTHER_ACCOUNT, SLUGS[1])], periods, "days")
+    assert views == list(range(1, 11)), f"views drift: {views}"
+    assert clicks == [2] * 10, f"clicks drift: {clicks}"
+
+
+@th.django_unit_test("teardown: range fetch metrics removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.metrics import redis_metrics
+
+    _clear()
+    assert not redis_metrics.get_account_slugs(ACCOUNT), "range fetch slugs must be removed"
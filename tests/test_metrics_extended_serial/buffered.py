@@ -0,0 +1,80 @@
+"""Buffered record(): increments coalesce in process and land in one flush."""
+
+from testit import helpers as th
+
+
+ACCOUNT = "tmb_buffer"
+SLUG = "tmb_buffered_metric"
+CATEGORY = "tmb_buffered"
+
+
+def _clear():
+    from mojo.apps import metrics
+
+    metrics.delete_category(CATEGORY, account=ACCOUNT)
+    metrics.delete_metrics_slug(SLUG, account=ACCOUNT)
+    metrics.delete_account(ACCOUNT)
+
+
+@th.django_unit_setup()
+def setup_buffered_metrics(opts):
+    _clear()
+
+
+@th.django_unit_test("buffered record() is invisible until flushed, then summed")
+def test_buffered_record_flush(opts):
+    import datetime
+    from mojo.apps import metrics
+    from mojo.apps.metrics import redis_metrics
+
+    _clear()
+    when = datetime.datetime(2025, 5, 2, 13, 5, tzinfo=datetime.timezone.utc)
+    buffer = redis_metrics.MetricsBuffer(interval_ms=60000)
+    original, redis_metrics._buffer = redis_metrics._buffer, buffer
+    try:
+        for _ in range(7):
+            metrics.record(SLUG, when=when, count=3, category=CATEGORY, account=ACCOUNT,
+                           min_granularity="hours", max_granularity="days", buffered=True)
+        assert buffer.pending() == 2, f"one pending counter per bucket, got {buffer.pending()}"
+        values = metrics.fetch(SLUG, when, when, granularity="hours", account=ACCOUNT)
+        assert values == [0], f"nothing may reach Redis before a flush, got {values}"
+
+        assert metrics.flush() == 2, "flush() must write both buckets"
+        assert buffer.pending() == 0, "flush() must drain the buffer"
+    finally:
+        redis_metrics._buffer = original
+
+    for granularity in ("hours", "days"):
+        values = metrics.fetch(SLUG, when, when, granularity=granularity, account=ACCOUNT)
+        assert values == [21], f"{granularity}: seven records of 3 must sum to 21, got {values}"
+    assert SLUG in metrics.get_category_slugs(CATEGORY, account=ACCOUNT), "flush must register the category slug"
+    assert SLUG in redis_metrics.get_account_slugs(ACCOUNT), "flush must register the slug"
+
+
+@th.django_unit_test("buffer flushes early once max_keys counters are pending")
+def test_buffer_flushes_at_max_keys(opts):
+    import datetime
+    from mojo.apps import metrics
+    from mojo.apps.metrics import redis_metrics
+
+    _clear()
+    when = datetime.datetime(2025, 5, 3, 9, 0, tzinfo=datetime.timezone.utc)
+    buffer = redis_metrics.MetricsBuffer(interval_ms=60000, max_keys=2)
+    original, redis_metrics._buffer = redis_metrics._buffer, buffer
+    try:
+        metrics.record(SLUG, when=when, account=ACCOUNT,
+                       min_granularity="hours", max_granularity="days", buffered=True)
+        assert buffer.pending() == 0 and buffer.flushes == 1, "reaching max_keys must flush inline"
+    finally:
+        redis_metrics._buffer = original
+
+    values = metrics.fetch(SLUG, when, when, granularity="days", account=ACCOUNT)
+    assert values == [1], f"the early flush must be visible, got {values}"
+
+
+@th.django_unit_test("teardown: buffered metrics removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.metrics import redis_metrics
+
+    _clear()
+    assert SLUG not in redis_metrics.get_account_slugs(ACCOUNT), "buffered metric slug must be removed"
@@ -0,0 +1,98 @@
+"""Hash storage layout and the keys <-> hash migration.
+
+Flips redis_metrics.METRICS_STORAGE for the duration of each test, so it
+runs in the serial tier.
+"""
+
+import datetime
+from unittest import mock
+
+from testit import helpers as th
+
+
+ACCOUNT = "tmh_hash"
+SLUG = "tmh:hashed"
+START = datetime.datetime(2025, 4, 1, 22, 0, tzinfo=datetime.timezone.utc)
+END = START + datetime.timedelta(hours=4)
+
+
+def _clear():
+    from mojo.apps import metrics
+
+    metrics.delete_metrics_slug(SLUG, account=ACCOUNT)
+    metrics.delete_account(ACCOUNT)
+
+
+def _record_hours():
+    from mojo.apps import metrics
+
+    for hour in range(5):
+        metrics.record(SLUG, when=START + datetime.timedelta(hours=hour), count=hour + 1,
+                       account=ACCOUNT, min_granularity="minutes", max_granularity="days",
+                       buffered=False)
+
+
+def _bucket_keys(r):
+    pattern = f"{{mets:{ACCOUNT}}}:mets:{ACCOUNT}::*"
+    return {k.decode() if isinstance(k, bytes) else k for k in r.scan_iter(match=pattern)}
+
+
+@th.django_unit_setup()
+def setup_hash_storage(opts):
+    from mojo.helpers import redis
+
+    opts.redis = redis.get_connection()
+    _clear()
+
+
+@th.django_unit_test("hash storage packs buckets into per-period hashes and reads them back")
+def test_hash_storage_round_trip(opts):
+    from mojo.apps import metrics
+    from mojo.apps.metrics import redis_metrics
+
+    _clear()
+    with mock.patch.object(redis_metrics, "METRICS_STORAGE", redis_metrics.STORAGE_HASH):
+        _record_hours()
+        keys = _bucket_keys(opts.redis)
+        assert all(":h:" in k for k in keys), f"hash mode must not write string buckets: {keys}"
+        # minutes: 2 days, hours: 1 month, days: 1 year
+        assert len(keys) == 4, f"expected four container hashes, got {sorted(keys)}"
+        hourly = metrics.fetch(SLUG, START, END, granularity="hours", account=ACCOUNT)
+        minutes = metrics.fetch(SLUG, START, END, granularity="minutes", account=ACCOUNT)
+        values = metrics.fetch_values(SLUG, when=END, granularity="hours", account=ACCOUNT, with_delta=True)
+
+    assert hourly == [1, 2, 3, 4, 5], f"hourly series drift: {hourly}"
+    assert minutes[::60] == [1, 2, 3, 4, 5] and sum(minutes) == 15, "minute buckets must read back"
+    assert values["data"][SLUG] == 5 and values["prev_data"][SLUG] == 4, f"fetch_values drift: {values}"
+
+
+@th.django_unit_test("migrate_storage moves keys to hashes and back without losing counts")
+def test_migrate_storage_round_trip(opts):
+    from mojo.apps import metrics
+    from mojo.apps.metrics import redis_metrics
+
+    _clear()
+    _record_hours()
+    string_keys = _bucket_keys(opts.redis)
+    assert len(string_keys) == 12, f"5 minutes + 5 hours + 2 days, got {len(string_keys)}"
+
+    with mock.patch.object(redis_metrics, "METRICS_STORAGE", redis_metrics.STORAGE_HASH):
+        dry = metrics.migrate_storage("hash", account=ACCOUNT, dry_run=True)
+        assert dry.moved == 12 and _bucket_keys(opts.redis) == string_keys, "dry_run must not write"
+        stats = metrics.migrate_storage("hash", account=ACCOUNT)
+        assert stats.moved == 12, f"every string bucket must move, got {stats}"
+        assert all(":h:" in k for k in _bucket_keys(opts.redis)), "string buckets must be deleted"
+        hourly = metrics.fetch(SLUG, START, END, granularity="hours", account=ACCOUNT)
+        assert hourly == [1, 2, 3, 4, 5], f"hash reads after migration drift: {hourly}"
+        assert metrics.migrate_storage("hash", account=ACCOUNT).moved == 0, "a re-run finds nothing to move"
+
+    stats = metrics.migrate_storage("keys", account=ACCOUNT)
+    assert _bucket_keys(opts.redis) == string_keys, "rolling back must restore the original keys"
+    hourly = metrics.fetch(SLUG, START, END, granularity="hours", account=ACCOUNT)
+    assert hourly == [1, 2, 3, 4, 5], f"key reads after rollback drift: {hourly}"
+
+
+@th.django_unit_test("teardown: hash storage metrics removed")
+def test_zz_cleanup(opts):
+    _clear()
+    assert not _bucket_keys(opts.redis), "hash storage test keys must be removed"
@@ -0,0 +1,132 @@
+"""Keyset (cursor) pagination on list endpoints — `?_cursor=1`, `?_after=`,
+`?_before=`, plus `?_count=exact|estimate|none`.
+
+Calls ``rest_cursor.on_rest_list_cursor`` directly with a synthetic request
+and a prefix-scoped queryset (fast + precise, mirroring list_stats.py).
+
+Host model: ``account.User`` — ``last_login`` is a nullable DateTimeField, so
+the walk crosses the NULLs-last block the date sort produces; ``id`` covers
+the pk-only path. Some users share a last_login so the pk tiebreak is load-
+bearing.
+"""
+import json
+import datetime
+import objict
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+PREFIX = "cursorpg_"
+ROWS = 23
+PAGE = 5
+
+
+def _base_qs():
+    from mojo.apps.account.models import User
+    return User.objects.filter(username__startswith=PREFIX)
+
+
+def _request(data):
+    req = objict.objict()
+    req.DATA = objict.objict(data)
+    return req
+
+
+def _page(qs, **data):
+    from mojo.apps.account.models import User
+    from mojo.models import rest_cursor
+    from mojo.serializers import get_serializer_manager
+
+    resp = rest_cursor.on_rest_list_cursor(
+        User, _request(data), qs, "basic", PAGE, get_serializer_manager())
+    return json.loads(resp.content)
+
+
+def _sorted(qs, descending):
+    from django.db.models import F
+    expr = F("last_login").desc(nulls_last=True) if descending else F("last_login").asc(nulls_last=True)
+    return qs.order_by(expr)
+
+
+def _walk(qs):
+    body = _page(qs, _cursor="1")
+    pages = [body]
+    while body.get("next"):
+        body = _page(qs, _after=body["next"])
+        pages.append(body)
+    return pages
+
+
+@th.django_unit_setup()
+def setup_cursor_pagination(opts):
+    from django.utils import timezone
+    from mojo.apps.account.models import User
+
+    _base_qs().delete()
+    now = timezone.now()
+    for i in range(ROWS):
+        user = User(username=f"{PREFIX}{i}", email=f"{PREFIX}{i}@example.com")
+        # every third row NULL, the rest in pairs sharing a timestamp
+        user.last_login = None if i % 3 == 0 else now - datetime.timedelta(minutes=i // 2)
+        user.save()
+
+
+@th.django_unit_test("forward walk over a nulls-last date sort visits every row once, in order")
+def test_forward_walk_matches_order(opts):
+    from mojo.models import rest_cursor
+
+    for descending in (True, False):
+        qs = _sorted(_base_qs(), descending)
+        expected = list(_base_qs().order_by(
+            *rest_cursor._resolve_sort(qs.model, qs).ordering()).values_list("id", flat=True))
+        got = [row["id"] for page in _walk(qs) for row in page["data"]]
+        assert_eq(got, expected, f"cursor walk (descending={descending}) must match the full ordering")
+
+
+@th.django_unit_test("_before walks back to the first page")
+def test_backward_walk(opts):
+    qs = _sorted(_base_qs(), True)
+    pages = _walk(qs)
+    forward = [[row["id"] for row in page["data"]] for page in pages]
+    body = pages[-1]
+    backward = []
+    while body.get("prev"):
+        body = _page(qs, _before=body["prev"])
+        backward.insert(0, [row["id"] for row in body["data"]])
+    assert_eq(backward, forward[:-1], "walking back must reproduce every earlier page exactly")
+    assert_true(pages[0].get("prev") is None, "the first page has no prev token")
+
+
+@th.django_unit_test("pk sort pages by id alone")
+def test_pk_sort(opts):
+    qs = _base_qs().order_by("-id")
+    got = [row["id"] for page in _walk(qs) for row in page["data"]]
+    expected = list(_base_qs().order_by("-id").values_list("id", flat=True))
+    assert_eq(got, expected, "a -id sort must page in descending id order")
+
+
+@th.django_unit_test("a cursor minted for one sort is refused under another")
+def test_cursor_sort_mismatch(opts):
+    from mojo import errors as me
+
+    token = _page(_base_qs().order_by("-id"), _cursor="1")["next"]
+    with th.assert_raises(me.ValueException):
+        _page(_sorted(_base_qs(), True), _after=token)
+    with th.assert_raises(me.ValueException):
+        _page(_base_qs().order_by("-id"), _after="not-a-cursor")
+
+
+@th.django_unit_test("_count=none skips the count, exact stays the default")
+def test_count_modes(opts):
+    qs = _base_qs().order_by("-id")
+    assert_eq(_page(qs, _cursor="1")["count"], ROWS, "default count is exact")
+    assert_true(_page(qs, _cursor="1", _count="none")["count"] is None,
+                "_count=none must return a null count")
+    estimate = _page(qs, _cursor="1", _count="estimate")["count"]
+    assert_true(isinstance(estimate, int) and estimate >= 0,
+                f"_count=estimate must return an integer, got {estimate!r}")
+
+
+@th.django_unit_test("teardown: cursor fixtures removed")
+def test_zz_cleanup(opts):
+    _base_qs().delete()
+    assert_eq(_base_qs().count(), 0, "cursor fixture users must be removed")
@@ -0,0 +1,62 @@
+"""Compiled graph plans — OptimizedGraphSerializer resolves a (model, graph)
+once and executes the cached plan per row.
+
+Pins the three properties the cache must not break: the plan is reused across
+serializations, replacing a graph dict at runtime rebuilds it (tests install
+temporary graphs this way), and NO_SHOW_FIELDS / exclude / mojo_secrets are
+still stripped even when a graph lists them explicitly.
+"""
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+GRAPH = "plan_probe"
+
+
+@th.django_unit_test("graph plan is compiled once and reused")
+def test_plan_is_reused(opts):
+    from mojo.apps.account.models import User
+    from mojo.serializers.core.plan import get_graph_plan
+
+    User.RestMeta.GRAPHS[GRAPH] = {"fields": ["id", "username"]}
+    try:
+        first = get_graph_plan(User, GRAPH)
+        second = get_graph_plan(User, GRAPH)
+        assert_true(first is second, "the same (model, graph) must return the cached plan")
+        assert_eq([f[0] for f in first.fields], ["id", "username"],
+                  f"plan fields must follow the graph order, got {first.fields!r}")
+    finally:
+        User.RestMeta.GRAPHS.pop(GRAPH, None)
+
+
+@th.django_unit_test("replacing a graph dict rebuilds its plan")
+def test_plan_rebuilt_on_graph_replace(opts):
+    from mojo.apps.account.models import User
+    from mojo.serializers.core.plan import get_graph_plan
+
+    User.RestMeta.GRAPHS[GRAPH] = {"fields": ["id"]}
+    try:
+        before = get_graph_plan(User, GRAPH)
+        User.RestMeta.GRAPHS[GRAPH] = {"fields": ["id", "email"]}
+        after = get_graph_plan(User, GRAPH)
+        assert_true(before is not after, "a replaced graph dict must not serve the stale plan")
+        assert_eq([f[0] for f in after.fields], ["id", "email"],
+                  f"rebuilt plan must reflect the new graph, got {after.fields!r}")
+    finally:
+        User.RestMeta.GRAPHS.pop(GRAPH, None)
+
+
+@th.django_unit_test("plan strips NO_SHOW_FIELDS and mojo_secrets even when listed")
+def test_plan_enforces_no_show(opts):
+    from mojo.apps.account.models import User
+    from mojo.serializers.core.plan import get_graph_plan
+
+    User.RestMeta.GRAPHS[GRAPH] = {
+        "fields": ["id", "username", "password", "auth_key", "mojo_secrets", "email"],
+        "exclude": ["email"],
+    }
+    try:
+        names = [f[0] for f in get_graph_plan(User, GRAPH).fields]
+        assert_eq(names, ["id", "username"],
+                  f"NO_SHOW_FIELDS, mojo_secrets and exclude must be stripped, got {names!r}")
+    finally:
+        User.RestMeta.GRAPHS.pop(GRAPH, None)
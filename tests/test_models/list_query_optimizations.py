@@ -0,0 +1,201 @@
+"""Graph-driven query optimization on list serialization.
+
+The serializer applies select_related / prefetch_related / only() derived from
+the requested graph to every QuerySet before evaluating it, so a nested graph
+costs one JOIN or one prefetch query per page instead of one query per row.
+
+Fixtures: User.devices is a reverse FK (account.UserDevice.user), used for the
+prefetch path; UserDevice.user is a forward FK, used for the select_related
+path. Temporary graphs are installed under names nothing else requests and
+popped again in the last test (modules run as threads in one process).
+"""
+import uuid
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+USER_GRAPH = "qopt_user_devices"
+DEVICE_GRAPH = "qopt_device"
+DEVICE_USER_GRAPH = "qopt_device_user"
+USER_BASIC = "qopt_user_basic"
+USER_DEVICES_EXTRA = "qopt_user_devices_extra"
+DEVICE_EXTRA_GRAPH = "qopt_device_extra"
+ROWS = 4
+
+
+@th.django_unit_setup()
+def setup_query_optimizations(opts):
+    from mojo.apps.account.models import User, UserDevice
+
+    User.objects.filter(username__startswith="qopt_").delete()
+    tag = uuid.uuid4().hex[:8]
+    opts.user_ids = []
+    for i in range(ROWS):
+        user = User.objects.create_user(
+            username=f"qopt_{tag}_{i}@example.com",
+            email=f"qopt_{tag}_{i}@example.com",
+            password="Qopt##pw99")
+        for d in range(2):
+            UserDevice.objects.create(user=user, duid=f"qopt-{tag}-{i}-{d}", muid=f"m{d}")
+        opts.user_ids.append(user.pk)
+
+    User.RestMeta.GRAPHS[USER_GRAPH] = {
+        "fields": ["id", "username"],
+        "graphs": {"devices": DEVICE_GRAPH},
+    }
+    User.RestMeta.GRAPHS[USER_BASIC] = {"fields": ["id", "username"]}
+    UserDevice.RestMeta.GRAPHS[DEVICE_GRAPH] = {"fields": ["id", "duid", "user"]}
+    UserDevice.RestMeta.GRAPHS[DEVICE_USER_GRAPH] = {
+        "fields": ["id", "duid"],
+        "graphs": {"user": USER_BASIC},
+    }
+    # An extra makes the child graph unprunable, so its Prefetch queryset is a
+    # plain select_related one — the shape a re-optimizing clone would re-query.
+    UserDevice.RestMeta.GRAPHS[DEVICE_EXTRA_GRAPH] = {
+        "fields": ["id", "duid"],
+        "extra": [("get_model_string", "model")],
+        "graphs": {"user": USER_BASIC},
+    }
+    User.RestMeta.GRAPHS[USER_DEVICES_EXTRA] = {
+        "fields": ["id"],
+        "graphs": {"devices": DEVICE_EXTRA_GRAPH},
+    }
+
+
+@th.django_unit_test("reverse FK graph is prefetched: query count does not grow with rows")
+def test_reverse_fk_is_prefetched(opts):
+    from mojo.apps.account.models import User
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = User.objects.filter(pk__in=opts.user_ids)
+    with count_queries() as counter:
+        data = OptimizedGraphSerializer(qs, graph=USER_GRAPH, many=True).serialize()
+
+    assert_eq(len(data), ROWS, f"expected {ROWS} users, got {len(data)}")
+    assert_true(all(len(row["devices"]) == 2 for row in data),
+                f"every user should carry both devices, got {data!r}")
+    assert_true(counter.count <= 2,
+                f"users + one devices prefetch expected, got {counter.count} queries")
+
+
+@th.django_unit_test("forward FK graph is joined with select_related")
+def test_forward_fk_is_joined(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = UserDevice.objects.filter(user_id__in=opts.user_ids)
+    with count_queries() as counter:
+        data = OptimizedGraphSerializer(qs, graph=DEVICE_USER_GRAPH, many=True).serialize()
+
+    assert_eq(len(data), ROWS * 2, f"expected {ROWS * 2} devices, got {len(data)}")
+    assert_true(all(isinstance(row["user"], dict) for row in data),
+                f"nested user must serialize as an object, got {data[:1]!r}")
+    assert_eq(counter.count, 1, f"one joined query expected, got {counter.count}")
+
+
+@th.django_unit_test("flat concrete graph prunes columns with only(); FK fields read the id column")
+def test_flat_graph_prunes_columns(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = UserDevice.objects.filter(user_id__in=opts.user_ids)
+    optimized = OptimizedGraphSerializer(UserDevice.objects.none(), graph=DEVICE_GRAPH)._apply_query_optimizations(qs)
+    loaded, defer = optimized.query.deferred_loading
+    assert_true(not defer and set(loaded) == {"id", "duid", "user"},
+                f"only() should load exactly the graph columns, got {optimized.query.deferred_loading!r}")
+
+    with count_queries() as counter:
+        data = OptimizedGraphSerializer(qs, graph=DEVICE_GRAPH, many=True).serialize()
+    assert_eq(counter.count, 1, f"a flat graph must not load FK rows, got {counter.count} queries")
+    assert_true(all(row["user"] in opts.user_ids for row in data),
+                f"FK fields serialize as the related pk, got {data[:1]!r}")
+
+
+@th.django_unit_test("graphs with extras are never pruned with only()")
+def test_extras_disable_only(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = UserDevice.objects.filter(user_id__in=opts.user_ids)
+    optimized = OptimizedGraphSerializer(UserDevice.objects.none(), graph="sessions")._apply_query_optimizations(qs)
+    assert_eq(optimized.query.deferred_loading, (frozenset(), True),
+              "an extra may read any column — the queryset must load full rows")
+
+
+@th.django_unit_test("flat graph rows from values_list() match the instance path")
+def test_flat_values_path_parity(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = UserDevice.objects.filter(user_id__in=opts.user_ids).order_by("id")
+    fast = OptimizedGraphSerializer(qs, graph=DEVICE_GRAPH, many=True)
+    assert_true(fast._flat_plan is not None, "a flat concrete graph should take the values path")
+    assert_true(all(isinstance(row, tuple) for row in fast.instance),
+                "the values path must not hydrate model instances")
+
+    # A list of instances never takes the values path — use it as the oracle.
+    slow = OptimizedGraphSerializer(list(qs), graph=DEVICE_GRAPH, many=True)
+    assert_eq(fast.serialize(), slow.serialize(),
+              "values-path rows must be identical to instance-path rows")
+
+
+@th.django_unit_test("nested many graph under a prefetch is not re-queried per parent")
+def test_prefetched_children_not_requeried(opts):
+    from mojo.apps.account.models import User
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    qs = User.objects.filter(pk__in=opts.user_ids)
+    with count_queries() as counter:
+        data = OptimizedGraphSerializer(qs, graph=USER_DEVICES_EXTRA, many=True).serialize()
+    assert_true(all(len(row["devices"]) == 2 for row in data),
+                f"every user should carry both devices, got {data!r}")
+    assert_true(counter.count <= 2,
+                f"prefetched device rows must be reused, got {counter.count} queries")
+
+
+@th.django_unit_test("flat CSV export matches the instance path")
+def test_flat_csv_parity(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.serializers.formats.csv import CsvFormatter
+    from mojo.serializers.formats.rows import RowPlan
+
+    qs = UserDevice.objects.filter(user_id__in=opts.user_ids).order_by("id")
+    fields = ["id", "duid", "user", "first_seen"]
+    formatter = CsvFormatter()
+    assert_true(RowPlan(qs, fields).columns == ["id", "duid", "user_id", "first_seen"],
+                "concrete columns should map to values_list() columns")
+    fast = formatter.serialize_queryset(qs, fields=fields, raw_data=True)
+    slow = formatter.serialize_queryset(qs, fields=fields + ["pk"], raw_data=True)
+    fast_rows = [line for line in fast.splitlines()[1:]]
+    slow_rows = [line.rsplit(",", 1)[0] for line in slow.splitlines()[1:]]
+    assert_eq(fast_rows, slow_rows, "values-path CSV rows must match instance-path rows")
+
+
+@th.django_unit_test("query budget header is ignored outside the test-mode gate")
+def test_budget_header_requires_test_gate(opts):
+    from mojo.helpers.query_budget import get_request_budget
+
+    request = th.get_mock_request(ip="203.0.113.9", META={
+        "REMOTE_ADDR": "203.0.113.9",
+        "HTTP_X_MOJO_TEST_MAX_QUERIES": "1",
+    })
+    assert_true(get_request_budget(request) is None,
+                "a non-loopback request must never enable query counting")
+
+
+@th.django_unit_test("teardown: temporary graphs removed")
+def test_zz_cleanup_graphs(opts):
+    from mojo.apps.account.models import User, UserDevice
+
+    User.RestMeta.GRAPHS.pop(USER_GRAPH, None)
+    User.RestMeta.GRAPHS.pop(USER_BASIC, None)
+    User.RestMeta.GRAPHS.pop(USER_DEVICES_EXTRA, None)
+    UserDevice.RestMeta.GRAPHS.pop(DEVICE_EXTRA_GRAPH, None)
+    UserDevice.RestMeta.GRAPHS.pop(DEVICE_GRAPH, None)
+    UserDevice.RestMeta.GRAPHS.pop(DEVICE_USER_GRAPH, None)
+    User.objects.filter(pk__in=opts.user_ids).delete()
+    assert_true(USER_GRAPH not in User.RestMeta.GRAPHS,
+                "temporary graphs must not leak into other modules")
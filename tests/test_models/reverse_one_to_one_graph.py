@@ -111,10 +111,9 @@ def test_reverse_fk_still_list(opts):
 
 @th.django_unit_test("query optimizer routes a reverse OneToOne to select_related, not prefetch")
 def test_optimizer_selects_reverse_o2o(opts):
-    """NOTE: _apply_query_optimizations is currently DEAD CODE — nothing calls
-    it. This asserts the method is internally correct, not that a live query
-    got faster. Do not wire it into serialize() as a drive-by; that is a
-    framework-wide behavior change with its own risk profile.
+    """_apply_query_optimizations runs on every QuerySet handed to the
+    serializer (see tests/test_models/list_query_optimizations.py for the
+    query-count side); this pins the reverse OneToOne classification.
     """
     from mojo.apps.account.models import User
     from mojo.serializers.core.serializer import OptimizedGraphSerializer
@@ -0,0 +1,195 @@
+"""Tag-based invalidation of the persistent serializer cache (cache_ttl graphs).
+
+Each cached entry is indexed under its model, its instance, the forward-FK
+objects it embeds and a change tag per model it lists; post_save / post_delete
+/ m2m_changed invalidate by tag once the transaction commits. List pages read
+and write the cache in one batch call each.
+
+Fixtures: two users with one account.UserDevice each. Temporary cache_ttl
+graphs are installed under names nothing else requests and popped again in
+the last test.
+"""
+import uuid
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+DEVICE_CACHED = "ctag_device_user"
+USER_CACHED = "ctag_user_devices"
+USER_BASIC = "ctag_user_basic"
+DEVICE_BASIC = "ctag_device_basic"
+
+
+def _serialize(obj, graph):
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+    return OptimizedGraphSerializer(obj, graph=graph).serialize()
+
+
+def _cached(obj, graph):
+    from mojo.serializers.core.cache import get_cache_backend, get_cache_key
+    return get_cache_backend().get(get_cache_key(obj, graph))
+
+
+@th.django_unit_setup()
+def setup_cache_tags(opts):
+    from mojo.apps.account.models import User, UserDevice
+
+    User.objects.filter(username__startswith="ctag_").delete()
+    tag = uuid.uuid4().hex[:8]
+    opts.users = []
+    opts.devices = []
+    for i in range(2):
+        user = User.objects.create_user(
+            username=f"ctag_{tag}_{i}@example.com",
+            email=f"ctag_{tag}_{i}@example.com",
+            password="Ctag##pw99")
+        opts.users.append(user)
+        opts.devices.append(UserDevice.objects.create(user=user, duid=f"ctag-{tag}-{i}", muid="m"))
+
+    User.RestMeta.GRAPHS[USER_BASIC] = {"fields": ["id", "username"]}
+    User.RestMeta.GRAPHS[USER_CACHED] = {
+        "fields": ["id", "username"],
+        "graphs": {"devices": DEVICE_BASIC},
+        "cache_ttl": 60,
+    }
+    UserDevice.RestMeta.GRAPHS[DEVICE_BASIC] = {"fields": ["id", "duid"]}
+    UserDevice.RestMeta.GRAPHS[DEVICE_CACHED] = {
+        "fields": ["id", "duid"],
+        "graphs": {"user": USER_BASIC},
+        "cache_ttl": 60,
+    }
+
+
+@th.django_unit_test("memory backend: invalidate_tags drops only the tagged keys")
+def test_memory_backend_tags(opts):
+    from mojo.serializers.core.cache import MemoryCacheBackend
+
+    cache = MemoryCacheBackend(max_size=10)
+    cache.set_tagged("a", 1, ttl=60, tags=["M", "M_1"])
+    cache.set_tagged("b", 2, ttl=60, tags=["M", "M_2"])
+    cache.set("c", 3, ttl=60)
+    assert_eq(cache.invalidate_tags(["M_1"]), 1, "one key carries M_1")
+    assert_true(cache.get("a") is None and cache.get("b") == 2 and cache.get("c") == 3,
+                "only the M_1 entry may be dropped")
+    assert_eq(cache.invalidate_tags(["M"]), 1, "the model tag still indexes b")
+    assert_eq(cache.get("c"), 3, "untagged entries survive tag invalidation")
+
+
+@th.django_unit_test("plan tags: instance, embedded forward FK, listed relation")
+def test_plan_cache_tags(opts):
+    from mojo.apps.account.models import User, UserDevice
+    from mojo.serializers.core.plan import get_graph_plan, get_cache_dependent_models
+
+    device, user = opts.devices[0], opts.users[0]
+    tags = get_graph_plan(UserDevice, DEVICE_CACHED).cache_tags(device)
+    for expected in ("UserDevice", f"UserDevice_{device.pk}", "User", f"User_{user.pk}"):
+        assert_true(expected in tags, f"{expected} missing from {tags!r}")
+    tags = get_graph_plan(User, USER_CACHED).cache_tags(user)
+    assert_true("UserDevice~" in tags, f"a listed reverse FK needs the change tag, got {tags!r}")
+    dependents = get_cache_dependent_models()
+    assert_true(User in dependents and UserDevice in dependents,
+                "both models can stale a cached entry and must be tracked")
+
+
+@th.django_unit_test("saving an embedded FK object refreshes only the entries that embed it")
+def test_save_invalidates_embedding_entry(opts):
+    from mojo.apps.account.models import User, UserDevice
+
+    first, second = opts.devices
+    _serialize(first, DEVICE_CACHED)
+    _serialize(second, DEVICE_CACHED)
+    assert_true(_cached(first, DEVICE_CACHED) is not None, "entry must be cached after serializing")
+
+    user = User.objects.get(pk=opts.users[0].pk)
+    user.display_name = "ctag renamed"
+    user.save()
+
+    assert_true(_cached(first, DEVICE_CACHED) is None, "the entry embedding the saved user must be dropped")
+    assert_true(_cached(second, DEVICE_CACHED) is not None, "an unrelated entry must survive")
+    fresh = _serialize(UserDevice.objects.get(pk=first.pk), DEVICE_CACHED)
+    assert_eq(fresh["user"]["id"], user.pk, "re-serialized entry embeds the user again")
+
+
+@th.django_unit_test("adding a child row refreshes the parent's cached list")
+def test_new_child_invalidates_parent(opts):
+    from mojo.apps.account.models import User, UserDevice
+
+    user = User.objects.get(pk=opts.users[1].pk)
+    assert_eq(len(_serialize(user, USER_CACHED)["devices"]), 1, "one device before")
+    UserDevice.objects.create(user=user, duid=f"ctag-extra-{uuid.uuid4().hex[:6]}", muid="m")
+    assert_eq(len(_serialize(User.objects.get(pk=user.pk), USER_CACHED)["devices"]), 2,
+              "a cached parent must not hide a newly created child")
+
+
+@th.django_unit_test("invalidate_model_cache(Model) drops that model's entries")
+def test_model_wide_invalidation(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.serializers.core.cache import invalidate_model_cache
+
+    for device in opts.devices:
+        _serialize(device, DEVICE_CACHED)
+    removed = invalidate_model_cache(UserDevice)
+    assert_true(removed >= 2, f"both cached devices should be removed, got {removed}")
+    assert_true(all(_cached(device, DEVICE_CACHED) is None for device in opts.devices),
+                "no device entry may survive a model-wide invalidation")
+
+
+@th.django_unit_test("list pages read the cache with one batch_get and write misses in one batch")
+def test_list_page_batches_cache_calls(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.serializers.core.cache import MemoryCacheBackend
+    from mojo.serializers.core.serializer import OptimizedGraphSerializer
+
+    class CountingBackend(MemoryCacheBackend):
+        def __init__(self):
+            super().__init__(max_size=100)
+            self.calls = {"get": 0, "batch_get": 0, "set_tagged": 0, "batch_set_tagged": 0}
+
+        def get(self, key):
+            self.calls["get"] += 1
+            return super().get(key)
+
+        def batch_get(self, keys):
+            self.calls["batch_get"] += 1
+            return {k: v for k, v in ((k, MemoryCacheBackend.get(self, k)) for k in keys) if v is not None}
+
+        def set_tagged(self, key, value, ttl=0, tags=()):
+            self.calls["set_tagged"] += 1
+            return super().set_tagged(key, value, ttl, tags)
+
+        def batch_set_tagged(self, entries, ttl=0):
+            self.calls["batch_set_tagged"] += 1
+            return all(MemoryCacheBackend.set_tagged(self, k, v, ttl, t) for k, (v, t) in entries.items())
+
+    backend = CountingBackend()
+    qs = UserDevice.objects.filter(pk__in=[d.pk for d in opts.devices]).order_by("id")
+
+    first = OptimizedGraphSerializer(qs, graph=DEVICE_CACHED, many=True)
+    first._cache_backend = backend
+    cold = first.serialize()
+    assert_eq(backend.calls, {"get": 0, "batch_get": 1, "set_tagged": 0, "batch_set_tagged": 1},
+              f"a cold page is one batch read and one batch write, got {backend.calls}")
+
+    backend.calls = dict.fromkeys(backend.calls, 0)
+    second = OptimizedGraphSerializer(qs, graph=DEVICE_CACHED, many=True)
+    second._cache_backend = backend
+    warm = second.serialize()
+    assert_eq(backend.calls, {"get": 0, "batch_get": 1, "set_tagged": 0, "batch_set_tagged": 0},
+              f"a warm page is a single batch read, got {backend.calls}")
+    assert_eq(warm, cold, "cached rows must equal freshly serialized rows")
+
+
+@th.django_unit_test("teardown: temporary cache graphs removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.account.models import User, UserDevice
+    from mojo.serializers.core.cache import invalidate_model_cache
+    from mojo.serializers.core.plan import clear_graph_plans
+
+    invalidate_model_cache(User)
+    invalidate_model_cache(UserDevice)
+    for graph in (USER_BASIC, USER_CACHED):
+        User.RestMeta.GRAPHS.pop(graph, None)
+    for graph in (DEVICE_BASIC, DEVICE_CACHED):
+        UserDevice.RestMeta.GRAPHS.pop(graph, None)
+    clear_graph_plans()
+    User.objects.filter(pk__in=[u.pk for u in opts.users]).delete()
+    assert_true(USER_CACHED not in User.RestMeta.GRAPHS, "temporary graphs must not leak")
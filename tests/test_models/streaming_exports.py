@@ -0,0 +1,142 @@
+"""Streaming CSV / JSON Lines exports.
+
+Exports run through a compiled RowPlan: field paths are resolved against the
+model once, FK chains become values_list() joins, JSONField key paths are read
+per row, and the queryset is walked with iterator(chunk_size) either way.
+
+Fixtures: account.UserDevice rows (FK ``user``, JSONField ``device_info``).
+The values path is checked against the instance path, which a method field
+(``get_model_string``) forces.
+"""
+import json
+import uuid
+from testit import helpers as th
+from testit.helpers import assert_true, assert_eq
+
+PREFIX = "sexport_"
+ROWS = 5
+FIELDS = ["id", "duid", "user", "user.username", "device_info.os.name", "device_info.missing"]
+
+
+def _devices(opts):
+    from mojo.apps.account.models import UserDevice
+    return UserDevice.objects.filter(user_id=opts.user_id).order_by("id")
+
+
+@th.django_unit_setup()
+def setup_streaming_exports(opts):
+    from mojo.apps.account.models import User, UserDevice
+
+    User.objects.filter(username__startswith=PREFIX).delete()
+    tag = uuid.uuid4().hex[:8]
+    user = User.objects.create_user(
+        username=f"{PREFIX}{tag}@example.com",
+        email=f"{PREFIX}{tag}@example.com",
+        password="Sexport##pw99")
+    for i in range(ROWS):
+        UserDevice.objects.create(user=user, duid=f"{PREFIX}{tag}-{i}",
+                                  device_info={"os": {"name": f"os{i}"}})
+    opts.user_id = user.pk
+    opts.username = user.username
+
+
+@th.django_unit_test("FK chains and JSON key paths compile to values_list() columns")
+def test_row_plan_columns(opts):
+    from mojo.serializers.formats.rows import RowPlan
+
+    plan = RowPlan(_devices(opts), FIELDS)
+    assert_true(plan.values_mode, "every path is a column or FK/JSON path — the values path applies")
+    assert_eq(plan.columns, ["id", "duid", "user_id", "user__username", "device_info"],
+              f"unexpected columns {plan.columns!r}")
+
+    plan = RowPlan(_devices(opts), FIELDS + ["get_model_string"])
+    assert_true(not plan.values_mode, "a method field must fall back to instances")
+    assert_eq(plan.related, ["user"], "instance mode must select_related the FK hops")
+
+
+@th.django_unit_test("values-path CSV matches the instance path in one query")
+def test_csv_values_parity(opts):
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.formats.csv import CsvFormatter
+
+    formatter = CsvFormatter()
+    with count_queries() as counter:
+        fast = formatter.serialize_queryset(_devices(opts), fields=FIELDS, raw_data=True)
+    assert_eq(counter.count, 1, f"a joined values export is one query, got {counter.count}")
+
+    with count_queries() as counter:
+        slow = formatter.serialize_queryset(_devices(opts), fields=FIELDS + ["get_model_string"], raw_data=True)
+    assert_eq(counter.count, 1, f"instance mode must join the FK, got {counter.count} queries")
+
+    fast_rows = fast.splitlines()[1:]
+    slow_rows = [line.rsplit(",", 1)[0] for line in slow.splitlines()[1:]]
+    assert_eq(len(fast_rows), ROWS, f"expected {ROWS} rows, got {len(fast_rows)}")
+    assert_eq(fast_rows, slow_rows, "values-path rows must match instance-path rows")
+    assert_true(fast_rows[0].endswith(f"{opts.username},os0,N/A"),
+                f"FK and JSON paths must resolve, got {fast_rows[0]!r}")
+
+
+@th.django_unit_test("JSON Lines export: one object per row, null for missing values")
+def test_jsonl_export(opts):
+    from mojo.serializers.formats.jsonl import JsonLinesFormatter
+
+    fields = FIELDS + ["last_ip", ("first_seen", "seen")]
+    text = JsonLinesFormatter().serialize_queryset(_devices(opts), fields=fields, raw_data=True)
+    rows = [json.loads(line) for line in text.splitlines()]
+    assert_eq(len(rows), ROWS, f"expected {ROWS} lines, got {len(rows)}")
+    first = rows[0]
+    assert_eq(first["user"], opts.user_id, "FK fields export as the related pk")
+    assert_eq(first["user.username"], opts.username, "FK chains follow the path")
+    assert_eq(first["device_info.os.name"], "os0", "JSON key paths follow the document")
+    assert_true(first["last_ip"] is None, f"NULL columns export as null, got {first['last_ip']!r}")
+    assert_true(isinstance(first["seen"], str) and "T" in first["seen"],
+                f"tuple fields use their display name and dates are ISO 8601, got {first!r}")
+
+
+@th.django_unit_test("a bare JSONField column exports the stored value, even a plain string")
+def test_bare_json_column(opts):
+    from mojo.apps.account.models import UserDevice
+    from mojo.serializers.formats.csv import CsvFormatter
+    from mojo.serializers.formats.jsonl import JsonLinesFormatter
+
+    device = UserDevice.objects.create(user_id=opts.user_id, duid=f"{PREFIX}{uuid.uuid4().hex[:8]}-str",
+                                       device_info="legacy-agent")
+    try:
+        rows = UserDevice.objects.filter(pk=device.pk)
+        text = JsonLinesFormatter().serialize_queryset(rows, fields=["id", "device_info"], raw_data=True)
+        assert_eq(json.loads(text)["device_info"], "legacy-agent",
+                  f"a JSON string document must export as itself, got {text!r}")
+
+        formatter = CsvFormatter()
+        fast = formatter.serialize_queryset(rows, fields=["id", "device_info"], raw_data=True)
+        slow = formatter.serialize_queryset(rows, fields=["id", "device_info", "get_model_string"], raw_data=True)
+        assert_eq(fast.splitlines()[1], f"{device.pk},legacy-agent", f"values-path CSV cell, got {fast!r}")
+        assert_eq(slow.splitlines()[1].rsplit(",", 1)[0], fast.splitlines()[1],
+                  "values-path cell must match the instance path")
+    finally:
+        device.delete()
+
+
+@th.django_unit_test("exports stream without a COUNT query")
+def test_streaming_response(opts):
+    from mojo.helpers.query_budget import count_queries
+    from mojo.serializers.formats.jsonl import JsonLinesFormatter
+    from mojo.serializers.formats.rows import StreamingExportResponse
+
+    with count_queries() as counter:
+        response = JsonLinesFormatter().serialize_queryset(_devices(opts), fields=["id", "duid"])
+    assert_true(isinstance(response, StreamingExportResponse),
+                f"queryset exports must stream, got {type(response).__name__}")
+    assert_eq(counter.count, 0, "building the response must not touch the database")
+    assert_eq(response["Content-Type"], "application/x-ndjson", "JSON Lines content type")
+    body = b"".join(response).decode()
+    assert_eq(len(body.splitlines()), ROWS, f"expected {ROWS} streamed lines, got {body!r}")
+
+
+@th.django_unit_test("teardown: export fixtures removed")
+def test_zz_cleanup(opts):
+    from mojo.apps.account.models import User
+
+    User.objects.filter(pk=opts.user_id).delete()
+    assert_eq(User.objects.filter(username__startswith=PREFIX).count(), 0,
+              "export fixture users must be removed")
@@ -0,0 +1,165 @@
+"""Shared pub/sub hub: one Redis subscription per channel per process, one
+encoded frame per message."""
+
+import asyncio
+import json
+
+from testit import helpers as th
+
+
+CHANNEL = "realtime:test:hub"
+
+
+class _Sink:
+    def __init__(self):
+        self.received = []
+
+    def deliver(self, channel, frame):
+        self.received.append((channel, frame))
+        return True
+
+
+async def _wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.02)
+    return True
+
+
+async def _fan_out():
+    from mojo.apps.realtime.hub import PubSubHub
+    from mojo.helpers.redis.client import create_async_client
+
+    hub = PubSubHub(connections=2)
+    sinks = [_Sink() for _ in range(50)]
+    publisher = create_async_client()
+    try:
+        for sink in sinks:
+            await hub.subscribe(CHANNEL, sink)
+        stats = hub.stats()
+        assert stats["channels"] == 1 and stats["subscriptions"] == 50, f"stats drift: {stats}"
+        assert stats["connections"] == 1, "one channel must only open its own shard"
+
+        # Give the reader task a moment to start before publishing.
+        await asyncio.sleep(0.1)
+        await publisher.publish(CHANNEL, json.dumps({"type": "ignored"}))
+        await publisher.publish(CHANNEL, json.dumps({"type": "broadcast", "data": {"n": 1}, "timestamp": 1.0}))
+        assert await _wait_for(lambda: all(s.received for s in sinks)), "every subscriber gets the message"
+        channel, frame = sinks[0].received[0]
+        assert len(sinks[0].received) == 1, "messages with no client frame are not delivered"
+        assert json.loads(frame.text) == {"type": "message", "data": {"n": 1}, "timestamp": 1.0}, \
+            f"client frame drift: {frame.text}"
+        assert all(s.received[0][1].text is frame.text for s in sinks), "the frame is encoded once and shared"
+        assert hub.stats()["delivered"] == 50, f"delivery count drift: {hub.stats()}"
+
+        for sink in sinks[1:]:
+            await hub.unsubscribe(CHANNEL, sink)
+        assert CHANNEL in hub.subscribers, "the channel stays subscribed while one socket remains"
+        await hub.unsubscribe_all(sinks[0], [CHANNEL])
+        assert not hub.subscribers, "the last unsubscribe releases the channel"
+    finally:
+        await hub.close()
+        await publisher.aclose()
+    assert hub.stats()["connections"] == 0, "close releases every pub/sub connection"
+
+
+@th.django_unit_test("pub/sub hub fans one subscription out to many sockets")
+def test_hub_fan_out(opts):
+    asyncio.run(_fan_out())
+
+
+class _DeadPubSub:
+    """A pubsub whose connection died: every SUBSCRIBE fails."""
+
+    subscribed = False
+
+    def __init__(self):
+        self.attempts = 0
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.attempts += 1
+        raise ConnectionError("redis is down")
+
+    async def aclose(self):
+        self.closed = True
+
+
+async def _resubscribe_after_outage():
+    from mojo.apps.realtime.hub import PubSubHub
+    from mojo.helpers.redis.client import create_async_client
+
+    hub = PubSubHub(connections=1)
+    shard = hub.shards[0]
+    sink = _Sink()
+    dead = _DeadPubSub()
+    publisher = create_async_client()
+    try:
+        # The state a reconnect leaves behind when its resubscribe failed.
+        hub.subscribers[CHANNEL] = {sink}
+        shard.channels.add(CHANNEL)
+        shard.pubsub = dead
+        shard.task = asyncio.create_task(shard.run())
+
+        recovered = await _wait_for(
+            lambda: shard.pubsub is not dead and shard.pubsub.subscribed, timeout=5.0)
+        assert recovered, "a failed resubscribe must back off and retry, not idle forever"
+        assert dead.attempts == 1 and dead.closed, "the dead connection is retried once, then replaced"
+
+        await publisher.publish(CHANNEL, json.dumps({"type": "broadcast", "data": {"n": 3}, "timestamp": 1.0}))
+        assert await _wait_for(lambda: sink.received), "sockets get messages again after the outage"
+    finally:
+        await hub.close()
+        await publisher.aclose()
+
+
+@th.django_unit_test("pub/sub hub resubscribes a shard whose resubscribe failed")
+def test_hub_resubscribes_after_outage(opts):
+    asyncio.run(_resubscribe_after_outage())
+
+
+class _FakeSocket:
+    scope = None
+    request_headers = None
+    remote_address = None
+
+    def __init__(self):
+        self.close_codes = []
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+
+async def _slow_consumer_dropped():
+    from mojo.apps.realtime.handler import WebSocketHandler
+    from mojo.apps.realtime.hub import PubSubHub
+
+    hub = PubSubHub(connections=1)
+    socket = _FakeSocket()
+    slow = WebSocketHandler(socket, "/ws/realtime/")
+    slow._inbox = asyncio.Queue(maxsize=1)
+    slow._inbox.put_nowait(object())  # never drained: the client stopped reading
+    fast = _Sink()
+    hub.subscribers[CHANNEL] = {slow, fast}
+
+    message = json.dumps({"type": "broadcast", "data": {"n": 4}, "timestamp": 1.0})
+    hub.dispatch(CHANNEL, message)
+    assert await _wait_for(lambda: socket.close_codes), "a full send queue must close the socket"
+    assert socket.close_codes == [1013], f"slow consumers close with 1013, got {socket.close_codes}"
+    assert not slow.running, "the slow socket stops running"
+    assert slow._inbox.qsize() == 1, "nothing more is queued for the slow socket"
+    stats = hub.stats()
+    assert stats["dropped"] == 1 and stats["delivered"] == 1, f"one drop and one delivery, got {stats}"
+    assert len(fast.received) == 1, "other subscribers still receive the frame"
+
+    hub.dispatch(CHANNEL, message)
+    assert hub.stats()["dropped"] == 1, "a socket already being closed is not counted again"
+    assert len(fast.received) == 2, "delivery to the others continues"
+    await hub.close()
+
+
+@th.django_unit_test("pub/sub hub drops and closes a socket whose send queue is full")
+def test_hub_drops_slow_consumer(opts):
+    asyncio.run(_slow_consumer_dropped())